@@ -7,12 +7,15 @@ import asyncio
 from typing import Dict, List, Optional, Any
 from enum import Enum
 
-try:
-    import ccxt
-    import ccxt.async_support as ccxt_async
-    HAS_CCXT = True
-except ImportError:
-    HAS_CCXT = False
+from utils.lazy_import import lazy_import, module_available
+from utils.market_metadata import get_market_metadata_cache
+
+# ccxt импортируется при первом подключении к бирже
+HAS_CCXT = module_available("ccxt")
+if HAS_CCXT:
+    ccxt = lazy_import("ccxt")
+    ccxt_async = lazy_import("ccxt.async_support")
+else:
     logging.warning("CCXT не установлен. Установите: pip install ccxt")
 
 logger = logging.getLogger(__name__)
@@ -73,6 +76,8 @@ class ExchangeAdapter:
                 'enableRateLimit': True,
             }
             self._sync_exchange = exchange_class(config)
+            if not self.sandbox:
+                get_market_metadata_cache().apply(self._sync_exchange)
         return self._sync_exchange
 
     @property
@@ -89,6 +94,8 @@ class ExchangeAdapter:
                 'enableRateLimit': True,
             }
             self._async_exchange = exchange_class(config)
+            if not self.sandbox:
+                get_market_metadata_cache().apply(self._async_exchange)
         return self._async_exchange
 
     async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
@@ -16,7 +16,6 @@ from typing import Optional, List, Dict
 import structlog
 import asyncio
 from datetime import datetime
-import ccxt
 
 from app.config import settings
 from app.database import AsyncSessionLocal
@@ -34,6 +33,11 @@ from utils.enhanced_signal_generator import EnhancedSignalGenerator
 from utils.signal_integrator import SignalIntegrator
 from utils.universe_selector import get_universe_selector, get_top_20_pairs
 from trading.outcome_tracker import get_outcome_tracker
+from utils.lazy_import import lazy_import
+from utils.market_metadata import LazyExchangeRegistry, create_exchange
+
+# ccxt грузится при создании бирж, а не при импорте модуля
+ccxt = lazy_import("ccxt")
 
 logger = structlog.get_logger()
 
@@ -204,14 +208,12 @@ class MaxFlashBotV2:
             return
 
         self.application = Application.builder().token(self.token).build()
-        self.exchange = ccxt.binance({'enableRateLimit': True})
-        # Initialize exchanges for checking availability
-        self.exchanges = {
-            'binance': ccxt.binance({'enableRateLimit': True}),
-            'bybit': ccxt.bybit({'enableRateLimit': True}),
-            'okx': ccxt.okx({'enableRateLimit': True}),
-            'kraken': ccxt.kraken({'enableRateLimit': True}),
-        }
+        # Exchanges for checking availability: clients are created on first use,
+        # market metadata comes from the disk cache instead of load_markets()
+        self.exchanges = LazyExchangeRegistry(
+            lambda ex_id: create_exchange(ex_id, {'enableRateLimit': True}),
+            ['binance', 'bybit', 'okx', 'kraken'],
+        )
         # Store top signals for quick access
         self.cached_top_signals = []
         
@@ -270,7 +272,8 @@ class MaxFlashBotV2:
         self.signal_logger = get_signal_logger()
         
         # Initialize MTF analyzer and pattern recognizer (Phase 2 & 3)
-        self.mtf_analyzer = MTFAnalyzer(self.exchange)
+        # Built with the Binance client on first use (see the mtf_analyzer property)
+        self._mtf_analyzer: Optional[MTFAnalyzer] = None
         self.pattern_recognizer = PatternRecognizer()
         self.sr_detector = SupportResistance()
         
@@ -279,6 +282,22 @@ class MaxFlashBotV2:
         
         self._setup_handlers()
 
+    @property
+    def exchange(self):
+        """Default Binance client, built on first use."""
+        # The registry drops an exchange whose client cannot be built
+        client = self.exchanges.get('binance')
+        if client is None:
+            raise RuntimeError("Binance client is unavailable")
+        return client
+
+    @property
+    def mtf_analyzer(self) -> MTFAnalyzer:
+        """MTF analyzer over the default exchange, created on first use."""
+        if self._mtf_analyzer is None:
+            self._mtf_analyzer = MTFAnalyzer(self.exchange)
+        return self._mtf_analyzer
+
     def _setup_handlers(self):
         """Setup all command handlers."""
         # Main commands
@@ -835,7 +854,7 @@ class MaxFlashBotV2:
                 exchange_id = self.universe_selector.get_best_exchange_for_symbol(symbol)
             
             # Get exchange instance
-            exchange = self.exchanges.get(exchange_id, self.exchange)
+            exchange = self.exchanges.get(exchange_id) or self.exchange
             
             # Get ticker data
             ticker = exchange.fetch_ticker(symbol)
@@ -863,11 +882,10 @@ class MaxFlashBotV2:
             confidence = integrated.get('confidence', 0.5)
             reasons = integrated.get('reasons', [])
             
-            # Calculate RSI for display
-            rsi = self.signal_generator.calculate_rsi(df['close'])
-            
-            # Calculate MACD for additional info
-            macd_line, signal_line, macd_hist = self.signal_generator.calculate_macd(df['close'])
+            # RSI and MACD for display, already computed by the integrator for this candle
+            indicators = self.signal_generator.get_indicators(df, f"{exchange_id}:{symbol}", timeframe)
+            rsi = indicators['rsi_series'].iloc[-1]
+            macd_line, signal_line, macd_hist = indicators['macd']
             macd_bullish = macd_line > signal_line
             
             # Price trend
@@ -1232,7 +1250,11 @@ class MaxFlashBotV2:
         """Check which exchanges have this trading pair available."""
         available = []
         
-        for ex_id, exchange_obj in self.exchanges.items():
+        for ex_id in self.exchanges:
+            # None if the client failed to build (the registry drops it)
+            exchange_obj = self.exchanges.get(ex_id)
+            if exchange_obj is None:
+                continue
             try:
                 # Try to fetch ticker to check if pair exists
                 ticker = exchange_obj.fetch_ticker(symbol)
@@ -6,6 +6,8 @@ Calculates the difference between buy and sell volume (Delta).
 import numpy as np
 import pandas as pd
 
+from utils.candles import as_dataframe
+
 
 class DeltaAnalyzer:
     """
@@ -36,7 +38,7 @@ class DeltaAnalyzer:
             - delta_alignment: 'bullish', 'bearish', or 'neutral'
             - delta_divergence: Detected divergence
         """
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
 
         # Check if footprint data exists, otherwise estimate from OHLCV
         if 'fp_buy_volume' not in df.columns:
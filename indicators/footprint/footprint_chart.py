@@ -8,6 +8,8 @@ from typing import Optional
 import numpy as np
 import pandas as pd
 
+from utils.candles import as_dataframe
+
 
 class FootprintChart:
     """
@@ -38,7 +40,7 @@ class FootprintChart:
             - fp_total_volume: Total volume at price level
             - fp_price_level: Price level
         """
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
 
         # For now, we'll use simplified approach since full order flow data
         # requires Level 2 market data
@@ -6,6 +6,8 @@ Analyzes the flow of buy and sell orders.
 import numpy as np
 import pandas as pd
 
+from utils.candles import as_dataframe
+
 
 class OrderFlowAnalyzer:
     """
@@ -34,7 +36,7 @@ class OrderFlowAnalyzer:
             - of_selling_pressure: Selling pressure indicator
             - of_imbalance: Order flow imbalance
         """
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
 
         # Calculate buying/selling pressure
         df["of_buying_pressure"] = df["fp_buy_volume"].rolling(window=5).mean()
@@ -6,6 +6,9 @@ Calculates Value Area High (VAH), Value Area Low (VAL), and POC for Market Profi
 import numpy as np
 import pandas as pd
 
+from indicators.volume_profile.rolling_profile import rolling_histograms, window_histogram
+from utils.candles import as_dataframe
+
 
 class MarketProfileCalculator:
     """
@@ -42,27 +45,32 @@ class MarketProfileCalculator:
             - mp_profile_low: Profile low (lowest price in profile)
             - mp_market_state: Market state ('trending' or 'balanced')
         """
-        df = dataframe.copy()
-
-        # Initialize columns
-        df["mp_poc"] = np.nan
-        df["mp_vah"] = np.nan
-        df["mp_val"] = np.nan
-        df["mp_profile_high"] = np.nan
-        df["mp_profile_low"] = np.nan
-        df["mp_market_state"] = None
-
-        # Calculate Market Profile for each period
-        for i in range(self.period, len(df)):
-            period_data = df.iloc[i - self.period : i + 1]
-            profile = self._calculate_profile_for_period(period_data)
-
-            df.loc[df.index[i], "mp_poc"] = profile["poc"]
-            df.loc[df.index[i], "mp_vah"] = profile["vah"]
-            df.loc[df.index[i], "mp_val"] = profile["val"]
-            df.loc[df.index[i], "mp_profile_high"] = profile["profile_high"]
-            df.loc[df.index[i], "mp_profile_low"] = profile["profile_low"]
-            df.loc[df.index[i], "mp_market_state"] = profile["market_state"]
+        df = as_dataframe(dataframe)
+
+        # Calculate Market Profile for each period (all window histograms at once)
+        n = len(df)
+        columns = {name: np.full(n, np.nan) for name in ("poc", "vah", "val", "profile_high", "profile_low")}
+        market_state = np.full(n, None, dtype=object)
+        close = df["close"].to_numpy()
+
+        chunks = rolling_histograms(
+            df["low"].to_numpy(), df["high"].to_numpy(), df["volume"].to_numpy(), self.period + 1, self.bins
+        )
+        for chunk in chunks:
+            for k, i in enumerate(chunk.rows):
+                if chunk.flat[k]:
+                    profile = self._flat_profile(chunk.price_min[k])
+                else:
+                    profile = self._profile_from_histogram(
+                        chunk.hist[k], chunk.centers[k], chunk.price_min[k], chunk.price_max[k], close[i]
+                    )
+                for name, values in columns.items():
+                    values[i] = profile[name]
+                market_state[i] = profile["market_state"]
+
+        for name, values in columns.items():
+            df[f"mp_{name}"] = values
+        df["mp_market_state"] = market_state
 
         return df
 
@@ -86,49 +94,36 @@ class MarketProfileCalculator:
                 "market_state": "balanced",
             }
 
-        # Get price range
-        price_min = dataframe["low"].min()
-        price_max = dataframe["high"].max()
-
-        if price_min == price_max:
-            midpoint = price_min
-            return {
-                "poc": midpoint,
-                "vah": midpoint,
-                "val": midpoint,
-                "profile_high": midpoint,
-                "profile_low": midpoint,
-                "market_state": "balanced",
-            }
-
-        # Create price bins
-        bin_edges = np.linspace(price_min, price_max, self.bins + 1)
-        bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
-
-        # Distribute volume/time across bins (using volume as proxy for time)
-        volume_by_bin = np.zeros(self.bins)
-
-        for _idx, row in dataframe.iterrows():
-            low = row["low"]
-            high = row["high"]
-            volume = row["volume"]
-
-            # Find bins that this candle covers
-            low_bin = np.searchsorted(bin_edges, low)
-            high_bin = np.searchsorted(bin_edges, high)
-
-            # Ensure indices are within bounds
-            low_bin = max(0, min(low_bin, self.bins - 1))
-            high_bin = max(0, min(high_bin, self.bins - 1))
-
-            # Distribute volume across covered bins
-            if high_bin > low_bin:
-                bins_covered = high_bin - low_bin
-                volume_per_bin = volume / bins_covered
-                volume_by_bin[low_bin:high_bin] += volume_per_bin
-            else:
-                volume_by_bin[low_bin] += volume
+        chunk = window_histogram(
+            dataframe["low"].to_numpy(), dataframe["high"].to_numpy(), dataframe["volume"].to_numpy(), self.bins
+        )
+        if chunk.flat[0]:
+            return self._flat_profile(chunk.price_min[0])
+        return self._profile_from_histogram(
+            chunk.hist[0], chunk.centers[0], chunk.price_min[0], chunk.price_max[0], dataframe["close"].iloc[-1]
+        )
+
+    @staticmethod
+    def _flat_profile(price: float) -> dict:
+        """Profile of a period without price range."""
+        return {
+            "poc": price,
+            "vah": price,
+            "val": price,
+            "profile_high": price,
+            "profile_low": price,
+            "market_state": "balanced",
+        }
 
+    def _profile_from_histogram(
+        self,
+        volume_by_bin: np.ndarray,
+        bin_centers: np.ndarray,
+        price_min: float,
+        price_max: float,
+        current_price: float,
+    ) -> dict:
+        """Read POC, Value Area and market state off a volume histogram."""
         # Find POC (bin with maximum volume/time)
         poc_bin = np.argmax(volume_by_bin)
         poc = bin_centers[poc_bin]
@@ -140,7 +135,6 @@ class MarketProfileCalculator:
         val, vah = self._calculate_value_area(volume_by_bin, bin_centers, poc_bin, target_volume)
 
         # Determine market state
-        current_price = dataframe["close"].iloc[-1]
         market_state = self._determine_market_state(current_price, val, vah)
 
         return {
@@ -6,6 +6,9 @@ Analyzes price distribution over time using TPO letters.
 import numpy as np
 import pandas as pd
 
+from indicators.volume_profile.rolling_profile import ProfileChunk, rolling_histograms, window_histogram
+from utils.candles import as_dataframe
+
 
 class TPOCalculator:
     """
@@ -41,37 +44,38 @@ class TPOCalculator:
             - tpo_poor_low: Poor low level
             - tpo_initial_balance: Initial Balance range
         """
-        df = dataframe.copy()
-
-        # Initialize columns
-        df["tpo_single_prints"] = None
-        df["tpo_poor_high"] = np.nan
-        df["tpo_poor_low"] = np.nan
-        df["tpo_ib_high"] = np.nan
-        df["tpo_ib_low"] = np.nan
+        df = as_dataframe(dataframe)
 
         # Calculate TPO for rolling windows (e.g., daily)
         window_size = self.periods_per_day
-
-        for i in range(window_size, len(df)):
-            window_data = df.iloc[i - window_size : i + 1]
-            tpo_data = self._calculate_tpo_for_window(window_data, i - window_size)
-
-            df.loc[df.index[i], "tpo_single_prints"] = str(tpo_data["single_prints"])
-            df.loc[df.index[i], "tpo_poor_high"] = tpo_data["poor_high"]
-            df.loc[df.index[i], "tpo_poor_low"] = tpo_data["poor_low"]
-            df.loc[df.index[i], "tpo_ib_high"] = tpo_data["ib_high"]
-            df.loc[df.index[i], "tpo_ib_low"] = tpo_data["ib_low"]
+        n = len(df)
+        single_prints = np.full(n, None, dtype=object)
+        columns = {name: np.full(n, np.nan) for name in ("poor_high", "poor_low", "ib_high", "ib_low")}
+
+        low, high = df["low"].to_numpy(), df["high"].to_numpy()
+        chunks = rolling_histograms(
+            low, high, np.ones(n), window_size + 1, self.bins, inclusive=True, track_first_touch=True
+        )
+        for chunk in chunks:
+            for k, i in enumerate(chunk.rows):
+                start = i - window_size
+                tpo_data = self._tpo_from_chunk(chunk, k, low[start : start + 4], high[start : start + 4])
+                single_prints[i] = str(tpo_data["single_prints"])
+                for name, values in columns.items():
+                    values[i] = tpo_data[name]
+
+        df["tpo_single_prints"] = single_prints
+        for name, values in columns.items():
+            df[f"tpo_{name}"] = values
 
         return df
 
-    def _calculate_tpo_for_window(self, dataframe: pd.DataFrame, start_period: int) -> dict:
+    def _calculate_tpo_for_window(self, dataframe: pd.DataFrame) -> dict:
         """
-        Calculate TPO distribution for a time window.
+        Calculate TPO distribution for a single time window.
 
         Args:
             dataframe: DataFrame with OHLCV data for the window
-            start_period: Starting period index for TPO letter assignment
 
         Returns:
             Dictionary with TPO data
@@ -79,12 +83,25 @@ class TPOCalculator:
         if len(dataframe) == 0:
             return {"single_prints": [], "poor_high": np.nan, "poor_low": np.nan, "ib_high": np.nan, "ib_low": np.nan}
 
-        # Get price range
-        price_min = dataframe["low"].min()
-        price_max = dataframe["high"].max()
+        # Letters only label the periods; the levels depend on how many periods touched each bin
+        low, high = dataframe["low"].to_numpy(), dataframe["high"].to_numpy()
+        chunk = window_histogram(low, high, np.ones(len(dataframe)), self.bins, inclusive=True, track_first_touch=True)
+        return self._tpo_from_chunk(chunk, 0, low[:4], high[:4])
+
+    def _tpo_from_chunk(self, chunk: ProfileChunk, k: int, ib_low: np.ndarray, ib_high: np.ndarray) -> dict:
+        """
+        TPO levels of window k of a histogram chunk.
+
+        Args:
+            chunk: Rolling TPO counts per bin
+            k: Window index within the chunk
+            ib_low, ib_high: Lows/highs of the first periods of the window (Initial Balance)
 
-        if price_min == price_max:
-            midpoint = price_min
+        Returns:
+            Dictionary with TPO data
+        """
+        if chunk.flat[k]:
+            midpoint = chunk.price_min[k]
             return {
                 "single_prints": [],
                 "poor_high": midpoint,
@@ -93,70 +110,36 @@ class TPOCalculator:
                 "ib_low": midpoint,
             }
 
-        # Create price bins
-        bin_edges = np.linspace(price_min, price_max, self.bins + 1)
-        bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
-
-        # Create TPO matrix: bins x periods
-        tpo_matrix = {}
-
-        # Assign TPO letters to each period
-        for period_idx, (_idx, row) in enumerate(dataframe.iterrows()):
-            tpo_letter = self.tpo_letters[(start_period + period_idx) % len(self.tpo_letters)]
-
-            low = row["low"]
-            high = row["high"]
-
-            # Find bins that this candle covers
-            low_bin = np.searchsorted(bin_edges, low)
-            high_bin = np.searchsorted(bin_edges, high)
+        bin_centers = chunk.centers[k]
 
-            low_bin = max(0, min(low_bin, self.bins - 1))
-            high_bin = max(0, min(high_bin, self.bins - 1))
-
-            # Mark bins with TPO letter
-            for bin_idx in range(low_bin, high_bin + 1):
-                if bin_idx not in tpo_matrix:
-                    tpo_matrix[bin_idx] = []
-                tpo_matrix[bin_idx].append(tpo_letter)
-
-        # Find single prints (bins with only one TPO letter)
-        single_prints = []
-        for bin_idx, tpo_letters in tpo_matrix.items():
-            if len(tpo_letters) == 1:
-                single_prints.append(bin_centers[bin_idx])
+        # Single prints (bins touched by only one period), in order of first touch
+        single_bins = np.flatnonzero(chunk.hist[k] == 1)
+        single_bins = single_bins[np.argsort(chunk.first_touch[k][single_bins], kind="stable")]
+        single_prints = list(bin_centers[single_bins])
 
         # Find poor high and poor low (single prints at extremes)
         poor_high = np.nan
         poor_low = np.nan
 
-        if single_prints:
-            single_print_bins = [bin_idx for bin_idx, letters in tpo_matrix.items() if len(letters) == 1]
-            if single_print_bins:
-                highest_single = max(single_print_bins)
-                lowest_single = min(single_print_bins)
-
-                # Poor high: single print near top
-                if highest_single >= self.bins * 0.8:  # Top 20% of range
-                    poor_high = bin_centers[highest_single]
-
-                # Poor low: single print near bottom
-                if lowest_single <= self.bins * 0.2:  # Bottom 20% of range
-                    poor_low = bin_centers[lowest_single]
+        if len(single_bins):
+            highest_single = single_bins.max()
+            lowest_single = single_bins.min()
 
-        # Calculate Initial Balance (first hour range)
-        ib_size = min(len(dataframe), 4)  # First 4 periods (roughly first hour)
-        ib_data = dataframe.iloc[:ib_size]
+            # Poor high: single print near top
+            if highest_single >= self.bins * 0.8:  # Top 20% of range
+                poor_high = bin_centers[highest_single]
 
-        ib_high = ib_data["high"].max()
-        ib_low = ib_data["low"].min()
+            # Poor low: single print near bottom
+            if lowest_single <= self.bins * 0.2:  # Bottom 20% of range
+                poor_low = bin_centers[lowest_single]
 
+        # Calculate Initial Balance (first 4 periods, roughly first hour)
         return {
             "single_prints": single_prints,
             "poor_high": poor_high,
             "poor_low": poor_low,
-            "ib_high": ib_high,
-            "ib_low": ib_low,
+            "ib_high": np.nanmax(ib_high),
+            "ib_low": np.nanmin(ib_low),
         }
 
     def get_tpo_summary(self, dataframe: pd.DataFrame) -> dict:
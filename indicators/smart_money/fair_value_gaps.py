@@ -3,11 +3,57 @@ Fair Value Gaps (FVG) detection module.
 Identifies price gaps that indicate supply/demand imbalance.
 """
 
+from bisect import bisect_left
 from typing import Optional
 
 import numpy as np
 import pandas as pd
 
+from utils.candles import as_dataframe
+
+
+class FVGIntervalIndex:
+    """
+    Sorted interval index over FVG price ranges.
+
+    Answers "first FVG (in list order) whose [low, high] contains the price"
+    with a binary search: answers are precomputed for every range endpoint and
+    for every open interval between consecutive endpoints.
+    """
+
+    def __init__(self, fvgs: list[dict]):
+        """
+        Args:
+            fvgs: FVG dictionaries with "low" and "high"
+        """
+        self.fvgs = fvgs
+        # Inverted or NaN ranges can never contain a price
+        ranges = [(k, fvg["low"], fvg["high"]) for k, fvg in enumerate(fvgs) if fvg["low"] <= fvg["high"]]
+        self._points = sorted({bound for _, low, high in ranges for bound in (low, high)})
+        # _at_point[p]: answer for price == _points[p];
+        # _between[p]: answer for _points[p - 1] < price < _points[p]
+        self._at_point = [-1] * len(self._points)
+        self._between = [-1] * (len(self._points) + 1)
+
+        # Earlier FVGs are written last so they win, as in a linear scan
+        for k, low, high in reversed(ranges):
+            lo = bisect_left(self._points, low)
+            hi = bisect_left(self._points, high)
+            self._at_point[lo : hi + 1] = [k] * (hi + 1 - lo)
+            self._between[lo + 1 : hi + 1] = [k] * (hi - lo)
+
+    def find(self, price: float) -> Optional[dict]:
+        """First FVG containing price, or None."""
+        pos = bisect_left(self._points, price)
+        if pos < len(self._points) and self._points[pos] == price:
+            k = self._at_point[pos]
+        else:
+            k = self._between[pos]
+        return self.fvgs[k] if k >= 0 else None
+
+    def __len__(self) -> int:
+        return len(self.fvgs)
+
 
 class FairValueGapDetector:
     """
@@ -28,6 +74,16 @@ class FairValueGapDetector:
         self.strong_threshold_pct = strong_threshold_pct
         self.active_fvgs: list[dict] = []
 
+    @property
+    def active_fvgs(self) -> list[dict]:
+        """Active FVGs of the last detection."""
+        return self._active_fvgs
+
+    @active_fvgs.setter
+    def active_fvgs(self, fvgs: list[dict]):
+        self._active_fvgs = fvgs
+        self._active_index: Optional[FVGIntervalIndex] = None
+
     def detect_fair_value_gaps(self, dataframe: pd.DataFrame, store_active: bool = True) -> pd.DataFrame:
         """
         Detect Fair Value Gaps in the dataframe.
@@ -51,80 +107,36 @@ class FairValueGapDetector:
             - fvg_type: Type of FVG (bullish/bearish/None)
             - fvg_strength: Strength of FVG (strong/weak)
         """
-        df = dataframe.copy()
-
-        # Initialize columns
-        df["fvg_bullish_high"] = np.nan
-        df["fvg_bullish_low"] = np.nan
-        df["fvg_bearish_high"] = np.nan
-        df["fvg_bearish_low"] = np.nan
-        df["fvg_type"] = None
-        df["fvg_strength"] = None
-
-        fvgs = []
-
-        # Detect FVGs by checking 3-candle patterns
-        for i in range(2, len(df)):
-            # Bullish FVG: candle 1 close < candle 3 open, candle 2 doesn't overlap
-            if (
-                df.iloc[i - 2]["close"] < df.iloc[i]["open"]
-                and df.iloc[i - 1]["high"] < df.iloc[i - 2]["close"]
-                and df.iloc[i - 1]["low"] > df.iloc[i]["open"]
-            ):
-                fvg_low = df.iloc[i]["open"]
-                fvg_high = df.iloc[i - 2]["close"]
-
-                # Check minimum size
-                size_pct = ((fvg_high - fvg_low) / fvg_low) * 100
-                if size_pct >= self.min_size_pct:
-                    strength = "strong" if size_pct >= self.strong_threshold_pct else "weak"
-
-                    fvg = {
-                        "index": i,
-                        "high": fvg_high,
-                        "low": fvg_low,
-                        "type": "bullish",
-                        "strength": strength,
-                        "size_pct": size_pct,
-                    }
-                    fvgs.append(fvg)
-
-                    df.loc[df.index[i], "fvg_bullish_high"] = fvg_high
-                    df.loc[df.index[i], "fvg_bullish_low"] = fvg_low
-                    df.loc[df.index[i], "fvg_type"] = "bullish"
-                    df.loc[df.index[i], "fvg_strength"] = strength
-
-            # Bearish FVG: candle 1 close > candle 3 open, candle 2 doesn't overlap
-            elif (
-                df.iloc[i - 2]["close"] > df.iloc[i]["open"]
-                and df.iloc[i - 1]["low"] > df.iloc[i - 2]["close"]
-                and df.iloc[i - 1]["high"] < df.iloc[i]["open"]
-            ):
-                fvg_high = df.iloc[i]["open"]
-                fvg_low = df.iloc[i - 2]["close"]
-
-                # Check minimum size
-                size_pct = ((fvg_high - fvg_low) / fvg_low) * 100
-                if size_pct >= self.min_size_pct:
-                    strength = "strong" if size_pct >= self.strong_threshold_pct else "weak"
-
-                    fvg = {
-                        "index": i,
-                        "high": fvg_high,
-                        "low": fvg_low,
-                        "type": "bearish",
-                        "strength": strength,
-                        "size_pct": size_pct,
-                    }
-                    fvgs.append(fvg)
-
-                    df.loc[df.index[i], "fvg_bearish_high"] = fvg_high
-                    df.loc[df.index[i], "fvg_bearish_low"] = fvg_low
-                    df.loc[df.index[i], "fvg_type"] = "bearish"
-                    df.loc[df.index[i], "fvg_strength"] = strength
+        df = as_dataframe(dataframe)
+        n = len(df)
+        open_, high, low, close = (df[name].to_numpy(dtype=np.float64) for name in ("open", "high", "low", "close"))
+
+        columns = {
+            "fvg_bullish_high": np.full(n, np.nan),
+            "fvg_bullish_low": np.full(n, np.nan),
+            "fvg_bearish_high": np.full(n, np.nan),
+            "fvg_bearish_low": np.full(n, np.nan),
+        }
+        fvg_type = np.full(n, None, dtype=object)
+        fvg_strength = np.full(n, None, dtype=object)
+
+        fvgs = self._find_fvgs(open_, high, low, close)
+
+        # Detection bars
+        for fvg in fvgs:
+            i = fvg["index"]
+            columns[f"fvg_{fvg['type']}_high"][i] = fvg["high"]
+            columns[f"fvg_{fvg['type']}_low"][i] = fvg["low"]
+            fvg_type[i] = fvg["type"]
+            fvg_strength[i] = fvg["strength"]
 
         # Forward fill FVG levels until filled or expired
-        self._forward_fill_fvgs(df, fvgs)
+        self._forward_fill_fvgs(close, fvgs, columns, fvg_type, fvg_strength)
+
+        for name, values in columns.items():
+            df[name] = values
+        df["fvg_type"] = fvg_type
+        df["fvg_strength"] = fvg_strength
 
         # Store active FVGs if requested
         if store_active:
@@ -132,43 +144,92 @@ class FairValueGapDetector:
 
         return df
 
-    def _forward_fill_fvgs(self, dataframe: pd.DataFrame, fvgs: list[dict]):
+    def _find_fvgs(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> list[dict]:
+        """
+        Find 3-candle FVG patterns with shifted array comparisons.
+
+        Candle 1 is bar i-2, candle 2 is bar i-1 and candle 3 is bar i.
+
+        Returns:
+            FVG dictionaries ordered by index
+        """
+        if len(close) < 3:
+            return []
+
+        c1, h2, l2, o3 = close[:-2], high[1:-1], low[1:-1], open_[2:]
+
+        # Bullish FVG: candle 1 close < candle 3 open, candle 2 doesn't overlap
+        bullish = (c1 < o3) & (h2 < c1) & (l2 > o3)
+        # Bearish FVG: candle 1 close > candle 3 open, candle 2 doesn't overlap
+        bearish = ~bullish & (c1 > o3) & (l2 > c1) & (h2 < o3)
+
+        fvg_high = np.where(bullish, c1, o3)
+        fvg_low = np.where(bullish, o3, c1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            size_pct = ((fvg_high - fvg_low) / fvg_low) * 100
+
+        # Check minimum size
+        hits = np.flatnonzero((bullish | bearish) & (size_pct >= self.min_size_pct))
+
+        fvgs = []
+        for k in hits:
+            fvgs.append(
+                {
+                    "index": int(k) + 2,
+                    "high": fvg_high[k],
+                    "low": fvg_low[k],
+                    "type": "bullish" if bullish[k] else "bearish",
+                    "strength": "strong" if size_pct[k] >= self.strong_threshold_pct else "weak",
+                    "size_pct": size_pct[k],
+                }
+            )
+        return fvgs
+
+    def _forward_fill_fvgs(
+        self,
+        close: np.ndarray,
+        fvgs: list[dict],
+        columns: dict[str, np.ndarray],
+        fvg_type: np.ndarray,
+        fvg_strength: np.ndarray,
+    ):
         """
         Forward fill FVG levels until filled or expired.
 
         FVG is filled when price closes within the gap.
-        FVG expires after max_age_bars.
+        FVG expires after max_age_bars. Fill bars of all FVGs are found with
+        one windowed comparison; later FVGs overwrite earlier ones.
 
         Args:
-            dataframe: DataFrame to modify
-            fvgs: List of detected FVGs
+            close: Close prices
+            fvgs: List of detected FVGs (ordered by index)
+            columns: FVG level columns to modify
+            fvg_type: fvg_type column to modify
+            fvg_strength: fvg_strength column to modify
         """
-        for fvg in fvgs:
-            fvg_type = fvg["type"]
-            fvg_high = fvg["high"]
-            fvg_low = fvg["low"]
-            start_idx = fvg["index"]
-
-            # Forward fill until filled or expired
-            for i in range(start_idx + 1, min(start_idx + self.max_age_bars + 1, len(dataframe))):
-                current_close = dataframe.loc[dataframe.index[i], "close"]
-
-                # Check if FVG is filled
-                if fvg_low <= current_close <= fvg_high:
-                    # FVG filled, stop forward filling
-                    break
-
-                # Keep FVG active
-                if fvg_type == "bullish":
-                    dataframe.loc[dataframe.index[i], "fvg_bullish_high"] = fvg_high
-                    dataframe.loc[dataframe.index[i], "fvg_bullish_low"] = fvg_low
-                    dataframe.loc[dataframe.index[i], "fvg_type"] = "bullish"
-                    dataframe.loc[dataframe.index[i], "fvg_strength"] = fvg["strength"]
-                elif fvg_type == "bearish":
-                    dataframe.loc[dataframe.index[i], "fvg_bearish_high"] = fvg_high
-                    dataframe.loc[dataframe.index[i], "fvg_bearish_low"] = fvg_low
-                    dataframe.loc[dataframe.index[i], "fvg_type"] = "bearish"
-                    dataframe.loc[dataframe.index[i], "fvg_strength"] = fvg["strength"]
+        n = len(close)
+        if not fvgs or self.max_age_bars <= 0:
+            return
+
+        # Closes of the max_age_bars bars following each FVG (NaN past the end)
+        padded = np.concatenate([close, np.full(self.max_age_bars, np.nan)])
+        index = np.array([fvg["index"] for fvg in fvgs])
+        lows = np.array([fvg["low"] for fvg in fvgs])
+        highs = np.array([fvg["high"] for fvg in fvgs])
+        following = np.lib.stride_tricks.sliding_window_view(padded[1:], self.max_age_bars)[index]
+
+        filled = (lows[:, None] <= following) & (following <= highs[:, None])
+        first_fill = np.where(filled.any(axis=1), filled.argmax(axis=1), self.max_age_bars)
+        ends = np.minimum(index + 1 + first_fill, n)
+
+        for fvg, start, end in zip(fvgs, index + 1, ends):
+            if start >= end:
+                continue
+            # Keep FVG active
+            columns[f"fvg_{fvg['type']}_high"][start:end] = fvg["high"]
+            columns[f"fvg_{fvg['type']}_low"][start:end] = fvg["low"]
+            fvg_type[start:end] = fvg["type"]
+            fvg_strength[start:end] = fvg["strength"]
 
     def _get_active_fvgs(self, dataframe: pd.DataFrame, fvgs: list[dict]) -> list[dict]:
         """
@@ -183,6 +244,9 @@ class FairValueGapDetector:
         """
         active = []
         current_idx = len(dataframe) - 1
+        if current_idx < 0:
+            return active
+        current_close = dataframe["close"].iat[current_idx]
 
         for fvg in fvgs:
             if fvg["index"] >= current_idx:
@@ -193,8 +257,6 @@ class FairValueGapDetector:
             if age > self.max_age_bars:
                 continue
 
-            current_close = dataframe.loc[dataframe.index[current_idx], "close"]
-
             # Check if FVG is filled
             if fvg["low"] <= current_close <= fvg["high"]:
                 continue  # FVG filled
@@ -208,6 +270,9 @@ class FairValueGapDetector:
         """
         Check if price is currently in a Fair Value Gap.
 
+        Active FVGs are queried through an interval index in O(log n); an
+        explicitly passed list is scanned.
+
         Args:
             price: Current price
             fvgs: List of FVGs (uses active_fvgs if None)
@@ -216,7 +281,11 @@ class FairValueGapDetector:
             FVG dictionary if price is in FVG, None otherwise
         """
         if fvgs is None:
-            fvgs = self.active_fvgs
+            index = self._active_index
+            # Rebuilt after reassignment or in-place changes of the list length
+            if index is None or index.fvgs is not self._active_fvgs or len(index) != len(self._active_fvgs):
+                index = self._active_index = FVGIntervalIndex(self._active_fvgs)
+            return index.find(price)
 
         for fvg in fvgs:
             if fvg["low"] <= price <= fvg["high"]:
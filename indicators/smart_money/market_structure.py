@@ -1,10 +1,118 @@
 """
 Market Structure analysis module.
 Identifies Break of Structure (BOS), Change of Character (ChoCH), and trend direction.
+
+Swing points are centered rolling extrema; BOS, ChoCH, trend and liquidity
+zones are produced together by one pass of MarketStructureState over the
+raw arrays. The same state machine backs MarketStructureAnalyzer.update for
+bar-by-bar use.
 """
 
+from collections import deque
+from collections.abc import Mapping
+from typing import Optional
+
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils.candles import as_dataframe
+
+NAN = float("nan")
+
+# Column order of the per-bar rows produced by MarketStructureState.step
+STATE_COLUMNS = (
+    "bos_detected",
+    "bos_type",
+    "choch_detected",
+    "choch_type",
+    "market_structure",
+    "liquidity_zone_high",
+    "liquidity_zone_low",
+)
+
+
+class MarketStructureState:
+    """
+    Running market structure state over confirmed swing points.
+
+    - BOS: close breaks the last unbroken swing high (bullish) or swing low
+      (bearish); a broken level does not trigger again until the next swing.
+    - ChoCH: the last swing low is higher than the one before (bullish) or the
+      last swing high is lower than the one before (bearish).
+    - Trend: higher highs and higher lows (bullish), lower highs and lower
+      lows (bearish), otherwise range.
+    - Liquidity zones: last swing high/low with a 0.1% stop-hunt buffer.
+    """
+
+    __slots__ = ("bos_high", "bos_low", "highs", "lows")
+
+    def __init__(self):
+        self.bos_high: Optional[float] = None  # Swing high not broken yet
+        self.bos_low: Optional[float] = None  # Swing low not broken yet
+        self.highs: tuple = ()  # Last two swing highs
+        self.lows: tuple = ()  # Last two swing lows
+
+    def copy(self) -> "MarketStructureState":
+        """Independent copy of the state."""
+        state = MarketStructureState()
+        state.bos_high, state.bos_low = self.bos_high, self.bos_low
+        state.highs, state.lows = self.highs, self.lows
+        return state
+
+    def step(self, swing_high: float, swing_low: float, close: float) -> tuple:
+        """
+        Advance by one bar.
+
+        Args:
+            swing_high: Swing high of the bar (NaN if none)
+            swing_low: Swing low of the bar (NaN if none)
+            close: Close price
+
+        Returns:
+            Values of the bar in STATE_COLUMNS order
+        """
+        # Update last swing points (NaN != NaN)
+        if swing_high == swing_high:
+            self.bos_high = swing_high
+            self.highs = self.highs[-1:] + (swing_high,)
+        if swing_low == swing_low:
+            self.bos_low = swing_low
+            self.lows = self.lows[-1:] + (swing_low,)
+
+        # Break of Structure, reset to avoid multiple triggers
+        bos, bos_type = False, None
+        if self.bos_high is not None and close > self.bos_high:
+            bos, bos_type = True, "bullish"
+            self.bos_high = None
+        if self.bos_low is not None and close < self.bos_low:
+            bos, bos_type = True, "bearish"
+            self.bos_low = None
+
+        highs, lows = self.highs, self.lows
+        higher_low = len(lows) == 2 and lows[1] > lows[0]
+        lower_high = len(highs) == 2 and highs[1] < highs[0]
+
+        # Change of Character
+        choch, choch_type = False, None
+        if higher_low:
+            choch, choch_type = True, "bullish"
+        if lower_high:
+            choch, choch_type = True, "bearish"
+
+        # Trend
+        trend = "range"
+        if len(highs) == 2 and len(lows) == 2:
+            if highs[1] > highs[0] and higher_low:
+                trend = "bullish"
+            elif lower_high and lows[1] < lows[0]:
+                trend = "bearish"
+
+        # Liquidity zones (with small buffer for stop hunts)
+        liquidity_high = highs[-1] + highs[-1] * 0.001 if highs else NAN
+        liquidity_low = lows[-1] - lows[-1] * 0.001 if lows else NAN
+
+        return bos, bos_type, choch, choch_type, trend, liquidity_high, liquidity_low
 
 
 class MarketStructureAnalyzer:
@@ -20,11 +128,23 @@ class MarketStructureAnalyzer:
             swing_lookback: Lookback period for swing high/low detection
         """
         self.swing_lookback = swing_lookback
+        self.reset()
+
+    def reset(self):
+        """Forget the bars seen by update()."""
+        window = 2 * self.swing_lookback + 1
+        self._state = MarketStructureState()  # State after the last confirmed bar
+        self._highs: deque = deque(maxlen=window)
+        self._lows: deque = deque(maxlen=window)
+        self._closes: deque = deque(maxlen=self.swing_lookback + 1)
+        self._bars = 0
 
     def analyze_market_structure(self, dataframe: pd.DataFrame) -> pd.DataFrame:
         """
         Analyze market structure and add columns to dataframe.
 
+        Also primes update() to continue from the last bar of the dataframe.
+
         Args:
             dataframe: DataFrame with OHLCV data
 
@@ -34,255 +154,126 @@ class MarketStructureAnalyzer:
             - swing_low: Swing low levels
             - market_structure: 'bullish', 'bearish', 'range'
             - bos_detected: Break of Structure detected
+            - bos_type: 'bullish', 'bearish' or None
             - choch_detected: Change of Character detected
+            - choch_type: 'bullish', 'bearish' or None
             - liquidity_zone: Liquidity zone levels
         """
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
+        high = df["high"].to_numpy(dtype=np.float64)
+        low = df["low"].to_numpy(dtype=np.float64)
+        close = df["close"].to_numpy(dtype=np.float64)
+        n = len(df)
 
         # Detect swing points
-        swing_highs = self._detect_swing_highs(df)
-        swing_lows = self._detect_swing_lows(df)
+        swing_highs = self._detect_swings(high, np.fmax)
+        swing_lows = self._detect_swings(low, np.fmin)
+
+        # Single pass over the bars; the state after the last bar whose swing
+        # status is final is kept for update()
+        self.reset()
+        confirmed = n - 1 - self.swing_lookback
+        state = self._state
+        rows = []
+        for i, bar in enumerate(zip(swing_highs.tolist(), swing_lows.tolist(), close.tolist())):
+            rows.append(state.step(*bar))
+            if i == confirmed:
+                self._state = state.copy()
+        self._highs.extend(high[-self._highs.maxlen :].tolist())
+        self._lows.extend(low[-self._lows.maxlen :].tolist())
+        self._closes.extend(close[-self._closes.maxlen :].tolist())
+        self._bars = n
+
+        columns = dict(zip(STATE_COLUMNS, zip(*rows))) if rows else dict.fromkeys(STATE_COLUMNS, ())
 
         df["swing_high"] = swing_highs
         df["swing_low"] = swing_lows
-
-        # Detect Break of Structure
-        bos_events = self._detect_break_of_structure(df, swing_highs, swing_lows)
-        df["bos_detected"] = bos_events
-        df["bos_type"] = None
-
-        # Detect Change of Character
-        choch_events = self._detect_change_of_character(df, swing_highs, swing_lows)
-        df["choch_detected"] = choch_events
-        df["choch_type"] = None
-
-        # Determine trend
-        trend = self._determine_trend(df, swing_highs, swing_lows)
-        df["market_structure"] = trend
-
-        # Identify liquidity zones
-        liquidity_zones = self._identify_liquidity_zones(df, swing_highs, swing_lows)
-        df["liquidity_zone_high"] = liquidity_zones["high"]
-        df["liquidity_zone_low"] = liquidity_zones["low"]
+        df["bos_type"] = np.array(columns["bos_type"], dtype=object)
+        df["bos_detected"] = np.array(columns["bos_detected"], dtype=bool)
+        df["choch_type"] = np.array(columns["choch_type"], dtype=object)
+        df["choch_detected"] = np.array(columns["choch_detected"], dtype=bool)
+        df["market_structure"] = np.array(columns["market_structure"], dtype=object)
+        df["liquidity_zone_high"] = np.array(columns["liquidity_zone_high"], dtype=np.float64)
+        df["liquidity_zone_low"] = np.array(columns["liquidity_zone_low"], dtype=np.float64)
 
         return df
 
-    def _detect_swing_highs(self, dataframe: pd.DataFrame) -> pd.Series:
+    def update(self, new_bar: Mapping) -> dict:
         """
-        Detect swing highs.
+        Process one new closed bar incrementally.
 
-        Args:
-            dataframe: DataFrame with OHLCV data
-
-        Returns:
-            Series with swing high levels
-        """
-        highs = dataframe["high"]
-        swing_highs = pd.Series(index=dataframe.index, dtype=float)
-
-        for i in range(self.swing_lookback, len(dataframe) - self.swing_lookback):
-            if highs.iloc[i] == highs.iloc[i - self.swing_lookback : i + self.swing_lookback + 1].max():
-                swing_highs.iloc[i] = highs.iloc[i]
-
-        return swing_highs
-
-    def _detect_swing_lows(self, dataframe: pd.DataFrame) -> pd.Series:
-        """
-        Detect swing lows.
+        A swing at bar i is known only once swing_lookback bars follow it, so
+        the state is committed up to bar n - 1 - swing_lookback and the last
+        swing_lookback bars are replayed without swings. The result equals the
+        last row of analyze_market_structure over all bars seen so far.
 
         Args:
-            dataframe: DataFrame with OHLCV data
+            new_bar: Bar with 'high', 'low' and 'close'
 
         Returns:
-            Series with swing low levels
+            Dictionary with the analyze_market_structure columns for the bar
         """
-        lows = dataframe["low"]
-        swing_lows = pd.Series(index=dataframe.index, dtype=float)
-
-        for i in range(self.swing_lookback, len(dataframe) - self.swing_lookback):
-            if lows.iloc[i] == lows.iloc[i - self.swing_lookback : i + self.swing_lookback + 1].min():
-                swing_lows.iloc[i] = lows.iloc[i]
-
-        return swing_lows
-
-    def _detect_break_of_structure(
-        self, dataframe: pd.DataFrame, swing_highs: pd.Series, swing_lows: pd.Series
-    ) -> pd.Series:
+        k = self.swing_lookback
+        self._highs.append(float(new_bar["high"]))
+        self._lows.append(float(new_bar["low"]))
+        self._closes.append(float(new_bar["close"]))
+        self._bars += 1
+
+        # Bar that just received its last right-hand neighbour
+        confirmed = self._bars - 1 - k
+        swing_high = swing_low = NAN
+        row = None
+        if confirmed >= 0:
+            if confirmed >= k:
+                swing_high = self._window_swing(self._highs, max)
+                swing_low = self._window_swing(self._lows, min)
+            row = self._state.step(swing_high, swing_low, self._closes[0])
+            pending = list(self._closes)[1:]
+        else:
+            pending = list(self._closes)
+
+        # Bars without a final swing status, newest last
+        if pending:
+            state = self._state.copy()
+            for close in pending:
+                row = state.step(NAN, NAN, close)
+            swing_high = swing_low = NAN
+
+        result = {"swing_high": swing_high, "swing_low": swing_low}
+        result.update(zip(STATE_COLUMNS, row))
+        return result
+
+    def _detect_swings(self, values: np.ndarray, extreme: np.ufunc) -> np.ndarray:
         """
-        Detect Break of Structure (BOS).
+        Detect swing points as centered rolling extrema.
 
-        BOS occurs when price breaks a previous swing high (bullish BOS)
-        or swing low (bearish BOS).
+        A bar is a swing high (low) when its value equals the maximum
+        (minimum) of the swing_lookback bars on each side and itself.
 
         Args:
-            dataframe: DataFrame with OHLCV data
-            swing_highs: Series with swing high levels
-            swing_lows: Series with swing low levels
-
-        Returns:
-            Series with BOS events
-        """
-        bos = pd.Series(False, index=dataframe.index)
-        bos_type = pd.Series(None, index=dataframe.index, dtype=object)
-
-        # Track last swing high and low
-        last_swing_high = None
-        last_swing_low = None
-
-        for i in range(len(dataframe)):
-            # Update last swing points
-            if pd.notna(swing_highs.iloc[i]):
-                last_swing_high = swing_highs.iloc[i]
-
-            if pd.notna(swing_lows.iloc[i]):
-                last_swing_low = swing_lows.iloc[i]
-
-            # Check for bullish BOS (break above swing high)
-            if last_swing_high is not None and dataframe.iloc[i]["close"] > last_swing_high:
-                bos.iloc[i] = True
-                bos_type.iloc[i] = "bullish"
-                last_swing_high = None  # Reset to avoid multiple triggers
-
-            # Check for bearish BOS (break below swing low)
-            if last_swing_low is not None and dataframe.iloc[i]["close"] < last_swing_low:
-                bos.iloc[i] = True
-                bos_type.iloc[i] = "bearish"
-                last_swing_low = None  # Reset to avoid multiple triggers
-
-        dataframe["bos_type"] = bos_type
-        return bos
-
-    def _detect_change_of_character(
-        self, dataframe: pd.DataFrame, swing_highs: pd.Series, swing_lows: pd.Series
-    ) -> pd.Series:
-        """
-        Detect Change of Character (ChoCH).
-
-        ChoCH is a change in price behavior, often appearing after BOS.
-        - Bullish ChoCH: Price makes a higher low after breaking structure
-        - Bearish ChoCH: Price makes a lower high after breaking structure
-
-        Args:
-            dataframe: DataFrame with OHLCV data
-            swing_highs: Series with swing high levels
-            swing_lows: Series with swing low levels
+            values: Highs (with np.fmax) or lows (with np.fmin)
+            extreme: NaN-skipping reduction
 
         Returns:
-            Series with ChoCH events
-        """
-        choch = pd.Series(False, index=dataframe.index)
-        choch_type = pd.Series(None, index=dataframe.index, dtype=object)
-
-        # Track recent swing points
-        recent_swing_highs = []
-        recent_swing_lows = []
-
-        for i in range(len(dataframe)):
-            # Update recent swings (keep last 3)
-            if pd.notna(swing_highs.iloc[i]):
-                recent_swing_highs.append(swing_highs.iloc[i])
-                if len(recent_swing_highs) > 3:
-                    recent_swing_highs.pop(0)
-
-            if pd.notna(swing_lows.iloc[i]):
-                recent_swing_lows.append(swing_lows.iloc[i])
-                if len(recent_swing_lows) > 3:
-                    recent_swing_lows.pop(0)
-
-            # Check for bullish ChoCH (higher low)
-            if len(recent_swing_lows) >= 2 and recent_swing_lows[-1] > recent_swing_lows[-2]:
-                choch.iloc[i] = True
-                choch_type.iloc[i] = "bullish"
-
-            # Check for bearish ChoCH (lower high)
-            if len(recent_swing_highs) >= 2 and recent_swing_highs[-1] < recent_swing_highs[-2]:
-                choch.iloc[i] = True
-                choch_type.iloc[i] = "bearish"
-
-        dataframe["choch_type"] = choch_type
-        return choch
-
-    def _determine_trend(self, dataframe: pd.DataFrame, swing_highs: pd.Series, swing_lows: pd.Series) -> pd.Series:
+            Array with swing levels (NaN elsewhere)
         """
-        Determine market trend: bullish, bearish, or range.
-
-        Args:
-            dataframe: DataFrame with OHLCV data
-            swing_highs: Series with swing high levels
-            swing_lows: Series with swing low levels
-
-        Returns:
-            Series with trend: 'bullish', 'bearish', or 'range'
-        """
-        trend = pd.Series("range", index=dataframe.index, dtype=object)
-
-        # Get recent swing points
-        [h for h in swing_highs.dropna().tail(3) if pd.notna(h)]
-        [l for l in swing_lows.dropna().tail(3) if pd.notna(l)]
-
-        for i in range(len(dataframe)):
-            # Update recent swings up to current index
-            current_highs = swing_highs.iloc[: i + 1].dropna().tail(3).tolist()
-            current_lows = swing_lows.iloc[: i + 1].dropna().tail(3).tolist()
-
-            if len(current_highs) >= 2 and len(current_lows) >= 2:
-                # Bullish trend: higher highs and higher lows
-                if current_highs[-1] > current_highs[-2] and current_lows[-1] > current_lows[-2]:
-                    trend.iloc[i] = "bullish"
-
-                # Bearish trend: lower highs and lower lows
-                elif current_highs[-1] < current_highs[-2] and current_lows[-1] < current_lows[-2]:
-                    trend.iloc[i] = "bearish"
-
-                else:
-                    trend.iloc[i] = "range"
-            else:
-                trend.iloc[i] = "range"
-
-        return trend
-
-    def _identify_liquidity_zones(
-        self, dataframe: pd.DataFrame, swing_highs: pd.Series, swing_lows: pd.Series
-    ) -> dict[str, pd.Series]:
-        """
-        Identify liquidity zones (areas where stops are likely).
-
-        Liquidity zones are typically:
-        - Above swing highs (for long liquidations)
-        - Below swing lows (for short liquidations)
-
-        Args:
-            dataframe: DataFrame with OHLCV data
-            swing_highs: Series with swing high levels
-            swing_lows: Series with swing low levels
-
-        Returns:
-            Dictionary with 'high' and 'low' liquidity zones
-        """
-        liquidity_high = pd.Series(np.nan, index=dataframe.index)
-        liquidity_low = pd.Series(np.nan, index=dataframe.index)
-
-        # Forward fill swing points
-        last_swing_high = None
-        last_swing_low = None
-
-        for i in range(len(dataframe)):
-            if pd.notna(swing_highs.iloc[i]):
-                last_swing_high = swing_highs.iloc[i]
-
-            if pd.notna(swing_lows.iloc[i]):
-                last_swing_low = swing_lows.iloc[i]
-
-            # Liquidity zones (with small buffer for stop hunts)
-            if last_swing_high is not None:
-                buffer = last_swing_high * 0.001  # 0.1% buffer
-                liquidity_high.iloc[i] = last_swing_high + buffer
-
-            if last_swing_low is not None:
-                buffer = last_swing_low * 0.001  # 0.1% buffer
-                liquidity_low.iloc[i] = last_swing_low - buffer
-
-        return {"high": liquidity_high, "low": liquidity_low}
+        k = self.swing_lookback
+        n = len(values)
+        swings = np.full(n, np.nan)
+        if n < 2 * k + 1:
+            return swings
+
+        centers = values[k : n - k]
+        is_swing = centers == extreme.reduce(sliding_window_view(values, 2 * k + 1), axis=1)
+        swings[k : n - k] = np.where(is_swing, centers, np.nan)
+        return swings
+
+    @staticmethod
+    def _window_swing(window: deque, extreme) -> float:
+        """Center value of a full window if it is the window extreme, else NaN."""
+        values = [value for value in window if value == value]
+        center = window[len(window) // 2]
+        return center if values and center == extreme(values) else NAN
 
     def get_market_structure_summary(self, dataframe: pd.DataFrame) -> dict:
         """
@@ -1,13 +1,89 @@
 """
 Order Blocks detection module.
 Identifies consolidation zones before impulsive price movements.
+
+Detection works on NumPy arrays of the whole series: forward impulse
+extremes come from O(n) rolling max/min, consolidation checks from
+windowed array masks, and invalidation bars from a binary-lifting search
+over range minima/maxima. The frame is written once per column.
 """
 
 from typing import Optional
 
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils.candles import as_dataframe
+
+
+def forward_extreme(values: np.ndarray, window: int, extreme: str = "max") -> np.ndarray:
+    """
+    Max/min of the `window` bars after each bar, values[i + 1 : i + window + 1].
+
+    Windows are truncated at the end of the series and skip NaN like pandas
+    max()/min() of the slice (NaN when empty). Uses pandas rolling extrema
+    (monotonic deque, O(n)) over the reversed series.
 
+    Args:
+        values: Price array
+        window: Bars to look ahead
+        extreme: 'max' or 'min'
+
+    Returns:
+        Array of forward extremes
+    """
+    result = np.full(len(values), np.nan)
+    if window <= 0 or len(values) < 2:
+        return result
+
+    rolling = pd.Series(values[::-1]).rolling(window, min_periods=1)
+    # ahead[i] = extreme of values[i : i + window]
+    ahead = (rolling.max() if extreme == "max" else rolling.min()).to_numpy()[::-1]
+    result[:-1] = ahead[1:]
+    return result
+
+
+def first_crossing(values: np.ndarray, starts: np.ndarray, levels: np.ndarray, below: bool) -> np.ndarray:
+    """
+    First bar j >= start with values[j] < level (below=True) or > level.
+
+    All queries are answered together by binary lifting over a sparse table
+    of range minima (maxima): O((n + queries) log n). NaN values and levels
+    never cross.
+
+    Args:
+        values: Price array
+        starts: First bar to check for each query
+        levels: Level for each query
+        below: Look for a close below (True) or above (False) the level
+
+    Returns:
+        Crossing bar for each query (len(values) if none)
+    """
+    n = len(values)
+    pos = np.asarray(starts, dtype=np.int64).copy()
+    if n == 0 or len(pos) == 0:
+        return np.minimum(pos, n)
+
+    if below:
+        reduce, table = np.minimum, np.where(np.isnan(values), np.inf, values)
+    else:
+        reduce, table = np.maximum, np.where(np.isnan(values), -np.inf, values)
+
+    # tables[p][j]: extreme of values[j : j + 2**p]; the extra slot at n never crosses
+    tables = [np.append(table, np.inf if below else -np.inf)]
+    while 2 ** len(tables) <= n:
+        step = 2 ** (len(tables) - 1)
+        prev = tables[-1]
+        tables.append(np.append(reduce(prev[:-step], prev[step:]), prev[-step:]))
+
+    for p in reversed(range(len(tables))):
+        block = tables[p][np.minimum(pos, n)]
+        crosses = block < levels if below else block > levels
+        # Skip the whole block when no bar in it crosses
+        pos = np.where((pos < n) & ~crosses, np.minimum(pos + 2**p, n), pos)
+    return pos
 
 class OrderBlockDetector:
     """
@@ -49,36 +125,31 @@ class OrderBlockDetector:
             - ob_bearish_low: Bearish OB low
             - ob_type: Type of OB (bullish/bearish/None)
         """
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
 
-        # Initialize columns
-        df["ob_bullish_high"] = np.nan
-        df["ob_bullish_low"] = np.nan
-        df["ob_bearish_high"] = np.nan
-        df["ob_bearish_low"] = np.nan
-        df["ob_type"] = None
-
-        # Detect bullish Order Blocks
+        # Detect bullish and bearish Order Blocks
         bullish_obs = self._detect_bullish_order_blocks(df)
-
-        # Detect bearish Order Blocks
         bearish_obs = self._detect_bearish_order_blocks(df)
 
-        # Mark Order Blocks in dataframe
-        for ob in bullish_obs:
-            idx = ob["index"]
-            df.loc[idx, "ob_bullish_high"] = ob["high"]
-            df.loc[idx, "ob_bullish_low"] = ob["low"]
-            df.loc[idx, "ob_type"] = "bullish"
-
-        for ob in bearish_obs:
-            idx = ob["index"]
-            df.loc[idx, "ob_bearish_high"] = ob["high"]
-            df.loc[idx, "ob_bearish_low"] = ob["low"]
-            df.loc[idx, "ob_type"] = "bearish"
-
-        # Forward fill Order Block levels until they're invalidated
-        self._forward_fill_order_blocks(df, bullish_obs + bearish_obs)
+        # Mark Order Blocks and forward fill their levels until invalidated
+        close = df["close"].to_numpy(dtype=np.float64)
+        bullish_marks, bullish_fills = self._forward_fill_order_blocks(close, bullish_obs)
+        bearish_marks, bearish_fills = self._forward_fill_order_blocks(close, bearish_obs)
+        bullish_owner = np.where(bullish_fills >= 0, bullish_fills, bullish_marks)
+        bearish_owner = np.where(bearish_fills >= 0, bearish_fills, bearish_marks)
+
+        df["ob_bullish_high"] = self._block_levels(bullish_obs, bullish_owner, "high")
+        df["ob_bullish_low"] = self._block_levels(bullish_obs, bullish_owner, "low")
+        df["ob_bearish_high"] = self._block_levels(bearish_obs, bearish_owner, "high")
+        df["ob_bearish_low"] = self._block_levels(bearish_obs, bearish_owner, "low")
+
+        # Later writes win: bullish marks, bearish marks, bullish fills, bearish fills
+        ob_type = np.full(len(df), None, dtype=object)
+        ob_type[bullish_marks >= 0] = "bullish"
+        ob_type[bearish_marks >= 0] = "bearish"
+        ob_type[bullish_fills >= 0] = "bullish"
+        ob_type[bearish_fills >= 0] = "bearish"
+        df["ob_type"] = ob_type
 
         # Store active blocks if requested
         if store_active:
@@ -98,28 +169,9 @@ class OrderBlockDetector:
         Returns:
             List of Order Block dictionaries
         """
-        order_blocks = []
-        df = dataframe.copy()
-
-        # Calculate price change percentage
-        df["price_change_pct"] = df["close"].pct_change() * 100
-
-        for i in range(self.lookback, len(df) - self.max_candles):
-            # Look for upward impulse
-            future_max = df["high"].iloc[i + 1 : i + self.lookback + 1].max()
-            current_close = df["close"].iloc[i]
-
-            if future_max > current_close:
-                impulse_pct = ((future_max - current_close) / current_close) * 100
-
-                if impulse_pct >= self.impulse_threshold_pct:
-                    # Found impulse, look back for consolidation
-                    ob = self._find_consolidation_before_impulse(df, i, direction="bullish")
-                    if ob:
-                        ob["index"] = i
-                        order_blocks.append(ob)
-
-        return order_blocks
+        # Look for upward impulse to the highest high of the next `lookback` bars
+        future_max = forward_extreme(dataframe["high"].to_numpy(dtype=np.float64), self.lookback, "max")
+        return self._detect_order_blocks(dataframe, future_max, "bullish")
 
     def _detect_bearish_order_blocks(self, dataframe: pd.DataFrame) -> list[dict]:
         """
@@ -133,115 +185,139 @@ class OrderBlockDetector:
         Returns:
             List of Order Block dictionaries
         """
-        order_blocks = []
-        df = dataframe.copy()
-
-        # Calculate price change percentage
-        df["price_change_pct"] = df["close"].pct_change() * 100
+        # Look for downward impulse to the lowest low of the next `lookback` bars
+        future_min = forward_extreme(dataframe["low"].to_numpy(dtype=np.float64), self.lookback, "min")
+        return self._detect_order_blocks(dataframe, future_min, "bearish")
 
-        for i in range(self.lookback, len(df) - self.max_candles):
-            # Look for downward impulse
-            future_min = df["low"].iloc[i + 1 : i + self.lookback + 1].min()
-            current_close = df["close"].iloc[i]
-
-            if future_min < current_close:
-                impulse_pct = ((current_close - future_min) / current_close) * 100
+    def _detect_order_blocks(self, dataframe: pd.DataFrame, future_extreme: np.ndarray, direction: str) -> list[dict]:
+        """
+        Build Order Blocks at impulse bars preceded by a consolidation.
 
-                if impulse_pct >= self.impulse_threshold_pct:
-                    # Found impulse, look back for consolidation
-                    ob = self._find_consolidation_before_impulse(df, i, direction="bearish")
-                    if ob:
-                        ob["index"] = i
-                        order_blocks.append(ob)
+        Args:
+            dataframe: DataFrame with OHLCV data
+            future_extreme: Forward max (bullish) or min (bearish) for each bar
+            direction: 'bullish' or 'bearish'
 
-        return order_blocks
+        Returns:
+            List of Order Block dictionaries ordered by index
+        """
+        bars = np.arange(self.lookback, len(dataframe) - self.max_candles)
+        if len(bars) == 0:
+            return []
+
+        close = dataframe["close"].to_numpy(dtype=np.float64)
+        current_close = close[bars]
+        future = future_extreme[bars]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if direction == "bullish":
+                impulse_pct = ((future - current_close) / current_close) * 100
+                impulse = (future > current_close) & (impulse_pct >= self.impulse_threshold_pct)
+            else:
+                impulse_pct = ((current_close - future) / current_close) * 100
+                impulse = (future < current_close) & (impulse_pct >= self.impulse_threshold_pct)
+
+        # Found impulse, look back for consolidation
+        bars = bars[impulse]
+        is_block, high_range, low_range = self._find_consolidation_before_impulse(dataframe, bars)
+
+        return [
+            {
+                "high": high,
+                "low": low,
+                "type": direction,
+                "start_index": max(0, i - self.max_candles),
+                "end_index": i,
+                "impulse_start": i,
+                "index": i,
+            }
+            for i, high, low in zip(bars[is_block].tolist(), high_range[is_block], low_range[is_block])
+        ]
 
     def _find_consolidation_before_impulse(
-        self, dataframe: pd.DataFrame, impulse_start_idx: int, direction: str
-    ) -> Optional[dict]:
+        self, dataframe: pd.DataFrame, impulse_bars: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
-        Find consolidation zone before an impulse.
+        Find consolidation zones before impulses.
+
+        The zone of an impulse at bar i spans the up to max_candles bars
+        before it; it is an Order Block when it has at least min_candles
+        bars and its range is at most 1.5x the average candle range.
 
         Args:
             dataframe: DataFrame with OHLCV data
-            impulse_start_idx: Index where impulse starts
-            direction: 'bullish' or 'bearish'
+            impulse_bars: Bars where impulses start
 
         Returns:
-            Order Block dictionary or None
+            Tuple of (is Order Block mask, zone high, zone low) per impulse bar
         """
-        # Look back for consolidation
-        start_idx = max(0, impulse_start_idx - self.max_candles)
-        end_idx = impulse_start_idx
+        empty = np.zeros(len(impulse_bars))
+        if len(impulse_bars) == 0 or self.max_candles <= 0:
+            return empty.astype(bool), empty, empty
 
-        if end_idx - start_idx < self.min_candles:
-            return None
+        # Windows of the max_candles bars before each bar, NaN-padded at the start
+        def windows(column: str) -> np.ndarray:
+            padded = np.concatenate([np.full(self.max_candles, np.nan), dataframe[column].to_numpy(dtype=np.float64)])
+            return sliding_window_view(padded, self.max_candles)[impulse_bars]
 
-        # Check consolidation: low volatility, sideways movement
-        consolidation_range = dataframe.iloc[start_idx:end_idx]
+        highs, lows, closes = windows("high"), windows("low"), windows("close")
 
-        # Calculate volatility (ATR normalized)
-        high_range = consolidation_range["high"].max()
-        low_range = consolidation_range["low"].min()
-        range_pct = ((high_range - low_range) / consolidation_range["close"].mean()) * 100
+        # Volatility of the zone, NaN-skipping like pandas
+        high_range = np.fmax.reduce(highs, axis=1)
+        low_range = np.fmin.reduce(lows, axis=1)
+        counts = (~np.isnan(closes)).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_close = np.where(np.isnan(closes), 0.0, closes).sum(axis=1) / counts
+            range_pct = ((high_range - low_range) / mean_close) * 100
 
         # Check if range is small enough (consolidation)
+        enough_candles = np.minimum(impulse_bars, self.max_candles) >= self.min_candles
+        return enough_candles & ~(range_pct > self._average_range_pct(dataframe) * 1.5), high_range, low_range
+
+    def _average_range_pct(self, dataframe: pd.DataFrame) -> float:
+        """Average candle range as percentage of the average close."""
         avg_range = (dataframe["high"] - dataframe["low"]).mean()
-        avg_range_pct = (avg_range / dataframe["close"].mean()) * 100
-
-        if range_pct > avg_range_pct * 1.5:
-            return None  # Too volatile for consolidation
-
-        # Valid Order Block
-        return {
-            "high": high_range,
-            "low": low_range,
-            "type": direction,
-            "start_index": start_idx,
-            "end_index": end_idx,
-            "impulse_start": impulse_start_idx,
-        }
-
-    def _forward_fill_order_blocks(self, dataframe: pd.DataFrame, order_blocks: list[dict]):
+        return (avg_range / dataframe["close"].mean()) * 100
+
+    def _forward_fill_order_blocks(self, close: np.ndarray, order_blocks: list[dict]) -> tuple[np.ndarray, np.ndarray]:
         """
         Forward fill Order Block levels until invalidated.
 
-        An OB is invalidated when:
-        - Price closes beyond the OB (bullish OB: close below low, bearish OB: close above high)
-        - Price has moved significantly away from OB
+        An OB is invalidated when price closes beyond the OB
+        (bullish OB: close below low, bearish OB: close above high).
+        Blocks are applied in list order, so a later block overwrites an
+        earlier one on the bars both cover.
 
         Args:
-            dataframe: DataFrame to modify
-            order_blocks: List of detected Order Blocks
+            close: Close prices
+            order_blocks: Detected Order Blocks of one type (ordered by index)
+
+        Returns:
+            Tuple of (block marked at each bar, block filled at each bar),
+            as positions in order_blocks (-1 for none)
         """
-        for ob in order_blocks:
-            ob_type = ob["type"]
-            ob_high = ob["high"]
-            ob_low = ob["low"]
-            start_idx = ob["index"]
-
-            # Forward fill until invalidated
-            for i in range(start_idx + 1, len(dataframe)):
-                current_close = dataframe.loc[dataframe.index[i], "close"]
-
-                # Check invalidation
-                if ob_type == "bullish":
-                    # Bullish OB invalidated if close below low
-                    if current_close < ob_low:
-                        break
-                    # Keep OB active
-                    dataframe.loc[dataframe.index[i], "ob_bullish_high"] = ob_high
-                    dataframe.loc[dataframe.index[i], "ob_bullish_low"] = ob_low
-                    dataframe.loc[dataframe.index[i], "ob_type"] = "bullish"
-
-                elif ob_type == "bearish":
-                    # Bearish OB invalidated if close above high
-                    if current_close > ob_high:
-                        break
-                    # Keep OB active
-                    dataframe.loc[dataframe.index[i], "ob_bearish_high"] = ob_high
-                    dataframe.loc[dataframe.index[i], "ob_bearish_low"] = ob_low
-                    dataframe.loc[dataframe.index[i], "ob_type"] = "bearish"
+        marks = np.full(len(close), -1, dtype=np.int64)
+        fills = np.full(len(close), -1, dtype=np.int64)
+        if not order_blocks:
+            return marks, fills
+
+        index = np.array([ob["index"] for ob in order_blocks])
+        marks[index] = np.arange(len(order_blocks))
+
+        if order_blocks[0]["type"] == "bullish":
+            ends = first_crossing(close, index + 1, np.array([ob["low"] for ob in order_blocks]), below=True)
+        else:
+            ends = first_crossing(close, index + 1, np.array([ob["high"] for ob in order_blocks]), below=False)
+
+        for k, (start, end) in enumerate(zip((index + 1).tolist(), ends.tolist())):
+            fills[start:end] = k
+        return marks, fills
+
+    @staticmethod
+    def _block_levels(order_blocks: list[dict], owner: np.ndarray, key: str) -> np.ndarray:
+        """Level `key` of the block owning each bar (NaN where none)."""
+        # Owner -1 picks the trailing NaN
+        levels = np.array([ob[key] for ob in order_blocks] + [np.nan], dtype=np.float64)
+        return levels[owner]
 
     def _get_active_blocks(self, dataframe: pd.DataFrame, order_blocks: list[dict]) -> list[dict]:
         """
@@ -256,19 +332,19 @@ class OrderBlockDetector:
         """
         active = []
         current_idx = len(dataframe) - 1
+        if current_idx < 0:
+            return active
+        current_close = dataframe["close"].iat[current_idx]
 
         for ob in order_blocks:
             if ob["index"] >= current_idx:
                 continue
 
             # Check if OB is still active
-            ob_type = ob["type"]
-            current_close = dataframe.loc[dataframe.index[current_idx], "close"]
-
-            if ob_type == "bullish":
+            if ob["type"] == "bullish":
                 if current_close >= ob["low"]:
                     active.append(ob)
-            elif ob_type == "bearish" and current_close <= ob["high"]:
+            elif ob["type"] == "bearish" and current_close <= ob["high"]:
                 active.append(ob)
 
         return active
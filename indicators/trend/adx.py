@@ -6,6 +6,8 @@ Measures trend strength and direction using DI+, DI-, and ADX.
 import numpy as np
 import pandas as pd
 
+from utils.candles import as_dataframe
+
 
 class ADXCalculator:
     """
@@ -49,7 +51,7 @@ class ADXCalculator:
         if period is None:
             period = self.period
 
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
 
         # Step 1: Calculate True Range (TR)
         df['high_low'] = df['high'] - df['low']
@@ -6,6 +6,8 @@ Creates dynamic support/resistance channels based on highest high and lowest low
 import numpy as np
 import pandas as pd
 
+from utils.candles import as_dataframe
+
 
 class DonchianChannelCalculator:
     """
@@ -51,7 +53,7 @@ class DonchianChannelCalculator:
         if period is None:
             period = self.period
 
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
 
         # Calculate upper and lower bands
         df['dc_upper'] = df['high'].rolling(window=period).max()
@@ -160,7 +162,7 @@ class DonchianChannelCalculator:
         Returns:
             DataFrame with multiple channel columns
         """
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
 
         for period in periods:
             df[f'dc_upper_{period}'] = df['high'].rolling(window=period).max()
@@ -6,6 +6,8 @@ Measures accumulation/distribution by tracking cumulative volume flow.
 import numpy as np
 import pandas as pd
 
+from utils.candles import as_dataframe
+
 
 class OBVCalculator:
     """
@@ -45,7 +47,7 @@ class OBVCalculator:
         if ma_period is None:
             ma_period = self.ma_period
 
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
 
         # Calculate price changes
         df['price_change'] = df['close'].diff()
@@ -171,7 +173,7 @@ class OBVCalculator:
             - obv_oscillator_signal: Short MA of oscillator
             - obv_oscillator_histogram: Oscillator - Signal
         """
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
 
         if 'obv' not in df.columns:
             df = self.calculate_obv(df)
@@ -298,7 +300,7 @@ class OBVCalculator:
         Returns:
             DataFrame with normalized_obv column
         """
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
 
         if 'obv' not in df.columns:
             df = self.calculate_obv(df)
@@ -7,6 +7,8 @@ import numpy as np
 import pandas as pd
 from datetime import datetime, time
 
+from utils.candles import as_dataframe
+
 
 class VWAPCalculator:
     """
@@ -58,7 +60,7 @@ class VWAPCalculator:
         if reset_daily is None:
             reset_daily = self.reset_daily
 
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
 
         # Ensure index is datetime
         if not isinstance(df.index, pd.DatetimeIndex):
@@ -146,7 +148,7 @@ class VWAPCalculator:
         Returns:
             DataFrame with vwap_cross column ('bullish', 'bearish', None)
         """
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
 
         if 'vwap' not in df.columns:
             df = self.calculate_vwap(df)
@@ -175,7 +177,7 @@ class VWAPCalculator:
         Returns:
             Series with bounce signals ('bullish_bounce', 'bearish_bounce', None)
         """
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
         bounce = pd.Series(None, index=df.index, dtype=object)
 
         for i in range(2, len(df)):
@@ -250,7 +252,7 @@ class VWAPCalculator:
         Returns:
             DataFrame with multiple VWAP columns
         """
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
 
         # Calculate typical price
         df['typical_price'] = (df['high'] + df['low'] + df['close']) / 3
@@ -0,0 +1,154 @@
+"""
+Rolling price histograms shared by Volume Profile, Market Profile and TPO.
+
+The profile calculators bin every rolling window of bars into `bins` price
+levels spanning that window's own low/high, then read POC, Value Area and
+node levels off the histogram. Instead of slicing each window and looping
+over its rows, `rolling_histograms` builds the histograms of all windows at
+once: window ranges come from sliding min/max, bin indices from one
+broadcast comparison against every window's edges, and the per-bin sums
+from a single scatter-add whose order matches the per-row loop (so results
+are bit-identical to the original implementation).
+"""
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Upper bound for windows x bars x edges cells materialized per chunk
+DEFAULT_CHUNK_CELLS = 4_000_000
+
+
+@dataclass
+class ProfileChunk:
+    """Histograms of consecutive rolling windows."""
+
+    rows: np.ndarray  # Row index of the last bar of each window
+    price_min: np.ndarray  # Window low
+    price_max: np.ndarray  # Window high
+    centers: np.ndarray  # (windows, bins) bin centers
+    hist: np.ndarray  # (windows, bins) weight per bin
+    first_touch: Optional[np.ndarray] = None  # (windows, bins) first bar (in window) covering the bin
+
+    @property
+    def flat(self) -> np.ndarray:
+        """Windows whose low equals their high (no price range to bin)."""
+        return self.price_min == self.price_max
+
+
+def window_edges(price_min: np.ndarray, price_max: np.ndarray, bins: int) -> np.ndarray:
+    """Bin edges of each window, computed exactly like np.linspace(min, max, bins + 1)."""
+    step = (price_max - price_min) / bins
+    edges = np.arange(bins + 1)[None, :] * step[:, None] + price_min[:, None]
+    edges[:, -1] = price_max
+    return edges
+
+
+def _bin_index(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """np.searchsorted(edges[w], values[w, j]) for every window w (NaN sorts last)."""
+    index = (edges[:, None, :] < values[:, :, None]).sum(axis=2)
+    return np.where(np.isnan(values), edges.shape[1], index)
+
+
+def rolling_histograms(
+    low: np.ndarray,
+    high: np.ndarray,
+    weight: np.ndarray,
+    window: int,
+    bins: int,
+    inclusive: bool = False,
+    track_first_touch: bool = False,
+    chunk_cells: int = DEFAULT_CHUNK_CELLS,
+) -> Iterator[ProfileChunk]:
+    """
+    Histograms of every window of `window` bars ending at rows window-1 .. n-1.
+
+    Each bar covers the bins between searchsorted(edges, low) and
+    searchsorted(edges, high), clipped to the histogram:
+    - inclusive=False (volume profiles): weight / (high_bin - low_bin) is added
+      to bins low_bin .. high_bin - 1, or the full weight to low_bin when both
+      fall into one bin;
+    - inclusive=True (TPO): the full weight is added to bins low_bin .. high_bin.
+
+    Args:
+        low, high, weight: Per-bar arrays
+        window: Bars per window
+        bins: Price levels per histogram
+        inclusive: Include the high bin (TPO counting)
+        track_first_touch: Also return the first bar covering each bin
+        chunk_cells: Memory bound for the bin search of one chunk
+
+    Yields:
+        ProfileChunk for consecutive groups of windows
+    """
+    low = np.asarray(low, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    weight = np.asarray(weight, dtype=np.float64)
+    n = len(low)
+    if window <= 0 or n < window:
+        return
+
+    lows = sliding_window_view(low, window)
+    highs = sliding_window_view(high, window)
+    weights = sliding_window_view(weight, window)
+    # pandas min()/max() skip NaN
+    price_min = np.nanmin(lows, axis=1)
+    price_max = np.nanmax(highs, axis=1)
+
+    per_chunk = max(1, chunk_cells // (window * (bins + 1)))
+    for start in range(0, len(lows), per_chunk):
+        stop = min(start + per_chunk, len(lows))
+        pmin, pmax = price_min[start:stop], price_max[start:stop]
+        edges = window_edges(pmin, pmax, bins)
+
+        low_bin = np.clip(_bin_index(lows[start:stop], edges), 0, bins - 1)
+        high_bin = np.clip(_bin_index(highs[start:stop], edges), 0, bins - 1)
+        if inclusive:
+            end = np.maximum(high_bin + 1, low_bin)
+            amount = weights[start:stop]
+        else:
+            spread = high_bin > low_bin
+            end = np.where(spread, high_bin, low_bin + 1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                amount = np.where(spread, weights[start:stop] / (high_bin - low_bin), weights[start:stop])
+
+        # Expand (window, bar) pairs into (window, bin) cells in window-major,
+        # bar order, so each bin accumulates its bars in the same order as a loop
+        length = (end - low_bin).ravel()
+        pair = np.repeat(np.arange(length.size), length)
+        offset = np.arange(pair.size) - np.repeat(np.cumsum(length) - length, length)
+        window_idx = pair // window
+        cell = window_idx * bins + low_bin.ravel()[pair] + offset
+
+        hist = np.zeros((stop - start) * bins)
+        np.add.at(hist, cell, amount.ravel()[pair])
+
+        first_touch = None
+        if track_first_touch:
+            first_touch = np.full((stop - start) * bins, window, dtype=np.int64)
+            np.minimum.at(first_touch, cell, pair % window)
+            first_touch = first_touch.reshape(-1, bins)
+
+        yield ProfileChunk(
+            rows=np.arange(start, stop) + window - 1,
+            price_min=pmin,
+            price_max=pmax,
+            centers=(edges[:, :-1] + edges[:, 1:]) / 2,
+            hist=hist.reshape(-1, bins),
+            first_touch=first_touch,
+        )
+
+
+def window_histogram(
+    low: np.ndarray,
+    high: np.ndarray,
+    weight: np.ndarray,
+    bins: int,
+    inclusive: bool = False,
+    track_first_touch: bool = False,
+) -> Optional[ProfileChunk]:
+    """Histogram of all bars as a single window (None for empty input)."""
+    return next(rolling_histograms(low, high, weight, len(low), bins, inclusive, track_first_touch), None)
@@ -8,6 +8,9 @@ from typing import Optional
 import numpy as np
 import pandas as pd
 
+from indicators.volume_profile.rolling_profile import rolling_histograms, window_histogram
+from utils.candles import as_dataframe
+
 
 class VolumeProfileCalculator:
     """
@@ -52,7 +55,7 @@ class VolumeProfileCalculator:
             - vp_lvn: Low Volume Nodes (list)
             - vp_total_volume: Total volume in profile
         """
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
 
         # Initialize columns
         df["vp_poc"] = np.nan
@@ -72,18 +75,34 @@ class VolumeProfileCalculator:
             # Add HVN and LVN as lists (stored in last row)
             df.loc[df.index[-1], "vp_hvn"] = str(profile["hvn"])
             df.loc[df.index[-1], "vp_lvn"] = str(profile["lvn"])
-        else:
-            # Rolling calculation
-            for i in range(period, len(df)):
-                period_data = df.iloc[i - period : i + 1]
-                profile = self._calculate_profile_for_period(period_data)
-
-                df.loc[df.index[i], "vp_poc"] = profile["poc"]
-                df.loc[df.index[i], "vp_vah"] = profile["vah"]
-                df.loc[df.index[i], "vp_val"] = profile["val"]
-                df.loc[df.index[i], "vp_total_volume"] = profile["total_volume"]
-                df.loc[df.index[i], "vp_hvn"] = str(profile["hvn"])
-                df.loc[df.index[i], "vp_lvn"] = str(profile["lvn"])
+        elif len(df) > period:
+            # Rolling calculation: histograms of all windows are built at once
+            n = len(df)
+            poc, vah, val = np.full(n, np.nan), np.full(n, np.nan), np.full(n, np.nan)
+            total_volume = np.zeros(n)
+            hvn = np.full(n, np.nan, dtype=object)
+            lvn = np.full(n, np.nan, dtype=object)
+
+            chunks = rolling_histograms(
+                df["low"].to_numpy(), df["high"].to_numpy(), df["volume"].to_numpy(), period + 1, self.bins
+            )
+            volumes = df["volume"].to_numpy()
+            for chunk in chunks:
+                for k, i in enumerate(chunk.rows):
+                    if chunk.flat[k]:
+                        profile = self._flat_profile(chunk.price_min[k], np.nansum(volumes[i - period : i + 1]))
+                    else:
+                        profile = self._profile_from_histogram(chunk.hist[k], chunk.centers[k])
+                    poc[i], vah[i], val[i] = profile["poc"], profile["vah"], profile["val"]
+                    total_volume[i] = profile["total_volume"]
+                    hvn[i], lvn[i] = str(profile["hvn"]), str(profile["lvn"])
+
+            df["vp_poc"] = poc
+            df["vp_vah"] = vah
+            df["vp_val"] = val
+            df["vp_total_volume"] = total_volume
+            df["vp_hvn"] = hvn
+            df["vp_lvn"] = lvn
 
         return df
 
@@ -106,51 +125,30 @@ class VolumeProfileCalculator:
         if len(dataframe) == 0:
             return {"poc": np.nan, "vah": np.nan, "val": np.nan, "hvn": [], "lvn": [], "total_volume": 0.0}
 
-        # Get price range
-        price_min = dataframe["low"].min()
-        price_max = dataframe["high"].max()
-
-        if price_min == price_max:
+        chunk = window_histogram(
+            dataframe["low"].to_numpy(), dataframe["high"].to_numpy(), dataframe["volume"].to_numpy(), self.bins
+        )
+        if chunk.flat[0]:
             # Flat price, return midpoint
-            midpoint = (price_min + price_max) / 2
-            return {
-                "poc": midpoint,
-                "vah": midpoint,
-                "val": midpoint,
-                "hvn": [],
-                "lvn": [],
-                "total_volume": dataframe["volume"].sum(),
-            }
-
-        # Create price bins
-        bin_edges = np.linspace(price_min, price_max, self.bins + 1)
-        bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
-
-        # Distribute volume across bins
-        volume_by_bin = np.zeros(self.bins)
-
-        for _idx, row in dataframe.iterrows():
-            low = row["low"]
-            high = row["high"]
-            volume = row["volume"]
-
-            # Find bins that this candle covers
-            low_bin = np.searchsorted(bin_edges, low)
-            high_bin = np.searchsorted(bin_edges, high)
-
-            # Ensure indices are within bounds
-            low_bin = max(0, min(low_bin, self.bins - 1))
-            high_bin = max(0, min(high_bin, self.bins - 1))
-
-            # Distribute volume evenly across covered bins
-            if high_bin > low_bin:
-                bins_covered = high_bin - low_bin
-                volume_per_bin = volume / bins_covered
-                volume_by_bin[low_bin:high_bin] += volume_per_bin
-            else:
-                # Single bin
-                volume_by_bin[low_bin] += volume
+            return self._flat_profile(chunk.price_min[0], dataframe["volume"].sum())
+        return self._profile_from_histogram(chunk.hist[0], chunk.centers[0])
+
+    @staticmethod
+    def _flat_profile(price: float, total_volume: float) -> dict:
+        """Profile of a period without price range."""
+        return {"poc": price, "vah": price, "val": price, "hvn": [], "lvn": [], "total_volume": total_volume}
+
+    def _profile_from_histogram(self, volume_by_bin: np.ndarray, bin_centers: np.ndarray) -> dict:
+        """
+        Read POC, Value Area, HVN and LVN off a volume histogram.
 
+        Args:
+            volume_by_bin: Volume distribution across bins
+            bin_centers: Center prices of bins
+
+        Returns:
+            Dictionary with profile data (see _calculate_profile_for_period)
+        """
         # Find POC (bin with maximum volume)
         poc_bin = np.argmax(volume_by_bin)
         poc = bin_centers[poc_bin]
@@ -167,8 +165,8 @@ class VolumeProfileCalculator:
         hvn_threshold = avg_volume * self.hvn_threshold_multiplier
         lvn_threshold = avg_volume * self.lvn_threshold_multiplier
 
-        hvn = [bin_centers[i] for i in range(self.bins) if volume_by_bin[i] >= hvn_threshold]
-        lvn = [bin_centers[i] for i in range(self.bins) if volume_by_bin[i] <= lvn_threshold and volume_by_bin[i] > 0]
+        hvn = list(bin_centers[volume_by_bin >= hvn_threshold])
+        lvn = list(bin_centers[(volume_by_bin <= lvn_threshold) & (volume_by_bin > 0)])
 
         return {"poc": poc, "vah": vah, "val": val, "hvn": hvn, "lvn": lvn, "total_volume": total_volume}
 
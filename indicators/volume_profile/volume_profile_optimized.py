@@ -8,6 +8,7 @@ from typing import Optional
 import numpy as np
 import pandas as pd
 
+from utils.candles import as_dataframe
 from utils.performance import global_cache, global_profiler, vectorized_volume_distribution
 
 
@@ -54,7 +55,7 @@ class VolumeProfileCalculatorOptimized:
         """
         global_profiler.start("volume_profile_calc")
 
-        df = dataframe.copy()
+        df = as_dataframe(dataframe)
 
         # Initialize columns
         df["vp_poc"] = np.nan
@@ -2,7 +2,14 @@
 
 __all__ = ["LSTMSignalGenerator"]
 
-try:
-    from ml.lstm_signal_generator import LSTMSignalGenerator
-except ImportError:
-    LSTMSignalGenerator = None
+
+def __getattr__(name):
+    # Lazy: importing ml.lightgbm_model must not pull in the LSTM stack
+    if name == "LSTMSignalGenerator":
+        try:
+            from ml.lstm_signal_generator import LSTMSignalGenerator
+        except ImportError:
+            LSTMSignalGenerator = None
+        globals()[name] = LSTMSignalGenerator
+        return LSTMSignalGenerator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -16,18 +16,14 @@ import numpy as np
 import pandas as pd
 
 from ml.lstm_signal_generator import LSTMSignalGenerator
+from utils.lazy_import import module_available
 from utils.logger_config import setup_logging
 
 logger = setup_logging()
 
-try:
-    from sklearn.ensemble import RandomForestClassifier
-    from sklearn.model_selection import train_test_split
-    from sklearn.metrics import accuracy_score
-
-    HAS_SKLEARN = True
-except ImportError:
-    HAS_SKLEARN = False
+# sklearn/tensorflow are imported by the models on first use
+HAS_SKLEARN = module_available("sklearn")
+HAS_TENSORFLOW = module_available("tensorflow")
 
 try:
     from ml.lightgbm_model import LightGBMSignalGenerator
@@ -36,12 +32,6 @@ except ImportError:
     HAS_LIGHTGBM = False
     LightGBMSignalGenerator = None
 
-try:
-    import tensorflow as tf
-    HAS_TENSORFLOW = True
-except ImportError:
-    HAS_TENSORFLOW = False
-
 
 class EnsembleSignalGenerator:
     """
@@ -201,6 +191,10 @@ class EnsembleSignalGenerator:
         y = y[:min_len]
 
         # Split
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.metrics import accuracy_score
+        from sklearn.model_selection import train_test_split
+
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
 
         # Train
@@ -11,6 +11,7 @@ import warnings
 warnings.filterwarnings("ignore")
 
 from utils.logger_config import setup_logging
+from ml.feature_graph import FeatureGraph, FeatureSet, true_range
 from indicators.trend.adx import ADXCalculator
 from indicators.volume.obv import OBVCalculator
 from indicators.volume.vwap import VWAPCalculator
@@ -19,6 +20,301 @@ from indicators.trend.donchian import DonchianChannelCalculator
 logger = setup_logging()
 
 
+# === Feature graph ===
+# Every feature and shared intermediate is declared once with its inputs;
+# builders below request named columns and the planner computes each node once.
+
+FEATURE_GRAPH = FeatureGraph()
+# Optional Smart Money / order flow columns used by the LightGBM feature set
+FEATURE_GRAPH.source(
+    "ob_bullish_low", "ob_bullish_high", "ob_bearish_low", "ob_bearish_high",
+    "fvg_bullish_low", "fvg_bullish_high", "fvg_bearish_low", "fvg_bearish_high",
+    "market_structure", "delta", "vp_poc", "vp_vah", "vp_val",
+)
+_node = FEATURE_GRAPH.add
+
+# Price
+_node("returns", ["close"], lambda close: close.pct_change())
+_node("log_returns", ["close"], lambda close: np.log(close / close.shift(1)))
+_node("volatility_5", ["returns"], lambda returns: returns.rolling(5).std())
+_node("volatility_20", ["returns"], lambda returns: returns.rolling(20).std())
+_node("volatility_ratio", ["volatility_5", "volatility_20"], lambda v5, v20: v5 / v20)
+_node("hl_ratio", ["high", "low", "close"], lambda high, low, close: (high - low) / close)
+_node("co_ratio", ["open", "close"], lambda open_, close: (close - open_) / open_)
+for _period in [5, 10, 20]:
+    _node(f"momentum_{_period}", ["close"], lambda close, p=_period: close / close.shift(p) - 1)
+
+# Moving averages
+for _period in [5, 10, 20, 50]:
+    _node(f"sma_{_period}", ["close"], lambda close, p=_period: close.rolling(p).mean())
+    _node(f"sma_{_period}_ratio", ["close", f"sma_{_period}"], lambda close, sma: close / sma)
+for _period in [5, 10, 12, 20, 26, 50]:
+    _node(f"ema_{_period}", ["close"], lambda close, p=_period: close.ewm(span=p, adjust=False).mean())
+for _period in [5, 10, 20, 50]:
+    _node(f"ema_{_period}_ratio", ["close", f"ema_{_period}"], lambda close, ema: close / ema)
+
+# MACD
+_node("macd", ["ema_12", "ema_26"], lambda ema_12, ema_26: ema_12 - ema_26)
+_node("macd_signal", ["macd"], lambda macd: macd.ewm(span=9, adjust=False).mean())
+_node("macd_hist", ["macd", "macd_signal"], lambda macd, signal: macd - signal)
+_node(
+    "macd_cross_up", ["macd", "macd_signal"],
+    lambda macd, signal: (macd > signal) & (macd.shift(1) <= signal.shift(1)), flags=["macd_cross_up"],
+)
+_node(
+    "macd_cross_down", ["macd", "macd_signal"],
+    lambda macd, signal: (macd < signal) & (macd.shift(1) >= signal.shift(1)), flags=["macd_cross_down"],
+)
+
+# RSI (rsi_safe guards against zero average loss)
+_node("close_delta", ["close"], lambda close: close.diff())
+_node("rsi_gain", ["close_delta"], lambda delta: delta.where(delta > 0, 0).rolling(window=14).mean())
+_node("rsi_loss", ["close_delta"], lambda delta: (-delta.where(delta < 0, 0)).rolling(window=14).mean())
+_node("rsi", ["rsi_gain", "rsi_loss"], lambda gain, loss: 100 - (100 / (1 + gain / loss)))
+_node("rsi_safe", ["rsi_gain", "rsi_loss"], lambda gain, loss: 100 - (100 / (1 + gain / (loss + 1e-10))))
+_node("rsi_oversold", ["rsi_safe"], lambda rsi: rsi < 30, flags=["rsi_oversold"])
+_node("rsi_overbought", ["rsi_safe"], lambda rsi: rsi > 70, flags=["rsi_overbought"])
+
+# Bollinger Bands
+_node("std_20", ["close"], lambda close: close.rolling(20).std())
+_node("bb_upper", ["sma_20", "std_20"], lambda sma, std: sma + (std * 2))
+_node("bb_lower", ["sma_20", "std_20"], lambda sma, std: sma - (std * 2))
+_node("bb_position", ["close", "bb_upper", "bb_lower"], lambda close, upper, lower: (close - lower) / (upper - lower))
+_node(
+    "bb_position_safe", ["close", "bb_upper", "bb_lower"],
+    lambda close, upper, lower: (close - lower) / (upper - lower + 1e-10),
+)
+_node("bb_width", ["bb_upper", "bb_lower", "sma_20"], lambda upper, lower, sma: (upper - lower) / sma)
+
+# ATR (Average True Range)
+_node("true_range", ["high", "low", "close"], true_range)
+_node("atr", ["true_range"], lambda tr: tr.rolling(14).mean())
+_node("atr_ratio", ["atr", "close"], lambda atr, close: atr / close)
+
+# Volume
+for _period in [5, 20]:
+    _node(f"volume_ma_{_period}", ["volume"], lambda volume, p=_period: volume.rolling(p).mean())
+    _node(f"volume_ratio_{_period}", ["volume", f"volume_ma_{_period}"], lambda volume, ma: volume / ma)
+    _node(
+        f"volume_ratio_{_period}_safe", ["volume", f"volume_ma_{_period}"],
+        lambda volume, ma: volume / (ma + 1e-10),
+    )
+    _node(f"vp_corr_{_period}", ["volume", "close"], lambda volume, close, p=_period: volume.rolling(p).corr(close))
+
+# Stochastic Oscillator and price patterns
+_node("low_14", ["low"], lambda low: low.rolling(14).min())
+_node("high_14", ["high"], lambda high: high.rolling(14).max())
+_node(
+    "stoch_k", ["close", "low_14", "high_14"],
+    lambda close, low_14, high_14: 100 * (close - low_14) / (high_14 - low_14 + 1e-10),
+)
+_node("stoch_d", ["stoch_k"], lambda stoch_k: stoch_k.rolling(3).mean())
+_node("higher_high", ["high"], lambda high: high > high.shift(1), flags=["higher_high"])
+_node("lower_low", ["low"], lambda low: low < low.shift(1), flags=["lower_low"])
+_node("bullish_candle", ["open", "close"], lambda open_, close: close > open_, flags=["bullish_candle"])
+_node("body_size", ["open", "close"], lambda open_, close: np.abs(close - open_) / close)
+
+
+def _in_range(close: pd.Series, low: Optional[pd.Series], high: Optional[pd.Series]) -> Any:
+    """Close inside [low, high] (0 when the levels are not in the data)."""
+    if low is None or high is None:
+        return 0
+    return (close >= low) & (close <= high)
+
+
+# Smart Money / order flow columns (0 when not in the data)
+for _kind in ["ob", "fvg"]:
+    for _side in ["bullish", "bearish"]:
+        _name = f"in_{_side}_{_kind}"
+        _node(_name, ["close", f"{_kind}_{_side}_low", f"{_kind}_{_side}_high"], _in_range, flags=[_name])
+for _side in ["bullish", "bearish"]:
+    _node(
+        f"structure_{_side}", ["market_structure"],
+        lambda structure, side=_side: 0 if structure is None else structure.str.lower() == side,
+        flags=[f"structure_{_side}"],
+    )
+_node("delta_filled", ["delta"], lambda delta: 0 if delta is None else delta)
+_node(
+    "delta_normalized", ["delta", "volume"],
+    lambda delta, volume: 0 if delta is None else np.tanh(delta / (volume + 1e-10)),
+)
+_node("cumulative_delta", ["delta"], lambda delta: 0 if delta is None else delta.cumsum())
+_node("delta_ma_5", ["delta"], lambda delta: 0 if delta is None else delta.rolling(5).mean())
+_node("poc_distance", ["close", "vp_poc"], lambda close, poc: 0 if poc is None else (close - poc) / close)
+_node("near_poc", ["vp_poc", "poc_distance"], lambda poc, distance: 0 if poc is None else np.abs(distance) < 0.01,
+      flags=["near_poc"])
+_node("in_value_area", ["close", "vp_val", "vp_vah"], _in_range, flags=["in_value_area"])
+
+
+def _adx_features(ohlcv: pd.DataFrame) -> tuple:
+    """ADX-based trend strength columns."""
+    try:
+        adx_data = ADXCalculator().calculate_adx(ohlcv)
+        adx, di_plus, di_minus = adx_data['adx'], adx_data['di_plus'], adx_data['di_minus']
+        return (
+            adx,
+            di_plus,
+            di_minus,
+            adx > 25,
+            adx < 20,
+            di_plus > di_minus,
+            di_plus - di_minus,
+            di_plus / di_minus.replace(0, np.nan),
+            adx.diff(5) > 0,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to create ADX features: {e}")
+        # Fill with defaults if calculation fails
+        return (0,) * 9
+
+
+def _obv_features(ohlcv: pd.DataFrame) -> tuple:
+    """OBV columns."""
+    try:
+        obv_calc = OBVCalculator()
+        obv_data = obv_calc.calculate_obv(ohlcv)
+        return (
+            obv_calc.normalize_obv(obv_data)['normalized_obv'],
+            obv_data['obv_signal'] == 'bullish',
+            obv_data['obv_signal'] == 'bearish',
+            obv_data['obv_trend'] == 'rising',
+            obv_data['obv_trend'] == 'falling',
+            obv_data['obv_divergence'] == 'bullish',
+            obv_data['obv_divergence'] == 'bearish',
+        )
+    except Exception as e:
+        logger.warning(f"Failed to create OBV features: {e}")
+        return (0,) * 7
+
+
+def _vwap_features(ohlcv: pd.DataFrame) -> tuple:
+    """Cumulative VWAP columns."""
+    try:
+        vwap_data = VWAPCalculator().calculate_vwap(ohlcv, reset_daily=False)
+        return (
+            vwap_data['vwap'],
+            ohlcv['close'] / vwap_data['vwap'],
+            vwap_data['vwap_position'] == 'above',
+            vwap_data['vwap_position'] == 'below',
+            vwap_data['vwap_distance_pct'],
+            ohlcv['close'] > vwap_data['vwap_upper_1std'],
+            ohlcv['close'] < vwap_data['vwap_lower_1std'],
+        )
+    except Exception as e:
+        logger.warning(f"Failed to create VWAP features: {e}")
+        return (0,) * 7
+
+
+def _donchian_features(ohlcv: pd.DataFrame) -> tuple:
+    """Donchian Channel columns."""
+    try:
+        dc_data = DonchianChannelCalculator().calculate_donchian(ohlcv)
+        return (
+            dc_data['dc_position'],
+            dc_data['dc_width'],
+            dc_data['dc_breakout'] == 'upper',
+            dc_data['dc_breakout'] == 'lower',
+            dc_data['dc_trend'] == 'uptrend',
+            dc_data['dc_trend'] == 'downtrend',
+            dc_data['dc_trend'] == 'ranging',
+            dc_data['dc_squeeze'],
+            (dc_data['dc_upper'] - ohlcv['close']) / ohlcv['close'],
+            (ohlcv['close'] - dc_data['dc_lower']) / ohlcv['close'],
+        )
+    except Exception as e:
+        logger.warning(f"Failed to create Donchian Channel features: {e}")
+        return (0,) * 10
+
+
+# Indicator calculators produce several columns per call
+_node(
+    "adx_features", ["frame"], _adx_features,
+    outputs=['adx', 'di_plus', 'di_minus', 'adx_strong_trend', 'adx_weak_trend',
+             'di_bullish', 'di_spread', 'di_ratio', 'adx_rising'],
+    flags=['adx_strong_trend', 'adx_weak_trend', 'di_bullish', 'adx_rising'],
+)
+_node(
+    "obv_features", ["frame"], _obv_features,
+    outputs=['obv_normalized', 'obv_bullish', 'obv_bearish', 'obv_rising',
+             'obv_falling', 'obv_divergence_bullish', 'obv_divergence_bearish'],
+    flags=['obv_bullish', 'obv_bearish', 'obv_rising', 'obv_falling',
+           'obv_divergence_bullish', 'obv_divergence_bearish'],
+)
+_node(
+    "vwap_features", ["frame"], _vwap_features,
+    outputs=['vwap', 'price_to_vwap', 'above_vwap', 'below_vwap',
+             'vwap_distance_pct', 'near_vwap_upper', 'near_vwap_lower'],
+    flags=['above_vwap', 'below_vwap', 'near_vwap_upper', 'near_vwap_lower'],
+)
+_node(
+    "donchian_features", ["frame"], _donchian_features,
+    outputs=['dc_position', 'dc_width', 'dc_breakout_upper', 'dc_breakout_lower',
+             'dc_uptrend', 'dc_downtrend', 'dc_ranging', 'dc_squeeze',
+             'dc_distance_upper', 'dc_distance_lower'],
+    flags=['dc_breakout_upper', 'dc_breakout_lower', 'dc_uptrend', 'dc_downtrend', 'dc_ranging', 'dc_squeeze'],
+)
+
+# === Feature sets ===
+
+PRICE_FEATURES = FeatureSet(FEATURE_GRAPH, [
+    "returns", "log_returns", "volatility_5", "volatility_20", "volatility_ratio",
+    "hl_ratio", "co_ratio", "momentum_5", "momentum_10", "momentum_20",
+])
+VOLUME_FEATURES = FeatureSet(FEATURE_GRAPH, [
+    "volume_ma_5", "volume_ma_20", "volume_ratio_5", "volume_ratio_20", "vp_corr_5", "vp_corr_20",
+])
+TECHNICAL_FEATURES = FeatureSet(FEATURE_GRAPH, [
+    "sma_5", "sma_5_ratio", "sma_10", "sma_10_ratio", "sma_20", "sma_20_ratio", "sma_50", "sma_50_ratio",
+    "ema_12", "ema_26", "macd", "macd_signal", "macd_hist", "rsi",
+    "bb_upper", "bb_lower", "bb_position", "atr", "atr_ratio",
+])
+TREND_STRENGTH_FEATURES = FeatureSet(FEATURE_GRAPH, FEATURE_GRAPH.node_for("adx_features").outputs)
+VOLUME_STRENGTH_FEATURES = FeatureSet(
+    FEATURE_GRAPH,
+    FEATURE_GRAPH.node_for("obv_features").outputs + FEATURE_GRAPH.node_for("vwap_features").outputs,
+)
+CHANNEL_FEATURES = FeatureSet(FEATURE_GRAPH, FEATURE_GRAPH.node_for("donchian_features").outputs)
+
+# create_all_features(use_new_features=False / True)
+BASE_FEATURES = PRICE_FEATURES + VOLUME_FEATURES + TECHNICAL_FEATURES
+ENHANCED_FEATURES = BASE_FEATURES + TREND_STRENGTH_FEATURES + VOLUME_STRENGTH_FEATURES + CHANNEL_FEATURES
+
+# LightGBMSignalGenerator legacy features (with zero-division guards and Smart Money columns)
+LIGHTGBM_FEATURES = FeatureSet(FEATURE_GRAPH, {
+    **{name: name for name in [
+        "returns", "log_returns", "hl_ratio", "co_ratio", "momentum_5", "momentum_10", "momentum_20",
+        "volatility_5", "volatility_20", "volatility_ratio",
+    ]},
+    **{name: name for period in [5, 10, 20, 50] for name in [
+        f"sma_{period}", f"sma_{period}_ratio", f"ema_{period}", f"ema_{period}_ratio",
+    ]},
+    "rsi": "rsi_safe",
+    "rsi_oversold": "rsi_oversold",
+    "rsi_overbought": "rsi_overbought",
+    **{name: name for name in ["macd", "macd_signal", "macd_hist", "macd_cross_up", "macd_cross_down"]},
+    "bb_upper": "bb_upper",
+    "bb_lower": "bb_lower",
+    "bb_position": "bb_position_safe",
+    "bb_width": "bb_width",
+    "atr": "atr",
+    "atr_ratio": "atr_ratio",
+    "volume_ma_5": "volume_ma_5",
+    "volume_ma_20": "volume_ma_20",
+    "volume_ratio_5": "volume_ratio_5_safe",
+    "volume_ratio_20": "volume_ratio_20_safe",
+    "vp_corr": "vp_corr_20",
+    **{name: name for name in [
+        "in_bullish_ob", "in_bearish_ob", "in_bullish_fvg", "in_bearish_fvg",
+        "structure_bullish", "structure_bearish",
+    ]},
+    "delta": "delta_filled",
+    **{name: name for name in [
+        "delta_normalized", "cumulative_delta", "delta_ma_5", "poc_distance", "near_poc", "in_value_area",
+        "stoch_k", "stoch_d", "higher_high", "lower_low", "bullish_candle", "body_size",
+    ]},
+})
+
+
 def create_price_features(ohlcv: pd.DataFrame) -> pd.DataFrame:
     """
     Create price-based features from OHLCV data.
@@ -29,27 +325,7 @@ def create_price_features(ohlcv: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with price features
     """
-    features = pd.DataFrame(index=ohlcv.index)
-
-    # Returns
-    features["returns"] = ohlcv["close"].pct_change()
-    features["log_returns"] = np.log(ohlcv["close"] / ohlcv["close"].shift(1))
-
-    # Volatility
-    features["volatility_5"] = features["returns"].rolling(5).std()
-    features["volatility_20"] = features["returns"].rolling(20).std()
-    features["volatility_ratio"] = features["volatility_5"] / features["volatility_20"]
-
-    # Price ratios
-    features["hl_ratio"] = (ohlcv["high"] - ohlcv["low"]) / ohlcv["close"]
-    features["co_ratio"] = (ohlcv["close"] - ohlcv["open"]) / ohlcv["open"]
-
-    # Momentum
-    features["momentum_5"] = ohlcv["close"] / ohlcv["close"].shift(5) - 1
-    features["momentum_10"] = ohlcv["close"] / ohlcv["close"].shift(10) - 1
-    features["momentum_20"] = ohlcv["close"] / ohlcv["close"].shift(20) - 1
-
-    return features
+    return PRICE_FEATURES.frame(ohlcv)
 
 
 def create_volume_features(ohlcv: pd.DataFrame) -> pd.DataFrame:
@@ -62,21 +338,7 @@ def create_volume_features(ohlcv: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with volume features
     """
-    features = pd.DataFrame(index=ohlcv.index)
-
-    # Volume moving averages
-    features["volume_ma_5"] = ohlcv["volume"].rolling(5).mean()
-    features["volume_ma_20"] = ohlcv["volume"].rolling(20).mean()
-
-    # Volume ratios
-    features["volume_ratio_5"] = ohlcv["volume"] / features["volume_ma_5"]
-    features["volume_ratio_20"] = ohlcv["volume"] / features["volume_ma_20"]
-
-    # Volume-price correlation
-    features["vp_corr_5"] = ohlcv["volume"].rolling(5).corr(ohlcv["close"])
-    features["vp_corr_20"] = ohlcv["volume"].rolling(20).corr(ohlcv["close"])
-
-    return features
+    return VOLUME_FEATURES.frame(ohlcv)
 
 
 def create_technical_features(ohlcv: pd.DataFrame) -> pd.DataFrame:
@@ -89,45 +351,7 @@ def create_technical_features(ohlcv: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with technical features
     """
-    features = pd.DataFrame(index=ohlcv.index)
-
-    # Moving averages
-    for period in [5, 10, 20, 50]:
-        features[f"sma_{period}"] = ohlcv["close"].rolling(period).mean()
-        features[f"sma_{period}_ratio"] = ohlcv["close"] / features[f"sma_{period}"]
-
-    # Exponential moving averages
-    for period in [12, 26]:
-        features[f"ema_{period}"] = ohlcv["close"].ewm(span=period, adjust=False).mean()
-
-    # MACD
-    features["macd"] = features["ema_12"] - features["ema_26"]
-    features["macd_signal"] = features["macd"].ewm(span=9, adjust=False).mean()
-    features["macd_hist"] = features["macd"] - features["macd_signal"]
-
-    # RSI
-    delta = ohlcv["close"].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    features["rsi"] = 100 - (100 / (1 + rs))
-
-    # Bollinger Bands
-    sma_20 = ohlcv["close"].rolling(20).mean()
-    std_20 = ohlcv["close"].rolling(20).std()
-    features["bb_upper"] = sma_20 + (std_20 * 2)
-    features["bb_lower"] = sma_20 - (std_20 * 2)
-    features["bb_position"] = (ohlcv["close"] - features["bb_lower"]) / (features["bb_upper"] - features["bb_lower"])
-
-    # ATR (Average True Range)
-    high_low = ohlcv["high"] - ohlcv["low"]
-    high_close = np.abs(ohlcv["high"] - ohlcv["close"].shift())
-    low_close = np.abs(ohlcv["low"] - ohlcv["close"].shift())
-    true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    features["atr"] = true_range.rolling(14).mean()
-    features["atr_ratio"] = features["atr"] / ohlcv["close"]
-
-    return features
+    return TECHNICAL_FEATURES.frame(ohlcv)
 
 
 def create_trend_strength_features(ohlcv: pd.DataFrame) -> pd.DataFrame:
@@ -140,36 +364,7 @@ def create_trend_strength_features(ohlcv: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with ADX-based trend strength features
     """
-    features = pd.DataFrame(index=ohlcv.index)
-
-    try:
-        adx_calc = ADXCalculator()
-        adx_data = adx_calc.calculate_adx(ohlcv)
-
-        # ADX features
-        features['adx'] = adx_data['adx']
-        features['di_plus'] = adx_data['di_plus']
-        features['di_minus'] = adx_data['di_minus']
-
-        # Derived features
-        features['adx_strong_trend'] = (adx_data['adx'] > 25).astype(int)
-        features['adx_weak_trend'] = (adx_data['adx'] < 20).astype(int)
-        features['di_bullish'] = (adx_data['di_plus'] > adx_data['di_minus']).astype(int)
-        features['di_spread'] = adx_data['di_plus'] - adx_data['di_minus']
-        features['di_ratio'] = adx_data['di_plus'] / adx_data['di_minus'].replace(0, np.nan)
-
-        # ADX trend
-        features['adx_rising'] = adx_data['adx'].diff(5) > 0
-        features['adx_rising'] = features['adx_rising'].astype(int)
-
-    except Exception as e:
-        logger.warning(f"Failed to create ADX features: {e}")
-        # Fill with defaults if calculation fails
-        for col in ['adx', 'di_plus', 'di_minus', 'adx_strong_trend', 'adx_weak_trend',
-                    'di_bullish', 'di_spread', 'di_ratio', 'adx_rising']:
-            features[col] = 0
-
-    return features
+    return TREND_STRENGTH_FEATURES.frame(ohlcv)
 
 
 def create_volume_strength_features(ohlcv: pd.DataFrame) -> pd.DataFrame:
@@ -182,57 +377,7 @@ def create_volume_strength_features(ohlcv: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with OBV and VWAP features
     """
-    features = pd.DataFrame(index=ohlcv.index)
-
-    try:
-        # OBV features
-        obv_calc = OBVCalculator()
-        obv_data = obv_calc.calculate_obv(ohlcv)
-
-        # Normalize OBV
-        obv_normalized = obv_calc.normalize_obv(obv_data)
-        features['obv_normalized'] = obv_normalized['normalized_obv']
-
-        # OBV signal
-        features['obv_bullish'] = (obv_data['obv_signal'] == 'bullish').astype(int)
-        features['obv_bearish'] = (obv_data['obv_signal'] == 'bearish').astype(int)
-
-        # OBV trend
-        features['obv_rising'] = (obv_data['obv_trend'] == 'rising').astype(int)
-        features['obv_falling'] = (obv_data['obv_trend'] == 'falling').astype(int)
-
-        # OBV divergence
-        features['obv_divergence_bullish'] = (obv_data['obv_divergence'] == 'bullish').astype(int)
-        features['obv_divergence_bearish'] = (obv_data['obv_divergence'] == 'bearish').astype(int)
-
-    except Exception as e:
-        logger.warning(f"Failed to create OBV features: {e}")
-        for col in ['obv_normalized', 'obv_bullish', 'obv_bearish', 'obv_rising',
-                    'obv_falling', 'obv_divergence_bullish', 'obv_divergence_bearish']:
-            features[col] = 0
-
-    try:
-        # VWAP features
-        vwap_calc = VWAPCalculator()
-        vwap_data = vwap_calc.calculate_vwap(ohlcv, reset_daily=False)  # Cumulative VWAP
-
-        features['vwap'] = vwap_data['vwap']
-        features['price_to_vwap'] = ohlcv['close'] / vwap_data['vwap']
-        features['above_vwap'] = (vwap_data['vwap_position'] == 'above').astype(int)
-        features['below_vwap'] = (vwap_data['vwap_position'] == 'below').astype(int)
-        features['vwap_distance_pct'] = vwap_data['vwap_distance_pct']
-
-        # VWAP bands
-        features['near_vwap_upper'] = (ohlcv['close'] > vwap_data['vwap_upper_1std']).astype(int)
-        features['near_vwap_lower'] = (ohlcv['close'] < vwap_data['vwap_lower_1std']).astype(int)
-
-    except Exception as e:
-        logger.warning(f"Failed to create VWAP features: {e}")
-        for col in ['vwap', 'price_to_vwap', 'above_vwap', 'below_vwap',
-                    'vwap_distance_pct', 'near_vwap_upper', 'near_vwap_lower']:
-            features[col] = 0
-
-    return features
+    return VOLUME_STRENGTH_FEATURES.frame(ohlcv)
 
 
 def create_channel_features(ohlcv: pd.DataFrame) -> pd.DataFrame:
@@ -245,40 +390,7 @@ def create_channel_features(ohlcv: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with Donchian Channel features
     """
-    features = pd.DataFrame(index=ohlcv.index)
-
-    try:
-        dc_calc = DonchianChannelCalculator()
-        dc_data = dc_calc.calculate_donchian(ohlcv)
-
-        # Channel position
-        features['dc_position'] = dc_data['dc_position']
-        features['dc_width'] = dc_data['dc_width']
-
-        # Channel breakouts
-        features['dc_breakout_upper'] = (dc_data['dc_breakout'] == 'upper').astype(int)
-        features['dc_breakout_lower'] = (dc_data['dc_breakout'] == 'lower').astype(int)
-
-        # Channel trend
-        features['dc_uptrend'] = (dc_data['dc_trend'] == 'uptrend').astype(int)
-        features['dc_downtrend'] = (dc_data['dc_trend'] == 'downtrend').astype(int)
-        features['dc_ranging'] = (dc_data['dc_trend'] == 'ranging').astype(int)
-
-        # Channel squeeze
-        features['dc_squeeze'] = dc_data['dc_squeeze'].astype(int)
-
-        # Distance from bands
-        features['dc_distance_upper'] = (dc_data['dc_upper'] - ohlcv['close']) / ohlcv['close']
-        features['dc_distance_lower'] = (ohlcv['close'] - dc_data['dc_lower']) / ohlcv['close']
-
-    except Exception as e:
-        logger.warning(f"Failed to create Donchian Channel features: {e}")
-        for col in ['dc_position', 'dc_width', 'dc_breakout_upper', 'dc_breakout_lower',
-                    'dc_uptrend', 'dc_downtrend', 'dc_ranging', 'dc_squeeze',
-                    'dc_distance_upper', 'dc_distance_lower']:
-            features[col] = 0
-
-    return features
+    return CHANNEL_FEATURES.frame(ohlcv)
 
 
 def create_smart_money_features(indicators: Dict[str, Any]) -> pd.Series:
@@ -326,36 +438,16 @@ def create_all_features(
     Create complete feature set for ML models.
 
     Args:
-        ohlcv: OHLCV DataFrame
+        ohlcv: OHLCV DataFrame or Candles
         smart_money_indicators: Optional Smart Money indicators
         use_new_features: Include new ADX/OBV/VWAP/Donchian features (default True)
 
     Returns:
         Complete feature DataFrame
     """
-    # Create base features
-    price_features = create_price_features(ohlcv)
-    volume_features = create_volume_features(ohlcv)
-    technical_features = create_technical_features(ohlcv)
-
-    # Create new advanced features if enabled
-    if use_new_features:
-        trend_strength_features = create_trend_strength_features(ohlcv)
-        volume_strength_features = create_volume_strength_features(ohlcv)
-        channel_features = create_channel_features(ohlcv)
-
-        # Combine all features
-        all_features = pd.concat([
-            price_features,
-            volume_features,
-            technical_features,
-            trend_strength_features,
-            volume_strength_features,
-            channel_features
-        ], axis=1)
-    else:
-        # Legacy: only base features
-        all_features = pd.concat([price_features, volume_features, technical_features], axis=1)
+    feature_set = ENHANCED_FEATURES if use_new_features else BASE_FEATURES
+    # Shared intermediates are computed once; infinity values are replaced with NaN
+    all_features = feature_set.frame(ohlcv, inf_as_nan=True, dropna=not smart_money_indicators)
 
     # Add Smart Money features if available
     if smart_money_indicators:
@@ -363,9 +455,8 @@ def create_all_features(
         for col, value in sm_features.items():
             all_features[col] = value
 
-    # Replace infinity values with NaN, then drop NaN
-    all_features = all_features.replace([np.inf, -np.inf], np.nan)
-    all_features = all_features.dropna()
+        all_features = all_features.replace([np.inf, -np.inf], np.nan)
+        all_features = all_features.dropna()
 
     logger.debug(f"Created {len(all_features.columns)} features from OHLCV data")
 
@@ -0,0 +1,300 @@
+"""
+Declarative feature graph for ML models.
+
+Each node declares the nodes it is computed from. For a requested list of
+features the planner resolves the minimal set of nodes in dependency order,
+computes every node once into one preallocated float matrix and returns the
+requested columns. Intermediates shared by several features (SMA, EMA, true
+range, returns, ...) are therefore computed once per call, and features a
+model does not use are not computed at all.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.candles import as_dataframe
+from utils.logger_config import setup_logging
+
+logger = setup_logging()
+
+
+def true_range(high: pd.Series, low: pd.Series, close: pd.Series) -> pd.Series:
+    """
+    True Range: max(high - low, |high - prev close|, |low - prev close|).
+
+    NaN terms are skipped, so the first bar is high - low.
+    """
+    prev_close = close.shift(1)
+    high_close = (high - prev_close).abs()
+    low_close = (low - prev_close).abs()
+    return pd.Series(np.fmax(np.fmax(high - low, high_close), low_close), index=close.index)
+
+
+class FeatureNode:
+    """
+    Graph node: a function of its input nodes producing one or more columns.
+    """
+
+    __slots__ = ("name", "inputs", "fn", "outputs", "flags")
+
+    def __init__(
+        self,
+        name: str,
+        inputs: Tuple[str, ...],
+        fn: Callable[..., Any],
+        outputs: Tuple[str, ...],
+        flags: Tuple[str, ...],
+    ):
+        self.name = name
+        self.inputs = inputs
+        self.fn = fn
+        self.outputs = outputs
+        self.flags = flags
+
+
+class FeaturePlan:
+    """
+    Execution plan for one list of requested columns.
+
+    Requested columns take the first slots of the matrix in request order,
+    intermediates follow, so the result is a view of the leading slots.
+    """
+
+    def __init__(self, graph: "FeatureGraph", columns: Tuple[str, ...]):
+        self.columns = columns
+        self.order: List[FeatureNode] = []
+        self.sources: List[str] = []
+        self.slots: Dict[str, int] = {name: k for k, name in enumerate(dict.fromkeys(columns))}
+
+        visiting = set()
+        done = set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in graph.sources:
+                self.sources.append(name)
+                done.add(name)
+                return
+            node = graph.node_for(name)
+            if node.name in visiting:
+                raise ValueError(f"Feature graph cycle at '{node.name}'")
+            visiting.add(node.name)
+            for dependency in node.inputs:
+                visit(dependency)
+            visiting.discard(node.name)
+            self.order.append(node)
+            for output in node.outputs:
+                self.slots.setdefault(output, len(self.slots))
+                done.add(output)
+            done.add(node.name)
+
+        for name in columns:
+            if name in graph.sources:
+                raise ValueError(f"Source column '{name}' is not a feature")
+            visit(name)
+
+        self.width = len(self.slots)
+        # Several requested names may share a column; then the result is gathered
+        self._select = None if len(set(columns)) == len(columns) else [self.slots[name] for name in columns]
+        self.flags = frozenset(flag for node in self.order for flag in node.flags if flag in columns)
+
+    def execute(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Compute the plan on a DataFrame.
+
+        Returns:
+            Float matrix (n_rows x len(columns)), column-major
+        """
+        n = len(df)
+        matrix = np.empty((n, self.width), dtype=np.float64, order="F")
+        # Node inputs: source columns and computed slots as Series with a common RangeIndex
+        values: Dict[str, Any] = {"frame": df}
+        for name in self.sources:
+            if name == "frame":
+                continue
+            values[name] = pd.Series(df[name].to_numpy(), copy=False) if name in df.columns else None
+
+        for node in self.order:
+            result = node.fn(*(values[name] for name in node.inputs))
+            if len(node.outputs) == 1:
+                result = (result,)
+            for output, column in zip(node.outputs, result):
+                slot = self.slots[output]
+                matrix[:, slot] = np.asarray(column, dtype=np.float64)
+                values[output] = pd.Series(matrix[:, slot], copy=False)
+
+        if self._select is not None:
+            return matrix[:, self._select]
+        return matrix[:, : len(self.columns)]
+
+
+class FeatureGraph:
+    """
+    Registry of feature nodes with a per-request plan cache.
+    """
+
+    def __init__(self, sources: Sequence[str] = ("open", "high", "low", "close", "volume")):
+        """
+        Args:
+            sources: Raw input columns. Missing optional columns are passed to
+                nodes as None; the special source "frame" is the whole DataFrame.
+        """
+        self.sources = set(sources) | {"frame"}
+        self._nodes: Dict[str, FeatureNode] = {}
+        self._producers: Dict[str, FeatureNode] = {}
+        self._plans: Dict[Tuple[str, ...], FeaturePlan] = {}
+
+    def add(
+        self,
+        name: str,
+        inputs: Sequence[str],
+        fn: Callable[..., Any],
+        outputs: Optional[Sequence[str]] = None,
+        flags: Sequence[str] = (),
+    ):
+        """
+        Register a node.
+
+        Args:
+            name: Node name (also the column name of single-output nodes)
+            inputs: Names of source columns or other nodes' columns passed to fn
+            fn: Function of the inputs returning an array/Series, or a tuple
+                of them for multi-output nodes
+            outputs: Columns produced (default: [name])
+            flags: Outputs holding 0/1 flags (int dtype in DataFrames)
+        """
+        outputs = tuple(outputs) if outputs is not None else (name,)
+        node = FeatureNode(name, tuple(inputs), fn, outputs, tuple(flags))
+        for key in {name, *outputs}:
+            if key in self._producers or key in self.sources:
+                raise ValueError(f"Feature '{key}' is already defined")
+            self._producers[key] = node
+        self._nodes[name] = node
+        self._plans.clear()
+
+    def source(self, *names: str):
+        """Register optional raw input columns."""
+        self.sources.update(names)
+        self._plans.clear()
+
+    def node_for(self, name: str) -> FeatureNode:
+        """Node producing a column."""
+        try:
+            return self._producers[name]
+        except KeyError:
+            raise KeyError(f"Unknown feature '{name}'") from None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._producers
+
+    def plan(self, columns: Sequence[str]) -> FeaturePlan:
+        """Cached plan for the requested columns."""
+        key = tuple(columns)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = FeaturePlan(self, key)
+            logger.debug(f"Feature plan: {len(key)} features, {len(plan.order)} nodes, {plan.width} slots")
+        return plan
+
+
+class FeatureSet:
+    """
+    Named, ordered features mapped onto graph columns.
+
+    Several sets may expose the same feature name with different definitions
+    (e.g. RSI with and without a zero-division guard); the set decides which
+    graph column a name refers to.
+    """
+
+    def __init__(self, graph: FeatureGraph, features: Any):
+        """
+        Args:
+            graph: Feature graph
+            features: Feature names (same as graph columns) or a dict
+                {feature name: graph column}
+        """
+        self.graph = graph
+        if not isinstance(features, dict):
+            features = {name: name for name in features}
+        for column in features.values():
+            graph.node_for(column)
+        self.features: Dict[str, str] = dict(features)
+
+    @property
+    def names(self) -> List[str]:
+        """Feature names in set order."""
+        return list(self.features)
+
+    def __add__(self, other: "FeatureSet") -> "FeatureSet":
+        return FeatureSet(self.graph, {**self.features, **other.features})
+
+    def _columns(self, names: Optional[Sequence[str]]) -> Tuple[List[str], List[str]]:
+        names = self.names if names is None else list(names)
+        missing = [name for name in names if name not in self.features]
+        if missing:
+            raise ValueError(f"Features not available: {missing}")
+        return names, [self.features[name] for name in names]
+
+    def matrix(
+        self,
+        data: Any,
+        names: Optional[Sequence[str]] = None,
+        dropna: bool = False,
+        inf_as_nan: bool = False,
+    ) -> Tuple[np.ndarray, List[str]]:
+        """
+        Compute features as a float matrix.
+
+        Args:
+            data: OHLCV DataFrame or Candles
+            names: Features to compute in this order (default: the whole set)
+            dropna: Drop rows with NaN in any requested feature
+            inf_as_nan: Treat +-inf as NaN (replaced, and dropped with dropna)
+
+        Returns:
+            Tuple of (matrix, names); without dropna the matrix has one row per bar
+        """
+        df = as_dataframe(data, copy=False)
+        names, columns = self._columns(names)
+        matrix = self.graph.plan(columns).execute(df)
+        if inf_as_nan:
+            matrix[np.isinf(matrix)] = np.nan
+        if dropna:
+            valid = ~np.isnan(matrix).any(axis=1)
+            if not valid.all():
+                matrix = matrix[valid]
+        return matrix, names
+
+    def frame(
+        self,
+        data: Any,
+        names: Optional[Sequence[str]] = None,
+        dropna: bool = False,
+        inf_as_nan: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Compute features as a DataFrame indexed like the input.
+
+        Flag features are returned as int columns. Arguments as in matrix().
+        """
+        df = as_dataframe(data, copy=False)
+        names, columns = self._columns(names)
+        plan = self.graph.plan(columns)
+        matrix = plan.execute(df)
+        if inf_as_nan:
+            matrix[np.isinf(matrix)] = np.nan
+
+        index = df.index
+        if dropna:
+            valid = ~np.isnan(matrix).any(axis=1)
+            if not valid.all():
+                matrix, index = matrix[valid], index[valid]
+
+        features = pd.DataFrame(matrix, index=index, columns=names, copy=False)
+        flags = {name: np.int64 for name, column in zip(names, columns) if column in plan.flags}
+        if flags:
+            features = features.astype(flags)
+        return features
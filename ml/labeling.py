@@ -16,6 +16,8 @@ from typing import Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 
+from ml.feature_graph import true_range
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,19 +35,11 @@ def calculate_atr(
     Returns:
         ATR series
     """
-    high = df['high']
-    low = df['low']
-    close = df['close']
-    
     # True Range
-    tr1 = high - low
-    tr2 = (high - close.shift(1)).abs()
-    tr3 = (low - close.shift(1)).abs()
-    
-    true_range = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    tr = true_range(df['high'], df['low'], df['close'])
     
     # ATR (SMA of True Range)
-    atr = true_range.rolling(window=period, min_periods=1).mean()
+    atr = tr.rolling(window=period, min_periods=1).mean()
     
     return atr
 
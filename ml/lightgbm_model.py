@@ -14,23 +14,19 @@ import pandas as pd
 
 warnings.filterwarnings("ignore")
 
-try:
-    import lightgbm as lgb
-    from sklearn.model_selection import train_test_split
-    from sklearn.metrics import accuracy_score, classification_report
-    from sklearn.preprocessing import StandardScaler
-    
-    HAS_LIGHTGBM = True
-except ImportError:
-    HAS_LIGHTGBM = False
-    lgb = None
-
+from utils.candles import as_dataframe
+from utils.lazy_import import lazy_import, module_available
 from utils.logger_config import setup_logging
-from ml.feature_engineering import create_all_features
+from ml.feature_engineering import ENHANCED_FEATURES, LIGHTGBM_FEATURES
+from ml.feature_graph import FeatureSet
 from ml.labeling import create_barrier_labels_vectorized, calculate_atr
 
 logger = setup_logging()
 
+# lightgbm/sklearn are imported on first use, not when this module is imported
+HAS_LIGHTGBM = module_available("lightgbm") and module_available("sklearn")
+lgb = lazy_import("lightgbm") if HAS_LIGHTGBM else None
+
 
 class LightGBMSignalGenerator:
     """
@@ -66,6 +62,8 @@ class LightGBMSignalGenerator:
         
         self.prediction_threshold = prediction_threshold
         self.lookback = lookback_periods
+        from sklearn.preprocessing import StandardScaler
+
         self.scaler = StandardScaler()
         self.is_trained = False
         self.model: Optional[lgb.Booster] = None
@@ -99,160 +97,43 @@ class LightGBMSignalGenerator:
     
     def _prepare_features(self, df: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
         """
-        Prepare comprehensive feature set for the model.
+        Prepare comprehensive feature set for the model (LIGHTGBM_FEATURES).
         
         Args:
-            df: OHLCV DataFrame with optional Smart Money indicators
+            df: OHLCV DataFrame (or Candles) with optional Smart Money indicators
             
         Returns:
             Tuple of (feature_array, feature_names)
         """
-        features = pd.DataFrame(index=df.index)
-        
-        # === 1. Price-based features ===
-        features['returns'] = df['close'].pct_change()
-        features['log_returns'] = np.log(df['close'] / df['close'].shift(1))
-        features['hl_ratio'] = (df['high'] - df['low']) / df['close']
-        features['co_ratio'] = (df['close'] - df['open']) / df['open']
-        
-        # Momentum
-        for period in [5, 10, 20]:
-            features[f'momentum_{period}'] = df['close'] / df['close'].shift(period) - 1
-        
-        # Volatility
-        features['volatility_5'] = features['returns'].rolling(5).std()
-        features['volatility_20'] = features['returns'].rolling(20).std()
-        features['volatility_ratio'] = features['volatility_5'] / features['volatility_20']
-        
-        # === 2. Moving Averages ===
-        for period in [5, 10, 20, 50]:
-            features[f'sma_{period}'] = df['close'].rolling(period).mean()
-            features[f'sma_{period}_ratio'] = df['close'] / features[f'sma_{period}']
-            features[f'ema_{period}'] = df['close'].ewm(span=period, adjust=False).mean()
-            features[f'ema_{period}_ratio'] = df['close'] / features[f'ema_{period}']
-        
-        # === 3. RSI ===
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / (loss + 1e-10)
-        features['rsi'] = 100 - (100 / (1 + rs))
-        features['rsi_oversold'] = (features['rsi'] < 30).astype(int)
-        features['rsi_overbought'] = (features['rsi'] > 70).astype(int)
-        
-        # === 4. MACD ===
-        exp12 = df['close'].ewm(span=12, adjust=False).mean()
-        exp26 = df['close'].ewm(span=26, adjust=False).mean()
-        features['macd'] = exp12 - exp26
-        features['macd_signal'] = features['macd'].ewm(span=9, adjust=False).mean()
-        features['macd_hist'] = features['macd'] - features['macd_signal']
-        features['macd_cross_up'] = ((features['macd'] > features['macd_signal']) & 
-                                      (features['macd'].shift(1) <= features['macd_signal'].shift(1))).astype(int)
-        features['macd_cross_down'] = ((features['macd'] < features['macd_signal']) & 
-                                        (features['macd'].shift(1) >= features['macd_signal'].shift(1))).astype(int)
-        
-        # === 5. Bollinger Bands ===
-        sma_20 = df['close'].rolling(20).mean()
-        std_20 = df['close'].rolling(20).std()
-        features['bb_upper'] = sma_20 + (std_20 * 2)
-        features['bb_lower'] = sma_20 - (std_20 * 2)
-        features['bb_position'] = (df['close'] - features['bb_lower']) / (features['bb_upper'] - features['bb_lower'] + 1e-10)
-        features['bb_width'] = (features['bb_upper'] - features['bb_lower']) / sma_20
-        
-        # === 6. ATR (Average True Range) ===
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        features['atr'] = true_range.rolling(14).mean()
-        features['atr_ratio'] = features['atr'] / df['close']
-        
-        # === 7. Volume features ===
-        features['volume_ma_5'] = df['volume'].rolling(5).mean()
-        features['volume_ma_20'] = df['volume'].rolling(20).mean()
-        features['volume_ratio_5'] = df['volume'] / (features['volume_ma_5'] + 1e-10)
-        features['volume_ratio_20'] = df['volume'] / (features['volume_ma_20'] + 1e-10)
-        features['vp_corr'] = df['volume'].rolling(20).corr(df['close'])
-        
-        # === 8. Smart Money Features (if available) ===
-        # Order Blocks
-        if 'ob_bullish_low' in df.columns:
-            features['in_bullish_ob'] = ((df['close'] >= df['ob_bullish_low']) & 
-                                          (df['close'] <= df['ob_bullish_high'])).astype(int)
-        else:
-            features['in_bullish_ob'] = 0
-            
-        if 'ob_bearish_low' in df.columns:
-            features['in_bearish_ob'] = ((df['close'] >= df['ob_bearish_low']) & 
-                                          (df['close'] <= df['ob_bearish_high'])).astype(int)
-        else:
-            features['in_bearish_ob'] = 0
-        
-        # Fair Value Gaps
-        if 'fvg_bullish_low' in df.columns:
-            features['in_bullish_fvg'] = ((df['close'] >= df['fvg_bullish_low']) & 
-                                           (df['close'] <= df['fvg_bullish_high'])).astype(int)
-        else:
-            features['in_bullish_fvg'] = 0
-            
-        if 'fvg_bearish_low' in df.columns:
-            features['in_bearish_fvg'] = ((df['close'] >= df['fvg_bearish_low']) & 
-                                           (df['close'] <= df['fvg_bearish_high'])).astype(int)
-        else:
-            features['in_bearish_fvg'] = 0
-        
-        # Market Structure
-        if 'market_structure' in df.columns:
-            features['structure_bullish'] = (df['market_structure'].str.lower() == 'bullish').astype(int)
-            features['structure_bearish'] = (df['market_structure'].str.lower() == 'bearish').astype(int)
-        else:
-            features['structure_bullish'] = 0
-            features['structure_bearish'] = 0
-        
-        # === 9. Order Flow / Delta (if available) ===
-        if 'delta' in df.columns:
-            features['delta'] = df['delta']
-            features['delta_normalized'] = np.tanh(df['delta'] / (df['volume'] + 1e-10))
-            features['cumulative_delta'] = df['delta'].cumsum()
-            features['delta_ma_5'] = df['delta'].rolling(5).mean()
-        else:
-            features['delta'] = 0
-            features['delta_normalized'] = 0
-            features['cumulative_delta'] = 0
-            features['delta_ma_5'] = 0
-        
-        # === 10. Volume Profile (if available) ===
-        if 'vp_poc' in df.columns:
-            features['poc_distance'] = (df['close'] - df['vp_poc']) / df['close']
-            features['near_poc'] = (np.abs(features['poc_distance']) < 0.01).astype(int)
-        else:
-            features['poc_distance'] = 0
-            features['near_poc'] = 0
-            
-        if 'vp_vah' in df.columns and 'vp_val' in df.columns:
-            features['in_value_area'] = ((df['close'] >= df['vp_val']) & 
-                                          (df['close'] <= df['vp_vah'])).astype(int)
-        else:
-            features['in_value_area'] = 0
-        
-        # === 11. Stochastic Oscillator ===
-        low_14 = df['low'].rolling(14).min()
-        high_14 = df['high'].rolling(14).max()
-        features['stoch_k'] = 100 * (df['close'] - low_14) / (high_14 - low_14 + 1e-10)
-        features['stoch_d'] = features['stoch_k'].rolling(3).mean()
-        
-        # === 12. Price patterns ===
-        features['higher_high'] = (df['high'] > df['high'].shift(1)).astype(int)
-        features['lower_low'] = (df['low'] < df['low'].shift(1)).astype(int)
-        features['bullish_candle'] = (df['close'] > df['open']).astype(int)
-        features['body_size'] = np.abs(df['close'] - df['open']) / df['close']
-        
-        # Drop NaN values
-        features = features.dropna()
-        
-        feature_names = features.columns.tolist()
-        
-        return features.values, feature_names
+        return LIGHTGBM_FEATURES.matrix(df, dropna=True)
+
+    def _feature_set(self) -> FeatureSet:
+        """Feature set the model was trained on."""
+        # Model trained with enhanced features (68 features)
+        if self.feature_names and len(self.feature_names) > 64:
+            return ENHANCED_FEATURES
+        return LIGHTGBM_FEATURES
+
+    def _model_features(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Feature matrix with exactly the model's feature_names columns.
+
+        Only the features the model uses (and their inputs) are computed.
+
+        Args:
+            df: OHLCV DataFrame (or Candles) with optional Smart Money indicators
+
+        Returns:
+            Feature array without NaN rows
+        """
+        feature_set = self._feature_set()
+        X, _ = feature_set.matrix(
+            df,
+            self.feature_names or None,
+            dropna=True,
+            inf_as_nan=feature_set is ENHANCED_FEATURES,
+        )
+        return X
     
     def _create_labels(
         self, 
@@ -328,6 +209,7 @@ class LightGBMSignalGenerator:
         Returns:
             Training metrics dictionary
         """
+        df = as_dataframe(df, copy=False)
         logger.info(f"Training LightGBM on {len(df)} samples...")
         logger.info(f"Using enhanced features: {use_new_features}")
         logger.info(f"Using barrier labels: {use_barrier_labels} (TP={tp_atr_mult}*ATR, SL={sl_atr_mult}*ATR, horizon={horizon_bars})")
@@ -335,9 +217,7 @@ class LightGBMSignalGenerator:
         # Prepare features
         if use_new_features:
             # Use enhanced feature engineering from feature_engineering.py
-            features_df = create_all_features(df, smart_money_indicators=None, use_new_features=True)
-            X = features_df.values
-            self.feature_names = features_df.columns.tolist()
+            X, self.feature_names = ENHANCED_FEATURES.matrix(df, dropna=True, inf_as_nan=True)
             logger.info(f"Using {len(self.feature_names)} enhanced features (ADX, OBV, VWAP, Donchian)")
         else:
             # Use legacy feature engineering
@@ -362,6 +242,9 @@ class LightGBMSignalGenerator:
         X_scaled = self.scaler.fit_transform(X)
         
         # Split data
+        from sklearn.metrics import accuracy_score
+        from sklearn.model_selection import train_test_split
+
         X_train, X_test, y_train, y_test = train_test_split(
             X_scaled, y, test_size=test_size, shuffle=False
         )
@@ -497,14 +380,8 @@ class LightGBMSignalGenerator:
                 'timestamp': datetime.now().isoformat(),
             }
         
-        # Prepare features - use enhanced features if model was trained with them
-        if self.feature_names and len(self.feature_names) > 64:
-            # Model trained with enhanced features (68 features)
-            from ml.feature_engineering import create_all_features
-            features_df = create_all_features(df, smart_money_indicators=None, use_new_features=True)
-            X = features_df.values
-        else:
-            X, _ = self._prepare_features(df)
+        # Prepare features (only those the model uses)
+        X = self._model_features(df)
 
         if len(X) == 0:
             return {
@@ -563,13 +440,8 @@ class LightGBMSignalGenerator:
             default_probs = np.array([[0.33, 0.34, 0.33]] * len(df))
             return np.ones(len(df), dtype=int), default_probs
         
-        # Prepare features
-        if self.feature_names and len(self.feature_names) > 64:
-            from ml.feature_engineering import create_all_features
-            features_df = create_all_features(df, smart_money_indicators=None, use_new_features=True)
-            X = features_df.values
-        else:
-            X, _ = self._prepare_features(df)
+        # Prepare features (only those the model uses)
+        X = self._model_features(df)
         
         if len(X) == 0:
             default_probs = np.array([[0.33, 0.34, 0.33]] * len(df))
@@ -618,13 +490,8 @@ class LightGBMSignalGenerator:
         if self.model is None:
             return np.ones(len(df), dtype=int)  # All HOLD
 
-        # Prepare features - use enhanced features if model was trained with them
-        if self.feature_names and len(self.feature_names) > 64:
-            from ml.feature_engineering import create_all_features
-            features_df = create_all_features(df, smart_money_indicators=None, use_new_features=True)
-            X = features_df.values
-        else:
-            X, _ = self._prepare_features(df)
+        # Prepare features (only those the model uses)
+        X = self._model_features(df)
 
         if len(X) == 0:
             return np.ones(len(df), dtype=int)
@@ -689,13 +556,8 @@ class LightGBMSignalGenerator:
 
         logger.info(f"Incremental training on {len(df)} new samples...")
 
-        # Prepare features
-        if self.feature_names and len(self.feature_names) > 64:
-            from ml.feature_engineering import create_all_features
-            features_df = create_all_features(df, smart_money_indicators=None, use_new_features=True)
-            X = features_df.values
-        else:
-            X, _ = self._prepare_features(df)
+        # Prepare features (only those the model uses)
+        X = self._model_features(df)
 
         # Create labels
         y = self._create_labels(df)
@@ -710,6 +572,8 @@ class LightGBMSignalGenerator:
 
         # Calculate class weights
         from collections import Counter
+        from sklearn.metrics import accuracy_score
+
         class_counts = Counter(y)
         total = len(y)
         class_weights = {cls: total / (len(class_counts) * count) for cls, count in class_counts.items()}
@@ -12,20 +12,13 @@ import pandas as pd
 
 warnings.filterwarnings("ignore")
 
-try:
-    import tensorflow as tf
-    from tensorflow import keras
-    from sklearn.preprocessing import MinMaxScaler
-    from sklearn.model_selection import train_test_split
-
-    HAS_ML = True
-except ImportError:
-    HAS_ML = False
-    tf = None
-    keras = None
-
+from utils.lazy_import import lazy_import, module_available
 from utils.logger_config import setup_logging
 
+# TensorFlow takes seconds to import: check availability now, import on first use
+HAS_ML = module_available("tensorflow") and module_available("sklearn")
+tf = lazy_import("tensorflow") if HAS_ML else None
+
 logger = setup_logging()
 
 
@@ -54,11 +47,13 @@ class LSTMSignalGenerator:
 
         self.lookback = lookback_periods
         self.prediction_threshold = prediction_threshold
+        from sklearn.preprocessing import MinMaxScaler
+
         self.scaler = MinMaxScaler(feature_range=(0, 1)) if HAS_ML else None
         self.is_trained = False
 
         if model_path and HAS_ML:
-            self.model = keras.models.load_model(model_path)
+            self.model = tf.keras.models.load_model(model_path)
             self.is_trained = True
             logger.info(f"Loaded pre-trained model from {model_path}")
         elif HAS_ML:
@@ -67,35 +62,35 @@ class LSTMSignalGenerator:
         else:
             self.model = None
 
-    def _build_model(self) -> "keras.Model":
+    def _build_model(self) -> "tf.keras.Model":
         """
         Build LSTM model architecture.
 
         Returns:
             Compiled Keras model
         """
-        model = keras.Sequential(
+        model = tf.keras.Sequential(
             [
                 # First LSTM layer with return sequences
-                keras.layers.LSTM(
+                tf.keras.layers.LSTM(
                     128,
                     return_sequences=True,
                     input_shape=(self.lookback, 6),  # OHLCV + volume indicators
                 ),
-                keras.layers.Dropout(0.2),
+                tf.keras.layers.Dropout(0.2),
                 # Second LSTM layer
-                keras.layers.LSTM(64, return_sequences=False),
-                keras.layers.Dropout(0.2),
+                tf.keras.layers.LSTM(64, return_sequences=False),
+                tf.keras.layers.Dropout(0.2),
                 # Dense layers
-                keras.layers.Dense(32, activation="relu"),
-                keras.layers.Dropout(0.1),
+                tf.keras.layers.Dense(32, activation="relu"),
+                tf.keras.layers.Dropout(0.1),
                 # Output layer: 3 classes (Buy, Sell, Hold)
-                keras.layers.Dense(3, activation="softmax"),
+                tf.keras.layers.Dense(3, activation="softmax"),
             ]
         )
 
         model.compile(
-            optimizer=keras.optimizers.Adam(learning_rate=0.001),
+            optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
             loss="categorical_crossentropy",
             metrics=["accuracy"],
         )
@@ -204,8 +199,8 @@ class LSTMSignalGenerator:
             validation_split=validation_split,
             verbose=1,
             callbacks=[
-                keras.callbacks.EarlyStopping(monitor="val_loss", patience=5, restore_best_weights=True),
-                keras.callbacks.ReduceLROnPlateau(monitor="val_loss", factor=0.5, patience=3, min_lr=0.00001),
+                tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=5, restore_best_weights=True),
+                tf.keras.callbacks.ReduceLROnPlateau(monitor="val_loss", factor=0.5, patience=3, min_lr=0.00001),
             ],
         )
 
@@ -21,11 +21,11 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import pandas as pd
 import numpy as np
-import ccxt
 from collections import Counter
 
 from ml.lightgbm_model import LightGBMSignalGenerator
 from ml.labeling import calculate_atr, evaluate_barrier_outcome
+from utils.history_backfill import load_history_many
 from utils.logger_config import setup_logging
 
 logger = setup_logging()
@@ -113,26 +113,19 @@ def send_telegram_alert(message: str, is_error: bool = False):
 
 
 def load_recent_data(days: int = 14) -> pd.DataFrame:
-    """Load recent OHLCV data for retraining."""
-    exchange = ccxt.binance({'enableRateLimit': True})
+    """Load recent OHLCV data for retraining (all coins in parallel, paged)."""
+    history = load_history_many(CONFIG['coins'], '15m', days)
     all_data = []
 
-    since = int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
-
     for coin in CONFIG['coins']:
-        try:
-            ohlcv = exchange.fetch_ohlcv(coin, '15m', since=since, limit=2000)
-
-            if ohlcv:
-                df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-                df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-                df.set_index('timestamp', inplace=True)
-                df['symbol'] = coin
-                all_data.append(df)
-                logger.info(f"Loaded {len(df)} candles for {coin}")
-
-        except Exception as e:
-            logger.warning(f"Failed to load {coin}: {e}")
+        df = history.get(coin)
+        if df is None or df.empty:
+            logger.warning(f"Failed to load {coin}")
+            continue
+        df = df.copy()
+        df['symbol'] = coin
+        all_data.append(df)
+        logger.info(f"Loaded {len(df)} candles for {coin}")
 
     if not all_data:
         return pd.DataFrame()
@@ -0,0 +1,74 @@
+"""
+Backfill исторических OHLCV свечей в локальный датасет data/history.
+
+Постраничная загрузка (since=), несколько пар параллельно в общем rate
+limit биржи, продолжение прерванной загрузки из checkpoint. Повторный
+запуск догружает только новые свечи.
+
+Использование:
+    python scripts/backfill_history.py --days 180 --timeframes 1h 15m
+    python scripts/backfill_history.py --symbols BTC/USDT ETH/USDT --market future
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.history_backfill import HistoryBackfill  # noqa: E402
+
+DEFAULT_SYMBOLS = [
+    "BTC/USDT", "ETH/USDT", "SOL/USDT", "BNB/USDT", "XRP/USDT",
+    "DOGE/USDT", "ADA/USDT", "AVAX/USDT", "LINK/USDT", "DOT/USDT",
+    "LTC/USDT", "ATOM/USDT", "UNI/USDT", "NEAR/USDT", "APT/USDT",
+    "ARB/USDT", "OP/USDT", "SUI/USDT", "INJ/USDT", "TRX/USDT",
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Backfill historical OHLCV into the local columnar dataset")
+    parser.add_argument("--symbols", nargs="+", default=DEFAULT_SYMBOLS, help="Trading pairs")
+    parser.add_argument("--timeframes", nargs="+", default=["1h"], help="Timeframes (e.g. 15m 1h 4h)")
+    parser.add_argument("--days", type=int, default=180, help="History depth in days")
+    parser.add_argument("--exchange", default="binance", help="ccxt exchange id")
+    parser.add_argument("--market", default="spot", choices=["spot", "future"], help="Market type")
+    parser.add_argument("--workers", type=int, default=4, help="Symbols downloaded in parallel")
+    parser.add_argument("--root", default=None, help="Dataset root (default: data/history)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    backfill = HistoryBackfill(
+        exchange_id=args.exchange,
+        market_type=args.market,
+        root_dir=args.root,
+        max_workers=args.workers,
+    )
+
+    failed = 0
+    for timeframe in args.timeframes:
+        started = time.monotonic()
+        results = backfill.backfill_many(args.symbols, timeframe, args.days)
+        elapsed = time.monotonic() - started
+
+        added = sum(r["added"] for r in results.values())
+        pages = sum(r["pages"] for r in results.values())
+        errors = {s: r["error"] for s, r in results.items() if r["error"]}
+        failed += len(errors)
+
+        print(f"\n{timeframe}: +{added} candles, {pages} requests, {elapsed:.1f}s")
+        for symbol in args.symbols:
+            r = results[symbol]
+            status = f"ERROR: {r['error']}" if r["error"] else "ok"
+            print(f"  {symbol:12} {r['candles']:7d} candles  (+{r['added']})  {status}")
+
+    print(f"\nDataset: {backfill.store.root_dir}")
+    if failed:
+        print(f"{failed} downloads failed - rerun to resume from checkpoint")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -37,34 +37,14 @@ except:
 
 
 def load_data(symbol: str, timeframe: str = '1h', days_back: int = 90):
-    """Загрузить данные для тестирования."""
-    import ccxt
-    from datetime import datetime, timedelta
-    
-    exchange = ccxt.binance({'enableRateLimit': True})
-    end_time = datetime.now()
-    start_time = end_time - timedelta(days=days_back)
-    since = int(start_time.timestamp() * 1000)
-    
-    all_ohlcv = []
-    while since < int(end_time.timestamp() * 1000):
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=1000)
-        if not ohlcv:
-            break
-        all_ohlcv.extend(ohlcv)
-        since = ohlcv[-1][0] + 1
-    
-    if not all_ohlcv:
+    """Загрузить данные для тестирования (локальный датасет + догрузка новых свечей)."""
+    from utils.history_backfill import load_history
+
+    try:
+        return load_history(symbol, timeframe, days_back)
+    except Exception as e:
+        print(f"Failed to load {symbol}: {e}")
         return None
-    
-    df = pd.DataFrame(all_ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-    df.set_index('timestamp', inplace=True)
-    
-    for col in ['open', 'high', 'low', 'close', 'volume']:
-        df[col] = df[col].astype(float)
-    
-    return df
 
 
 def test_confidence_threshold(
@@ -205,6 +185,14 @@ def find_optimal_confidence():
     model = LightGBMSignalGenerator(model_path=str(model_path))
     print()
     
+    # Данные загружаем один раз (пары параллельно), а не на каждый порог
+    from utils.history_backfill import load_history_many
+    try:
+        coin_data = load_history_many(test_coins, CONFIG['timeframe'], CONFIG['days_back'])
+    except Exception as e:
+        print(f"Failed to load history: {e}")
+        coin_data = {}
+
     # Тестируем каждый порог
     all_results = []
     
@@ -218,7 +206,9 @@ def find_optimal_confidence():
         for symbol in test_coins:
             print(f"  {symbol}...", end=" ", flush=True)
             
-            df = load_data(symbol, CONFIG['timeframe'], CONFIG['days_back'])
+            df = coin_data.get(symbol)
+            if df is None:
+                df = load_data(symbol, CONFIG['timeframe'], CONFIG['days_back'])
             if df is None or len(df) < 500:
                 print("[SKIP]")
                 continue
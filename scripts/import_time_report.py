@@ -0,0 +1,179 @@
+"""
+Отчёт о времени импорта точек входа (python -X importtime) с бюджетами.
+
+Каждая точка входа импортируется в отдельном чистом процессе, время
+разбирается по пакетам верхнего уровня. Скрипт падает с кодом 1, если
+точка входа превышает бюджет или тянет запрещённый тяжёлый стек
+(например, ml.lightgbm_model не должен загружать tensorflow).
+
+Использование:
+    python scripts/import_time_report.py
+    python scripts/import_time_report.py --top 15 bots.telegram.bot_v2
+    python scripts/import_time_report.py --json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Тяжёлые опциональные стеки, загрузку которых отслеживаем
+HEAVY_PACKAGES = ("tensorflow", "keras", "torch", "lightgbm", "sklearn", "scipy", "ccxt", "plotly", "dash")
+
+# Точка входа -> бюджет (мс) и стеки, которые не должны грузиться при импорте
+ENTRY_POINTS = {
+    "bots.telegram.bot_v2": {"budget_ms": 2500, "forbidden": ("tensorflow", "lightgbm", "sklearn", "scipy", "plotly")},
+    "api.main": {"budget_ms": 1500, "forbidden": ("tensorflow", "lightgbm", "sklearn", "scipy", "plotly", "ccxt")},
+    "web_interface.app_simple": {"budget_ms": 3000, "forbidden": ("tensorflow", "lightgbm", "sklearn", "scipy")},
+    "web_interface.dashboard_v2": {"budget_ms": 3000, "forbidden": ("tensorflow", "lightgbm", "sklearn", "scipy")},
+    "ml.lightgbm_model": {"budget_ms": 1000, "forbidden": ("tensorflow", "lightgbm", "sklearn")},
+    "utils.market_data_manager": {"budget_ms": 1000, "forbidden": ("tensorflow", "lightgbm", "sklearn", "ccxt")},
+    "utils.signal_generator": {"budget_ms": 1500, "forbidden": ("tensorflow", "lightgbm", "sklearn", "ccxt")},
+}
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """
+    Разобрать вывод -X importtime.
+
+    Returns:
+        Список (module, depth, self_us, cumulative_us) в порядке вывода
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            head, cumulative_us, name = line.split("|", 2)
+            self_us = int(head.split(":", 1)[1])
+            cumulative_us = int(cumulative_us)
+        except ValueError:
+            continue
+        stripped = name.lstrip(" ")
+        depth = (len(name) - len(stripped) - 1) // 2
+        rows.append((stripped.strip(), depth, self_us, cumulative_us))
+    return rows
+
+
+def summarize(rows: list[tuple[str, int, int, int]], entry: str, loaded: list[str]) -> dict:
+    """
+    Итоги по одной точке входа.
+
+    Args:
+        rows: Результат parse_importtime
+        entry: Модуль точки входа
+        loaded: Тяжёлые пакеты, оказавшиеся в sys.modules после импорта
+
+    Returns:
+        total_ms (cumulative самой точки входа), packages (self-время по пакетам
+        верхнего уровня, мс) и heavy (загруженные тяжёлые стеки, мс cumulative)
+    """
+    total_us = next((cum for name, depth, _, cum in reversed(rows) if name == entry and depth == 0), None)
+    if total_us is None:
+        # Импорт упал: суммируем то, что успело загрузиться
+        total_us = sum(cum for name, depth, _, cum in rows if depth == 0 and name != "site")
+
+    packages: dict[str, int] = defaultdict(int)
+    heavy: dict[str, int] = dict.fromkeys(loaded, 0)
+    for name, _, self_us, cum_us in rows:
+        root = name.split(".")[0]
+        packages[root] += self_us
+        if root in heavy and name == root:
+            heavy[root] = max(heavy[root], cum_us)
+
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "packages": {k: round(v / 1000, 1) for k, v in sorted(packages.items(), key=lambda kv: -kv[1])},
+        "heavy": {k: round(v / 1000, 1) for k, v in heavy.items()},
+    }
+
+
+def measure(entry: str) -> dict:
+    """Импортировать точку входа в отдельном процессе и собрать статистику."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")]))
+    # Список загруженных тяжёлых пакетов печатается и при упавшем импорте
+    code = (
+        "import sys\n"
+        "try:\n"
+        f"    import {entry}\n"
+        "finally:\n"
+        f"    print(','.join(p for p in {HEAVY_PACKAGES!r} if p in sys.modules))\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    stdout_lines = proc.stdout.strip().splitlines()
+    loaded = [p for p in stdout_lines[-1].split(",") if p] if stdout_lines else []
+    result = summarize(parse_importtime(proc.stderr), entry, loaded)
+    result["ok"] = proc.returncode == 0
+    if not result["ok"]:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        result["error"] = errors[-1] if errors else f"exit code {proc.returncode}"
+    return result
+
+
+def check(entry: str, result: dict, config: dict) -> list[str]:
+    """Список нарушений бюджета для точки входа."""
+    problems = []
+    if result["ok"] and result["total_ms"] > config["budget_ms"]:
+        problems.append(f"{result['total_ms']:.0f}ms > budget {config['budget_ms']}ms")
+    loaded = [pkg for pkg in config.get("forbidden", ()) if pkg in result["heavy"]]
+    if loaded:
+        problems.append("loads " + ", ".join(loaded))
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import-time budget report for MaxFlash entry points")
+    parser.add_argument("entries", nargs="*", help="Entry point modules (default: all configured)")
+    parser.add_argument("--top", type=int, default=8, help="Show N slowest packages per entry point")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    parser.add_argument("--strict", action="store_true", help="Treat entry points that fail to import as failures")
+    args = parser.parse_args()
+
+    entries = args.entries or list(ENTRY_POINTS)
+    report = {}
+    failed = False
+
+    for entry in entries:
+        config = ENTRY_POINTS.get(entry, {"budget_ms": 2000, "forbidden": ()})
+        result = measure(entry)
+        result["budget_ms"] = config["budget_ms"]
+        result["problems"] = check(entry, result, config)
+        if not result["ok"] and args.strict:
+            result["problems"].append(f"import failed: {result['error']}")
+        failed |= bool(result["problems"])
+        report[entry] = result
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return 1 if failed else 0
+
+    for entry, result in report.items():
+        status = "FAIL" if result["problems"] else ("SKIP" if not result["ok"] else "OK")
+        print(f"{status:4}  {entry:32} {result['total_ms']:8.0f} ms  (budget {result['budget_ms']} ms)")
+        if not result["ok"]:
+            print(f"      import error: {result['error']}")
+        for problem in result["problems"]:
+            print(f"      ! {problem}")
+        if result["heavy"]:
+            heavy = ", ".join(f"{k} {v:.0f}ms" for k, v in sorted(result["heavy"].items(), key=lambda kv: -kv[1]))
+            print(f"      heavy: {heavy}")
+        top = list(result["packages"].items())[: args.top]
+        print("      top:   " + ", ".join(f"{k} {v:.0f}ms" for k, v in top))
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
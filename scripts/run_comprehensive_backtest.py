@@ -20,11 +20,11 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pandas as pd
 import numpy as np
-import ccxt
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from ml.lightgbm_model import LightGBMSignalGenerator
 from ml.labeling import calculate_atr, evaluate_barrier_outcome
+from utils.history_backfill import load_history, load_history_many
 from utils.logger_config import setup_logging
 
 logger = setup_logging()
@@ -314,36 +314,9 @@ class BarrierBacktester:
 
 
 def load_data(symbol: str, days_back: int = 180, timeframe: str = '1h') -> Optional[pd.DataFrame]:
-    """Load historical data for backtesting."""
+    """Load historical data for backtesting (local dataset, topped up from Binance futures)."""
     try:
-        exchange = ccxt.binance({'enableRateLimit': True, 'options': {'defaultType': 'future'}})
-
-        end_time = datetime.now()
-        start_time = end_time - timedelta(days=days_back)
-        since = int(start_time.timestamp() * 1000)
-
-        all_ohlcv = []
-
-        while since < int(end_time.timestamp() * 1000):
-            ohlcv = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=1000)
-            if not ohlcv:
-                break
-            all_ohlcv.extend(ohlcv)
-            since = ohlcv[-1][0] + 1
-            exchange.sleep(exchange.rateLimit / 1000)
-
-        if not all_ohlcv:
-            return None
-
-        df = pd.DataFrame(all_ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df.set_index('timestamp', inplace=True)
-
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            df[col] = df[col].astype(float)
-
-        return df
-
+        return load_history(symbol, timeframe, days_back, exchange_id='binance', market_type='future')
     except Exception as e:
         logger.error(f"Failed to load {symbol}: {e}")
         return None
@@ -466,7 +439,7 @@ def test_multiple_thresholds(
         
         threshold_results = []
         for symbol in coins:
-            df = load_data(symbol, BACKTEST_CONFIG['timeframe'], BACKTEST_CONFIG['days_back'])
+            df = load_data(symbol, days_back=BACKTEST_CONFIG['days_back'], timeframe=BACKTEST_CONFIG['timeframe'])
             if df is None or len(df) < BACKTEST_CONFIG['min_candles']:
                 continue
             
@@ -540,6 +513,9 @@ def run_comprehensive_backtest(n_coins: int = 20, test_thresholds: bool = False)
         min_confidence=config['min_confidence'],
     )
 
+    # Download missing history for all coins in parallel (paged, resumable)
+    load_history_many(coins, config['timeframe'], config['days_back'], exchange_id='binance', market_type='future')
+
     # Results storage
     all_results = []
 
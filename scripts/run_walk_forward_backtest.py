@@ -22,11 +22,11 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pandas as pd
 import numpy as np
-import ccxt
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from ml.lightgbm_model import LightGBMSignalGenerator
 from ml.labeling_fixed import calculate_atr, evaluate_barrier_outcome, create_realistic_labels
+from utils.history_backfill import load_history, load_history_many
 from utils.logger_config import setup_logging
 
 logger = setup_logging()
@@ -347,36 +347,9 @@ class WalkForwardBacktester:
 
 
 def load_data(symbol: str, days_back: int = 180, timeframe: str = '1h') -> Optional[pd.DataFrame]:
-    """Load historical data."""
+    """Load historical data (local dataset, topped up from Binance futures)."""
     try:
-        exchange = ccxt.binance({'enableRateLimit': True, 'options': {'defaultType': 'future'}})
-
-        end_time = datetime.now()
-        start_time = end_time - timedelta(days=days_back)
-        since = int(start_time.timestamp() * 1000)
-
-        all_ohlcv = []
-
-        while since < int(end_time.timestamp() * 1000):
-            ohlcv = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=1000)
-            if not ohlcv:
-                break
-            all_ohlcv.extend(ohlcv)
-            since = ohlcv[-1][0] + 1
-            exchange.sleep(exchange.rateLimit / 1000)
-
-        if not all_ohlcv:
-            return None
-
-        df = pd.DataFrame(all_ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df.set_index('timestamp', inplace=True)
-
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            df[col] = df[col].astype(float)
-
-        return df
-
+        return load_history(symbol, timeframe, days_back, exchange_id='binance', market_type='future')
     except Exception as e:
         logger.error(f"Failed to load {symbol}: {e}")
         return None
@@ -411,6 +384,9 @@ def run_walk_forward_backtest(n_coins: int = 10):
         min_confidence=config['min_confidence'],
     )
 
+    # Download missing history for all coins in parallel (paged, resumable)
+    load_history_many(coins, config['timeframe'], config['total_days'], exchange_id='binance', market_type='future')
+
     all_results = []
 
     print(f"\n{'='*80}")
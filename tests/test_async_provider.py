@@ -0,0 +1,341 @@
+"""
+Tests for the async OHLCV/ticker API of CCXTProvider, MultiSourceDataProvider and MarketDataManager.
+"""
+
+import asyncio
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from utils.market_data_manager import MarketDataManager
+from utils.multi_source_provider import CCXTProvider, MultiSourceDataProvider
+from utils.performance import PerformanceProfiler
+
+BASE_TS = 1_700_000_000_000
+
+
+class FakeAsyncExchange:
+    """Minimal ccxt.async_support-like client that records concurrency."""
+
+    def __init__(self, exchange_id: str, delay: float = 0.01, fail: bool = False, markets=None, bulk: bool = True):
+        self.id = exchange_id
+        self.delay = delay
+        self.fail = fail
+        self.markets = {m: {} for m in (markets or ["BTC/USDT", "ETH/USDT", "SOL/USDT", "BTC/USD"])}
+        self.has = {"fetchTickers": bulk}
+        self.ohlcv_calls = []
+        self.ticker_calls = 0
+        self.bulk_calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.closed = False
+
+    async def load_markets(self):
+        return self.markets
+
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.ohlcv_calls.append((symbol, since, limit))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        if self.fail:
+            raise ConnectionError("exchange unavailable")
+        start = since if since is not None else BASE_TS
+        return [[start + i * 3_600_000, 1.0, 2.0, 0.5, 1.5, 10.0] for i in range(limit or 5)]
+
+    async def fetch_ticker(self, symbol):
+        self.ticker_calls += 1
+        if self.fail:
+            raise ConnectionError("exchange unavailable")
+        return {"symbol": symbol, "last": 1.0}
+
+    async def fetch_tickers(self, symbols=None):
+        self.bulk_calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("exchange unavailable")
+        return {s: {"symbol": s, "last": 1.0} for s in symbols if s in self.markets}
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeAsyncModule:
+    """Replacement for create_exchange: builds one fake per call and keeps them all."""
+
+    def __init__(self, **specs):
+        self.specs = dict(specs)
+        self.created = []
+
+    def __call__(self, exchange_id, config=None, module=None):
+        exchange = FakeAsyncExchange(exchange_id, **self.specs.get(exchange_id, {}))
+        self.created.append(exchange)
+        return exchange
+
+    def latest(self, exchange_id) -> FakeAsyncExchange:
+        return [e for e in self.created if e.id == exchange_id][-1]
+
+
+class AsyncProviderTestCase(unittest.TestCase):
+    """Patch async client construction with fakes."""
+
+    specs: dict = {}
+
+    def setUp(self):
+        """Set up the fake client factory."""
+        self.factory = FakeAsyncModule(**self.specs)
+        patcher = mock.patch("utils.multi_source_provider.create_exchange", self.factory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestAsyncFallback(AsyncProviderTestCase):
+    """Test fallback order and health tracking of afetch_ohlcv."""
+
+    specs = {"kucoin": {"fail": True}}
+
+    def test_falls_back_in_priority_order(self):
+        """Test that a failing first exchange is recorded and the next one answers."""
+        provider = CCXTProvider()
+
+        df = asyncio.run(provider.afetch_ohlcv("BTC/USDT", "1h", limit=5))
+
+        self.assertEqual(len(df), 5)
+        self.assertEqual([e.id for e in self.factory.created], ["kucoin", "kraken"])
+        # Kraken trades BTC/USD instead of BTC/USDT
+        self.assertEqual(self.factory.latest("kraken").ohlcv_calls[0][0], "BTC/USD")
+
+        health = provider.get_health_status()
+        self.assertEqual(health["kucoin"].error_count, 1)
+        self.assertIn("unavailable", health["kucoin"].last_error)
+        self.assertIsNotNone(health["kraken"].last_success)
+        self.assertGreater(health["kraken"].avg_latency_ms, 0)
+
+    def test_open_circuit_is_tried_last(self):
+        """Test that repeated failures move an exchange behind the healthy ones."""
+        provider = CCXTProvider()
+
+        async def run():
+            for _ in range(CCXTProvider.CIRCUIT_BREAKER_THRESHOLD):
+                await provider.afetch_ohlcv("BTC/USDT", "1h", limit=5)
+            kucoin_calls = len(self.factory.latest("kucoin").ohlcv_calls)
+            await provider.afetch_ohlcv("BTC/USDT", "1h", limit=5)
+            return kucoin_calls
+
+        kucoin_calls = asyncio.run(run())
+
+        self.assertTrue(provider._is_circuit_open("kucoin"))
+        self.assertEqual(provider._exchange_order()[-1], "kucoin")
+        self.assertEqual(len(self.factory.latest("kucoin").ohlcv_calls), kucoin_calls)
+
+
+class TestAsyncFanOut(AsyncProviderTestCase):
+    """Test parallel fetching with per-exchange bounds and client reuse."""
+
+    def test_many_symbols_run_concurrently_within_limit(self):
+        """Test that aget_ohlcv_many overlaps requests but respects ASYNC_CONCURRENCY."""
+        provider = MultiSourceDataProvider(use_candle_store=False)
+        symbols = [f"SYM{i}/USDT" for i in range(10)] + ["BTC/USDT"]
+        self.factory.specs["kucoin"] = {"delay": 0.05, "markets": symbols}
+
+        data = asyncio.run(provider.aget_ohlcv_many(symbols, "1h", limit=5))
+
+        self.assertEqual(set(data), set(symbols))
+        self.assertTrue(all(df is not None and len(df) == 5 for df in data.values()))
+        kucoin = self.factory.latest("kucoin")
+        self.assertEqual(len(kucoin.ohlcv_calls), len(symbols))
+        self.assertGreater(kucoin.max_active, 1)
+        self.assertLessEqual(kucoin.max_active, CCXTProvider.ASYNC_CONCURRENCY)
+
+    def test_clients_are_reused_per_loop(self):
+        """Test one client per exchange within a loop; a new loop closes and replaces them."""
+        provider = CCXTProvider()
+
+        async def run():
+            await asyncio.gather(*(provider.afetch_ohlcv("BTC/USDT", "1h", limit=5) for _ in range(3)))
+            await provider.afetch_ticker("ETH/USDT")
+
+        asyncio.run(run())
+        self.assertEqual([e.id for e in self.factory.created], ["kucoin"])
+
+        first = self.factory.latest("kucoin")
+        asyncio.run(run())
+        self.assertEqual([e.id for e in self.factory.created], ["kucoin", "kucoin"])
+        self.assertIsNot(self.factory.latest("kucoin"), first)
+        self.assertTrue(first.closed)
+
+        asyncio.run(provider.aclose())
+        self.assertTrue(self.factory.latest("kucoin").closed)
+        self.assertEqual(provider.async_exchanges, {})
+
+    def test_clients_of_a_running_loop_are_closed_in_it(self):
+        """Test stale clients of a loop still running in another thread are closed on that loop."""
+        provider = CCXTProvider()
+        other = asyncio.new_event_loop()
+        thread = threading.Thread(target=other.run_forever, daemon=True)
+        thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(provider.afetch_ticker("ETH/USDT"), other).result(timeout=5)
+            first = self.factory.latest("kucoin")
+
+            closed_on = []
+            done = threading.Event()
+
+            async def close():
+                closed_on.append(asyncio.get_running_loop())
+                done.set()
+
+            first.close = close
+            asyncio.run(provider.afetch_ticker("ETH/USDT"))
+            self.assertTrue(done.wait(timeout=5))
+            self.assertEqual(closed_on, [other])
+        finally:
+            other.call_soon_threadsafe(other.stop)
+            thread.join(timeout=5)
+            other.close()
+
+
+class TestAsyncTickers(AsyncProviderTestCase):
+    """Test bulk tickers with fallback."""
+
+    specs = {
+        "kucoin": {"markets": ["BTC/USDT"]},
+        "kraken": {"bulk": False, "markets": ["ETH/USD"]},
+        "okx": {"fail": True},
+        "bybit": {"markets": ["SOL/USDT"]},
+    }
+
+    def test_bulk_then_per_symbol_fallback(self):
+        """Test one bulk request per exchange and per-symbol requests only for the rest."""
+        provider = MultiSourceDataProvider(use_candle_store=False)
+
+        result = asyncio.run(provider.aget_tickers(["BTC/USDT", "ETH/USDT", "SOL/USDT"]))
+
+        self.assertEqual(set(result), {"BTC/USDT", "ETH/USDT", "SOL/USDT"})
+        self.assertEqual(self.factory.latest("kucoin").bulk_calls, 1)
+        self.assertEqual(self.factory.latest("bybit").bulk_calls, 1)
+        self.assertEqual(self.factory.latest("kraken").bulk_calls, 0)
+        self.assertEqual(self.factory.latest("kraken").ticker_calls, 1)
+        # okx fails its bulk request and is skipped by the per-symbol fallback after kraken answers
+        self.assertEqual(provider.ccxt_provider.health["okx"].error_count, 1)
+
+    def test_concurrent_cycles_each_record_timing(self):
+        """Test that overlapping bulk cycles each record their own duration."""
+        provider = CCXTProvider()
+        profiler = PerformanceProfiler()
+
+        async def run():
+            await asyncio.gather(*(provider.afetch_tickers(["BTC/USDT", "SOL/USDT"]) for _ in range(3)))
+
+        with mock.patch("utils.multi_source_provider.global_profiler", profiler):
+            asyncio.run(run())
+
+        timings = profiler.timings["afetch_tickers_bulk"]
+        self.assertEqual(len(timings), 3)
+        self.assertTrue(all(t > 0 for t in timings))
+
+
+class TestAsyncCandleStore(AsyncProviderTestCase):
+    """Test incremental async OHLCV through the candle store."""
+
+    def test_store_io_runs_off_the_event_loop(self):
+        """Test that plan/merge run in worker threads and the second call fetches only new candles."""
+        with tempfile.TemporaryDirectory() as tmp:
+            provider = MultiSourceDataProvider(candle_store_dir=tmp)
+            threads = []
+            for name in ("_plan_incremental", "_merge_incremental"):
+                original = getattr(provider, name)
+
+                def recorder(*args, _original=original, **kwargs):
+                    threads.append(threading.get_ident())
+                    return _original(*args, **kwargs)
+
+                setattr(provider, name, recorder)
+
+            async def run():
+                loop_thread = threading.get_ident()
+                first = await provider.aget_ohlcv("BTC/USDT", "1h", limit=5)
+                second = await provider.aget_ohlcv("BTC/USDT", "1h", limit=5, force_refresh=True)
+                return loop_thread, first, second
+
+            with mock.patch("utils.multi_source_provider.time.time", return_value=(BASE_TS + 5 * 3_600_000) / 1000):
+                loop_thread, first, second = asyncio.run(run())
+
+        self.assertEqual(len(first), 5)
+        self.assertEqual(len(second), 5)
+        self.assertEqual(len(threads), 4)
+        self.assertNotIn(loop_thread, threads)
+        calls = self.factory.latest("kucoin").ohlcv_calls
+        self.assertIsNone(calls[0][1])
+        self.assertEqual(calls[1][1], BASE_TS + 4 * 3_600_000)
+
+
+class FakeAsyncDataProvider:
+    """MultiSourceDataProvider stand-in that only supports the async path."""
+
+    def __init__(self):
+        self.calls = 0
+        self.ticker_calls = 0
+
+    def get_ohlcv(self, *args, **kwargs):
+        raise AssertionError("sync path used from aget_ohlcv")
+
+    def get_ticker(self, *args, **kwargs):
+        raise AssertionError("sync path used from aget_ticker")
+
+    async def aget_ohlcv(self, symbol, timeframe, limit, force_refresh=False):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        index = pd.date_range("2024-01-01", periods=limit, freq="1h", name="timestamp")
+        return pd.DataFrame({"open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10.0}, index=index)
+
+    async def aget_ticker(self, symbol):
+        self.ticker_calls += 1
+        await asyncio.sleep(0.01)
+        return {"symbol": symbol, "last": 1.5}
+
+
+class TestManagerAsyncRouting(unittest.TestCase):
+    """Test that MarketDataManager's async API uses the native async provider."""
+
+    def setUp(self):
+        """Set up a manager with a fake async provider."""
+        self.manager = MarketDataManager(use_multi_source=False, use_candle_store=False)
+        self.manager.exchange_manager = None
+        self.manager.use_multi_source = True
+        self.provider = FakeAsyncDataProvider()
+        self.manager.data_provider = self.provider
+
+    def test_aget_ohlcv_coalesces_native_requests(self):
+        """Test that concurrent coroutines share one async fetch and the result is cached."""
+
+        async def run():
+            return await asyncio.gather(*(self.manager.aget_ohlcv("BTC/USDT", "1h", limit=10) for _ in range(4)))
+
+        frames = asyncio.run(run())
+
+        self.assertEqual(self.provider.calls, 1)
+        self.assertTrue(all(len(df) == 10 for df in frames))
+        self.assertIsNotNone(self.manager.market_cache.get("multi:BTC/USDT:1h"))
+
+    def test_aget_ticker_uses_async_provider(self):
+        """Test that aget_ticker awaits the provider and fills the ticker cache."""
+
+        async def run():
+            return await asyncio.gather(*(self.manager.aget_ticker("BTC/USDT") for _ in range(3)))
+
+        tickers = asyncio.run(run())
+
+        self.assertEqual(self.provider.ticker_calls, 1)
+        self.assertTrue(all(t["last"] == 1.5 for t in tickers))
+        self.assertIn("ticker:BTC/USDT", self.manager.tickers_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+"""
+Tests for the streaming tick-to-candle builder.
+"""
+
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from utils.candle_builder import LiveCandleBuilder
+
+MIN_MS = 60_000
+
+
+def make_history(end_ts: int, periods: int, freq_ms: int = MIN_MS) -> pd.DataFrame:
+    """REST-like OHLCV history whose last candle opens at end_ts."""
+    ts = end_ts - freq_ms * np.arange(periods - 1, -1, -1)
+    close = 100.0 + np.arange(periods, dtype=float)
+    return pd.DataFrame(
+        {"open": close - 0.5, "high": close + 1.0, "low": close - 1.0, "close": close, "volume": 10.0},
+        index=pd.DatetimeIndex(pd.to_datetime(ts, unit="ms"), name="timestamp"),
+    )
+
+
+class TestLiveCandleBuilder(unittest.TestCase):
+    """Test bar updates, time-based closing and merging with history."""
+
+    def setUp(self):
+        """Anchor all events on a recent 1h boundary."""
+        self.t0 = int(time.time() * 1000) // 3_600_000 * 3_600_000 - 3_600_000
+        self.builder = LiveCandleBuilder(timeframes=("1m", "5m"), max_silence=600)
+        self.closed = []
+        self.builder.add_listener(lambda symbol, tf, bar: self.closed.append((symbol, tf, bar)))
+
+    def test_trades_update_current_bar(self):
+        """Test OHLCV of the bar being built."""
+        for offset, price, amount in [(1_000, 10.0, 1.0), (2_000, 12.0, 2.0), (3_000, 9.0, 0.5), (4_000, 11.0, 1.5)]:
+            self.builder.add_trade("BTC/USDT", price, amount, self.t0 + offset)
+
+        bar = self.builder.current_bar("BTC/USDT", "1m")
+        self.assertEqual(bar["timestamp"], self.t0)
+        self.assertEqual((bar["open"], bar["high"], bar["low"], bar["close"]), (10.0, 12.0, 9.0, 11.0))
+        self.assertAlmostEqual(bar["volume"], 5.0)
+        self.assertEqual(self.builder.current_bar("BTC/USDT", "5m")["close"], 11.0)
+        self.assertEqual(self.closed, [])
+
+    def test_boundary_closes_bar_and_fills_gaps(self):
+        """Test that a trade in a later period closes the bar and fills empty periods."""
+        self.builder.add_trade("BTC/USDT", 10.0, 1.0, self.t0 + 1_000)
+        self.builder.add_trade("BTC/USDT", 11.0, 1.0, self.t0 + 3 * MIN_MS + 1_000)
+
+        one_minute = [bar for _, tf, bar in self.closed if tf == "1m"]
+        self.assertEqual([bar["timestamp"] for bar in one_minute], [self.t0 + i * MIN_MS for i in range(3)])
+        self.assertEqual(one_minute[1]["volume"], 0.0)
+        self.assertEqual(one_minute[2]["close"], 10.0)
+        self.assertEqual(self.builder.current_bar("BTC/USDT", "1m")["open"], 11.0)
+        # 5m bar is still open
+        self.assertFalse([bar for _, tf, bar in self.closed if tf == "5m"])
+        self.assertEqual(self.builder.current_bar("BTC/USDT", "5m")["high"], 11.0)
+
+    def test_late_trade_is_ignored(self):
+        """Test that trades of an already closed period do not reopen it."""
+        self.builder.add_trade("BTC/USDT", 10.0, 1.0, self.t0 + MIN_MS + 1)
+        self.builder.add_trade("BTC/USDT", 50.0, 1.0, self.t0 + 1)
+        self.assertEqual(self.builder.current_bar("BTC/USDT", "1m")["high"], 10.0)
+        self.assertEqual(self.builder.current_bar("BTC/USDT", "5m")["high"], 50.0)
+        self.assertEqual(self.builder.stats["late"], 1)
+
+    def test_close_due_without_trades(self):
+        """Test that bars close on time boundaries even without new trades."""
+        self.builder.add_trade("BTC/USDT", 10.0, 1.0, self.t0 + 1_000)
+
+        self.assertEqual(self.builder.close_due(self.t0 + MIN_MS - 1), 0)
+        self.assertEqual(self.builder.close_due(self.t0 + MIN_MS + 5), 1)
+
+        bar = self.builder.current_bar("BTC/USDT", "1m")
+        self.assertEqual(bar["timestamp"], self.t0 + MIN_MS)
+        self.assertEqual((bar["open"], bar["close"], bar["volume"]), (10.0, 10.0, 0.0))
+
+    def test_ticker_volume_delta(self):
+        """Test that ticker events add the increase of the 24h volume."""
+        update = {"symbol": "ETH/USDT", "price": 2000.0, "volume": 500.0, "event_time": self.t0 + 1_000}
+        self.builder.handle_update(update)
+        self.builder.handle_update({**update, "price": 2010.0, "volume": 503.5, "event_time": self.t0 + 2_000})
+        self.builder.handle_update({**update, "price": 2005.0, "volume": 503.0, "event_time": self.t0 + 3_000})
+
+        bar = self.builder.current_bar("ETH/USDT", "1m")
+        self.assertEqual((bar["high"], bar["close"]), (2010.0, 2005.0))
+        self.assertAlmostEqual(bar["volume"], 3.5)
+
+    def test_merge_replaces_and_appends(self):
+        """Test overlaying live bars on cached history."""
+        history = make_history(self.t0 + MIN_MS, 50)
+        self.builder.add_trade("BTC/USDT", 500.0, 1.0, self.t0 + MIN_MS + 1_000)
+        self.builder.add_trade("BTC/USDT", 510.0, 2.0, self.t0 + 2 * MIN_MS + 1_000)
+
+        merged = self.builder.merge("BTC/USDT", "1m", history)
+
+        self.assertEqual(len(merged), len(history))
+        self.assertEqual(merged.index[-1], pd.Timestamp(self.t0 + 2 * MIN_MS, unit="ms"))
+        self.assertEqual(merged["close"].iloc[-1], 510.0)
+        # The bar the builder joined mid-way keeps open/low from history
+        joined = merged.loc[pd.Timestamp(self.t0 + MIN_MS, unit="ms")]
+        self.assertEqual(joined["open"], history["open"].iloc[-1])
+        self.assertEqual(joined["low"], history["low"].iloc[-1])
+        self.assertEqual(joined["high"], 500.0)
+        self.assertEqual(joined["volume"], 10.0)
+        pd.testing.assert_frame_equal(merged.iloc[:-2], history.iloc[1:-1])
+
+    def test_merge_detects_gap(self):
+        """Test that detached live bars require a REST reconcile."""
+        history = make_history(self.t0 - 10 * MIN_MS, 50)
+        self.builder.add_trade("BTC/USDT", 500.0, 1.0, self.t0 + 1_000)
+        self.assertIsNone(self.builder.merge("BTC/USDT", "1m", history))
+
+    def test_silence_resets_symbol(self):
+        """Test that a stream outage drops live bars instead of inventing flat ones."""
+        self.builder.add_trade("BTC/USDT", 10.0, 1.0, self.t0 + 1_000)
+        self.builder.add_trade("BTC/USDT", 11.0, 1.0, self.t0 + 20 * MIN_MS)
+
+        self.assertEqual(self.builder.stats["resets"], 1)
+        self.assertEqual(self.closed, [])
+        frame = self.builder.to_frame("BTC/USDT", "1m")
+        self.assertEqual(len(frame), 1)
+
+
+class TestMarketDataManagerLive(unittest.TestCase):
+    """Test that MarketDataManager serves live candles without REST."""
+
+    def test_cached_history_stays_current(self):
+        """Test get_ohlcv with an attached builder and an expired cache entry."""
+        from utils.market_data_manager import MarketDataManager
+
+        manager = MarketDataManager(cache_ttl_minutes=0, use_multi_source=False)
+        manager.exchange_manager = None
+        builder = LiveCandleBuilder(timeframes=("1m",))
+        manager.attach_candle_builder(builder)
+        self.addCleanup(builder.stop_clock)
+
+        now = int(time.time() * 1000)
+        bar_ts = now // MIN_MS * MIN_MS
+        history = make_history(bar_ts, 100)
+        manager.market_cache.set("multi:BTC/USDT:1m", history, ttl_seconds=0)
+        builder.add_trade("BTC/USDT", 999.0, 1.0, now)
+
+        df = manager.get_ohlcv("BTC/USDT", "1m", limit=100)
+
+        self.assertIsNotNone(df)
+        self.assertEqual(len(df), 100)
+        self.assertEqual(df["close"].iloc[-1], 999.0)
+        self.assertIn("live_candles", manager.get_cache_stats())
+
+    def test_subscriptions_are_fed_from_websocket(self):
+        """Test that subscribe_live_candles streams a symbol once and its trades reach get_ohlcv."""
+        from utils.market_data_manager import MarketDataManager
+
+        class FakeWebSocketManager:
+            def __init__(self):
+                self.callbacks = {}
+
+            def stream_candles(self, builder, symbols, use_trades=True):
+                for symbol in symbols:
+                    self.callbacks.setdefault(symbol, []).append(builder.handle_update)
+
+        ws = FakeWebSocketManager()
+        manager = MarketDataManager(cache_ttl_minutes=0, use_multi_source=False)
+        manager.exchange_manager = None
+        builder = LiveCandleBuilder(timeframes=("1m",))
+        manager.attach_candle_builder(builder, ws_manager=ws, symbols=[])
+        self.addCleanup(builder.stop_clock)
+        self.assertEqual(ws.callbacks, {})
+
+        self.assertTrue(manager.subscribe_live_candles("BTC/USDT"))
+        self.assertFalse(manager.subscribe_live_candles("BTC/USDT"))
+        self.assertEqual(len(ws.callbacks["BTC/USDT"]), 1)
+
+        now = int(time.time() * 1000)
+        manager.market_cache.set("multi:BTC/USDT:1m", make_history(now // MIN_MS * MIN_MS, 50), ttl_seconds=0)
+        ws.callbacks["BTC/USDT"][0]({"type": "trade", "symbol": "BTC/USDT", "price": 555.0, "amount": 1.0,
+                                     "timestamp": now})
+
+        df = manager.get_ohlcv("BTC/USDT", "1m", limit=50)
+        self.assertEqual(df["close"].iloc[-1], 555.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
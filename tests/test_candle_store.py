@@ -0,0 +1,162 @@
+"""
+Tests for the on-disk candle store.
+"""
+
+import multiprocessing
+import random
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.candle_store import HAS_FCNTL, CandleStore
+
+
+def make_candles(start: str, periods: int, base: float = 100.0) -> pd.DataFrame:
+    """Build a simple OHLCV frame indexed by timestamp."""
+    index = pd.date_range(start, periods=periods, freq="1h", name="timestamp")
+    close = base + np.arange(periods, dtype=float)
+    return pd.DataFrame(
+        {
+            "open": close - 0.5,
+            "high": close + 1.0,
+            "low": close - 1.0,
+            "close": close,
+            "volume": np.full(periods, 10.0),
+        },
+        index=index,
+    )
+
+
+def append_chunks(root: str, chunks: list[int], size: int):
+    """Process worker: append the given chunks of an hourly series in random order."""
+    store = CandleStore(root)
+    random.Random(chunks[0]).shuffle(chunks)
+    series = make_candles("2024-01-01", 200 * size)
+    for j in chunks:
+        store.append("BTC/USDT", "1h", series.iloc[j * size : (j + 1) * size])
+
+
+class TestCandleStore(unittest.TestCase):
+    """Test CandleStore persistence and incremental append."""
+
+    def setUp(self):
+        """Set up a temporary store."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = CandleStore(self.tmp.name)
+
+    def tearDown(self):
+        """Remove the temporary store."""
+        self.tmp.cleanup()
+
+    def test_empty_store(self):
+        """Test reads from an empty partition."""
+        assert self.store.read("BTC/USDT", "1h") is None
+        assert self.store.last_timestamp("BTC/USDT", "1h") is None
+        assert self.store.count("BTC/USDT", "1h") == 0
+
+    def test_roundtrip(self):
+        """Test that stored candles read back unchanged."""
+        df = make_candles("2024-01-01", 50)
+        added = self.store.append("BTC/USDT", "1h", df)
+
+        assert added == 50
+        result = self.store.read("BTC/USDT", "1h")
+        pd.testing.assert_frame_equal(result, df, check_freq=False, check_index_type=False)
+
+    def test_incremental_append_overwrites_last_candle(self):
+        """Test that overlapping fetches replace the open candle and append new ones."""
+        self.store.append("BTC/USDT", "1h", make_candles("2024-01-01", 10))
+
+        update = make_candles("2024-01-01 09:00", 3, base=500.0)
+        added = self.store.append("BTC/USDT", "1h", update)
+
+        assert added == 2
+        assert self.store.count("BTC/USDT", "1h") == 12
+        result = self.store.read("BTC/USDT", "1h")
+        assert result["close"].iloc[9] == 500.0
+        assert result["close"].iloc[-1] == 502.0
+
+    def test_gap_fill_rewrites_partition(self):
+        """Test that missing candles in the middle of history are merged in order."""
+        full = make_candles("2024-01-01", 20)
+        self.store.append("ETH/USDT", "1h", full.iloc[:5])
+        self.store.append("ETH/USDT", "1h", full.iloc[10:])
+
+        added = self.store.append("ETH/USDT", "1h", full.iloc[5:10])
+
+        assert added == 5
+        result = self.store.read("ETH/USDT", "1h")
+        assert result.index.is_monotonic_increasing
+        np.testing.assert_array_equal(result["close"].to_numpy(), full["close"].to_numpy())
+
+    def test_read_limit_and_since(self):
+        """Test tail and time-range reads."""
+        df = make_candles("2024-01-01", 30)
+        self.store.append("SOL/USDT", "1h", df)
+
+        tail = self.store.read("SOL/USDT", "1h", limit=5)
+        assert len(tail) == 5
+        assert tail.index[-1] == df.index[-1]
+
+        since_ms = int(df.index[25].value // 1_000_000)
+        recent = self.store.read("SOL/USDT", "1h", since=since_ms)
+        assert len(recent) == 5
+
+    def test_persists_across_instances(self):
+        """Test that history survives a new store instance (restart)."""
+        self.store.append("BTC/USDT", "4h", make_candles("2024-01-01", 8))
+
+        reopened = CandleStore(self.tmp.name)
+        assert reopened.count("BTC/USDT", "4h") == 8
+        assert ("BTC/USDT", "4h") in reopened.list_partitions()
+
+    def test_torn_write_is_truncated(self):
+        """Test recovery when a column file has a partial trailing record."""
+        self.store.append("BTC/USDT", "1h", make_candles("2024-01-01", 4))
+        part_dir = self.store._partition_dir("BTC/USDT", "1h")
+        with open(part_dir / "close.f8", "ab") as f:
+            f.write(b"\x00" * 3)
+
+        assert self.store.count("BTC/USDT", "1h") == 4
+        self.store.append("BTC/USDT", "1h", make_candles("2024-01-01 04:00", 1))
+        assert self.store.count("BTC/USDT", "1h") == 5
+
+
+@pytest.mark.skipif(not HAS_FCNTL, reason="cross-process locking needs fcntl")
+class TestCandleStoreProcesses(unittest.TestCase):
+    """Test concurrent writers and readers in separate processes."""
+
+    def test_concurrent_writers_keep_partition_consistent(self):
+        """Test that interleaved appends and rewrites from several processes neither tear nor duplicate rows."""
+        size, workers, chunks = 5, 4, 120
+        with tempfile.TemporaryDirectory() as tmp:
+            ctx = multiprocessing.get_context("fork")
+            procs = [
+                ctx.Process(target=append_chunks, args=(tmp, list(range(k, chunks, workers)), size))
+                for k in range(workers)
+            ]
+            for proc in procs:
+                proc.start()
+
+            store = CandleStore(tmp)
+            while any(proc.is_alive() for proc in procs):
+                columns = store.read_columns("BTC/USDT", "1h")
+                if columns is None:
+                    continue
+                self.assertEqual({len(arr) for arr in columns.values()}, {len(columns["timestamp"])})
+                self.assertTrue((np.diff(columns["timestamp"]) > 0).all())
+
+            for proc in procs:
+                proc.join()
+                self.assertEqual(proc.exitcode, 0)
+
+            result = store.read("BTC/USDT", "1h")
+            expected = make_candles("2024-01-01", chunks * size)
+            pd.testing.assert_frame_equal(result, expected, check_freq=False, check_index_type=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Tests for the struct-of-arrays Candles container.
+"""
+
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from utils.candle_store import CandleStore
+from utils.candles import Candles, as_dataframe
+
+START_MS = 1_700_000_000_000
+
+
+def make_rows(n: int = 300) -> list:
+    """ccxt-like OHLCV rows."""
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return [
+        [START_MS + i * 3_600_000, c - 0.3, c + 1.0, c - 1.0, c, float(rng.uniform(10, 100))]
+        for i, c in enumerate(close)
+    ]
+
+
+class TestCandles(unittest.TestCase):
+    """Test construction, zero-copy conversion and dtype handling."""
+
+    def setUp(self):
+        """Build candles from ccxt rows."""
+        self.rows = make_rows()
+        self.candles = Candles.from_ohlcv(self.rows)
+
+    def test_from_ohlcv(self):
+        """Test column layout and dtypes."""
+        self.assertEqual(len(self.candles), len(self.rows))
+        self.assertEqual(self.candles.timestamp.dtype, np.int64)
+        self.assertEqual(self.candles.timestamp[1], START_MS + 3_600_000)
+        self.assertEqual(self.candles["close"][-1], self.rows[-1][4])
+        for name in ("open", "high", "low", "close", "volume"):
+            self.assertTrue(self.candles[name].flags.c_contiguous)
+
+    def test_dataframe_round_trip_is_zero_copy(self):
+        """Test that price columns share memory with the DataFrame."""
+        df = self.candles.to_dataframe()
+
+        self.assertEqual(df.index.name, "timestamp")
+        self.assertEqual(df.index[0], pd.Timestamp(START_MS, unit="ms"))
+        self.assertTrue(np.shares_memory(df["close"].to_numpy(), self.candles.close))
+
+        back = Candles.from_dataframe(df)
+        self.assertTrue(np.shares_memory(back.close, self.candles.close))
+        np.testing.assert_array_equal(back.timestamp, self.candles.timestamp)
+
+    def test_float32(self):
+        """Test the compact float32 representation."""
+        light = self.candles.astype(np.float32)
+
+        self.assertEqual(light.dtype, np.float32)
+        self.assertLess(light.nbytes, self.candles.nbytes * 0.6)
+        np.testing.assert_allclose(light.close, self.candles.close, rtol=1e-6)
+        self.assertEqual(Candles.from_dataframe(light.to_dataframe()).dtype, np.float32)
+
+    def test_slices_are_views(self):
+        """Test slicing and tail."""
+        tail = self.candles.tail(10)
+        self.assertEqual(len(tail), 10)
+        self.assertTrue(np.shares_memory(tail.close, self.candles.close))
+        self.assertEqual(tail.timestamp[-1], self.candles.timestamp[-1])
+
+    def test_length_mismatch_rejected(self):
+        """Test validation of column lengths."""
+        with self.assertRaises(ValueError):
+            Candles([1, 2], [1.0, 2.0], [1.0, 2.0], [1.0, 2.0], [1.0], [1.0, 2.0])
+
+    def test_candle_store_read_candles(self):
+        """Test zero-copy reading from the columnar store."""
+        with tempfile.TemporaryDirectory() as tmp:
+            store = CandleStore(tmp)
+            store.append("BTC/USDT", "1h", self.candles.to_dataframe())
+
+            stored = store.read_candles("BTC/USDT", "1h", limit=50)
+
+            self.assertEqual(len(stored), 50)
+            np.testing.assert_array_equal(stored.close, self.candles.close[-50:])
+            del stored
+
+    def test_as_dataframe(self):
+        """Test that DataFrames are still copied and Candles are wrapped."""
+        df = self.candles.to_dataframe()
+        copied = as_dataframe(df)
+        copied["extra"] = 1.0
+        self.assertNotIn("extra", df.columns)
+        self.assertIs(as_dataframe(df, copy=False), df)
+
+        wrapped = as_dataframe(self.candles)
+        wrapped["extra"] = 1.0
+        self.assertTrue(np.shares_memory(wrapped["close"].to_numpy(), self.candles.close))
+
+
+class TestCandlesConsumers(unittest.TestCase):
+    """Test that indicators and feature builders accept Candles."""
+
+    def test_features_match_dataframe_input(self):
+        """Test create_all_features with Candles and DataFrame input."""
+        from ml.feature_engineering import create_all_features
+
+        candles = Candles.from_ohlcv(make_rows())
+        expected = create_all_features(candles.to_dataframe())
+        actual = create_all_features(candles)
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_indicator_accepts_candles(self):
+        """Test an indicator with Candles input."""
+        from indicators.trend.adx import ADXCalculator
+
+        candles = Candles.from_ohlcv(make_rows())
+        expected = ADXCalculator().calculate_adx(candles.to_dataframe())
+        actual = ADXCalculator().calculate_adx(candles)
+
+        pd.testing.assert_frame_equal(actual, expected)
+        self.assertNotIn("adx", candles.to_dataframe().columns)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+"""
+Tests for CCXTProvider source routing, circuit breaker, hedged requests and bulk tickers.
+"""
+
+import time
+import unittest
+
+from utils.market_metadata import LazyExchangeRegistry
+from utils.multi_source_provider import CCXTProvider
+
+
+class FakeExchange:
+    """Minimal synchronous ccxt-like client."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False, markets=None, bulk: bool = True):
+        self.delay = delay
+        self.fail = fail
+        self.markets = {m: {} for m in (markets or ["BTC/USDT", "BTC/USD"])}
+        self.has = {"fetchTickers": bulk}
+        self.calls = 0
+        self.ticker_calls = 0
+        self.bulk_calls = 0
+
+    def load_markets(self):
+        return self.markets
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("exchange unavailable")
+        return [[1700000000000 + i * 60000, 1.0, 2.0, 0.5, 1.5, 10.0] for i in range(limit or 5)]
+
+    def fetch_ticker(self, symbol):
+        self.ticker_calls += 1
+        return {"symbol": symbol, "last": 1.0}
+
+    def fetch_tickers(self, symbols=None):
+        self.bulk_calls += 1
+        return {s: {"symbol": s, "last": 1.0} for s in symbols if s in self.markets}
+
+
+def make_provider(exchanges, **kwargs) -> CCXTProvider:
+    """Create a provider whose clients are replaced by fakes."""
+    provider = CCXTProvider(**kwargs)
+    provider.exchanges = exchanges
+    return provider
+
+
+class TestCCXTRouting(unittest.TestCase):
+    """Test latency-ranked routing."""
+
+    def test_priority_order_by_default(self):
+        """Test that the default mode keeps EXCHANGE_PRIORITY order."""
+        provider = make_provider({ex_id: FakeExchange() for ex_id in CCXTProvider.EXCHANGE_PRIORITY})
+        provider.health["okx"].avg_latency_ms = 10
+        provider.health["kucoin"].avg_latency_ms = 900
+
+        assert provider._exchange_order() == CCXTProvider.EXCHANGE_PRIORITY
+
+    def test_latency_routing_prefers_fast_source(self):
+        """Test that latency mode ranks by EWMA latency and error rate."""
+        provider = make_provider(
+            {ex_id: FakeExchange() for ex_id in CCXTProvider.EXCHANGE_PRIORITY}, routing="latency"
+        )
+        for ex_id, latency in {"kucoin": 800, "kraken": 400, "okx": 50, "bybit": 60}.items():
+            provider.health[ex_id].avg_latency_ms = latency
+        provider.health["okx"].error_rate = 0.5
+
+        order = provider._exchange_order()
+        assert order[0] == "bybit"
+        assert order.index("okx") < order.index("kraken")
+
+    def test_invalid_routing_mode(self):
+        """Test that unknown routing modes are rejected."""
+        with self.assertRaises(ValueError):
+            CCXTProvider(routing="random")
+
+    def test_circuit_breaker_moves_source_last(self):
+        """Test that repeated failures open the circuit and skip the source."""
+        exchanges = {"kucoin": FakeExchange(fail=True), "kraken": FakeExchange()}
+        provider = make_provider(exchanges)
+
+        for _ in range(CCXTProvider.CIRCUIT_BREAKER_THRESHOLD):
+            df = provider.fetch_ohlcv("BTC/USDT", "1m", limit=5)
+            assert df is not None
+
+        assert provider._is_circuit_open("kucoin")
+        assert provider._exchange_order() == ["kraken", "kucoin"]
+
+        calls_before = exchanges["kucoin"].calls
+        provider.fetch_ohlcv("BTC/USDT", "1m", limit=5)
+        assert exchanges["kucoin"].calls == calls_before
+
+    def test_hedged_request_returns_faster_backup(self):
+        """Test that a slow primary is hedged by the next source."""
+        exchanges = {"kucoin": FakeExchange(delay=0.5), "kraken": FakeExchange(delay=0.0)}
+        provider = make_provider(exchanges, hedge=True)
+        provider.HEDGE_DEFAULT_DELAY_MS = 50
+
+        start = time.perf_counter()
+        df = provider.fetch_ohlcv("BTC/USDT", "1m", limit=5)
+        elapsed = time.perf_counter() - start
+
+        assert df is not None
+        assert len(df) == 5
+        assert elapsed < 0.4
+        assert exchanges["kraken"].calls == 1
+
+
+
+class TestBulkTickers(unittest.TestCase):
+    """Test the bulk ticker path."""
+
+    def test_one_request_per_exchange(self):
+        """Test that tickers come from one bulk call with fallback only for missing pairs."""
+        exchanges = {
+            "kucoin": FakeExchange(markets=["BTC/USDT", "ETH/USDT", "SOL/USDT"]),
+            "kraken": FakeExchange(markets=["XRP/USDT"], bulk=False),
+        }
+        provider = make_provider(exchanges)
+
+        tickers = provider.fetch_tickers(["BTC/USDT", "ETH/USDT", "SOL/USDT", "XRP/USDT"])
+
+        assert set(tickers) == {"BTC/USDT", "ETH/USDT", "SOL/USDT", "XRP/USDT"}
+        assert exchanges["kucoin"].bulk_calls == 1
+        assert exchanges["kucoin"].ticker_calls == 0
+        assert exchanges["kraken"].ticker_calls == 1
+
+    def test_symbol_mapping_is_reversed(self):
+        """Test that exchange-specific symbols are mapped back to requested ones."""
+        exchanges = {"kraken": FakeExchange(markets=["BTC/USD"])}
+        provider = make_provider(exchanges)
+
+        tickers = provider.fetch_tickers(["BTC/USDT"])
+
+        assert tickers["BTC/USDT"]["symbol"] == "BTC/USD"
+
+
+class TestUnbuildableClient(unittest.TestCase):
+    """Test that a client that fails to build is skipped instead of raising."""
+
+    def make_provider(self) -> CCXTProvider:
+        def factory(ex_id):
+            if ex_id == "kucoin":
+                raise RuntimeError("no such exchange")
+            return self.kraken
+
+        self.kraken = FakeExchange(markets=["BTC/USD"])
+        return make_provider(LazyExchangeRegistry(factory, ["kucoin", "kraken"]))
+
+    def test_ohlcv_falls_back(self):
+        """Test that fetch_ohlcv records the failure and asks the next exchange."""
+        provider = self.make_provider()
+
+        df = provider.fetch_ohlcv("BTC/USDT", "1m", limit=5)
+
+        assert df is not None
+        assert self.kraken.calls == 1
+        assert provider.health["kucoin"].error_count == 1
+
+    def test_tickers_fall_back(self):
+        """Test that fetch_ticker and fetch_tickers skip the missing client."""
+        assert self.make_provider().fetch_ticker("BTC/USDT")["symbol"] == "BTC/USD"
+        assert self.make_provider().fetch_tickers(["BTC/USDT"])["BTC/USDT"]["symbol"] == "BTC/USD"
+
+
+if __name__ == "__main__":
+    unittest.main()
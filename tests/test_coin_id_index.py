@@ -0,0 +1,169 @@
+"""
+Tests for the CoinGecko symbol -> id index and batched market requests.
+"""
+
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from utils.coin_id_index import CoinIdIndex
+from utils.multi_source_provider import CoinGeckoProvider
+
+COINS = [
+    {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+    {"id": "wrapped-bitcoin", "symbol": "wbtc", "name": "Wrapped Bitcoin"},
+    {"id": "ethereum", "symbol": "eth", "name": "Ethereum"},
+    {"id": "bridged-ether-eth", "symbol": "eth", "name": "Bridged Ether"},
+    {"id": "toncoin-fake", "symbol": "ton", "name": "Fake Ton"},
+    {"id": "the-open-network", "symbol": "ton", "name": "Toncoin"},
+    {"id": "kaspa", "symbol": "kas", "name": "Kaspa"},
+]
+
+
+class FakeResponse:
+    """requests.Response stand-in."""
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    """Serves /coins/list and /coins/markets and records the calls."""
+
+    def __init__(self, total_coins: int = 600):
+        self.calls = []
+        self.top = [{"id": f"coin-{i}", "symbol": f"c{i}", "current_price": float(i)} for i in range(total_coins)]
+        self.top[:3] = [{"id": "the-open-network", "symbol": "ton"}, {"id": "bitcoin", "symbol": "btc"},
+                        {"id": "ethereum", "symbol": "eth"}]
+
+    def get(self, url, params=None, timeout=None):
+        params = params or {}
+        path = url.split("/api/v3", 1)[1]
+        self.calls.append((path, params))
+        if path == "/coins/list":
+            return FakeResponse(COINS)
+        if path == "/coins/markets":
+            if "ids" in params:
+                ids = params["ids"].split(",")
+                return FakeResponse([{"id": coin_id, "symbol": coin_id} for coin_id in ids])
+            start = (params["page"] - 1) * params["per_page"]
+            return FakeResponse(self.top[start:start + params["per_page"]])
+        raise AssertionError(f"unexpected request {path}")
+
+
+class TestCoinIdIndex(unittest.TestCase):
+    """Test index building, persistence and refresh."""
+
+    def setUp(self):
+        """Set up a temporary index file."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "coin_ids.json"
+
+    def tearDown(self):
+        """Remove the index file."""
+        self.tmp.cleanup()
+
+    def test_ambiguous_symbols_use_rank_then_shortest_id(self):
+        """Test resolution of tickers shared by several coins."""
+        ids = CoinIdIndex.build(COINS, ranked_ids=["the-open-network", "bitcoin"])
+
+        self.assertEqual(ids["TON"], "the-open-network")
+        self.assertEqual(ids["ETH"], "ethereum")
+        self.assertEqual(ids["KAS"], "kaspa")
+
+    def test_index_persists_and_overrides_win(self):
+        """Test that a new process reads the index from disk."""
+        CoinIdIndex(self.path).update(COINS)
+
+        index = CoinIdIndex(self.path, overrides={"KAS": "kaspa-override"})
+        self.assertTrue(index.is_fresh())
+        self.assertEqual(index.get("ETH/USDT"), "ethereum")
+        self.assertEqual(index.get("kas-usdt"), "kaspa-override")
+        self.assertIsNone(index.get("NOPE/USDT"))
+        self.assertEqual(index.stats["misses"], 1)
+
+    def test_refresh_only_when_stale(self):
+        """Test the daily refresh policy."""
+        index = CoinIdIndex(self.path, ttl_seconds=60)
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return COINS, []
+
+        self.assertTrue(index.refresh_if_stale(fetch, block=True))
+        self.assertFalse(index.refresh_if_stale(fetch, block=True))
+        index._saved_at = time.time() - 120
+        self.assertTrue(index.refresh_if_stale(fetch, block=True))
+        self.assertEqual(len(calls), 2)
+
+    def test_failed_refresh_backs_off(self):
+        """Test that a failing API is not retried on every lookup."""
+        index = CoinIdIndex(self.path)
+
+        def fetch():
+            raise ConnectionError("rate limited")
+
+        self.assertTrue(index.refresh_if_stale(fetch, block=True))
+        self.assertFalse(index.refresh_if_stale(fetch, block=True))
+
+
+class TestCoinGeckoBatching(unittest.TestCase):
+    """Test that market requests are batched and paginated."""
+
+    def setUp(self):
+        """Set up a provider with a fake session and a temporary index."""
+        self.tmp = tempfile.TemporaryDirectory()
+        index = CoinIdIndex(Path(self.tmp.name) / "coin_ids.json", overrides=CoinGeckoProvider.SYMBOL_TO_ID)
+        self.provider = CoinGeckoProvider(coin_index=index)
+        self.provider.rate_limiter.wait_if_needed = lambda: None
+        self.session = FakeSession()
+        self.provider.session = self.session
+
+    def tearDown(self):
+        """Remove the index file."""
+        self.tmp.cleanup()
+
+    def test_index_covers_symbols_outside_hardcoded_map(self):
+        """Test lookups of coins missing from SYMBOL_TO_ID."""
+        self.provider.refresh_coin_index(block=True)
+
+        self.assertEqual(self.provider._get_coin_id("KAS/USDT"), "kaspa")
+        self.assertEqual(self.provider._get_coin_id("TON/USDT"), "the-open-network")
+        self.assertEqual(self.provider._get_coin_id("AVAX/USDT"), "avalanche-2")
+        # /coins/list + INDEX_RANK_PAGES pages of the ranking
+        self.assertEqual(len(self.session.calls), 1 + CoinGeckoProvider.INDEX_RANK_PAGES)
+
+    def test_market_data_is_paginated(self):
+        """Test that the top 50 is one call and the top 500 two calls."""
+        self.assertEqual(len(self.provider.get_market_data(limit=50)), 50)
+        self.assertEqual(len(self.session.calls), 1)
+
+        self.session.calls.clear()
+        data = self.provider.get_market_data(limit=500)
+        self.assertEqual(len(data), 500)
+        self.assertEqual([params["page"] for _, params in self.session.calls], [1, 2])
+
+    def test_get_markets_joins_ids(self):
+        """Test that a list of symbols costs one request per 250 coins."""
+        self.provider.coin_index.update(
+            COINS + [{"id": f"coin-{i}", "symbol": f"c{i}"} for i in range(300)]
+        )
+        symbols = ["BTC/USDT", "ETH/USDT", "KAS/USDT", "NOPE/USDT"] + [f"C{i}/USDT" for i in range(300)]
+
+        markets = self.provider.get_markets(symbols)
+
+        self.assertEqual(len(markets), 303)
+        self.assertEqual(len(self.session.calls), 2)
+        self.assertTrue(all(path == "/coins/markets" for path, _ in self.session.calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
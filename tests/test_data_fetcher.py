@@ -0,0 +1,185 @@
+"""
+Tests for local timeframe resampling.
+"""
+
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from trading.mtf_analyzer import MTFAnalyzer
+from utils.data_fetcher import DataFetcher, resample_ohlcv
+from utils.market_data_manager import MarketDataManager
+from utils.multi_source_provider import CCXTProvider, MultiSourceDataProvider
+
+
+def make_candles(start: str, periods: int, freq: str = "15min") -> pd.DataFrame:
+    """Build an OHLCV frame with distinct values per candle."""
+    index = pd.date_range(start, periods=periods, freq=freq, name="timestamp")
+    close = 100 + np.sin(np.arange(periods) / 5.0) * 10
+    return pd.DataFrame(
+        {
+            "open": close - 0.5,
+            "high": close + np.arange(periods) % 7,
+            "low": close - np.arange(periods) % 5,
+            "close": close,
+            "volume": np.arange(periods, dtype=float) + 1,
+        },
+        index=index,
+    )
+
+
+class TestResample(unittest.TestCase):
+    """Test resample_ohlcv."""
+
+    def test_matches_pandas_on_aligned_history(self):
+        """Test that complete buckets equal a pandas resample."""
+        df = make_candles("2024-01-01", 96 * 3)
+
+        result = resample_ohlcv(df, "4h", source_timeframe="15m")
+        expected = df.resample("4h").agg(
+            {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+        )
+
+        assert len(result) == 18
+        np.testing.assert_allclose(result.to_numpy(), expected.to_numpy())
+        np.testing.assert_array_equal(result.index.values, expected.index.values)
+
+    def test_buckets_align_to_epoch(self):
+        """Test that 4h buckets open at 00/04/08 UTC and a leading partial bucket is dropped."""
+        df = make_candles("2024-01-01 01:00", 16 * 3)
+
+        result = resample_ohlcv(df, "4h", source_timeframe="15m")
+
+        assert result.index[0] == pd.Timestamp("2024-01-01 04:00")
+        assert all(ts.hour % 4 == 0 for ts in result.index)
+
+    def test_trailing_partial_bar(self):
+        """Test that the forming bar is kept by default and dropped on request."""
+        df = make_candles("2024-01-01", 4 * 5 + 2)
+
+        with_partial = resample_ohlcv(df, "1h", source_timeframe="15m")
+        closed_only = resample_ohlcv(df, "1h", source_timeframe="15m", include_partial=False)
+
+        assert len(with_partial) == 6
+        assert len(closed_only) == 5
+        assert with_partial["close"].iloc[-1] == df["close"].iloc[-1]
+        assert with_partial["volume"].iloc[-1] == df["volume"].iloc[-2:].sum()
+
+    def test_weekly_buckets_open_on_monday(self):
+        """Test weekly alignment to Monday like exchange candles."""
+        df = make_candles("2024-01-01", 28, freq="1D")  # 2024-01-01 is a Monday
+
+        result = resample_ohlcv(df, "1w", source_timeframe="1d")
+
+        assert len(result) == 4
+        assert all(ts.dayofweek == 0 for ts in result.index)
+
+    def test_rejects_non_multiple(self):
+        """Test that impossible derivations raise."""
+        df = make_candles("2024-01-01", 10, freq="1h")
+        with self.assertRaises(ValueError):
+            resample_ohlcv(df, "15m", source_timeframe="1h")
+
+    def test_data_fetcher_delegates(self):
+        """Test DataFetcher.get_timeframe_data."""
+        df = make_candles("2024-01-01", 96)
+        result = DataFetcher().get_timeframe_data(df, "1d", "15m")
+        assert len(result) == 1
+        assert result["volume"].iloc[0] == df["volume"].sum()
+
+
+class FakeExchange:
+    """Exchange stub that records fetch_ohlcv calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def fetch_ohlcv(self, symbol, timeframe, limit=100):
+        self.calls.append((timeframe, limit))
+        df = make_candles("2024-01-01", limit)
+        ts = df.index.values.astype("datetime64[ms]").astype(np.int64)
+        return [[t, *row] for t, row in zip(ts, df.to_numpy().tolist())]
+
+
+class TestMTFAnalyzerResampling(unittest.TestCase):
+    """Test that MTFAnalyzer derives higher timeframes from one fetch."""
+
+    def test_single_fetch_for_15m(self):
+        """Test that 1h and 4h trends come from one 15m request."""
+        exchange = FakeExchange()
+        analyzer = MTFAnalyzer(exchange)
+
+        frames = analyzer.get_higher_tf_frames("BTC/USDT", "15m")
+
+        assert exchange.calls == [("15m", 960)]
+        assert set(frames) == {"1h", "4h"}
+        assert all(len(df) == analyzer.HIGHER_TF_BARS for df in frames.values())
+
+    def test_short_history_falls_back_to_direct_fetch(self):
+        """Test that a timeframe the base fetch cannot cover is fetched directly."""
+        exchange = FakeExchange()
+        analyzer = MTFAnalyzer(exchange)
+
+        result = analyzer.get_higher_tf_trends("BTC/USDT", "1h")
+
+        assert exchange.calls == [("1h", 1000), ("1d", 60)]
+        assert set(result["trends"]) == {"4h", "1d"}
+
+
+class PagedExchange:
+    """Exchange stub that serves at most one page of 15m candles from `since` up to `now_ms`."""
+
+    def __init__(self, now_ms: int):
+        self.now_ms = now_ms
+        self.markets = {"BTC/USDT": {}}
+        self.calls = []
+
+    def load_markets(self):
+        return self.markets
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls.append((timeframe, since, limit))
+        tf_ms = 15 * 60_000
+        limit = min(limit, CCXTProvider.OHLCV_PAGE_LIMIT)
+        last = self.now_ms // tf_ms * tf_ms
+        start = last - (limit - 1) * tf_ms if since is None else since
+        ts = np.arange(start, min(start + limit * tf_ms, last + tf_ms), tf_ms)
+        close = 100 + np.sin(ts / tf_ms / 5.0) * 10
+        return [[int(t), c - 0.5, c + 1, c - 1, c, float(t // tf_ms % 97 + 1)] for t, c in zip(ts, close)]
+
+
+class TestMultiTimeframeDepth(unittest.TestCase):
+    """Test that get_ohlcv_multi_tf fetches enough base history to derive 4h."""
+
+    def test_4h_derived_from_paged_15m(self):
+        """Test that 15m -> 4h at the default limit pages the base fetch and never asks for 4h."""
+        now_ms = 1_700_000_000_000
+        exchange = PagedExchange(now_ms)
+        manager = MarketDataManager(use_multi_source=False, use_candle_store=False)
+        manager.exchange_manager = None
+        manager.use_multi_source = True
+        manager.data_provider = MultiSourceDataProvider(use_candle_store=False)
+        manager.data_provider.ccxt_provider.exchanges = {"kucoin": exchange}
+
+        with mock.patch("utils.multi_source_provider.time.time", return_value=now_ms / 1000):
+            frames = manager.get_ohlcv_multi_tf("BTC/USDT", ["15m", "1h", "4h"])
+
+        needed = 201 * 16
+        self.assertEqual({tf for tf, _, _ in exchange.calls}, {"15m"})
+        self.assertEqual(len(exchange.calls), -(-needed // CCXTProvider.OHLCV_PAGE_LIMIT))
+        self.assertTrue(all(limit <= CCXTProvider.OHLCV_PAGE_LIMIT for _, _, limit in exchange.calls))
+
+        base = manager.market_cache.get("multi:BTC/USDT:15m")
+        self.assertEqual(len(base), needed)
+        self.assertTrue(base.index.is_unique and base.index.is_monotonic_increasing)
+        self.assertTrue((base.index.to_series().diff().dropna() == pd.Timedelta("15min")).all())
+
+        self.assertTrue(all(len(frames[tf]) == 200 for tf in ("15m", "1h", "4h")))
+        expected = resample_ohlcv(base, "4h", source_timeframe="15m").iloc[-200:]
+        pd.testing.assert_frame_equal(frames["4h"], expected, check_freq=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Tests for the vectorized batch OHLCV validator.
+"""
+
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from utils.data_validator import BatchDataValidator, DataValidator
+
+HOUR = pd.Timedelta(hours=1)
+
+
+def make_frame(n: int = 100, start: str = "2024-01-01") -> pd.DataFrame:
+    """Clean hourly OHLCV frame."""
+    close = 100 + np.cumsum(np.random.default_rng(n).normal(0, 1, n))
+    return pd.DataFrame(
+        {"open": close - 0.2, "high": close + 1, "low": close - 1, "close": close, "volume": 10.0},
+        index=pd.DatetimeIndex(pd.date_range(start, periods=n, freq="1h"), name="timestamp"),
+    )
+
+
+class TestBatchDataValidator(unittest.TestCase):
+    """Test per-symbol reports, repair plans and repairs."""
+
+    def setUp(self):
+        """Build a panel with one clean and several broken symbols."""
+        self.validator = BatchDataValidator()
+        broken = make_frame()
+        broken.iloc[5, broken.columns.get_loc("high")] = broken["low"].iloc[5] - 1
+        broken.iloc[7, broken.columns.get_loc("volume")] = -3
+        broken.iloc[8, broken.columns.get_loc("volume")] = 0
+
+        gapped = make_frame().drop(make_frame().index[[10, 11, 12, 50]])
+
+        shuffled = make_frame()
+        shuffled = pd.concat([shuffled.iloc[50:], shuffled.iloc[:50], shuffled.iloc[[3]]])
+
+        with_nan = make_frame()
+        with_nan.iloc[20, with_nan.columns.get_loc("close")] = np.nan
+
+        self.frames = {
+            "BTC/USDT": make_frame(),
+            "ETH/USDT": broken,
+            "SOL/USDT": gapped,
+            "XRP/USDT": shuffled,
+            "ADA/USDT": with_nan,
+            "DOT/USDT": None,
+        }
+
+    def test_clean_symbol(self):
+        """Test that a clean frame has an empty plan."""
+        report = self.validator.validate(self.frames, "1h")["BTC/USDT"]
+        self.assertTrue(report.is_clean)
+        self.assertEqual(report.rows, 100)
+        self.assertEqual(report.repairs, [])
+
+    def test_ohlc_and_volume_issues(self):
+        """Test OHLC consistency and volume checks."""
+        report = self.validator.validate(self.frames, "1h")["ETH/USDT"]
+        self.assertEqual(report.invalid_ohlc, 1)
+        self.assertEqual(report.negative_volume, 1)
+        self.assertEqual(report.zero_volume, 1)
+        self.assertEqual(report.repairs, ["fix_ohlc", "clip_volume"])
+
+    def test_gaps(self):
+        """Test gap detection against the timeframe spacing."""
+        report = self.validator.validate(self.frames, "1h")["SOL/USDT"]
+        self.assertEqual((report.gaps, report.missing_bars), (2, 4))
+        self.assertEqual(report.repairs, ["refetch_gaps"])
+        self.assertFalse(report.needs_repair)
+
+        no_tf = self.validator.validate(self.frames)["SOL/USDT"]
+        self.assertEqual(no_tf.gaps, 0)
+
+    def test_order_and_duplicates(self):
+        """Test unsorted and duplicated timestamps."""
+        report = self.validator.validate(self.frames, "1h")["XRP/USDT"]
+        self.assertEqual(report.unsorted, 2)
+        self.assertEqual(report.duplicates, 1)
+        self.assertEqual(report.gaps, 0)
+        self.assertEqual(report.repairs, ["sort", "drop_duplicates"])
+
+    def test_nan_and_missing_frames(self):
+        """Test NaN prices and skipped empty inputs."""
+        reports = self.validator.validate(self.frames, "1h")
+        self.assertEqual(reports["ADA/USDT"].nan_rows, 1)
+        self.assertNotIn("DOT/USDT", reports)
+
+    def test_matches_single_frame_validator(self):
+        """Test consistency with DataValidator.validate_ohlcv."""
+        reports = self.validator.validate(self.frames, "1h")
+        for symbol in ("BTC/USDT", "ETH/USDT", "SOL/USDT"):
+            is_valid, _ = DataValidator.validate_ohlcv(self.frames[symbol])
+            self.assertEqual(is_valid, reports[symbol].invalid_ohlc == 0)
+
+    def test_repair(self):
+        """Test that repaired frames validate cleanly and clean frames are untouched."""
+        repaired, _ = self.validator.validate_and_repair(self.frames, "1h")
+
+        self.assertIs(repaired["BTC/USDT"], self.frames["BTC/USDT"])
+        self.assertIs(repaired["SOL/USDT"], self.frames["SOL/USDT"])
+        again = self.validator.validate(repaired, "1h")
+        for symbol in ("ETH/USDT", "XRP/USDT", "ADA/USDT"):
+            self.assertEqual(
+                [a for a in again[symbol].repairs if a != "refetch_gaps"], [], symbol
+            )
+        self.assertTrue(repaired["XRP/USDT"].index.is_monotonic_increasing)
+
+    def test_panel_is_cheap(self):
+        """Test that a scanner-sized panel validates in milliseconds."""
+        frames = {f"C{i}/USDT": make_frame() for i in range(50)}
+        self.validator.validate(frames, "15m")
+
+        started = time.perf_counter()
+        for _ in range(10):
+            self.validator.validate(frames, "15m")
+        self.assertLess((time.perf_counter() - started) / 10, 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,7 +7,33 @@ import unittest
 import numpy as np
 import pandas as pd
 
-from indicators.smart_money.fair_value_gaps import FairValueGapDetector
+from indicators.smart_money.fair_value_gaps import FairValueGapDetector, FVGIntervalIndex
+
+
+def reference_fvg_columns(df, min_size_pct, max_age_bars, strong_threshold_pct):
+    """Row-by-row reference of detection and forward fill."""
+    n = len(df)
+    o, h, l, c = (df[k].to_numpy() for k in ("open", "high", "low", "close"))
+    cols = {k: [np.nan] * n for k in ("bullish_high", "bullish_low", "bearish_high", "bearish_low")}
+    kinds, strengths, fvgs = [None] * n, [None] * n, []
+    for i in range(2, n):
+        if c[i - 2] < o[i] and h[i - 1] < c[i - 2] and l[i - 1] > o[i]:
+            kind, high, low = "bullish", c[i - 2], o[i]
+        elif c[i - 2] > o[i] and l[i - 1] > c[i - 2] and h[i - 1] < o[i]:
+            kind, high, low = "bearish", o[i], c[i - 2]
+        else:
+            continue
+        size_pct = (high - low) / low * 100
+        if size_pct >= min_size_pct:
+            strength = "strong" if size_pct >= strong_threshold_pct else "weak"
+            fvgs.append((i, kind, high, low, strength))
+            cols[kind + "_high"][i], cols[kind + "_low"][i], kinds[i], strengths[i] = high, low, kind, strength
+    for i, kind, high, low, strength in fvgs:
+        for j in range(i + 1, min(i + max_age_bars + 1, n)):
+            if low <= c[j] <= high:
+                break
+            cols[kind + "_high"][j], cols[kind + "_low"][j], kinds[j], strengths[j] = high, low, kind, strength
+    return cols, kinds, strengths
 
 
 class TestFairValueGaps(unittest.TestCase):
@@ -123,6 +149,41 @@ class TestFairValueGaps(unittest.TestCase):
 
         assert isinstance(fvg, (dict, type(None)))
 
+    def test_matches_row_by_row_reference(self):
+        """Test that vectorized detection and forward fill equal the row-by-row logic."""
+        rng = np.random.default_rng(4)
+        base = 100 + np.cumsum(rng.normal(0, 0.3, 2000))
+        # Independent OHLC noise so that both patterns occur
+        df = pd.DataFrame({k: base + rng.normal(0, 1, 2000) for k in ("open", "high", "low", "close")})
+        df["volume"] = 1.0
+
+        for min_size, max_age in ((-5.0, 20), (-1.0, 3), (0.1, 50)):
+            detector = FairValueGapDetector(min_size_pct=min_size, max_age_bars=max_age, strong_threshold_pct=-0.5)
+            result = detector.detect_fair_value_gaps(df)
+            cols, kinds, strengths = reference_fvg_columns(df, min_size, max_age, -0.5)
+            for name, values in cols.items():
+                np.testing.assert_array_equal(result[f"fvg_{name}"].to_numpy(), values)
+            self.assertEqual(result["fvg_type"].tolist(), kinds)
+            self.assertEqual(result["fvg_strength"].tolist(), strengths)
+
+    def test_interval_index(self):
+        """Test that the interval index returns the same FVG as a linear scan."""
+        rng = np.random.default_rng(9)
+        lows = rng.uniform(90, 110, 40)
+        fvgs = [{"index": k, "low": low, "high": low + rng.uniform(-1, 4)} for k, low in enumerate(lows)]
+        index = FVGIntervalIndex(fvgs)
+        prices = np.concatenate([rng.uniform(85, 120, 500), lows, [fvg["high"] for fvg in fvgs], [np.nan]])
+        for price in prices:
+            expected = next((fvg for fvg in fvgs if fvg["low"] <= price <= fvg["high"]), None)
+            self.assertIs(index.find(price), expected)
+
+        # The detector rebuilds its index when active FVGs change
+        gap = {"index": 1, "low": 100.0, "high": 101.0}
+        self.detector.active_fvgs = [gap]
+        self.assertIs(self.detector.is_price_in_fvg(100.5), gap)
+        self.detector.active_fvgs = []
+        self.assertIsNone(self.detector.is_price_in_fvg(100.5))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,144 @@
+"""
+Tests for the declarative feature graph.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ml.feature_engineering import (
+    BASE_FEATURES,
+    ENHANCED_FEATURES,
+    LIGHTGBM_FEATURES,
+    create_technical_features,
+)
+from ml.feature_graph import FeatureGraph, FeatureSet
+from ml.labeling import calculate_atr
+
+
+def make_ohlcv(n: int = 400) -> pd.DataFrame:
+    """Random-walk OHLCV on a DatetimeIndex."""
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = close + rng.normal(0, 0.5, n)
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) + rng.uniform(0, 1, n),
+            "low": np.minimum(open_, close) - rng.uniform(0, 1, n),
+            "close": close,
+            "volume": rng.uniform(100, 1000, n),
+        },
+        index=pd.date_range("2024-01-01", periods=n, freq="15min"),
+    )
+
+
+class TestFeatureGraph(unittest.TestCase):
+    """Test planning and execution of the feature graph."""
+
+    def setUp(self):
+        """Set up a small graph that counts node evaluations."""
+        self.calls = {}
+        self.graph = FeatureGraph()
+
+        def counted(name, fn):
+            def wrapper(*args):
+                self.calls[name] = self.calls.get(name, 0) + 1
+                return fn(*args)
+            return wrapper
+
+        add = self.graph.add
+        add("sma_3", ["close"], counted("sma_3", lambda close: close.rolling(3).mean()))
+        add("ratio", ["close", "sma_3"], counted("ratio", lambda close, sma: close / sma))
+        add("spread", ["sma_3", "close"], counted("spread", lambda sma, close: close - sma))
+        add("up", ["close"], counted("up", lambda close: close > close.shift(1)), flags=["up"])
+        add("pair", ["close"], counted("pair", lambda close: (close * 2, close * 3)), outputs=["double", "triple"])
+
+    def test_shared_nodes_computed_once(self):
+        """Test that an intermediate used by several features is computed once."""
+        feature_set = FeatureSet(self.graph, ["ratio", "spread"])
+        X, names = feature_set.matrix(make_ohlcv(20))
+
+        self.assertEqual(names, ["ratio", "spread"])
+        self.assertEqual(self.calls, {"sma_3": 1, "ratio": 1, "spread": 1})
+        self.assertEqual(X.shape, (20, 2))
+
+    def test_only_requested_features_computed(self):
+        """Test that unrequested nodes are not evaluated and requested order is kept."""
+        df = make_ohlcv(20)
+        feature_set = FeatureSet(self.graph, ["ratio", "spread", "up", "double", "triple"])
+        X, names = feature_set.matrix(df, ["triple", "up"])
+
+        self.assertEqual(names, ["triple", "up"])
+        self.assertEqual(self.calls, {"pair": 1, "up": 1})
+        np.testing.assert_array_equal(X[:, 0], df["close"].to_numpy() * 3)
+
+    def test_frame_flags_and_dropna(self):
+        """Test int dtype of flag features and NaN row dropping."""
+        df = make_ohlcv(20)
+        frame = FeatureSet(self.graph, ["ratio", "up"]).frame(df, dropna=True)
+
+        self.assertEqual(frame["up"].dtype, np.int64)
+        self.assertEqual(frame["ratio"].dtype, np.float64)
+        pd.testing.assert_index_equal(frame.index, df.index[2:])
+
+    def test_aliases_and_errors(self):
+        """Test feature names mapped onto shared columns and unknown names."""
+        feature_set = FeatureSet(self.graph, {"a": "sma_3", "b": "sma_3"})
+        X, _ = feature_set.matrix(make_ohlcv(20))
+        np.testing.assert_array_equal(X[:, 0], X[:, 1])
+
+        with self.assertRaises(ValueError):
+            feature_set.matrix(make_ohlcv(20), ["missing"])
+        with self.assertRaises(KeyError):
+            FeatureSet(self.graph, ["missing"])
+        with self.assertRaises(ValueError):
+            self.graph.add("ratio", ["close"], lambda close: close)
+
+
+class TestFeatureSets(unittest.TestCase):
+    """Test the feature sets used by the models."""
+
+    def test_subset_matches_full_set(self):
+        """Test that computing a model's subset gives the same columns as the full set."""
+        df = make_ohlcv()
+        for feature_set in (BASE_FEATURES, LIGHTGBM_FEATURES):
+            full, names = feature_set.matrix(df)
+            subset = [names[k] for k in (20, 3, 11, 0)]
+            X, _ = feature_set.matrix(df, subset)
+            np.testing.assert_array_equal(X, full[:, [20, 3, 11, 0]])
+
+    def test_matches_pandas_reference(self):
+        """Test shared RSI/ATR/Bollinger nodes against direct pandas formulas."""
+        df = make_ohlcv()
+        close = df["close"]
+        features = create_technical_features(df)
+
+        delta = close.diff()
+        gain = delta.where(delta > 0, 0).rolling(14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+        np.testing.assert_array_equal(features["rsi"], 100 - 100 / (1 + gain / loss))
+
+        true_range = pd.concat(
+            [df["high"] - df["low"], (df["high"] - close.shift()).abs(), (df["low"] - close.shift()).abs()], axis=1
+        ).max(axis=1)
+        np.testing.assert_array_equal(features["atr"], true_range.rolling(14).mean())
+        np.testing.assert_array_equal(calculate_atr(df), true_range.rolling(14, min_periods=1).mean())
+
+        upper = close.rolling(20).mean() + close.rolling(20).std() * 2
+        np.testing.assert_array_equal(features["bb_upper"], upper)
+
+        X, names = LIGHTGBM_FEATURES.matrix(df)
+        np.testing.assert_array_equal(X[:, names.index("rsi")], 100 - 100 / (1 + gain / (loss + 1e-10)))
+        self.assertEqual(names.count("rsi"), 1)
+
+    def test_enhanced_set_layout(self):
+        """Test that the enhanced set extends the base set with indicator blocks."""
+        self.assertEqual(ENHANCED_FEATURES.names[: len(BASE_FEATURES.names)], BASE_FEATURES.names)
+        self.assertEqual(len(ENHANCED_FEATURES.names), 68)
+        self.assertEqual(len(LIGHTGBM_FEATURES.names), 64)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Tests for paginated OHLCV backfill into the local history dataset.
+"""
+
+import tempfile
+import threading
+import time
+import unittest
+
+from utils.history_backfill import HistoryBackfill
+
+HOUR_MS = 3_600_000
+
+
+class FakeExchange:
+    """Minimal ccxt-like exchange serving hourly candles from a fixed listing time."""
+
+    rateLimit = 1
+
+    def __init__(self, listed_at: int, fail_after: int = None):
+        self.listed_at = listed_at
+        self.fail_after = fail_after
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=1000):
+        with self._lock:
+            self.calls.append((symbol, since))
+            if self.fail_after is not None and len(self.calls) > self.fail_after:
+                raise RuntimeError("connection reset")
+        now = int(time.time() * 1000)
+        start = max(since, self.listed_at)
+        start = -(-start // HOUR_MS) * HOUR_MS
+        rows = []
+        ts = start
+        while ts <= now and len(rows) < limit:
+            price = 100.0 + (ts - self.listed_at) / HOUR_MS
+            rows.append([ts, price, price + 1, price - 1, price + 0.5, 10.0])
+            ts += HOUR_MS
+        return rows
+
+
+class TestHistoryBackfill(unittest.TestCase):
+    """Test paging, incremental updates and checkpoint resume."""
+
+    def setUp(self):
+        """Set up a temporary dataset root."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.now = int(time.time() * 1000)
+
+    def tearDown(self):
+        """Remove the temporary dataset."""
+        self.tmp.cleanup()
+
+    def make_backfill(self, exchange) -> HistoryBackfill:
+        return HistoryBackfill(
+            root_dir=self.tmp.name, exchange=exchange, page_limit=100, calls_per_minute=600_000
+        )
+
+    def test_pages_through_full_range(self):
+        """Test that history longer than one page is fetched completely."""
+        exchange = FakeExchange(listed_at=self.now - 400 * 24 * HOUR_MS)
+        backfill = self.make_backfill(exchange)
+
+        stats = backfill.backfill("BTC/USDT", "1h", days_back=10)
+
+        self.assertIsNone(stats["error"])
+        self.assertGreaterEqual(stats["pages"], 3)
+        df = backfill.read("BTC/USDT", "1h")
+        self.assertGreaterEqual(len(df), 10 * 24)
+        self.assertTrue(df.index.is_monotonic_increasing)
+        self.assertFalse(df.index.has_duplicates)
+        self.assertTrue((df.index.to_series().diff().dropna() == "1h").all())
+
+    def test_second_run_is_incremental(self):
+        """Test that a repeated run does not re-download stored candles."""
+        exchange = FakeExchange(listed_at=self.now - 400 * 24 * HOUR_MS)
+        backfill = self.make_backfill(exchange)
+        backfill.backfill("BTC/USDT", "1h", days_back=5)
+        count = backfill.store.count("BTC/USDT", "1h")
+
+        exchange.calls.clear()
+        stats = backfill.backfill("BTC/USDT", "1h", days_back=5)
+
+        self.assertLessEqual(len(exchange.calls), 1)
+        self.assertEqual(backfill.store.count("BTC/USDT", "1h"), count + stats["added"])
+
+    def test_extending_depth_fetches_only_the_head(self):
+        """Test that a deeper request only downloads the missing older candles."""
+        exchange = FakeExchange(listed_at=self.now - 400 * 24 * HOUR_MS)
+        backfill = self.make_backfill(exchange)
+        backfill.backfill("BTC/USDT", "1h", days_back=2)
+        first = backfill.store.first_timestamp("BTC/USDT", "1h")
+
+        exchange.calls.clear()
+        backfill.backfill("BTC/USDT", "1h", days_back=6)
+
+        self.assertLess(backfill.store.first_timestamp("BTC/USDT", "1h"), first)
+        head_calls = [since for _, since in exchange.calls if since < first]
+        self.assertEqual(len(head_calls), 1 + (4 * 24) // 100)
+
+    def test_stops_at_listing(self):
+        """Test that the head gap before listing is not requested again."""
+        listed_at = (self.now - 3 * 24 * HOUR_MS) // HOUR_MS * HOUR_MS
+        exchange = FakeExchange(listed_at=listed_at)
+        backfill = self.make_backfill(exchange)
+        backfill.backfill("NEW/USDT", "1h", days_back=30)
+        self.assertEqual(backfill.store.first_timestamp("NEW/USDT", "1h"), listed_at)
+
+        exchange.calls.clear()
+        backfill.backfill("NEW/USDT", "1h", days_back=30)
+        self.assertTrue(all(since > listed_at for _, since in exchange.calls))
+
+    def test_resumes_from_checkpoint(self):
+        """Test that an interrupted download continues where it stopped."""
+        failing = FakeExchange(listed_at=self.now - 400 * 24 * HOUR_MS, fail_after=2)
+        stats = self.make_backfill(failing).backfill("ETH/USDT", "1h", days_back=10)
+        self.assertIsNotNone(stats["error"])
+
+        exchange = FakeExchange(listed_at=failing.listed_at)
+        backfill = self.make_backfill(exchange)
+        pending = backfill._read_checkpoint()["pending"]
+        self.assertIn("ETH/USDT|1h", pending)
+
+        stats = backfill.backfill("ETH/USDT", "1h", days_back=10)
+
+        self.assertIsNone(stats["error"])
+        self.assertGreaterEqual(exchange.calls[0][1], pending["ETH/USDT|1h"]["head_next"])
+        self.assertEqual(backfill._read_checkpoint()["pending"], {})
+        df = backfill.read("ETH/USDT", "1h")
+        self.assertGreaterEqual(len(df), 10 * 24)
+        self.assertTrue((df.index.to_series().diff().dropna() == "1h").all())
+
+    def test_backfill_many(self):
+        """Test parallel backfill of several symbols."""
+        exchange = FakeExchange(listed_at=self.now - 400 * 24 * HOUR_MS)
+        backfill = self.make_backfill(exchange)
+        symbols = ["BTC/USDT", "ETH/USDT", "SOL/USDT"]
+
+        results = backfill.backfill_many(symbols, "1h", days_back=3)
+
+        self.assertEqual(set(results), set(symbols))
+        for symbol in symbols:
+            self.assertIsNone(results[symbol]["error"])
+            self.assertGreaterEqual(results[symbol]["candles"], 3 * 24)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+"""
+Tests for per-candle indicator memoization.
+"""
+
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.enhanced_signal_generator import EnhancedSignalGenerator
+from utils.indicator_memo import IndicatorMemo, bar_window
+
+
+def make_frame(n: int = 60, start: int = 0) -> pd.DataFrame:
+    """Hourly OHLCV with a millisecond timestamp column."""
+    close = 100 + np.cumsum(np.random.default_rng(n + start).normal(0, 1, n))
+    return pd.DataFrame(
+        {
+            "timestamp": (np.arange(n) + start) * 3_600_000,
+            "open": close,
+            "high": close + 1,
+            "low": close - 1,
+            "close": close,
+            "volume": 1000.0,
+        }
+    )
+
+
+class TestIndicatorMemo(unittest.TestCase):
+    """Test keys, invalidation, budget and metrics."""
+
+    def setUp(self):
+        """Set up a memo and a call counter."""
+        self.memo = IndicatorMemo()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def rsi(self, df: pd.DataFrame):
+        """Counted stand-in for an indicator."""
+        with self.calls_lock:
+            self.calls += 1
+        return df["close"].diff().rolling(14).mean()
+
+    def test_computed_once_per_candle(self):
+        """Test that repeated requests within a candle hit the cache."""
+        df = make_frame()
+        first = self.memo.compute("binance:BTC/USDT", "1h", df, "rsi", lambda: self.rsi(df), period=14)
+        for _ in range(3):
+            again = self.memo.compute("binance:BTC/USDT", "1h", df.copy(), "rsi", lambda: self.rsi(df), period=14)
+            self.assertIs(again, first)
+
+        # Other parameters, data windows and series are separate entries
+        self.memo.compute("binance:BTC/USDT", "1h", df, "rsi", lambda: self.rsi(df), period=21)
+        self.memo.compute("binance:BTC/USDT", "1h", df.tail(30), "rsi", lambda: self.rsi(df), period=14)
+        self.memo.compute("okx:BTC/USDT", "1h", df, "rsi", lambda: self.rsi(df), period=14)
+
+        self.assertEqual(self.calls, 4)
+        stats = self.memo.get_stats()
+        self.assertEqual(stats["hits"], 3)
+        self.assertEqual(stats["computes"], 4)
+        self.assertAlmostEqual(stats["hit_rate"], 3 / 7 * 100)
+
+    def test_new_candle_invalidates(self):
+        """Test that a new candle drops the previous candle's entries and old data is not cached."""
+        old, new = make_frame(), make_frame(start=1)
+        self.memo.compute("BTC/USDT", "1h", old, "rsi", lambda: self.rsi(old))
+        self.memo.compute("BTC/USDT", "1h", old, "macd", lambda: self.rsi(old))
+        self.memo.compute("BTC/USDT", "1h", new, "rsi", lambda: self.rsi(new))
+
+        stats = self.memo.get_stats()
+        self.assertEqual(stats["invalidated"], 2)
+        self.assertEqual(stats["entries"], 1)
+
+        # A late caller with the previous candle recomputes without caching
+        self.memo.compute("BTC/USDT", "1h", old, "rsi", lambda: self.rsi(old))
+        self.memo.compute("BTC/USDT", "1h", old, "rsi", lambda: self.rsi(old))
+        self.assertEqual(self.calls, 5)
+        self.assertEqual(self.memo.get_stats()["uncached"], 2)
+
+    def test_forming_candle_change_recomputes(self):
+        """Test that a changed last candle with the same timestamps is not served from the memo."""
+        first = make_frame(80)
+        polled = first.copy()
+        polled.loc[polled.index[-1], ["high", "close"]] *= 1.1
+        polled.loc[polled.index[-1], "volume"] += 500
+        self.assertEqual(bar_window(first), bar_window(polled))
+
+        stale = self.memo.compute("BTC/USDT", "1h", first, "rsi", lambda: self.rsi(first))
+        fresh = self.memo.compute("BTC/USDT", "1h", polled, "rsi", lambda: self.rsi(polled))
+        self.assertEqual(self.calls, 2)
+        self.assertNotEqual(fresh.iloc[-1], stale.iloc[-1])
+        self.assertEqual(fresh.iloc[-1], self.rsi(polled).iloc[-1])
+        self.assertEqual(self.memo.get_stats()["invalidated"], 1)
+
+        # The same snapshot hits; an earlier snapshot (less volume) is computed without caching
+        self.assertIs(self.memo.compute("BTC/USDT", "1h", polled.copy(), "rsi", lambda: self.rsi(polled)), fresh)
+        self.memo.compute("BTC/USDT", "1h", first, "rsi", lambda: self.rsi(first))
+        self.assertIs(self.memo.compute("BTC/USDT", "1h", polled, "rsi", lambda: self.rsi(polled)), fresh)
+        self.assertEqual(self.memo.get_stats()["uncached"], 1)
+
+    def test_memory_budget(self):
+        """Test that entries beyond the budget are evicted."""
+        memo = IndicatorMemo(max_bytes=40_000)
+        for k in range(10):
+            df = make_frame(start=k)
+            memo.compute(f"S{k}", "1h", df, "values", lambda: np.zeros(1000))
+        stats = memo.get_stats()
+        self.assertLessEqual(stats["bytes"], 40_000)
+        self.assertGreater(stats["evictions"], 0)
+
+    def test_concurrent_callers_compute_once(self):
+        """Test that concurrent requests of one key share a single computation."""
+        df = make_frame()
+
+        def slow():
+            time.sleep(0.1)
+            return self.rsi(df)
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            futures = [executor.submit(self.memo.compute, "BTC/USDT", "1h", df, "rsi", slow) for _ in range(6)]
+            results = [f.result() for f in futures]
+
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        stats = self.memo.get_stats()
+        self.assertEqual(stats["hits"] + stats["shared"], 5)
+
+    def test_bar_window(self):
+        """Test candle time extraction from columns and indexes."""
+        df = make_frame(5)
+        self.assertEqual(bar_window(df), (0, 4 * 3_600_000, 5))
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+        self.assertEqual(bar_window(df), (0, 4 * 3_600_000, 5))
+        self.assertEqual(bar_window(df.set_index("timestamp")), (0, 4 * 3_600_000, 5))
+        self.assertIsNone(bar_window(df.drop(columns="timestamp")))
+
+        # Without candle times nothing is cached
+        self.memo.compute("BTC/USDT", "1h", df.drop(columns="timestamp"), "rsi", lambda: self.rsi(df))
+        self.assertEqual(self.memo.get_stats()["uncached"], 1)
+
+
+class TestEnhancedIndicators(unittest.TestCase):
+    """Test the memoized indicator bundle of EnhancedSignalGenerator."""
+
+    def test_matches_single_indicators(self):
+        """Test that the bundle equals calculate_rsi/calculate_macd, including the previous candle."""
+        df = make_frame(80)
+        close = df["close"]
+        indicators = EnhancedSignalGenerator.get_indicators(df, "test:ETH/USDT", "1h")
+
+        self.assertEqual(indicators["rsi_series"].iloc[-1], EnhancedSignalGenerator.calculate_rsi(close))
+        self.assertEqual(indicators["macd"], EnhancedSignalGenerator.calculate_macd(close))
+        self.assertEqual(indicators["macd_prev"], EnhancedSignalGenerator.calculate_macd(close.iloc[:-1]))
+        self.assertIs(EnhancedSignalGenerator.get_indicators(df, "test:ETH/USDT", "1h"), indicators)
+
+    def test_forming_candle_price_move(self):
+        """Test that RSI follows a price move inside the still-forming candle."""
+        df = make_frame(80)
+        before = EnhancedSignalGenerator.get_indicators(df, "test:SOL/USDT", "1h")
+
+        moved = df.copy()
+        moved.loc[moved.index[-1], "close"] *= 1.1
+        after = EnhancedSignalGenerator.get_indicators(moved, "test:SOL/USDT", "1h")
+
+        self.assertEqual(after["rsi_series"].iloc[-1], EnhancedSignalGenerator.calculate_rsi(moved["close"]))
+        self.assertGreater(after["rsi_series"].iloc[-1], before["rsi_series"].iloc[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
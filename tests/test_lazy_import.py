@@ -0,0 +1,96 @@
+"""
+Tests for lazy optional-dependency imports and the import-time report.
+"""
+
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from scripts.import_time_report import parse_importtime, summarize
+from utils.lazy_import import is_loaded, lazy_import, module_available
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+class TestLazyImport(unittest.TestCase):
+    """Test lazy_import and module_available."""
+
+    def setUp(self):
+        """Create a throwaway module that records when it is executed."""
+        self.tmp = tempfile.TemporaryDirectory()
+        Path(self.tmp.name, "maxflash_heavy_dep.py").write_text("LOADED = True\nVALUE = 42\n")
+        sys.path.insert(0, self.tmp.name)
+
+    def tearDown(self):
+        """Remove the throwaway module."""
+        sys.path.remove(self.tmp.name)
+        sys.modules.pop("maxflash_heavy_dep", None)
+        self.tmp.cleanup()
+
+    def test_import_deferred_until_attribute_access(self):
+        """Test that the real module is imported on first attribute access."""
+        module = lazy_import("maxflash_heavy_dep")
+
+        assert "maxflash_heavy_dep" not in sys.modules
+        assert not is_loaded(module)
+
+        assert module.VALUE == 42
+        assert "maxflash_heavy_dep" in sys.modules
+        assert is_loaded(module)
+
+    def test_module_available_does_not_import(self):
+        """Test availability checks without executing the module."""
+        assert module_available("maxflash_heavy_dep")
+        assert "maxflash_heavy_dep" not in sys.modules
+        assert not module_available("maxflash_missing_dep")
+
+    def test_missing_module_raises_on_use(self):
+        """Test that a missing module fails with ImportError at first use."""
+        module = lazy_import("maxflash_missing_dep")
+        with self.assertRaises(ImportError):
+            module.anything  # noqa: B018
+
+
+class TestEntryPointImports(unittest.TestCase):
+    """Test that entry points do not load heavy stacks at import time."""
+
+    def test_lightgbm_model_import_is_light(self):
+        """Test that importing ml.lightgbm_model loads neither TensorFlow nor sklearn/lightgbm."""
+        code = (
+            "import sys, ml.lightgbm_model\n"
+            "print('loaded:' + ','.join(m for m in ('tensorflow', 'lightgbm', 'sklearn', 'ccxt') if m in sys.modules))"
+        )
+        proc = subprocess.run(
+            [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=120
+        )
+
+        assert proc.returncode == 0, proc.stderr
+        assert "loaded:\n" in proc.stdout
+
+
+class TestImportTimeReport(unittest.TestCase):
+    """Test -X importtime parsing."""
+
+    SAMPLE = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       500 |        500 |   numpy.core\n"
+        "import time:      1000 |       1500 | numpy\n"
+        "import time:       200 |        200 |   utils.helpers\n"
+        "import time:       300 |       2000 | utils.market_data_manager\n"
+    )
+
+    def test_parse_and_summarize(self):
+        """Test per-package totals and entry-point cumulative time."""
+        rows = parse_importtime(self.SAMPLE)
+        assert rows[0] == ("numpy.core", 1, 500, 500)
+        assert rows[-1] == ("utils.market_data_manager", 0, 300, 2000)
+
+        summary = summarize(rows, "utils.market_data_manager", loaded=[])
+        assert summary["total_ms"] == 2.0
+        assert summary["packages"] == {"numpy": 1.5, "utils": 0.5}
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,339 @@
+"""
+Tests for the size-aware LRU+TTL market data cache and the Redis tier.
+"""
+
+import time
+import unittest
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.market_cache import (
+    MarketCache,
+    SizedLRUCache,
+    decode_value,
+    encode_value,
+    estimate_nbytes,
+    thaw_frame,
+)
+from utils.market_data_manager import MarketDataManager
+
+
+def make_frame(rows: int = 200) -> pd.DataFrame:
+    """Build an OHLCV frame."""
+    index = pd.date_range("2024-01-01", periods=rows, freq="15min")
+    close = np.linspace(100, 110, rows)
+    return pd.DataFrame(
+        {"open": close, "high": close + 1, "low": close - 1, "close": close, "volume": np.ones(rows)},
+        index=index,
+    )
+
+
+class TestSizedLRUCache(unittest.TestCase):
+    """Test SizedLRUCache."""
+
+    def test_hit_returns_read_only_view(self):
+        """Test that cached frames are shared read-only views, not copies."""
+        cache = SizedLRUCache(max_bytes=10_000_000)
+        cache.set("multi:BTC/USDT:1h", make_frame())
+
+        a = cache.get("multi:BTC/USDT:1h")
+        b = cache.get("multi:BTC/USDT:1h")
+
+        assert np.shares_memory(a["close"].to_numpy(), b["close"].to_numpy())
+        with self.assertRaises(ValueError):
+            a.loc[a.index[0], "close"] = 0.0
+
+    def test_new_columns_do_not_leak_into_cache(self):
+        """Test that adding indicator columns to a returned frame leaves the cache untouched."""
+        cache = SizedLRUCache(max_bytes=10_000_000)
+        cache.set("k", make_frame())
+
+        view = cache.get("k")
+        view["rsi"] = 50.0
+        view["close"] = view["close"] * 2
+
+        fresh = cache.get("k")
+        assert "rsi" not in fresh.columns
+        assert fresh["close"].iloc[0] == 100.0
+
+    def test_source_frame_is_detached(self):
+        """Test that mutating the frame passed to set() does not change the cache."""
+        cache = SizedLRUCache(max_bytes=10_000_000)
+        df = make_frame()
+        cache.set("k", df)
+
+        df.loc[df.index[0], "close"] = -1.0
+
+        assert cache.get("k")["close"].iloc[0] == 100.0
+
+    def test_byte_budget_evicts_lru(self):
+        """Test LRU eviction when the byte budget is exceeded."""
+        entry_size = estimate_nbytes(make_frame())
+        cache = SizedLRUCache(max_bytes=int(entry_size * 2.5))
+
+        cache.set("a", make_frame())
+        cache.set("b", make_frame())
+        cache.get("a")  # "b" becomes least recently used
+        cache.set("c", make_frame())
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["bytes"] <= stats["max_bytes"]
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after their TTL."""
+        cache = SizedLRUCache(max_bytes=1_000_000, default_ttl=0.05)
+        cache.set("k", {"last": 1.0})
+        assert cache.get("k") == {"last": 1.0}
+
+        time.sleep(0.06)
+
+        assert cache.get("k") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_stale_entries_are_kept_for_get_stale(self):
+        """Test that expired entries stay readable through get_stale within stale_ttl."""
+        cache = SizedLRUCache(max_bytes=1_000_000, default_ttl=0.05, stale_ttl=0.1)
+        cache.set("k", {"last": 1.0})
+        assert cache.get_stale("k") == ({"last": 1.0}, True)
+
+        time.sleep(0.06)
+
+        assert cache.get("k") is None
+        assert cache.get_stale("k") == ({"last": 1.0}, False)
+        assert cache.stats()["stale_hits"] == 1
+
+        time.sleep(0.1)
+
+        assert cache.get_stale("k") == (None, False)
+        assert cache.stats()["expirations"] == 1
+
+    def test_counters(self):
+        """Test hit/miss counters."""
+        cache = SizedLRUCache()
+        cache.get("missing")
+        cache.set("k", 1)
+        cache.get("k")
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 50
+
+
+class TestMarketCacheMemory(unittest.TestCase):
+    """Test MarketCache on top of SizedLRUCache."""
+
+    def test_get_set_and_pattern_clear(self):
+        """Test memory backend round trip and pattern clearing."""
+        cache = MarketCache(use_redis=False)
+        cache.set("ticker:BTC/USDT", {"last": 1})
+        cache.set("ticker:ETH/USDT", {"last": 2})
+
+        assert cache.get("ticker:BTC/USDT") == {"last": 1}
+
+        cache.clear("BTC")
+        assert cache.get("ticker:BTC/USDT") is None
+        assert cache.get("ticker:ETH/USDT") == {"last": 2}
+        assert cache.get_stats()["memory"]["entries"] == 1
+
+
+class TestWritableFrames(unittest.TestCase):
+    """Test that frames handed out by MarketDataManager accept in-place writes."""
+
+    def setUp(self):
+        """Set up a manager with one cached frame."""
+        self.manager = MarketDataManager(use_multi_source=False, use_candle_store=False)
+        self.manager.exchange_manager = None
+        self.manager.market_cache.set("multi:BTC/USDT:15m", make_frame())
+
+    def test_cache_hit_is_writable(self):
+        """Test loc/iloc/Series/replace writes on a cache hit leave the cache intact."""
+        df = self.manager.get_ohlcv("BTC/USDT", "15m")
+
+        df.loc[df.index[0], "close"] = 0.0
+        opens = df["open"]
+        opens.iloc[0] = 0.0
+        df.iloc[1, 0] = 0.0
+        df.replace({"volume": {1.0: 2.0}}, inplace=True)
+
+        cached = self.manager.market_cache.get("multi:BTC/USDT:15m")
+        assert cached["close"].iloc[0] == 100.0
+        assert cached["open"].iloc[0] == 100.0
+        assert opens.iloc[0] == 0.0
+        assert (cached["volume"] == 1.0).all()
+        assert (df["volume"] == 2.0).all()
+
+    def test_batch_results_are_writable(self):
+        """Test that batch_fetch_ohlcv returns writable frames for cached symbols."""
+        df = self.manager.batch_fetch_ohlcv(["BTC/USDT"], "15m")["BTC/USDT"]
+
+        df.loc[df.index[0], "close"] = 0.0
+        assert self.manager.market_cache.get("multi:BTC/USDT:15m")["close"].iloc[0] == 100.0
+
+    def test_thaw_copies_only_frozen_frames(self):
+        """Test that writable frames pass through thaw_frame without a copy."""
+        df = make_frame()
+        assert thaw_frame(df) is df
+        assert thaw_frame(None) is None
+
+        cache = SizedLRUCache(max_bytes=10_000_000)
+        cache.set("k", df)
+        thawed = thaw_frame(cache.get("k"))
+        assert thawed["close"].to_numpy().flags.writeable
+
+
+class FakePipeline:
+    """Records commands and runs them against FakeRedis on execute()."""
+
+    def __init__(self, server):
+        self.server = server
+        self.commands = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+
+        return record
+
+    def execute(self):
+        self.server.round_trips += 1
+        return [getattr(self.server, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    """Minimal in-memory Redis shared by several MarketCache instances."""
+
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+        self.subscribers = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def pttl(self, key):
+        return 60_000 if key in self.data else -2
+
+    def set(self, key, value, px=None):
+        self.data[key] = value
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+        return len(keys)
+
+    def scan_iter(self, match=None, count=None):
+        needle = match.split("*")[1]
+        return [key for key in self.data if needle in key]
+
+    def publish(self, channel, message):
+        for handler in self.subscribers:
+            handler({"channel": channel, "data": message})
+        return len(self.subscribers)
+
+    def dbsize(self):
+        return len(self.data)
+
+
+class TestBinaryEncoding(unittest.TestCase):
+    """Test the Redis value encoding."""
+
+    def test_frame_roundtrip_is_zero_copy(self):
+        """Test that OHLCV frames keep dtypes and index and decode as read-only views."""
+        df = make_frame(50)
+        df.index.name = "timestamp"
+        df["symbol"] = "BTC/USDT"
+
+        result = decode_value(encode_value(df))
+
+        pd.testing.assert_frame_equal(result, df, check_freq=False)
+        assert not result["close"].to_numpy().flags.writeable
+
+    def test_array_and_json_values(self):
+        """Test ndarray and datetime-preserving JSON values."""
+        arr = np.arange(12, dtype=np.float32).reshape(3, 4)
+        np.testing.assert_array_equal(decode_value(encode_value(arr)), arr)
+
+        ticker = {"last": 1.5, "at": datetime(2024, 1, 1, 12, 30), "ts": pd.Timestamp("2024-01-01 00:00:00.000000001")}
+        assert decode_value(encode_value(ticker)) == ticker
+
+    def test_legacy_json_entries(self):
+        """Test that values written by the old JSON cache still decode."""
+        assert decode_value(b'{"last": 1}') == {"last": 1}
+
+
+class TestTieredCache(unittest.TestCase):
+    """Test MarketCache with an L2 Redis tier."""
+
+    def setUp(self):
+        """Two processes sharing one Redis."""
+        self.server = FakeRedis()
+        self.bot = MarketCache(redis_client=self.server, subscribe_invalidations=False)
+        self.dashboard = MarketCache(redis_client=self.server, subscribe_invalidations=False)
+        self.server.subscribers = [self.bot._handle_invalidation, self.dashboard._handle_invalidation]
+
+    def test_l2_shares_data_between_processes(self):
+        """Test that one process reads frames fetched by another and warms its L1."""
+        self.bot.set("multi:BTC/USDT:1h", make_frame(), ttl_seconds=60)
+
+        result = self.dashboard.get("multi:BTC/USDT:1h")
+
+        pd.testing.assert_frame_equal(result, make_frame(), check_freq=False)
+        assert "multi:BTC/USDT:1h" in self.dashboard.memory_cache
+        assert self.dashboard.get_stats()["redis"]["hits"] == 1
+
+    def test_set_invalidates_other_l1(self):
+        """Test that an update from one process evicts stale L1 copies elsewhere."""
+        self.bot.set("ticker:BTC/USDT", {"last": 1})
+        assert self.dashboard.get("ticker:BTC/USDT") == {"last": 1}
+
+        self.bot.set("ticker:BTC/USDT", {"last": 2})
+
+        assert "ticker:BTC/USDT" not in self.dashboard.memory_cache
+        assert self.dashboard.get("ticker:BTC/USDT") == {"last": 2}
+
+    def test_get_many_uses_one_round_trip(self):
+        """Test that batched reads and writes are pipelined."""
+        self.bot.set_many({f"ticker:{s}": {"s": s} for s in ("BTC", "ETH", "SOL")})
+        before = self.server.round_trips
+
+        found = self.dashboard.get_many(["ticker:BTC", "ticker:ETH", "ticker:SOL", "ticker:XRP"])
+
+        assert self.server.round_trips - before == 1
+        assert set(found) == {"ticker:BTC", "ticker:ETH", "ticker:SOL"}
+
+    def test_stale_l2_entries(self):
+        """Test that L2 entries past their fresh TTL are only served by get_stale."""
+        writer = MarketCache(redis_client=self.server, subscribe_invalidations=False, stale_seconds=120)
+        reader = MarketCache(redis_client=self.server, subscribe_invalidations=False, stale_seconds=120)
+        writer.set("multi:BTC/USDT:1h", make_frame(), ttl_seconds=60)
+
+        # FakeRedis reports 60s left, which is inside the 120s stale window
+        assert reader.get("multi:BTC/USDT:1h") is None
+        value, fresh = reader.get_stale("multi:BTC/USDT:1h")
+        assert value is not None and not fresh
+
+    def test_pattern_clear_propagates(self):
+        """Test that pattern clears remove L2 keys and other processes' L1 entries."""
+        self.bot.set("multi:BTC/USDT:1h", make_frame())
+        self.dashboard.get("multi:BTC/USDT:1h")
+
+        self.bot.clear("BTC")
+
+        assert self.server.data == {}
+        assert "multi:BTC/USDT:1h" not in self.dashboard.memory_cache
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Tests for the disk-cached exchange market metadata and lazy exchange clients.
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from utils.market_metadata import LazyExchangeRegistry, MarketMetadataCache
+
+
+class FakeExchange:
+    """ccxt-like client that counts market downloads."""
+
+    def __init__(self, exchange_id: str = "kucoin", market_type: str = "spot"):
+        self.id = exchange_id
+        self.options = {"defaultType": market_type}
+        self.markets = {}
+        self.currencies = {}
+        self.downloads = 0
+
+    def load_markets(self, reload=False):
+        if self.markets and not reload:
+            return self.markets
+        self.downloads += 1
+        self.set_markets({"BTC/USDT": {"id": "BTC-USDT", "symbol": "BTC/USDT"}}, {"BTC": {"id": "BTC"}})
+        return self.markets
+
+    def set_markets(self, markets, currencies=None):
+        self.markets = dict(markets)
+        self.currencies = dict(currencies or {})
+
+
+class TestMarketMetadataCache(unittest.TestCase):
+    """Test persistence, TTL and background refresh."""
+
+    def setUp(self):
+        """Set up a temporary cache directory."""
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the cache directory."""
+        self.tmp.cleanup()
+
+    def test_second_process_loads_from_disk(self):
+        """Test that markets are downloaded once and then reused from the file."""
+        first = MarketMetadataCache(self.tmp.name)
+        exchange = FakeExchange()
+        first.ensure(exchange)
+        first.ensure(exchange)
+        self.assertEqual(exchange.downloads, 1)
+
+        # New process: fresh cache object and client
+        second = MarketMetadataCache(self.tmp.name)
+        client = FakeExchange()
+        markets = second.ensure(client)
+
+        self.assertEqual(client.downloads, 0)
+        self.assertIn("BTC/USDT", markets)
+        self.assertEqual(client.currencies, {"BTC": {"id": "BTC"}})
+        self.assertEqual(second.stats["disk_hits"], 1)
+
+    def test_market_types_are_separate(self):
+        """Test that spot and futures metadata do not overwrite each other."""
+        cache = MarketMetadataCache(self.tmp.name)
+        cache.ensure(FakeExchange(market_type="spot"))
+
+        self.assertFalse(cache.apply(FakeExchange(market_type="future")))
+        self.assertTrue(cache.apply(FakeExchange(market_type="spot")))
+
+    def test_stale_file_is_used_and_refreshed_in_background(self):
+        """Test that an expired file is applied immediately and refreshed once."""
+        cache = MarketMetadataCache(self.tmp.name, ttl_seconds=60)
+        cache.ensure(FakeExchange())
+        path = os.path.join(self.tmp.name, "kucoin_spot.json")
+        payload = cache.load("kucoin")
+        payload["saved_at"] = time.time() - 3600
+
+        refreshed = []
+        cache.refresh = lambda exchange_id, market_type="spot", target=None: refreshed.append(
+            (exchange_id, market_type)
+        )
+
+        client = FakeExchange()
+        self.assertTrue(cache.apply(client))
+        self.assertIn("BTC/USDT", client.markets)
+        deadline = time.monotonic() + 2
+        while not refreshed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(refreshed, [("kucoin", "spot")])
+        self.assertTrue(os.path.exists(path))
+
+    def test_corrupted_file_falls_back_to_download(self):
+        """Test that a broken cache file is ignored."""
+        cache = MarketMetadataCache(self.tmp.name)
+        with open(os.path.join(self.tmp.name, "kucoin_spot.json"), "w") as f:
+            f.write("{not json")
+
+        exchange = FakeExchange()
+        cache.ensure(exchange)
+        self.assertEqual(exchange.downloads, 1)
+
+
+class TestLazyExchangeRegistry(unittest.TestCase):
+    """Test on-demand client construction."""
+
+    def test_clients_created_on_first_access(self):
+        """Test that membership checks do not construct clients."""
+        created = []
+        registry = LazyExchangeRegistry(lambda ex_id: created.append(ex_id) or FakeExchange(ex_id), ["kucoin", "okx"])
+
+        self.assertIn("okx", registry)
+        self.assertEqual(list(registry), ["kucoin", "okx"])
+        self.assertEqual(created, [])
+
+        self.assertIs(registry["okx"], registry["okx"])
+        self.assertEqual(created, ["okx"])
+        self.assertEqual(list(registry.loaded()), ["okx"])
+
+    def test_failed_client_is_dropped(self):
+        """Test that an exchange whose client cannot be built leaves the registry."""
+
+        def factory(ex_id):
+            raise RuntimeError("no such exchange")
+
+        registry = LazyExchangeRegistry(factory, ["bogus"])
+        self.assertIsNone(registry.get("bogus"))
+        self.assertNotIn("bogus", registry)
+
+    def test_provider_does_not_build_clients_at_startup(self):
+        """Test that CCXTProvider defers ccxt client construction."""
+        from utils.multi_source_provider import HAS_CCXT, CCXTProvider
+
+        if not HAS_CCXT:
+            self.skipTest("ccxt not installed")
+        provider = CCXTProvider()
+        self.assertEqual(provider.exchanges.loaded(), {})
+        self.assertEqual(set(provider.rate_limiters), set(CCXTProvider.EXCHANGE_CONFIGS))
+
+
+if __name__ == "__main__":
+    unittest.main()
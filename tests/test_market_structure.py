@@ -10,6 +10,72 @@ import pandas as pd
 from indicators.smart_money.market_structure import MarketStructureAnalyzer
 
 
+def reference_structure(df, k):
+    """Row-by-row reference: window swings, BOS with reset, last-two-swing ChoCH/trend."""
+    high, low, close = (df[c].tolist() for c in ("high", "low", "close"))
+    rows, bos_high, bos_low, highs, lows = [], None, None, [], []
+    for i in range(len(df)):
+        sh = sl = np.nan
+        if k <= i < len(df) - k:
+            if high[i] == pd.Series(high[i - k : i + k + 1]).max():
+                sh = high[i]
+            if low[i] == pd.Series(low[i - k : i + k + 1]).min():
+                sl = low[i]
+        if not np.isnan(sh):
+            bos_high = sh
+            highs.append(sh)
+        if not np.isnan(sl):
+            bos_low = sl
+            lows.append(sl)
+        bos_type = choch_type = None
+        if bos_high is not None and close[i] > bos_high:
+            bos_type, bos_high = "bullish", None
+        if bos_low is not None and close[i] < bos_low:
+            bos_type, bos_low = "bearish", None
+        if len(lows) >= 2 and lows[-1] > lows[-2]:
+            choch_type = "bullish"
+        if len(highs) >= 2 and highs[-1] < highs[-2]:
+            choch_type = "bearish"
+        trend = "range"
+        if len(highs) >= 2 and len(lows) >= 2:
+            if highs[-1] > highs[-2] and lows[-1] > lows[-2]:
+                trend = "bullish"
+            elif highs[-1] < highs[-2] and lows[-1] < lows[-2]:
+                trend = "bearish"
+        rows.append(
+            {
+                "swing_high": sh,
+                "swing_low": sl,
+                "bos_detected": bos_type is not None,
+                "bos_type": bos_type,
+                "choch_detected": choch_type is not None,
+                "choch_type": choch_type,
+                "market_structure": trend,
+                "liquidity_zone_high": highs[-1] * 1.001 if highs else np.nan,
+                "liquidity_zone_low": lows[-1] * 0.999 if lows else np.nan,
+            }
+        )
+    return pd.DataFrame(rows, index=df.index)
+
+
+def random_walk(n, seed):
+    """Random-walk OHLC with a flat stretch and a missing high."""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    df = pd.DataFrame(
+        {
+            "open": close,
+            "high": close + rng.uniform(0, 1, n),
+            "low": close - rng.uniform(0, 1, n),
+            "close": close + rng.normal(0, 0.3, n),
+            "volume": 1.0,
+        }
+    )
+    df.iloc[40:55, :4] = 100.0
+    df.iloc[20, 1] = np.nan
+    return df
+
+
 class TestMarketStructure(unittest.TestCase):
     """Test Market Structure analysis."""
 
@@ -72,6 +138,37 @@ class TestMarketStructure(unittest.TestCase):
         assert "bos_detected" in summary
         assert "choch_detected" in summary
 
+    def test_matches_row_by_row_reference(self):
+        """Test swing, BOS, ChoCH, trend and liquidity columns against the row-by-row logic."""
+        df = random_walk(600, seed=5)
+        for k in (0, 3, 5):
+            result = MarketStructureAnalyzer(swing_lookback=k).analyze_market_structure(df)
+            expected = reference_structure(df, k)
+            for column in ("swing_high", "swing_low", "bos_detected", "choch_detected", "market_structure"):
+                np.testing.assert_array_equal(result[column].to_numpy(), expected[column].to_numpy())
+            self.assertEqual(result["bos_type"].tolist(), expected["bos_type"].tolist())
+            self.assertEqual(result["choch_type"].tolist(), expected["choch_type"].tolist())
+            for column in ("liquidity_zone_high", "liquidity_zone_low"):
+                np.testing.assert_allclose(result[column], expected[column], rtol=1e-12)
+
+    def test_update_matches_batch(self):
+        """Test that bar-by-bar updates equal the last row of a batch run, also after priming."""
+        df = random_walk(90, seed=8)
+        for k in (0, 3):
+            streaming = MarketStructureAnalyzer(swing_lookback=k)
+            primed = MarketStructureAnalyzer(swing_lookback=k)
+            primed.analyze_market_structure(df.iloc[:60])
+            for i in range(len(df)):
+                row = streaming.update(df.iloc[i])
+                expected = MarketStructureAnalyzer(swing_lookback=k).analyze_market_structure(df.iloc[: i + 1]).iloc[-1]
+                rows = [row, primed.update(df.iloc[i])] if i >= 60 else [row]
+                for current in rows:
+                    for column, value in current.items():
+                        if isinstance(value, float) and np.isnan(value):
+                            self.assertTrue(np.isnan(expected[column]), (i, column))
+                        else:
+                            self.assertEqual(value, expected[column], (i, column))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -7,7 +7,43 @@ import unittest
 import numpy as np
 import pandas as pd
 
-from indicators.smart_money.order_blocks import OrderBlockDetector
+from indicators.smart_money.order_blocks import OrderBlockDetector, first_crossing, forward_extreme
+
+
+def reference_order_blocks(df, min_candles, max_candles, threshold, lookback):
+    """Row-by-row reference: impulse, consolidation, marks, then fills in block order."""
+    high, low, close = (df[c] for c in ("high", "low", "close"))
+    avg_range_pct = (high - low).mean() / close.mean() * 100
+    blocks = []
+    for direction in ("bullish", "bearish"):
+        for i in range(lookback, len(df) - max_candles):
+            ahead = slice(i + 1, i + lookback + 1)
+            future = high.iloc[ahead].max() if direction == "bullish" else low.iloc[ahead].min()
+            move = (future - close.iloc[i]) if direction == "bullish" else (close.iloc[i] - future)
+            if not (move > 0 and move / close.iloc[i] * 100 >= threshold):
+                continue
+            start = max(0, i - max_candles)
+            if i - start < min_candles:
+                continue
+            zone_high, zone_low = high.iloc[start:i].max(), low.iloc[start:i].min()
+            if (zone_high - zone_low) / close.iloc[start:i].mean() * 100 > avg_range_pct * 1.5:
+                continue
+            blocks.append((i, direction, zone_high, zone_low))
+
+    columns = {k: [np.nan] * len(df) for k in ("bullish_high", "bullish_low", "bearish_high", "bearish_low")}
+    ob_type = [None] * len(df)
+
+    def write(j, direction, zone_high, zone_low):
+        columns[direction + "_high"][j], columns[direction + "_low"][j], ob_type[j] = zone_high, zone_low, direction
+
+    for block in blocks:
+        write(*block)
+    for i, direction, zone_high, zone_low in blocks:
+        for j in range(i + 1, len(df)):
+            if (close.iloc[j] < zone_low) if direction == "bullish" else (close.iloc[j] > zone_high):
+                break
+            write(j, direction, zone_high, zone_low)
+    return columns, ob_type
 
 
 class TestOrderBlocks(unittest.TestCase):
@@ -119,6 +155,64 @@ class TestOrderBlocks(unittest.TestCase):
             # Price broke OB, so OB should be invalidated
             assert last_close < last_ob_low
 
+    def test_matches_row_by_row_reference(self):
+        """Test vectorized detection and fill against the row-by-row logic on a DatetimeIndex."""
+        rng = np.random.default_rng(1)
+        close = 100 + np.cumsum(rng.normal(0, 0.15, 800))
+        close[300:310] += np.linspace(0, 4, 10)
+        close[310:] += 4
+        close[600:610] -= np.linspace(0, 5, 10)
+        close[610:] -= 5
+        df = pd.DataFrame(
+            {
+                "open": close,
+                "high": close + rng.uniform(0, 1, 800),
+                "low": close - rng.uniform(0, 1, 800),
+                "close": close + rng.normal(0, 0.2, 800),
+                "volume": 1.0,
+            },
+            index=pd.date_range("2024-01-01", periods=800, freq="h"),
+        )
+        df.iloc[[50, 420], 1] = np.nan
+
+        for params in ((3, 5, 1.0, 20), (2, 10, 0.7, 6), (1, 4, 0.5, 2)):
+            detector = OrderBlockDetector(*params)
+            result = detector.detect_order_blocks(df)
+            self.assertTrue(result.index.equals(df.index))
+
+            columns, ob_type = reference_order_blocks(df, *params)
+            for name, values in columns.items():
+                np.testing.assert_array_equal(result[f"ob_{name}"].to_numpy(), values)
+            self.assertEqual(result["ob_type"].tolist(), ob_type)
+            self.assertGreater(result["ob_type"].notna().sum(), 0)
+
+    def test_range_helpers(self):
+        """Test forward extremes and first crossings against slicing."""
+        rng = np.random.default_rng(2)
+        values = rng.normal(0, 1, 300)
+        values[[5, 100, 101]] = np.nan
+        series = pd.Series(values)
+
+        for window in (1, 7, 400):
+            np.testing.assert_array_equal(
+                forward_extreme(values, window, "max"),
+                [series.iloc[i + 1 : i + window + 1].max() for i in range(300)],
+            )
+            np.testing.assert_array_equal(
+                forward_extreme(values, window, "min"),
+                [series.iloc[i + 1 : i + window + 1].min() for i in range(300)],
+            )
+
+        starts = rng.integers(0, 301, 200)
+        levels = rng.normal(0, 1.5, 200)
+        levels[0] = np.nan
+        for below in (True, False):
+            expected = [
+                next((j for j in range(s, 300) if (values[j] < lvl if below else values[j] > lvl)), 300)
+                for s, lvl in zip(starts, levels)
+            ]
+            np.testing.assert_array_equal(first_crossing(values, starts, levels, below), expected)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,121 @@
+"""
+Tests for stale-while-revalidate reads and the candle-close prefetch scheduler.
+"""
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from utils.prefetch_scheduler import CandlePrefetchScheduler
+
+
+class FakeManager:
+    """Records prefetch calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_ohlcv(self, symbol, timeframe, limit=200, force_refresh=False):
+        self.calls.append((symbol, timeframe, limit, force_refresh))
+        return pd.DataFrame({"close": [1.0]})
+
+
+class TestCandlePrefetchScheduler(unittest.TestCase):
+    """Test scheduling relative to candle closes."""
+
+    def test_next_run_follows_candle_close(self):
+        """Test that runs land just after the close, within the jitter window."""
+        scheduler = CandlePrefetchScheduler(FakeManager(), close_delay=2.0, jitter=10.0)
+        now = 1_700_000_123.0  # 2023-11-14 22:15:23 UTC
+        close = (int(now) // 3600 + 1) * 3600
+
+        for _ in range(50):
+            run_at = scheduler.next_run("1h", now)
+            self.assertGreaterEqual(run_at, close + 2.0)
+            self.assertLessEqual(run_at, close + 12.0)
+
+        # Jitter of short timeframes is capped at a tenth of the period
+        run_at = scheduler.next_run("1m", now)
+        self.assertLessEqual(run_at, (int(now) // 60 + 1) * 60 + 2.0 + 6.0)
+
+    def test_run_due_reschedules(self):
+        """Test that due subscriptions are returned once and moved to the next close."""
+        scheduler = CandlePrefetchScheduler(FakeManager(), jitter=0)
+        now = 1_700_000_123.0  # 22:15:23 UTC, far from the hourly close
+        with mock.patch("utils.prefetch_scheduler.time.time", return_value=now):
+            scheduler.subscribe("BTC/USDT", "1m")
+            scheduler.subscribe("ETH/USDT", "1h")
+        self.assertFalse(scheduler.subscribe("ETH/USDT", "7m"))
+
+        in_two_minutes = now + 120
+        self.assertEqual(scheduler.run_due(in_two_minutes), [("BTC/USDT", "1m")])
+        self.assertEqual(scheduler.run_due(in_two_minutes), [])
+
+        scheduler.unsubscribe("BTC/USDT", "1m")
+        self.assertEqual(scheduler.run_due(in_two_minutes + 3600), [("ETH/USDT", "1h")])
+
+    def test_prefetch_forces_refresh(self):
+        """Test that a prefetch bypasses the cache with the subscribed limit."""
+        manager = FakeManager()
+        scheduler = CandlePrefetchScheduler(manager)
+        scheduler.subscribe("BTC/USDT", "15m", limit=300)
+
+        scheduler._prefetch("BTC/USDT", "15m")
+
+        self.assertEqual(manager.calls, [("BTC/USDT", "15m", 300, True)])
+        self.assertEqual(scheduler.get_stats()["prefetched"], 1)
+
+
+class SlowExchangeManager:
+    """Legacy exchange manager stub that takes a while to answer."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def fetch_ohlcv(self, symbol, timeframe, limit, exchange_id):
+        self.calls += 1
+        self.release.wait(5)
+        base = 1_700_000_000_000
+        return [[base + i * 60_000, 2.0, 2.0, 2.0, 2.0, 1.0] for i in range(limit)]
+
+
+class TestStaleWhileRevalidate(unittest.TestCase):
+    """Test MarketDataManager serving expired frames without blocking."""
+
+    def test_stale_frame_is_served_and_refreshed_in_background(self):
+        """Test that an expired entry returns immediately and triggers one refresh."""
+        from utils.market_data_manager import MarketDataManager
+
+        manager = MarketDataManager(cache_ttl_minutes=0, use_multi_source=False, stale_while_revalidate=True)
+        exchange = SlowExchangeManager()
+        manager.exchange_manager = exchange
+        stale = pd.DataFrame(
+            {"open": [1.0], "high": [1.0], "low": [1.0], "close": [1.0], "volume": [1.0]},
+            index=pd.DatetimeIndex([pd.Timestamp("2024-01-01")], name="timestamp"),
+        )
+        manager.market_cache.set("multi:BTC/USDT:1m", stale, ttl_seconds=0)
+
+        started = time.monotonic()
+        first = manager.get_ohlcv("BTC/USDT", "1m", limit=10)
+        second = manager.get_ohlcv("BTC/USDT", "1m", limit=10)
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(first["close"].iloc[-1], 1.0)
+        self.assertEqual(second["close"].iloc[-1], 1.0)
+
+        exchange.release.set()
+        deadline = time.monotonic() + 5
+        while manager._revalidating and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(exchange.calls, 1)
+        refreshed, _ = manager.market_cache.get_stale("multi:BTC/USDT:1m")
+        self.assertEqual(refreshed["close"].iloc[-1], 2.0)
+        self.assertEqual(manager.get_cache_stats()["stale_while_revalidate"]["stale_served"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Tests for the token-bucket rate limiter.
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import pytest
+
+from utils.rate_limiter import HAS_FCNTL, RateLimiter, _private_dir
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test token-bucket behaviour."""
+
+    def test_burst_is_free(self):
+        """Test that calls within the bucket capacity do not wait."""
+        limiter = RateLimiter(calls_per_minute=600, burst=5)
+
+        waits = [limiter.acquire() for _ in range(5)]
+
+        assert all(w == 0 for w in waits)
+
+    def test_waits_when_bucket_empty(self):
+        """Test that the call after the burst waits for a refill."""
+        limiter = RateLimiter(calls_per_minute=600, burst=2)  # 10 tokens/s
+        limiter.acquire()
+        limiter.acquire()
+
+        start = time.perf_counter()
+        waited = limiter.acquire()
+        elapsed = time.perf_counter() - start
+
+        assert waited > 0.05
+        assert elapsed >= waited * 0.9
+
+    def test_waiting_threads_do_not_serialize(self):
+        """Test that sleepers wait concurrently instead of behind a held lock."""
+        limiter = RateLimiter(calls_per_minute=1200, burst=1)  # 20 tokens/s
+        limiter.acquire()
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        # 4 reservations at 20/s -> the last one waits ~0.2s, not the sum of all waits
+        assert elapsed < 0.35
+
+    def test_async_acquire(self):
+        """Test that async acquire reserves from the same bucket."""
+        limiter = RateLimiter(calls_per_minute=600, burst=1)
+
+        async def run():
+            return await asyncio.gather(*[limiter.acquire_async() for _ in range(3)])
+
+        waits = asyncio.run(run())
+
+        assert waits[0] == 0
+        assert waits[2] > waits[1] > 0
+
+    def test_wait_if_needed_compat(self):
+        """Test the legacy interface."""
+        limiter = RateLimiter(calls_per_minute=60)
+        limiter.wait_if_needed()
+
+
+@pytest.mark.skipif(not HAS_FCNTL, reason="shared segments need fcntl")
+class TestSharedRateLimiter(unittest.TestCase):
+    """Test the cross-process shared bucket."""
+
+    def setUp(self):
+        """Set up a temporary segment directory."""
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the segment directory."""
+        self.tmp.cleanup()
+
+    def test_limiters_share_budget(self):
+        """Test that two limiters with the same name draw from one bucket."""
+        a = RateLimiter(calls_per_minute=60, burst=2, shared_name="kucoin", shared_dir=self.tmp.name)
+        b = RateLimiter(calls_per_minute=60, burst=2, shared_name="kucoin", shared_dir=self.tmp.name)
+
+        assert a.is_shared
+        assert a._reserve(1) == 0
+        assert b._reserve(1) == 0
+        assert a._reserve(1) > 0
+        a.close()
+        b.close()
+
+    def test_different_names_are_independent(self):
+        """Test that each exchange has its own budget."""
+        a = RateLimiter(calls_per_minute=60, burst=1, shared_name="kucoin", shared_dir=self.tmp.name)
+        b = RateLimiter(calls_per_minute=60, burst=1, shared_name="okx", shared_dir=self.tmp.name)
+
+        assert a._reserve(1) == 0
+        assert b._reserve(1) == 0
+        a.close()
+        b.close()
+
+    def test_segment_is_private(self):
+        """Test that the bucket file is created owner-only."""
+        limiter = RateLimiter(calls_per_minute=60, shared_name="kucoin", shared_dir=self.tmp.name)
+
+        mode = os.stat(limiter._shared.path).st_mode & 0o777
+        assert mode == 0o600
+        limiter.close()
+
+    def test_symlinked_segment_is_refused(self):
+        """Test that a planted symlink is not followed and the limiter stays per-process."""
+        target = Path(self.tmp.name) / "victim"
+        target.write_bytes(b"keep")
+        os.symlink(target, Path(self.tmp.name) / "maxflash_ratelimit_kucoin.bucket")
+
+        limiter = RateLimiter(calls_per_minute=60, shared_name="kucoin", shared_dir=self.tmp.name)
+
+        assert not limiter.is_shared
+        assert target.read_bytes() == b"keep"
+
+    def test_private_dir_is_per_user(self):
+        """Test that the default segment directory is a 0o700 subdirectory owned by the user."""
+        path = _private_dir(Path(self.tmp.name))
+
+        assert path.parent == Path(self.tmp.name)
+        assert path.name == f"maxflash-ratelimit-{os.getuid()}"
+        assert os.stat(path).st_mode & 0o777 == 0o700
+
+        # A symlink in place of the directory is rejected
+        path.rmdir()
+        os.symlink(self.tmp.name, path)
+        with self.assertRaises(OSError):
+            _private_dir(Path(self.tmp.name))
+
+
+if __name__ == "__main__":
+    unittest.main()
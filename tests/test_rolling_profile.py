@@ -0,0 +1,128 @@
+"""
+Tests for the rolling price histogram engine.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from indicators.market_profile.market_profile import MarketProfileCalculator
+from indicators.market_profile.tpo import TPOCalculator
+from indicators.volume_profile.rolling_profile import rolling_histograms, window_histogram
+from indicators.volume_profile.volume_profile import VolumeProfileCalculator
+
+
+def make_frame(n: int = 150, seed: int = 11) -> pd.DataFrame:
+    """Random-walk OHLCV with a flat stretch."""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    df = pd.DataFrame(
+        {
+            "open": close,
+            "high": close + rng.uniform(0, 2, n),
+            "low": close - rng.uniform(0, 2, n),
+            "close": close + rng.normal(0, 0.5, n),
+            "volume": rng.uniform(10, 1000, n),
+        },
+        index=pd.date_range("2024-01-01", periods=n, freq="15min"),
+    )
+    df.iloc[60:90, :4] = 100.0
+    return df
+
+
+def loop_histogram(low, high, volume, bins, inclusive=False):
+    """Per-row reference binning (the calculators' original loop)."""
+    edges = np.linspace(low.min(), high.max(), bins + 1)
+    hist = np.zeros(bins)
+    for lo, hi, vol in zip(low, high, volume):
+        low_bin = max(0, min(np.searchsorted(edges, lo), bins - 1))
+        high_bin = max(0, min(np.searchsorted(edges, hi), bins - 1))
+        if inclusive:
+            hist[low_bin : high_bin + 1] += vol
+        elif high_bin > low_bin:
+            hist[low_bin:high_bin] += vol / (high_bin - low_bin)
+        else:
+            hist[low_bin] += vol
+    return hist
+
+
+class TestRollingHistograms(unittest.TestCase):
+    """Test histograms against the per-window loop."""
+
+    def setUp(self):
+        """Build arrays."""
+        df = make_frame()
+        self.low, self.high, self.volume = (df[c].to_numpy() for c in ("low", "high", "volume"))
+
+    def test_matches_loop(self):
+        """Test bit-identical volume and TPO histograms for every window."""
+        for inclusive in (False, True):
+            for chunk in rolling_histograms(self.low, self.high, self.volume, 21, 70, inclusive=inclusive):
+                for k, i in enumerate(chunk.rows):
+                    if chunk.flat[k]:
+                        continue
+                    window = slice(i - 20, i + 1)
+                    expected = loop_histogram(self.low[window], self.high[window], self.volume[window], 70, inclusive)
+                    np.testing.assert_array_equal(chunk.hist[k], expected)
+                    edges = np.linspace(chunk.price_min[k], chunk.price_max[k], 71)
+                    np.testing.assert_array_equal(chunk.centers[k], (edges[:-1] + edges[1:]) / 2)
+
+    def test_chunking(self):
+        """Test that chunk size does not affect results."""
+        big = list(rolling_histograms(self.low, self.high, self.volume, 25, 30))
+        small = list(rolling_histograms(self.low, self.high, self.volume, 25, 30, chunk_cells=1000))
+        self.assertEqual(len(big), 1)
+        self.assertGreater(len(small), 1)
+        np.testing.assert_array_equal(big[0].hist, np.vstack([c.hist for c in small]))
+        np.testing.assert_array_equal(big[0].rows, np.concatenate([c.rows for c in small]))
+
+    def test_first_touch_and_flat(self):
+        """Test first-touch tracking and flat windows."""
+        chunk = window_histogram(
+            np.array([1.0, 5.0, 2.0]), np.array([3.0, 6.0, 4.0]), np.ones(3), 5, inclusive=True, track_first_touch=True
+        )
+        # Edges 1..6: bars cover bins 0-2, 4 and 1-3 (searchsorted, high bin included)
+        np.testing.assert_array_equal(chunk.hist[0], [1, 2, 2, 1, 1])
+        self.assertEqual(list(chunk.first_touch[0]), [0, 0, 0, 2, 1])
+
+        flat = window_histogram(np.full(3, 7.0), np.full(3, 7.0), np.ones(3), 5)
+        self.assertTrue(flat.flat[0])
+        self.assertIsNone(window_histogram(np.array([]), np.array([]), np.array([]), 5))
+
+
+class TestProfileCalculators(unittest.TestCase):
+    """Test rolling calculator output against per-window calculation."""
+
+    def setUp(self):
+        """Build a frame."""
+        self.df = make_frame()
+
+    def test_volume_profile_rolling(self):
+        """Test that rolling rows equal the single-window profile of each slice."""
+        calculator = VolumeProfileCalculator(bins=40)
+        result = calculator.calculate_volume_profile(self.df, period=20)
+        self.assertTrue(result["vp_poc"].iloc[:20].isna().all())
+        for i in (20, 75, 149):
+            profile = calculator._calculate_profile_for_period(self.df.iloc[i - 20 : i + 1])
+            self.assertEqual(result["vp_poc"].iloc[i], profile["poc"])
+            self.assertEqual(result["vp_val"].iloc[i], profile["val"])
+            self.assertEqual(result["vp_total_volume"].iloc[i], profile["total_volume"])
+            self.assertEqual(result["vp_hvn"].iloc[i], str(profile["hvn"]))
+
+    def test_market_profile_and_tpo(self):
+        """Test market profile and TPO rows against single-window results."""
+        mp = MarketProfileCalculator(period=24).calculate_market_profile(self.df)
+        tpo_calculator = TPOCalculator(periods_per_day=24)
+        tpo = tpo_calculator.calculate_tpo_distribution(self.df)
+        for i in (24, 70, 120):
+            window = self.df.iloc[i - 24 : i + 1]
+            self.assertEqual(mp["mp_profile_low"].iloc[i], window["low"].min())
+            self.assertIn(mp["mp_market_state"].iloc[i], ("trending", "balanced"))
+            expected = tpo_calculator._calculate_tpo_for_window(window)
+            self.assertEqual(tpo["tpo_single_prints"].iloc[i], str(expected["single_prints"]))
+            self.assertEqual(tpo["tpo_ib_high"].iloc[i], window["high"].iloc[:4].max())
+
+
+if __name__ == "__main__":
+    unittest.main()
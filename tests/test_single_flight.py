@@ -0,0 +1,134 @@
+"""
+Tests for single-flight request coalescing.
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test in-flight deduplication."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.group = SingleFlight()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def slow_fetch(self):
+        """Simulate a slow network call."""
+        with self.calls_lock:
+            self.calls += 1
+        time.sleep(0.1)
+        return {"price": 42}
+
+    def test_concurrent_threads_share_one_call(self):
+        """Test that concurrent thread callers wait on a single fetch."""
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(self.group.do, "multi:BTC/USDT:1h", self.slow_fetch) for _ in range(8)]
+            results = [f.result() for f in futures]
+
+        assert self.calls == 1
+        assert all(value == {"price": 42} for value, _ in results)
+        assert sum(1 for _, shared in results if shared) == 7
+        assert self.group.in_flight() == 0
+
+    def test_different_keys_are_independent(self):
+        """Test that distinct keys are fetched separately."""
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            a = executor.submit(self.group.do, "multi:BTC/USDT:1h", self.slow_fetch)
+            b = executor.submit(self.group.do, "multi:ETH/USDT:1h", self.slow_fetch)
+            a.result()
+            b.result()
+
+        assert self.calls == 2
+
+    def test_async_callers_share_one_call(self):
+        """Test that coroutines coalesce with each other."""
+
+        async def run():
+            return await asyncio.gather(*[self.group.ado("ticker:BTC/USDT", self.slow_fetch) for _ in range(5)])
+
+        results = asyncio.run(run())
+
+        assert self.calls == 1
+        assert [shared for _, shared in results].count(False) == 1
+
+    def test_coroutine_leader_shares_with_threads(self):
+        """Test that an ado_coro leader runs on the loop and thread callers wait for it."""
+
+        async def fetch():
+            with self.calls_lock:
+                self.calls += 1
+            await asyncio.sleep(0.1)
+            return {"price": 42}
+
+        async def run():
+            leader = asyncio.ensure_future(self.group.ado_coro("multi:BTC/USDT:1h", fetch))
+            await asyncio.sleep(0.01)
+            thread_call = asyncio.to_thread(self.group.do, "multi:BTC/USDT:1h", self.slow_fetch)
+            waiters = [self.group.ado_coro("multi:BTC/USDT:1h", fetch) for _ in range(3)]
+            return await asyncio.gather(leader, thread_call, *waiters)
+
+        results = asyncio.run(run())
+
+        assert self.calls == 1
+        assert all(value == {"price": 42} for value, _ in results)
+        assert [shared for _, shared in results].count(False) == 1
+        assert self.group.in_flight() == 0
+
+    def test_blocking_call_inside_leader_loop_does_not_wait(self):
+        """Test that sync do() from the leader's own loop runs its own fetch instead of deadlocking."""
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "async"
+
+        async def run():
+            leader = asyncio.ensure_future(self.group.ado_coro("ticker:BTC/USDT", fetch))
+            await asyncio.sleep(0.01)
+            blocking = self.group.do("ticker:BTC/USDT", lambda: "sync")
+            return blocking, await leader
+
+        blocking, leader = asyncio.run(run())
+
+        assert blocking == ("sync", False)
+        assert leader == ("async", False)
+        assert self.group.in_flight() == 0
+
+    def test_exception_propagates_to_waiters(self):
+        """Test that a failed fetch raises for every waiter and clears the key."""
+
+        def failing():
+            time.sleep(0.05)
+            raise ConnectionError("exchange down")
+
+        errors = []
+
+        def call():
+            try:
+                self.group.do("multi:BTC/USDT:1h", failing)
+            except ConnectionError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(errors) == 4
+        assert self.group.in_flight() == 0
+
+        value, shared = self.group.do("multi:BTC/USDT:1h", lambda: "ok")
+        assert value == "ok"
+        assert not shared
+
+
+if __name__ == "__main__":
+    unittest.main()
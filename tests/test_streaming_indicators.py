@@ -0,0 +1,217 @@
+"""
+Tests for the incremental indicator engine.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from utils.signal_scanner import SignalScanner
+from utils.streaming_indicators import (
+    IndicatorConfig,
+    IndicatorEngine,
+    RollingExtreme,
+    RollingWindow,
+    StreamingIndicators,
+)
+
+
+def make_frame(n: int = 300, seed: int = 3) -> pd.DataFrame:
+    """Random-walk OHLCV with a DatetimeIndex."""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    index = pd.date_range("2024-01-01", periods=n, freq="15min", name="timestamp")
+    return pd.DataFrame(
+        {
+            "open": close + rng.normal(0, 0.3, n),
+            "high": close + rng.uniform(0, 1, n),
+            "low": close - rng.uniform(0, 1, n),
+            "close": close,
+            "volume": rng.uniform(100, 1000, n),
+        },
+        index=index,
+    )
+
+
+def streamed(df: pd.DataFrame, config: IndicatorConfig = None) -> pd.DataFrame:
+    """Push every bar as closed and collect the outputs."""
+    state = StreamingIndicators(config)
+    rows = []
+    for ts, row in zip(df.index, df.itertuples(index=False)):
+        rows.append(state.push({"timestamp": int(ts.value // 1_000_000), **row._asdict()}))
+    return pd.DataFrame(rows, index=df.index)
+
+
+class TestPrimitives(unittest.TestCase):
+    """Test rolling window, extreme and EMA primitives against pandas."""
+
+    def test_rolling_mean_std(self):
+        """Test rolling mean/std including NaN gaps."""
+        values = np.random.default_rng(1).normal(1000, 5, 500)
+        values[[40, 41, 200]] = np.nan
+        window = RollingWindow(20)
+        means, stds = [], []
+        for x in values:
+            means.append(window.mean(x))
+            stds.append(window.std(x))
+            window.push(x)
+        series = pd.Series(values)
+        np.testing.assert_allclose(means, series.rolling(20).mean(), rtol=1e-9)
+        np.testing.assert_allclose(stds, series.rolling(20).std(), rtol=1e-7)
+
+    def test_rolling_extreme(self):
+        """Test monotonic deque min/max."""
+        values = np.random.default_rng(2).normal(0, 1, 300)
+        low, high = RollingExtreme(14, "min"), RollingExtreme(14, "max")
+        mins, maxs = [], []
+        for x in values:
+            mins.append(low.value(x))
+            maxs.append(high.value(x))
+            low.push(x)
+            high.push(x)
+        series = pd.Series(values)
+        np.testing.assert_array_equal(mins, series.rolling(14).min())
+        np.testing.assert_array_equal(maxs, series.rolling(14).max())
+
+
+class TestStreamingIndicators(unittest.TestCase):
+    """Test that streaming values equal the scanner's batch formulas."""
+
+    def setUp(self):
+        """Build a frame and the scanner batch reference."""
+        self.df = make_frame()
+        scanner = SignalScanner.__new__(SignalScanner)
+        self.batch = scanner._calculate_indicators(self.df.copy())
+        self.stream = streamed(self.df)
+
+    def test_matches_batch(self):
+        """Test every shared column including warm-up NaNs."""
+        pairs = {
+            "rsi": "rsi", "ema_9": "ema_fast", "ema_21": "ema_slow", "ema_200": "ema_200",
+            "macd": "macd", "macd_signal": "macd_signal", "macd_hist": "macd_hist",
+            "atr": "atr", "bb_middle": "bb_middle", "bb_upper": "bb_upper", "bb_lower": "bb_lower",
+            "volume_sma": "volume_sma", "stoch_k": "stoch_k", "stoch_d": "stoch_d",
+        }
+        for ours, theirs in pairs.items():
+            with self.subTest(column=ours):
+                np.testing.assert_allclose(self.stream[ours], self.batch[theirs], rtol=1e-9, atol=1e-9)
+
+    def test_peek_does_not_commit(self):
+        """Test that peeking at a live bar leaves the state unchanged."""
+        state = StreamingIndicators()
+        rows = make_frame(60)
+        for i, row in enumerate(rows.itertuples(index=False)):
+            state.push({"timestamp": i, **row._asdict()})
+        before = dict(state.last)
+        live = {"timestamp": 60, "open": 1.0, "high": 500.0, "low": 0.5, "close": 400.0, "volume": 1e6}
+        peeked = state.peek(live)
+        self.assertEqual(state.last, before)
+        self.assertEqual(state.bars, 60)
+        self.assertEqual(state.push(live), peeked)
+
+    def test_service_config(self):
+        """Test the signal service variant (epsilon RSI, MACD 8-17-9, high-low ATR)."""
+        config = IndicatorConfig(rsi_epsilon=1e-10, ema_periods=(), macd=(8, 17, 9), atr_true_range=False)
+        out = streamed(self.df, config)
+        close = self.df["close"]
+        delta = close.diff()
+        gain = delta.where(delta > 0, 0).rolling(14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+        macd = close.ewm(span=8, adjust=False).mean() - close.ewm(span=17, adjust=False).mean()
+        np.testing.assert_allclose(out["rsi"], 100 - 100 / (1 + gain / (loss + 1e-10)), rtol=1e-9)
+        np.testing.assert_allclose(out["macd"], macd, rtol=1e-9, atol=1e-12)
+        np.testing.assert_allclose(out["atr"], (self.df["high"] - self.df["low"]).rolling(14).mean(), rtol=1e-9)
+        np.testing.assert_allclose(out["sma_50"], close.rolling(50).mean(), rtol=1e-9)
+
+
+class TestIndicatorEngine(unittest.TestCase):
+    """Test incremental updates from overlapping fetch windows."""
+
+    def setUp(self):
+        """Build a long frame and its batch reference."""
+        self.df = make_frame(400)
+        scanner = SignalScanner.__new__(SignalScanner)
+        self.batch = scanner._calculate_indicators(self.df.copy())
+
+    def test_sliding_windows(self):
+        """Test that repeated 100-bar fetches are incremental and equal the scanner's batch on each window."""
+        scanner = SignalScanner.__new__(SignalScanner)
+        engine = IndicatorEngine()
+        columns = ("rsi", "ema_200", "macd", "macd_signal", "macd_hist", "bb_upper", "atr")
+        for end in range(100, 401, 10):
+            window = self.df.iloc[end - 100:end]
+            batch = scanner._calculate_indicators(window.copy())
+            current, prev = engine.update("BTC/USDT", "15m", window)
+            for column in columns:
+                with self.subTest(end=end, column=column):
+                    self.assertAlmostEqual(current[column], batch[column].iloc[-1], places=9)
+                    self.assertAlmostEqual(prev[column], batch[column].iloc[-2], places=9)
+
+        stats = engine.get_stats()
+        self.assertEqual(stats["rebuilds"], 1)
+        self.assertEqual(stats["bars_pushed"], 399)
+
+    def test_result_independent_of_history(self):
+        """Test that an engine with long uptime and a fresh one agree on the same window."""
+        window = self.df.iloc[300:400]
+        warm = IndicatorEngine()
+        for end in range(100, 400, 7):
+            warm.update("BTC/USDT", "15m", self.df.iloc[end - 100:end])
+        warm_rows = warm.update("BTC/USDT", "15m", window)
+        fresh_rows = IndicatorEngine().update("BTC/USDT", "15m", window)
+
+        self.assertEqual(warm.get_stats()["rebuilds"], 1)
+        for warm_row, fresh_row in zip(warm_rows, fresh_rows):
+            for column in ("ema_9", "ema_21", "ema_200", "macd", "macd_signal"):
+                self.assertAlmostEqual(warm_row[column], fresh_row[column], places=9)
+
+    def test_on_bar_slides_window(self):
+        """Test that streamed bars keep the window length of the last update."""
+        scanner = SignalScanner.__new__(SignalScanner)
+        engine = IndicatorEngine()
+        engine.update("BTC/USDT", "15m", self.df.iloc[100:200])
+        bars = self.df.iloc[199:260]
+        for ts, row in zip(bars.index, bars.itertuples(index=False)):
+            bar = {"timestamp": int(ts.value // 1_000_000), **row._asdict()}
+            closed = engine.on_bar("BTC/USDT", "15m", bar, closed=True)
+
+        end = 260
+        batch = scanner._calculate_indicators(self.df.iloc[end - 99:end + 1].copy())
+        self.assertAlmostEqual(closed["ema_200"], batch["ema_200"].iloc[-2], places=9)
+        self.assertAlmostEqual(closed["macd_signal"], batch["macd_signal"].iloc[-2], places=9)
+
+    def test_live_bar_updates(self):
+        """Test that changes of the forming bar are not committed."""
+        engine = IndicatorEngine()
+        engine.update("ETH/USDT", "15m", self.df.iloc[:200])
+        live = self.df.iloc[:200].copy()
+        live.iloc[-1, live.columns.get_loc("close")] += 5
+        current, _ = engine.update("ETH/USDT", "15m", live)
+
+        self.assertEqual(engine.get_stats()["rebuilds"], 1)
+        self.assertNotAlmostEqual(current["close"], self.batch["close"].iloc[199])
+        current, _ = engine.update("ETH/USDT", "15m", self.df.iloc[:201])
+        self.assertAlmostEqual(current["macd"], self.batch["macd"].iloc[200], places=9)
+
+    def test_rebuild_on_history_change(self):
+        """Test that a rewritten closed bar resets the series."""
+        engine = IndicatorEngine()
+        engine.update("SOL/USDT", "15m", self.df.iloc[:150])
+        changed = self.df.iloc[:151].copy()
+        changed.iloc[148, changed.columns.get_loc("close")] += 1
+
+        engine.update("SOL/USDT", "15m", changed)
+        self.assertEqual(engine.get_stats()["rebuilds"], 2)
+
+    def test_lru_limit(self):
+        """Test that the number of tracked series is bounded."""
+        engine = IndicatorEngine(max_series=2)
+        for symbol in ("A", "B", "C"):
+            engine.update(symbol, "1h", self.df.iloc[:50])
+        self.assertEqual(engine.get_stats()["series"], 2)
+        self.assertIsNone(engine.on_bar("A", "1h", {"timestamp": 0}))
+
+
+if __name__ == "__main__":
+    unittest.main()
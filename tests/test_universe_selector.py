@@ -0,0 +1,190 @@
+"""
+Tests for the multi-exchange universe ranking.
+"""
+
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from utils.universe_selector import TickerMatrix, UniverseSelector
+
+
+def ticker(volume: float, price: float = 1.0) -> dict:
+    return {"quoteVolume": volume, "last": price}
+
+
+class FakeExchange:
+    """Returns fixed tickers after a delay."""
+
+    def __init__(self, tickers: dict, delay: float = 0.0):
+        self.tickers = tickers
+        self.delay = delay
+
+    def fetch_tickers(self):
+        time.sleep(self.delay)
+        return self.tickers
+
+
+class FakeExchangeManager:
+    """ExchangeManager stand-in with per-exchange fakes."""
+
+    def __init__(self, exchanges: dict):
+        self.exchanges = exchanges
+
+    def get_exchange_instance(self, exchange_id):
+        return self.exchanges.get(exchange_id)
+
+
+def make_tickers(scale: float = 1.0) -> dict:
+    return {
+        "binance": {
+            "BTC/USDT": ticker(2e9 * scale, 60000),
+            "ETH/USDT": ticker(1e9 * scale, 3000),
+            "SOL/USDT": ticker(3e8 * scale, 150),
+            "USDC/USDT": ticker(5e9, 1.0),
+            "ETH/BTC": ticker(1e9, 0.05),
+        },
+        "bybit": {
+            "BTC/USDT": ticker(1e9 * scale, 60010),
+            "ETH/USDT": ticker(6e8 * scale, 3001),
+            "DOGE/USDT": ticker(9e8, 0.1),
+        },
+        "okx": {
+            "BTC/USDT": ticker(8e8 * scale, 59990),
+            "SOL/USDT": ticker(2e8 * scale, 151),
+            "TINY/USDT": ticker(1e5, 1.0),
+        },
+    }
+
+
+class TestUniverseSelector(unittest.TestCase):
+    """Test aggregation, concurrency, persistence and re-ranking."""
+
+    def setUp(self):
+        """Set up fake exchanges and a temporary cache file."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "universe.json"
+        self.fakes = {ex: FakeExchange(t) for ex, t in make_tickers().items()}
+        self.manager = FakeExchangeManager(self.fakes)
+
+    def tearDown(self):
+        """Remove the cache file."""
+        self.tmp.cleanup()
+
+    def make_selector(self, **kwargs) -> UniverseSelector:
+        return UniverseSelector(exchange_manager=self.manager, cache_path=str(self.path), **kwargs)
+
+    def test_matrix_layout(self):
+        """Test the symbol x exchange matrices."""
+        matrix = TickerMatrix.from_tickers(make_tickers(), frozenset({"USDC"}))
+
+        self.assertEqual(matrix.exchanges, ["binance", "bybit", "okx"])
+        self.assertEqual(matrix.volumes.shape, (len(matrix.symbols), 3))
+        row = list(matrix.symbols).index("DOGE/USDT")
+        self.assertEqual(matrix.volumes[row, 1], 9e8)
+        self.assertNotIn("USDC/USDT", list(matrix.symbols))
+
+    def test_ranking(self):
+        """Test median aggregation and the min_exchanges filter."""
+        pairs = self.make_selector().get_top_pairs(n=10)
+
+        self.assertEqual([p["symbol"] for p in pairs], ["BTC/USDT", "ETH/USDT", "SOL/USDT"])
+        btc = pairs[0]
+        self.assertEqual(btc["median_volume"], 1e9)
+        self.assertEqual(btc["median_price"], 60000)
+        self.assertEqual(btc["best_exchange"], "binance")
+        self.assertEqual(btc["exchanges"], ["binance", "bybit", "okx"])
+        self.assertEqual(pairs[1]["median_volume"], 8e8)
+
+    def test_exchanges_fetched_concurrently(self):
+        """Test that slow exchanges are queried in parallel."""
+        for fake in self.fakes.values():
+            fake.delay = 0.2
+
+        started = time.monotonic()
+        self.make_selector().get_top_pairs(force_refresh=True)
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_restart_reuses_persisted_universe(self):
+        """Test that a new selector serves the saved ranking without fetching."""
+        self.make_selector().get_top_pairs()
+        self.fakes.clear()
+
+        selector = self.make_selector()
+        self.assertEqual(selector.get_pair_symbols(n=2), ["BTC/USDT", "ETH/USDT"])
+        self.assertEqual(selector.get_best_exchange_for_symbol("SOL/USDT"), "binance")
+        self.assertEqual(selector.stats["refreshes"], 0)
+
+    def test_small_volume_changes_keep_ranking(self):
+        """Test that re-ranking happens only on material volume changes."""
+        selector = self.make_selector(rerank_threshold=0.10)
+        first = selector.get_top_pairs()
+
+        for ex, t in make_tickers(scale=1.05).items():
+            self.fakes[ex].tickers = t
+        kept = selector.refresh()
+        self.assertEqual([p["symbol"] for p in kept], [p["symbol"] for p in first])
+        self.assertEqual(selector.stats["skipped_reranks"], 1)
+
+        # A second small step is measured against the last re-rank, not the last refresh
+        for ex, t in make_tickers(scale=1.15).items():
+            self.fakes[ex].tickers = t
+        selector.refresh()
+        self.assertEqual(selector.stats["reranks"], 2)
+
+        for ex, t in make_tickers(scale=2.0).items():
+            self.fakes[ex].tickers = t
+        self.assertEqual(selector.refresh()[0]["median_volume"], 2e9)
+        self.assertEqual(selector.stats["reranks"], 3)
+
+    def test_skipped_rerank_refreshes_entries(self):
+        """Test that keeping the order still updates prices, volumes and the best exchange."""
+        selector = self.make_selector(rerank_threshold=0.10)
+        selector.get_top_pairs()
+
+        tickers = make_tickers()
+        tickers["binance"]["BTC/USDT"] = ticker(1e9, 61000)
+        tickers["bybit"]["BTC/USDT"] = ticker(1.05e9, 61010)
+        for ex, t in tickers.items():
+            self.fakes[ex].tickers = t
+
+        pairs = selector.refresh()
+        self.assertEqual(selector.stats["skipped_reranks"], 1)
+        self.assertEqual([p["symbol"] for p in pairs], ["BTC/USDT", "ETH/USDT", "SOL/USDT"])
+        btc = pairs[0]
+        self.assertEqual(btc["median_price"], 61000)
+        self.assertEqual(btc["best_exchange"], "bybit")
+        self.assertEqual(btc["volumes_by_exchange"]["bybit"], 1.05e9)
+        self.assertEqual(selector.get_best_exchange_for_symbol("BTC/USDT"), "bybit")
+
+        # The persisted universe carries the fresh entries too
+        self.assertEqual(self.make_selector().get_top_pairs(n=1)[0]["median_price"], 61000)
+
+    def test_expired_universe_served_while_refreshing(self):
+        """Test that an expired ranking is returned without waiting for exchanges."""
+        selector = self.make_selector()
+        selector.get_top_pairs()
+        selector._cache_time = datetime.now() - timedelta(hours=1)
+        gate = threading.Event()
+        for fake in self.fakes.values():
+            fake.fetch_tickers = lambda: gate.wait(2) and {}
+
+        started = time.monotonic()
+        self.assertEqual(selector.get_pair_symbols(n=1), ["BTC/USDT"])
+        self.assertLess(time.monotonic() - started, 0.5)
+        gate.set()
+
+    def test_failed_fetch_keeps_previous_universe(self):
+        """Test that an outage does not empty the universe."""
+        selector = self.make_selector()
+        selector.get_top_pairs()
+        self.fakes.clear()
+
+        self.assertEqual(len(selector.get_top_pairs(force_refresh=True)), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,10 +3,15 @@ Multi-Timeframe Analyzer for signal confirmation.
 Checks higher timeframes before confirming signals on lower timeframes.
 """
 import pandas as pd
-import ccxt
 from typing import Tuple, Optional
 import logging
 
+from utils.candle_store import timeframe_to_ms
+from utils.data_fetcher import resample_ohlcv
+from utils.lazy_import import lazy_import
+
+ccxt = lazy_import("ccxt")
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,8 +28,13 @@ class MTFAnalyzer:
         '1h': ['4h', '1d'],
         '4h': ['1d', '1w'],
     }
+
+    # Bars per higher timeframe used for trend detection
+    HIGHER_TF_BARS = 60
+    # Max candles requested in one call when fetching the base timeframe
+    BASE_FETCH_LIMIT = 1000
     
-    def __init__(self, exchange: ccxt.Exchange):
+    def __init__(self, exchange: "ccxt.Exchange"):
         self.exchange = exchange
     
     def get_trend(self, df: pd.DataFrame) -> str:
@@ -50,7 +60,50 @@ class MTFAnalyzer:
         else:
             return 'neutral'
     
-    def get_higher_tf_trends(self, symbol: str, current_tf: str = '15m') -> dict:
+    def _fetch_df(self, symbol: str, timeframe: str, limit: int) -> pd.DataFrame:
+        """Fetch OHLCV from the exchange as a DataFrame indexed by timestamp."""
+        ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        return df.set_index('timestamp')
+
+    def get_higher_tf_frames(
+        self, symbol: str, current_tf: str = '15m', base_df: Optional[pd.DataFrame] = None
+    ) -> dict:
+        """
+        Get candles for the higher timeframes of current_tf.
+
+        Higher timeframes are resampled from one fetch of current_tf
+        (or from base_df if the caller already has it); only a timeframe
+        the base history is too short for is fetched directly.
+        Returns dict {timeframe: DataFrame}.
+        """
+        higher_tfs = self.TF_HIERARCHY.get(current_tf, ['1h', '4h'])
+        frames = {}
+
+        try:
+            base_ms = timeframe_to_ms(current_tf)
+            needed = max(self.HIGHER_TF_BARS * timeframe_to_ms(tf) // base_ms for tf in higher_tfs)
+            if base_df is None or len(base_df) < needed:
+                base_df = self._fetch_df(symbol, current_tf, min(needed, self.BASE_FETCH_LIMIT))
+        except Exception as e:
+            logger.debug(f"Error fetching {current_tf} for {symbol}: {e}")
+            base_df = None
+
+        for tf in higher_tfs:
+            try:
+                df = resample_ohlcv(base_df, tf, source_timeframe=current_tf) if base_df is not None else None
+                if df is None or len(df) < self.HIGHER_TF_BARS:
+                    df = self._fetch_df(symbol, tf, self.HIGHER_TF_BARS)
+                frames[tf] = df.iloc[-self.HIGHER_TF_BARS:]
+            except Exception as e:
+                logger.debug(f"Error fetching {tf} for {symbol}: {e}")
+
+        return frames
+
+    def get_higher_tf_trends(
+        self, symbol: str, current_tf: str = '15m', base_df: Optional[pd.DataFrame] = None
+    ) -> dict:
         """
         Get trends from higher timeframes.
         Returns dict with higher TF trends.
@@ -63,16 +116,11 @@ class MTFAnalyzer:
         }
         
         higher_tfs = self.TF_HIERARCHY.get(current_tf, ['1h', '4h'])
+        frames = self.get_higher_tf_frames(symbol, current_tf, base_df)
         
         for tf in higher_tfs:
-            try:
-                ohlcv = self.exchange.fetch_ohlcv(symbol, tf, limit=60)
-                df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-                trend = self.get_trend(df)
-                result['trends'][tf] = trend
-            except Exception as e:
-                logger.debug(f"Error fetching {tf} for {symbol}: {e}")
-                result['trends'][tf] = 'neutral'
+            df = frames.get(tf)
+            result['trends'][tf] = self.get_trend(df) if df is not None else 'neutral'
         
         # Check alignment
         trend_values = list(result['trends'].values())
@@ -96,7 +144,8 @@ class MTFAnalyzer:
         symbol: str, 
         signal: str,  # 'BUY' or 'SELL'
         confidence: float,
-        current_tf: str = '15m'
+        current_tf: str = '15m',
+        base_df: Optional[pd.DataFrame] = None
     ) -> Tuple[bool, float, str]:
         """
         Confirm signal using higher timeframes.
@@ -105,7 +154,7 @@ class MTFAnalyzer:
         if signal == 'HOLD':
             return True, confidence, ""
         
-        mtf_data = self.get_higher_tf_trends(symbol, current_tf)
+        mtf_data = self.get_higher_tf_trends(symbol, current_tf, base_df)
         
         expected_trend = 'bullish' if signal == 'BUY' else 'bearish'
         opposite_trend = 'bearish' if signal == 'BUY' else 'bullish'
@@ -137,6 +186,6 @@ class MTFAnalyzer:
         return True, confidence, ""
 
 
-def get_mtf_analyzer(exchange: ccxt.Exchange) -> MTFAnalyzer:
+def get_mtf_analyzer(exchange: "ccxt.Exchange") -> MTFAnalyzer:
     """Factory function to create MTF analyzer."""
     return MTFAnalyzer(exchange)
@@ -4,6 +4,7 @@ Centralizes signal generation, aggregation, and logging.
 """
 
 import logging
+import math
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
@@ -16,6 +17,7 @@ from app.config import settings
 from ml.signal_filter import SignalFilter
 from trading.risk_manager import AdvancedRiskManager
 from utils.market_data_manager import MarketDataManager
+from utils.streaming_indicators import IndicatorConfig, IndicatorEngine
 
 # Optional ML import
 try:
@@ -58,6 +60,13 @@ class SignalService:
         self.risk_manager = AdvancedRiskManager(account_balance=settings.MIN_LIQUIDITY_USD)
         self.data_manager = MarketDataManager()
         self.signal_filter = SignalFilter()
+        # Same formulas as before: RSI with epsilon, MACD 8-17-9, ATR as mean high-low range
+        self.indicators = IndicatorEngine(IndicatorConfig(
+            rsi_epsilon=1e-10,
+            ema_periods=(),
+            macd=(8, 17, 9),
+            atr_true_range=False,
+        ))
         # LLM removed for stability
         # self.llm_interpreter = LLMInterpreter()
 
@@ -116,17 +125,12 @@ class SignalService:
             buy_score += 10
         
         # === 2. OHLCV-based indicators ===
+        # Incremental: only candles closed since the previous call are processed
+        current, prev = self.indicators.update(symbol, "15m", df)
         if len(df) >= 26:
-            close = df["close"]
-            
             # --- RSI ---
-            delta = close.diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / (loss + 1e-10)
-            rsi_series = 100 - (100 / (1 + rs))
-            rsi = rsi_series.iloc[-1]
-            rsi_prev = rsi_series.iloc[-2] if len(rsi_series) > 1 else rsi
+            rsi = current["rsi"]
+            rsi_prev = prev["rsi"]
             rsi_trend = rsi - rsi_prev
             
             if rsi < 30:
@@ -149,15 +153,10 @@ class SignalService:
                 reasons.append(f"RSI {rsi:.0f}⬆")
             
             # --- MACD (8-17-9) ---
-            ema_fast = close.ewm(span=8, adjust=False).mean()
-            ema_slow = close.ewm(span=17, adjust=False).mean()
-            macd_line = ema_fast - ema_slow
-            signal_line = macd_line.ewm(span=9, adjust=False).mean()
-            
-            macd = macd_line.iloc[-1]
-            macd_prev = macd_line.iloc[-2] if len(macd_line) > 1 else macd
-            signal = signal_line.iloc[-1]
-            signal_prev = signal_line.iloc[-2] if len(signal_line) > 1 else signal
+            macd = current["macd"]
+            macd_prev = prev["macd"]
+            signal = current["macd_signal"]
+            signal_prev = prev["macd_signal"]
             
             if macd_prev < signal_prev and macd > signal:
                 buy_score += 25
@@ -173,9 +172,9 @@ class SignalService:
                 reasons.append("MACD-")
             
             # --- Price vs MA ---
-            price = close.iloc[-1]
-            ma20 = close.rolling(20).mean().iloc[-1]
-            ma50 = close.rolling(50).mean().iloc[-1] if len(close) >= 50 else ma20
+            price = current["close"]
+            ma20 = current["sma_20"]
+            ma50 = current["sma_50"] if not math.isnan(current["sma_50"]) else ma20
             
             if price > ma20 > ma50:
                 buy_score += 15
@@ -237,7 +236,7 @@ class SignalService:
         take_profit = None
         
         if final_signal_type != SignalType.NEUTRAL:
-            atr = (df["high"] - df["low"]).rolling(window=14).mean().iloc[-1]
+            atr = current["atr"]
             
             if final_signal_type == SignalType.BUY:
                 stop_loss = current_price - (atr * 1.5)
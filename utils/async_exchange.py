@@ -9,16 +9,13 @@ from typing import Any, Dict, List, Optional
 
 import pandas as pd
 
-try:
-    import ccxt.async_support as ccxt_async
-
-    HAS_CCXT_ASYNC = True
-except ImportError:
-    HAS_CCXT_ASYNC = False
-    ccxt_async = None
-
+from utils.lazy_import import lazy_import, module_available
 from utils.logger_config import setup_logging
 
+# ccxt imported on first exchange connection
+HAS_CCXT_ASYNC = module_available("ccxt")
+ccxt_async = lazy_import("ccxt.async_support") if HAS_CCXT_ASYNC else None
+
 logger = setup_logging()
 
 
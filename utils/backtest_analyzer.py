@@ -6,10 +6,10 @@ Calculates Sharpe Ratio, Max Drawdown, Win Rate, Profit Factor, etc.
 import numpy as np
 import pandas as pd
 
-try:
-    from scipy import stats
-except ImportError:
-    stats = None  # Optional dependency
+from utils.lazy_import import lazy_import, module_available
+
+# Optional dependency, imported on first use (scipy.stats takes ~1s to import)
+stats = lazy_import("scipy.stats") if module_available("scipy") else None
 
 
 class BacktestAnalyzer:
@@ -0,0 +1,361 @@
+"""
+Построение свечей из потока сделок/тикеров WebSocket.
+
+LiveCandleBuilder принимает события из WebSocketPriceStream (сделки
+aggTrade или тикеры), обновляет текущую свечу каждого подписанного
+таймфрейма на месте и закрывает свечи на границах периода - в том числе
+по таймеру, если сделок не было. MarketDataManager накладывает живые
+свечи на закэшированную историю, поэтому последняя свеча всегда актуальна
+без REST запроса; REST нужен только для сверки (разрыв в потоке, первая
+загрузка истории).
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.candle_store import TIMEFRAME_MS
+from utils.data_fetcher import bucket_starts
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+class _LiveSeries:
+    """Закрытые свечи и текущая свеча одной пары на одном таймфрейме."""
+
+    __slots__ = ("tf_ms", "closed", "bar", "incomplete_ts")
+
+    def __init__(self, tf_ms: int, max_bars: int):
+        self.tf_ms = tf_ms
+        # (ts, open, high, low, close, volume)
+        self.closed: deque = deque(maxlen=max_bars)
+        # Текущая свеча: [ts, open, high, low, close, volume]
+        self.bar: Optional[list] = None
+        # Свеча, начатая посреди периода (часть сделок пропущена)
+        self.incomplete_ts: Optional[int] = None
+
+
+class LiveCandleBuilder:
+    """
+    Потоковый сборщик OHLCV свечей для нескольких пар и таймфреймов.
+    """
+
+    def __init__(
+        self,
+        timeframes: tuple[str, ...] = ("1m", "5m", "15m", "1h", "4h"),
+        max_bars: int = 1000,
+        max_silence: float = 120.0,
+    ):
+        """
+        Args:
+            timeframes: Таймфреймы, которые строятся из каждой сделки
+            max_bars: Сколько закрытых свечей хранить на пару/таймфрейм
+            max_silence: Пауза в потоке (сек), после которой живые свечи
+                сбрасываются и история сверяется через REST
+        """
+        unknown = [tf for tf in timeframes if tf not in TIMEFRAME_MS]
+        if unknown:
+            raise ValueError(f"Unsupported timeframes: {unknown}")
+
+        self.timeframes = tuple(timeframes)
+        self.max_bars = max_bars
+        self.max_silence_ms = int(max_silence * 1000)
+
+        self._series: dict[tuple[str, str], _LiveSeries] = {}
+        self._last_event: dict[str, int] = {}
+        self._last_volume: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._listeners: list[Callable[[str, str, dict[str, Any]], None]] = []
+
+        self._clock_stop = threading.Event()
+        self._clock_thread: Optional[threading.Thread] = None
+
+        self.stats = {"trades": 0, "tickers": 0, "late": 0, "closed": 0, "resets": 0}
+
+    # ------------------------------------------------------------------
+    # События
+    # ------------------------------------------------------------------
+
+    def add_listener(self, callback: Callable[[str, str, dict[str, Any]], None]):
+        """Подписаться на закрытие свечей: callback(symbol, timeframe, bar)."""
+        self._listeners.append(callback)
+
+    def handle_update(self, update: dict[str, Any]):
+        """Callback для WebSocketPriceStream/WebSocketManager: сделка или тикер."""
+        if update.get("type") == "trade":
+            self.add_trade(update["symbol"], update["price"], update.get("amount", 0.0), update.get("timestamp"))
+        else:
+            self.add_ticker(update)
+
+    def add_ticker(self, update: dict[str, Any]):
+        """
+        Учесть тикер: цена - последняя сделка, объём - прирост 24h объёма.
+
+        Первый тикер пары объёма не добавляет (не с чем сравнить).
+        """
+        symbol = update["symbol"]
+        price = update.get("price")
+        if not price:
+            return
+        ts = update.get("event_time") or int(time.time() * 1000)
+
+        volume = update.get("volume")
+        amount = 0.0
+        if volume is not None:
+            previous = self._last_volume.get(symbol)
+            self._last_volume[symbol] = float(volume)
+            if previous is not None:
+                # 24h окно скользит, объём может уменьшаться - такие шаги пропускаем
+                amount = max(0.0, float(volume) - previous)
+
+        self.stats["tickers"] += 1
+        self._apply(symbol, float(price), amount, int(ts))
+
+    def add_trade(self, symbol: str, price: float, amount: float, timestamp_ms: Optional[int] = None):
+        """
+        Учесть сделку во всех таймфреймах.
+
+        Args:
+            symbol: Торговая пара
+            price: Цена сделки
+            amount: Объём в базовой валюте
+            timestamp_ms: Время сделки (мс), по умолчанию текущее
+        """
+        ts = int(timestamp_ms) if timestamp_ms is not None else int(time.time() * 1000)
+        self.stats["trades"] += 1
+        self._apply(symbol, float(price), float(amount), ts)
+
+    def _apply(self, symbol: str, price: float, amount: float, ts: int):
+        closed: list[tuple[str, str, dict[str, Any]]] = []
+
+        with self._lock:
+            last_event = self._last_event.get(symbol)
+            if last_event is not None and ts - last_event > self.max_silence_ms:
+                # Поток прерывался: свечи за паузу неизвестны, сверяемся через REST
+                self._reset_symbol(symbol)
+                self.stats["resets"] += 1
+            if last_event is None or ts > last_event:
+                self._last_event[symbol] = ts
+
+            for tf in self.timeframes:
+                series = self._series.get((symbol, tf))
+                if series is None:
+                    series = self._series[(symbol, tf)] = _LiveSeries(TIMEFRAME_MS[tf], self.max_bars)
+
+                bucket = int(bucket_starts(ts, series.tf_ms))
+                bar = series.bar
+
+                if bar is None:
+                    series.bar = [bucket, price, price, price, price, amount]
+                    series.incomplete_ts = bucket
+                    continue
+
+                if bucket < bar[0]:
+                    # Опоздавшая сделка уже закрытой свечи
+                    self.stats["late"] += 1
+                    continue
+
+                if bucket > bar[0]:
+                    closed.extend((symbol, tf, b) for b in self._roll(series, bucket))
+                    series.bar = [bucket, price, price, price, price, amount]
+                    continue
+
+                if price > bar[2]:
+                    bar[2] = price
+                if price < bar[3]:
+                    bar[3] = price
+                bar[4] = price
+                bar[5] += amount
+
+        self._notify(closed)
+
+    def _roll(self, series: _LiveSeries, until: int) -> list[dict[str, Any]]:
+        """
+        Закрыть текущую свечу и заполнить пустые периоды до until.
+
+        Периоды без сделок - плоские свечи по цене закрытия с нулевым
+        объёмом, как их отдают биржи. Вызывается под self._lock.
+        """
+        bar = series.bar
+        closed = [tuple(bar)]
+        ts = bar[0] + series.tf_ms
+        # Заполняем не больше, чем помещается в историю
+        first_fill = max(ts, until - series.tf_ms * series.closed.maxlen)
+        close = bar[4]
+        for fill_ts in range(first_fill, until, series.tf_ms):
+            closed.append((fill_ts, close, close, close, close, 0.0))
+
+        series.closed.extend(closed)
+        self.stats["closed"] += len(closed)
+        return [dict(zip(["timestamp"] + OHLCV_COLUMNS, b)) for b in closed]
+
+    def _notify(self, closed: list[tuple[str, str, dict[str, Any]]]):
+        for symbol, tf, bar in closed:
+            for callback in self._listeners:
+                try:
+                    callback(symbol, tf, bar)
+                except Exception as e:
+                    logger.error("Candle close listener failed for %s %s: %s", symbol, tf, e)
+
+    def _reset_symbol(self, symbol: str):
+        """Сбросить живые свечи пары (вызывается под self._lock)."""
+        for tf in self.timeframes:
+            self._series.pop((symbol, tf), None)
+        self._last_volume.pop(symbol, None)
+
+    # ------------------------------------------------------------------
+    # Закрытие по времени
+    # ------------------------------------------------------------------
+
+    def close_due(self, now_ms: Optional[int] = None) -> int:
+        """
+        Закрыть свечи, период которых истёк, даже если сделок не было.
+
+        Следующая свеча открывается плоской по цене закрытия. Пары, поток
+        которых молчит дольше max_silence, не продлеваются.
+
+        Returns:
+            Количество закрытых свечей
+        """
+        now = int(now_ms) if now_ms is not None else int(time.time() * 1000)
+        closed: list[tuple[str, str, dict[str, Any]]] = []
+
+        with self._lock:
+            for (symbol, tf), series in self._series.items():
+                bar = series.bar
+                if bar is None or now < bar[0] + series.tf_ms:
+                    continue
+                if now - self._last_event.get(symbol, now) > self.max_silence_ms:
+                    continue
+                bucket = int(bucket_starts(now, series.tf_ms))
+                closed.extend((symbol, tf, b) for b in self._roll(series, bucket))
+                close = bar[4]
+                series.bar = [bucket, close, close, close, close, 0.0]
+
+        self._notify(closed)
+        return len(closed)
+
+    def start_clock(self, interval: float = 1.0):
+        """Запустить фоновое закрытие свечей по границам периода."""
+        if self._clock_thread and self._clock_thread.is_alive():
+            return
+        self._clock_stop.clear()
+
+        def loop():
+            while not self._clock_stop.wait(interval):
+                try:
+                    self.close_due()
+                except Exception as e:
+                    logger.error("Candle clock error: %s", e)
+
+        self._clock_thread = threading.Thread(target=loop, name="candle-clock", daemon=True)
+        self._clock_thread.start()
+
+    def stop_clock(self):
+        """Остановить фоновое закрытие свечей."""
+        self._clock_stop.set()
+        if self._clock_thread:
+            self._clock_thread.join(timeout=5)
+            self._clock_thread = None
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+
+    def is_live(self, symbol: str, timeframe: Optional[str] = None, now_ms: Optional[int] = None) -> bool:
+        """Есть ли по паре свежие события (и строится ли нужный таймфрейм)."""
+        if timeframe is not None and timeframe not in self.timeframes:
+            return False
+        last_event = self._last_event.get(symbol)
+        if last_event is None:
+            return False
+        now = int(now_ms) if now_ms is not None else int(time.time() * 1000)
+        return now - last_event <= self.max_silence_ms
+
+    def current_bar(self, symbol: str, timeframe: str) -> Optional[dict[str, Any]]:
+        """Текущая (незакрытая) свеча."""
+        with self._lock:
+            series = self._series.get((symbol, timeframe))
+            if series is None or series.bar is None:
+                return None
+            return dict(zip(["timestamp"] + OHLCV_COLUMNS, series.bar))
+
+    def _snapshot(self, symbol: str, timeframe: str) -> tuple[Optional[np.ndarray], Optional[int]]:
+        """Закрытые свечи + текущая одним массивом (n, 6) и ts неполной свечи."""
+        with self._lock:
+            series = self._series.get((symbol, timeframe))
+            if series is None or series.bar is None:
+                return None, None
+            rows = list(series.closed)
+            rows.append(tuple(series.bar))
+            incomplete_ts = series.incomplete_ts
+        return np.array(rows, dtype=np.float64), incomplete_ts
+
+    def to_frame(self, symbol: str, timeframe: str) -> Optional[pd.DataFrame]:
+        """Живые свечи пары как OHLCV DataFrame (последняя - незакрытая)."""
+        rows, _ = self._snapshot(symbol, timeframe)
+        if rows is None:
+            return None
+        index = pd.DatetimeIndex(pd.to_datetime(rows[:, 0].astype(np.int64), unit="ms"), name="timestamp")
+        return pd.DataFrame(rows[:, 1:], index=index, columns=OHLCV_COLUMNS)
+
+    def merge(self, symbol: str, timeframe: str, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        Наложить живые свечи на историю (из кэша или REST).
+
+        Строки истории с теми же или более поздними метками заменяются живыми
+        свечами. Свеча, начатая посреди периода, сверяется с REST: open из
+        истории, high/low - экстремумы обеих, volume - максимум. Длина
+        результата равна длине истории (старые свечи уходят с начала).
+
+        Returns:
+            Объединённый DataFrame; исходный df, если живых свечей нет;
+            None, если между историей и живыми свечами разрыв (нужен REST)
+        """
+        rows, incomplete_ts = self._snapshot(symbol, timeframe)
+        if rows is None or df is None or df.empty:
+            return df
+
+        tf_ms = TIMEFRAME_MS[timeframe]
+        hist_ts = df.index.asi8 // 1_000_000 if isinstance(df.index, pd.DatetimeIndex) else None
+        if hist_ts is None:
+            return df
+
+        live_ts = rows[:, 0].astype(np.int64)
+        if live_ts[0] > hist_ts[-1] + tf_ms:
+            return None
+
+        # Живые свечи, начиная с последней свечи истории (более старые не нужны)
+        start = max(0, int(np.searchsorted(live_ts, hist_ts[-1])))
+        rows = rows[start:].copy()
+        live_ts = live_ts[start:]
+        if len(rows) == 0:
+            return df
+
+        cut = int(np.searchsorted(hist_ts, live_ts[0]))
+        if incomplete_ts is not None and live_ts[0] == incomplete_ts:
+            if cut == len(hist_ts) or hist_ts[cut] != incomplete_ts:
+                # Начало неполной свечи есть только в REST
+                return None
+            hist_bar = df.iloc[cut]
+            rows[0, 1] = hist_bar["open"]
+            rows[0, 2] = max(rows[0, 2], hist_bar["high"])
+            rows[0, 3] = min(rows[0, 3], hist_bar["low"])
+            rows[0, 5] = max(rows[0, 5], hist_bar["volume"])
+
+        index = pd.DatetimeIndex(pd.to_datetime(live_ts, unit="ms"), name=df.index.name)
+        live = pd.DataFrame(rows[:, 1:], index=index, columns=OHLCV_COLUMNS)
+        merged = pd.concat([df.iloc[:cut], live]) if cut else live
+        return merged.iloc[-len(df):]
+
+    def get_stats(self) -> dict[str, Any]:
+        """Статистика потока: события, закрытые свечи, сбросы."""
+        with self._lock:
+            return {**self.stats, "series": len(self._series), "symbols": len(self._last_event)}
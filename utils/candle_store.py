@@ -0,0 +1,448 @@
+"""
+Локальное колоночное хранилище OHLCV свечей.
+
+Каждая пара symbol/timeframe хранится в отдельной директории, каждая колонка -
+в отдельном бинарном файле (int64 для timestamp в мс, float64 для цен и объёма).
+Чтение идёт через np.memmap, запись - дописыванием в конец файлов, поэтому
+история переживает рестарт, а у биржи запрашиваются только свечи новее
+последнего сохранённого timestamp.
+
+Партиции пишут несколько процессов (бот, дашборд, background_updater), поэтому
+запись идёт под эксклюзивным flock на <partition>/.lock, а чтение - под
+разделяемым: читатель не увидит партицию посреди дописывания или перезаписи.
+
+Структура на диске:
+    <root>/BTC-USDT/1h/timestamp.i8
+    <root>/BTC-USDT/1h/open.f8
+    ...
+"""
+
+import logging
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Literal, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.candles import Candles
+
+try:
+    import fcntl
+
+    HAS_FCNTL = True
+except ImportError:  # Windows
+    HAS_FCNTL = False
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+_COLUMN_DTYPES: dict[str, np.dtype] = {
+    "timestamp": np.dtype(np.int64),
+    "open": np.dtype(np.float64),
+    "high": np.dtype(np.float64),
+    "low": np.dtype(np.float64),
+    "close": np.dtype(np.float64),
+    "volume": np.dtype(np.float64),
+}
+
+_COLUMN_FILES = {col: f"{col}.{'i8' if col == 'timestamp' else 'f8'}" for col in OHLCV_COLUMNS}
+_LOCK_FILE = ".lock"
+
+# Длительность таймфреймов в миллисекундах
+TIMEFRAME_MS: dict[str, int] = {
+    "1m": 60_000,
+    "3m": 3 * 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 3_600_000,
+    "2h": 2 * 3_600_000,
+    "4h": 4 * 3_600_000,
+    "6h": 6 * 3_600_000,
+    "12h": 12 * 3_600_000,
+    "1d": 86_400_000,
+    "1w": 7 * 86_400_000,
+}
+
+DEFAULT_STORE_DIR = Path(__file__).parent.parent / "data" / "candles"
+
+
+def timeframe_to_ms(timeframe: str) -> int:
+    """
+    Длительность таймфрейма в миллисекундах.
+
+    Raises:
+        ValueError: Если таймфрейм не поддерживается
+    """
+    if timeframe not in TIMEFRAME_MS:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    return TIMEFRAME_MS[timeframe]
+
+
+def dataframe_to_columns(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    """
+    Преобразовать OHLCV DataFrame (индекс или колонка timestamp) в массивы колонок.
+
+    Строки сортируются по времени, дубликаты timestamp схлопываются (последний выигрывает).
+    """
+    if "timestamp" in df.columns:
+        ts = pd.to_datetime(df["timestamp"], unit="ms") if df["timestamp"].dtype.kind in "iuf" else df["timestamp"]
+        ts_values = pd.DatetimeIndex(ts).values
+    else:
+        ts_values = pd.DatetimeIndex(df.index).values
+
+    timestamps = ts_values.astype("datetime64[ms]").astype(np.int64)
+    columns = {"timestamp": timestamps}
+    for col in OHLCV_COLUMNS[1:]:
+        columns[col] = df[col].to_numpy(dtype=np.float64) if col in df.columns else np.zeros(len(df))
+
+    # Сортировка и дедупликация (keep="last")
+    order = np.argsort(timestamps, kind="stable")
+    sorted_ts = timestamps[order]
+    keep = np.ones(len(sorted_ts), dtype=bool)
+    if len(sorted_ts) > 1:
+        keep[:-1] = sorted_ts[1:] != sorted_ts[:-1]
+    idx = order[keep]
+    return {col: arr[idx] for col, arr in columns.items()}
+
+
+def columns_to_dataframe(columns: dict[str, np.ndarray]) -> pd.DataFrame:
+    """Собрать OHLCV DataFrame с DatetimeIndex "timestamp" из массивов колонок."""
+    index = pd.to_datetime(np.asarray(columns["timestamp"]), unit="ms")
+    index.name = "timestamp"
+    return pd.DataFrame({col: np.asarray(columns[col]) for col in OHLCV_COLUMNS[1:]}, index=index)
+
+
+class CandleStore:
+    """
+    Персистентное хранилище свечей с инкрементальным дописыванием.
+
+    Безопасно для потоков и процессов: на каждую пару symbol/timeframe -
+    блокировка потоков и flock файла партиции (без fcntl - только потоки).
+    """
+
+    def __init__(self, root_dir: Optional[Union[str, Path]] = None):
+        """
+        Инициализация хранилища.
+
+        Args:
+            root_dir: Корневая директория (по умолчанию data/candles в корне проекта)
+        """
+        self.root_dir = Path(root_dir) if root_dir else DEFAULT_STORE_DIR
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _symbol_dir(self, symbol: str) -> Path:
+        """Директория пары."""
+        return self.root_dir / symbol.replace("/", "-").replace(":", "_")
+
+    def _partition_dir(self, symbol: str, timeframe: str) -> Path:
+        """Директория партиции symbol/timeframe."""
+        return self._symbol_dir(symbol) / timeframe
+
+    def _get_lock(self, symbol: str, timeframe: str) -> threading.Lock:
+        """Блокировка партиции."""
+        key = f"{symbol}:{timeframe}"
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    @contextmanager
+    def _flock(self, part_dir: Path, shared: bool) -> Iterator[bool]:
+        """
+        flock на файл блокировки партиции (LOCK_SH для чтения, LOCK_EX для записи).
+
+        Yields:
+            False, если директории партиции нет
+        """
+        if not HAS_FCNTL:
+            yield part_dir.is_dir()
+            return
+        try:
+            fd = os.open(part_dir / _LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            yield False
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield True
+        finally:
+            os.close(fd)
+
+    @contextmanager
+    def _write_lock(self, symbol: str, timeframe: str) -> Iterator[Path]:
+        """Эксклюзивная блокировка партиции (создаёт её директорию)."""
+        part_dir = self._partition_dir(symbol, timeframe)
+        with self._get_lock(symbol, timeframe):
+            part_dir.mkdir(parents=True, exist_ok=True)
+            with self._flock(part_dir, shared=False):
+                yield part_dir
+
+    @contextmanager
+    def _read_lock(self, symbol: str, timeframe: str) -> Iterator[Optional[Path]]:
+        """Разделяемая блокировка партиции; None, если партиции нет."""
+        part_dir = self._partition_dir(symbol, timeframe)
+        with self._flock(part_dir, shared=True) as exists:
+            yield part_dir if exists else None
+
+    def _row_count(self, part_dir: Path) -> int:
+        """
+        Количество целых строк в партиции.
+
+        Если запись была прервана, файлы колонок могут иметь разную длину -
+        берём минимальную, хвост будет отброшен при следующей записи.
+        """
+        counts = []
+        for col in OHLCV_COLUMNS:
+            path = part_dir / _COLUMN_FILES[col]
+            if not path.exists():
+                return 0
+            counts.append(path.stat().st_size // _COLUMN_DTYPES[col].itemsize)
+        return min(counts)
+
+    def _open_columns(self, part_dir: Path, mode: Literal["r", "r+"] = "r") -> Optional[dict[str, np.memmap]]:
+        """Открыть колонки партиции как memmap."""
+        rows = self._row_count(part_dir)
+        if rows == 0:
+            return None
+        return {
+            col: np.memmap(part_dir / _COLUMN_FILES[col], dtype=_COLUMN_DTYPES[col], mode=mode, shape=(rows,))
+            for col in OHLCV_COLUMNS
+        }
+
+    def count(self, symbol: str, timeframe: str) -> int:
+        """Количество сохранённых свечей."""
+        with self._read_lock(symbol, timeframe) as part_dir:
+            return self._row_count(part_dir) if part_dir is not None else 0
+
+    def last_timestamp(self, symbol: str, timeframe: str) -> Optional[int]:
+        """Timestamp (мс) последней сохранённой свечи или None."""
+        with self._read_lock(symbol, timeframe) as part_dir:
+            rows = self._row_count(part_dir) if part_dir is not None else 0
+            if part_dir is None or rows == 0:
+                return None
+            ts = np.memmap(part_dir / _COLUMN_FILES["timestamp"], dtype=np.int64, mode="r", shape=(rows,))
+            return int(ts[-1])
+
+    def first_timestamp(self, symbol: str, timeframe: str) -> Optional[int]:
+        """Timestamp (мс) первой сохранённой свечи или None."""
+        with self._read_lock(symbol, timeframe) as part_dir:
+            if part_dir is None or self._row_count(part_dir) == 0:
+                return None
+            ts = np.memmap(part_dir / _COLUMN_FILES["timestamp"], dtype=np.int64, mode="r", shape=(1,))
+            return int(ts[0])
+
+    def read_columns(
+        self,
+        symbol: str,
+        timeframe: str,
+        limit: Optional[int] = None,
+        since: Optional[int] = None,
+    ) -> Optional[dict[str, np.ndarray]]:
+        """
+        Прочитать свечи как словарь numpy-массивов (read-only memmap срезы).
+
+        Колонки открываются под разделяемой блокировкой, поэтому они одной длины
+        и из одной версии партиции: перезапись заменяет файлы, а уже открытые
+        memmap продолжают смотреть на старые.
+
+        Args:
+            symbol: Торговая пара
+            timeframe: Таймфрейм
+            limit: Вернуть только последние N свечей
+            since: Вернуть свечи с timestamp >= since (мс)
+
+        Returns:
+            Словарь {колонка: массив} или None если данных нет
+        """
+        with self._read_lock(symbol, timeframe) as part_dir:
+            columns = self._open_columns(part_dir) if part_dir is not None else None
+        if columns is None:
+            return None
+
+        start = 0
+        if since is not None:
+            start = int(np.searchsorted(columns["timestamp"], since, side="left"))
+        if limit is not None:
+            start = max(start, len(columns["timestamp"]) - limit)
+        if start >= len(columns["timestamp"]):
+            return None
+        return {col: arr[start:] for col, arr in columns.items()}
+
+    def read_candles(
+        self,
+        symbol: str,
+        timeframe: str,
+        limit: Optional[int] = None,
+        since: Optional[int] = None,
+    ) -> Optional[Candles]:
+        """
+        Прочитать свечи как Candles поверх memmap (без копирования).
+
+        Args:
+            symbol: Торговая пара
+            timeframe: Таймфрейм
+            limit: Вернуть только последние N свечей
+            since: Вернуть свечи с timestamp >= since (мс)
+
+        Returns:
+            Candles или None если данных нет
+        """
+        columns = self.read_columns(symbol, timeframe, limit=limit, since=since)
+        if columns is None:
+            return None
+        return Candles.from_columns(columns)
+
+    def read(
+        self,
+        symbol: str,
+        timeframe: str,
+        limit: Optional[int] = None,
+        since: Optional[int] = None,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Прочитать свечи как DataFrame (индекс timestamp, колонки OHLCV).
+
+        Args:
+            symbol: Торговая пара
+            timeframe: Таймфрейм
+            limit: Вернуть только последние N свечей
+            since: Вернуть свечи с timestamp >= since (мс)
+
+        Returns:
+            DataFrame или None если данных нет
+        """
+        columns = self.read_columns(symbol, timeframe, limit=limit, since=since)
+        if columns is None:
+            return None
+        return columns_to_dataframe(columns)
+
+    def append(self, symbol: str, timeframe: str, df: pd.DataFrame) -> int:
+        """
+        Дописать свечи в хранилище.
+
+        Свечи новее последней сохранённой дописываются в конец, свеча с тем же
+        timestamp, что и последняя сохранённая (обычно незакрытая), перезаписывается
+        на месте. Если пришли свечи, которых нет в середине истории, партиция
+        переписывается целиком.
+
+        Args:
+            symbol: Торговая пара
+            timeframe: Таймфрейм
+            df: OHLCV DataFrame
+
+        Returns:
+            Количество новых свечей
+        """
+        if df is None or df.empty:
+            return 0
+
+        incoming = dataframe_to_columns(df)
+
+        with self._write_lock(symbol, timeframe) as part_dir:
+            rows = self._row_count(part_dir)
+            self._truncate(part_dir, rows)
+
+            stored = self._open_columns(part_dir, mode="r+") if rows else None
+            if stored is None:
+                self._write_tail(part_dir, incoming)
+                return len(incoming["timestamp"])
+
+            stored_ts = stored["timestamp"]
+            last_ts = int(stored_ts[-1])
+            inc_ts = incoming["timestamp"]
+
+            older = inc_ts < last_ts
+            if older.any() and not np.isin(inc_ts[older], stored_ts).all():
+                del stored
+                return self._rewrite_merged(part_dir, incoming)
+
+            same = inc_ts == last_ts
+            if same.any():
+                i = int(np.flatnonzero(same)[-1])
+                for col in OHLCV_COLUMNS[1:]:
+                    stored[col][-1] = incoming[col][i]
+                    stored[col].flush()
+            del stored
+
+            newer = inc_ts > last_ts
+            if newer.any():
+                self._write_tail(part_dir, {col: arr[newer] for col, arr in incoming.items()})
+            return int(newer.sum())
+
+    def _truncate(self, part_dir: Path, rows: int):
+        """Обрезать колонки до общей длины (после прерванной записи)."""
+        for col in OHLCV_COLUMNS:
+            path = part_dir / _COLUMN_FILES[col]
+            expected = rows * _COLUMN_DTYPES[col].itemsize
+            if path.exists() and path.stat().st_size != expected:
+                with open(path, "r+b") as f:
+                    f.truncate(expected)
+
+    def _write_tail(self, part_dir: Path, columns: dict[str, np.ndarray]):
+        """Дописать массивы колонок в конец файлов."""
+        for col in OHLCV_COLUMNS:
+            with open(part_dir / _COLUMN_FILES[col], "ab") as f:
+                f.write(np.ascontiguousarray(columns[col], dtype=_COLUMN_DTYPES[col]).tobytes())
+
+    def _rewrite_merged(self, part_dir: Path, incoming: dict[str, np.ndarray]) -> int:
+        """
+        Слить сохранённые и новые свечи и переписать партицию.
+
+        Вызывается под эксклюзивной блокировкой (append): читатели других
+        процессов не увидят смесь старых и новых файлов колонок.
+        """
+        stored = self._open_columns(part_dir)
+        frames = [columns_to_dataframe(incoming)]
+        before = 0
+        if stored is not None:
+            before = len(stored["timestamp"])
+            frames.insert(0, columns_to_dataframe(dict(stored)))
+        merged = dataframe_to_columns(pd.concat(frames))
+        del stored
+
+        for col in OHLCV_COLUMNS:
+            tmp_path = part_dir / f"{_COLUMN_FILES[col]}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(np.ascontiguousarray(merged[col], dtype=_COLUMN_DTYPES[col]).tobytes())
+            os.replace(tmp_path, part_dir / _COLUMN_FILES[col])
+
+        added = len(merged["timestamp"]) - before
+        logger.debug(f"CandleStore: rewrote {part_dir} ({added} new candles)")
+        return added
+
+    def clear(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        """
+        Удалить сохранённые свечи.
+
+        Args:
+            symbol: Пара (None - все пары)
+            timeframe: Таймфрейм (None - все таймфреймы пары)
+        """
+        if symbol is None:
+            target = self.root_dir
+        elif timeframe is None:
+            target = self._symbol_dir(symbol)
+        else:
+            target = self._partition_dir(symbol, timeframe)
+
+        if target.exists():
+            shutil.rmtree(target)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+
+    def list_partitions(self) -> list[tuple[str, str]]:
+        """Список сохранённых пар (symbol, timeframe)."""
+        result = []
+        for symbol_dir in sorted(p for p in self.root_dir.iterdir() if p.is_dir()):
+            symbol = symbol_dir.name.replace("-", "/", 1)
+            for tf_dir in sorted(p for p in symbol_dir.iterdir() if p.is_dir()):
+                result.append((symbol, tf_dir.name))
+        return result
@@ -0,0 +1,203 @@
+"""
+Локальный индекс символ -> CoinGecko ID.
+
+CoinGecko адресует монеты по id ("bitcoin", "avalanche-2"), а не по тикеру.
+Индекс строится из /coins/list (все монеты) и первых страниц /coins/markets
+(ранжирование по капитализации для тикеров, которые носят сразу несколько
+токенов), хранится в data/cache/coingecko/coin_ids.json и обновляется раз в
+сутки. Поиск выполняется в памяти; устаревший файл используется, пока
+свежая версия скачивается в фоне.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = Path(__file__).parent.parent / "data" / "cache" / "coingecko" / "coin_ids.json"
+DEFAULT_INDEX_TTL = 24 * 3600
+# Пауза перед повтором неудачного обновления (сек)
+RETRY_DELAY = 300
+
+_FORMAT_VERSION = 1
+
+
+def clean_symbol(symbol: str) -> str:
+    """BTC/USDT, btc-usd, BTC -> BTC."""
+    base = symbol.replace("-", "/").split("/")[0]
+    return base.split(":")[0].upper()
+
+
+class CoinIdIndex:
+    """
+    Индекс тикер -> CoinGecko ID с дисковым кэшем и суточным обновлением.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        ttl_seconds: float = DEFAULT_INDEX_TTL,
+        overrides: Optional[dict[str, str]] = None,
+    ):
+        """
+        Args:
+            path: JSON файл индекса (по умолчанию data/cache/coingecko/coin_ids.json)
+            ttl_seconds: Возраст, после которого индекс обновляется
+            overrides: Фиксированные соответствия (имеют приоритет над индексом)
+        """
+        self.path = Path(path) if path else DEFAULT_INDEX_PATH
+        self.ttl_seconds = ttl_seconds
+        self.overrides = {k.upper(): v for k, v in (overrides or {}).items()}
+
+        self._ids: dict[str, str] = {}
+        self._saved_at = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+        self._retry_at = 0.0
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0}
+
+    @staticmethod
+    def build(coins: Iterable[dict], ranked_ids: Iterable[str] = ()) -> dict[str, str]:
+        """
+        Построить индекс из ответа /coins/list.
+
+        Если тикер носят несколько монет, выбирается монета с наибольшей
+        капитализацией (порядок ranked_ids), а вне рейтинга - с самым
+        коротким id: мосты и обёртки обычно имеют составные id
+        ("wrapped-bitcoin", "bridged-usdc").
+
+        Args:
+            coins: [{"id", "symbol", "name"}, ...]
+            ranked_ids: id монет по убыванию капитализации
+
+        Returns:
+            {"BTC": "bitcoin", ...}
+        """
+        rank = {coin_id: i for i, coin_id in enumerate(ranked_ids)}
+        unranked = len(rank)
+
+        best: dict[str, tuple[int, int, str]] = {}
+        for coin in coins:
+            coin_id, symbol = coin.get("id"), coin.get("symbol")
+            if not coin_id or not symbol:
+                continue
+            key = (rank.get(coin_id, unranked), len(coin_id), coin_id)
+            symbol = symbol.upper()
+            if symbol not in best or key < best[symbol]:
+                best[symbol] = key
+        return {symbol: key[2] for symbol, key in best.items()}
+
+    def load(self) -> bool:
+        """Загрузить индекс с диска в память. Returns: True, если файл прочитан."""
+        try:
+            payload = json.loads(self.path.read_bytes())
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning("Corrupted coin id index %s: %s", self.path, e)
+            return False
+        if payload.get("version") != _FORMAT_VERSION or not payload.get("ids"):
+            return False
+
+        with self._lock:
+            self._ids = payload["ids"]
+            self._saved_at = payload.get("saved_at", 0.0)
+        return True
+
+    def save(self):
+        """Атомарно сохранить индекс."""
+        payload = {"version": _FORMAT_VERSION, "saved_at": self._saved_at, "ids": self._ids}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(payload, separators=(",", ":")))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning("Failed to save coin id index: %s", e)
+
+    def update(self, coins: Iterable[dict], ranked_ids: Iterable[str] = ()):
+        """Заменить индекс новыми данными и сохранить на диск."""
+        ids = self.build(coins, ranked_ids)
+        if not ids:
+            return
+        with self._lock:
+            self._ids = ids
+            self._saved_at = time.time()
+            self._loaded = True
+        self.save()
+        self.stats["refreshes"] += 1
+        logger.info("Coin id index updated: %d symbols", len(ids))
+
+    def is_fresh(self) -> bool:
+        """Моложе ли индекс TTL."""
+        self._ensure_loaded()
+        return bool(self._ids) and time.time() - self._saved_at < self.ttl_seconds
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self.load()
+                    self._loaded = True
+
+    def get(self, symbol: str) -> Optional[str]:
+        """
+        CoinGecko ID по символу (BTC, BTC/USDT).
+
+        Returns:
+            ID или None, если символ неизвестен
+        """
+        self._ensure_loaded()
+        base = clean_symbol(symbol)
+        coin_id = self.overrides.get(base) or self._ids.get(base)
+        if coin_id:
+            self.stats["hits"] += 1
+        else:
+            self.stats["misses"] += 1
+        return coin_id
+
+    def refresh_if_stale(self, fetch: Callable[[], tuple[list[dict], list[str]]], block: bool = False) -> bool:
+        """
+        Обновить индекс, если он устарел (не больше одного обновления одновременно).
+
+        Args:
+            fetch: Возвращает (coins_list, ranked_ids)
+            block: Обновить синхронно (иначе в фоновом потоке)
+
+        Returns:
+            True, если обновление запущено
+        """
+        self._ensure_loaded()
+        if self.is_fresh() or time.time() < self._retry_at:
+            return False
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+
+        def run():
+            try:
+                self.update(*fetch())
+            except Exception as e:
+                self._retry_at = time.time() + RETRY_DELAY
+                logger.warning("Coin id index refresh failed: %s", e)
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        if block:
+            run()
+        else:
+            threading.Thread(target=run, name="coin-id-index", daemon=True).start()
+        return True
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._ids)
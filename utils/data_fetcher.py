@@ -1,10 +1,108 @@
 """
 Multi-timeframe data fetcher utility.
 Provides methods to fetch and align data from different timeframes.
+
+Higher timeframes are derived locally from lower-timeframe candles
+(e.g. 1h/4h from 15m) instead of being fetched from the exchange again,
+so all timeframes of a symbol come from the same candles.
 """
 
+from typing import Optional
+
+import numpy as np
 import pandas as pd
 
+from utils.candle_store import columns_to_dataframe, dataframe_to_columns, timeframe_to_ms
+
+# Exchanges open weekly candles on Monday 00:00 UTC; the Unix epoch is a Thursday.
+_WEEK_OFFSET_MS = 4 * 86_400_000
+
+
+def infer_timeframe_ms(timestamps: np.ndarray) -> Optional[int]:
+    """
+    Infer candle duration from sorted millisecond timestamps.
+
+    Uses the smallest positive step, so gaps in the history do not skew it.
+    """
+    if len(timestamps) < 2:
+        return None
+    steps = np.diff(timestamps)
+    steps = steps[steps > 0]
+    return int(steps.min()) if len(steps) else None
+
+
+def bucket_starts(timestamps: np.ndarray, timeframe_ms: int) -> np.ndarray:
+    """
+    Open time of the higher-timeframe bucket each timestamp belongs to.
+
+    Buckets are aligned to the Unix epoch like exchange candles
+    (4h bars open at 00/04/08... UTC, daily at 00:00 UTC, weekly on Monday).
+    """
+    offset = _WEEK_OFFSET_MS if timeframe_ms % (7 * 86_400_000) == 0 else 0
+    return (timestamps - offset) // timeframe_ms * timeframe_ms + offset
+
+
+def resample_ohlcv(
+    dataframe: pd.DataFrame,
+    timeframe: str,
+    source_timeframe: Optional[str] = None,
+    include_partial: bool = True,
+) -> pd.DataFrame:
+    """
+    Aggregate OHLCV candles into a higher timeframe.
+
+    Args:
+        dataframe: Source OHLCV candles (DatetimeIndex or "timestamp" column)
+        timeframe: Target timeframe (e.g. '1h', '4h', '1d')
+        source_timeframe: Timeframe of the source candles (inferred if None)
+        include_partial: Keep the last bar if its bucket is not complete yet
+            (the still-forming candle, as exchanges return it)
+
+    Returns:
+        DataFrame with open/high/low/close/volume indexed by bucket open time.
+        A leading bucket that starts before the available history is dropped,
+        because its open/high/low would be wrong.
+
+    Raises:
+        ValueError: If the target is not a whole multiple of the source timeframe
+    """
+    columns = dataframe_to_columns(dataframe)
+    ts = columns["timestamp"]
+    target_ms = timeframe_to_ms(timeframe)
+    source_ms = timeframe_to_ms(source_timeframe) if source_timeframe else infer_timeframe_ms(ts)
+
+    if source_ms is not None and (target_ms < source_ms or target_ms % source_ms):
+        raise ValueError(f"Cannot derive {timeframe} candles from {source_timeframe or f'{source_ms}ms'} candles")
+
+    if len(ts) == 0:
+        return columns_to_dataframe(columns)
+
+    buckets = bucket_starts(ts, target_ms)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)]
+
+    result = {
+        "timestamp": buckets[starts],
+        "open": columns["open"][starts],
+        "high": np.maximum.reduceat(columns["high"], starts),
+        "low": np.minimum.reduceat(columns["low"], starts),
+        "close": columns["close"][ends - 1],
+        "volume": np.add.reduceat(columns["volume"], starts),
+    }
+
+    keep = np.ones(len(starts), dtype=bool)
+    if source_ms is not None:
+        # History starts mid-bucket: the first bar lacks its real open
+        keep[0] = ts[0] == buckets[0]
+        if not include_partial:
+            keep[-1] &= ts[-1] + source_ms >= buckets[-1] + target_ms
+
+    resampled = columns_to_dataframe({col: arr[keep] for col, arr in result.items()})
+    tz = getattr(dataframe.index, "tz", None)
+    if tz is not None:
+        resampled.index = resampled.index.tz_localize("UTC").tz_convert(tz)
+    return resampled
+
 
 class DataFetcher:
     """
@@ -29,31 +127,7 @@ class DataFetcher:
         if timeframe == current_timeframe:
             return dataframe
 
-        # Convert timeframe strings to pandas resample frequencies
-        timeframe_map = {
-            "1m": "1T",
-            "5m": "5T",
-            "15m": "15T",
-            "30m": "30T",
-            "1h": "1H",
-            "4h": "4H",
-            "1d": "1D",
-            "1w": "1W",
-        }
-
-        if timeframe not in timeframe_map:
-            raise ValueError(f"Unsupported timeframe: {timeframe}")
-
-        freq = timeframe_map[timeframe]
-
-        # Resample OHLCV data
-        resampled = (
-            dataframe.resample(freq)
-            .agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
-            .dropna()
-        )
-
-        return resampled
+        return resample_ohlcv(dataframe, timeframe, source_timeframe=current_timeframe)
 
     def align_timeframes(self, higher_tf_data: pd.DataFrame, lower_tf_data: pd.DataFrame) -> pd.DataFrame:
         """
@@ -4,11 +4,15 @@
 """
 
 import logging
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Optional, Union
 
 import numpy as np
 import pandas as pd
 
+from utils.candle_store import TIMEFRAME_MS
+from utils.candles import Candles
+
 logger = logging.getLogger(__name__)
 
 
@@ -114,3 +118,193 @@ class DataValidator:
         if np.isnan(value) or np.isinf(value):
             return False
         return min_val <= value <= max_val
+
+
+@dataclass
+class ValidationReport:
+    """Результат проверки OHLCV одной пары."""
+
+    symbol: str
+    rows: int
+    unsorted: int = 0  # Переходов назад по времени
+    duplicates: int = 0  # Повторяющихся timestamp
+    invalid_ohlc: int = 0  # Строк с high < max(o, c, l) или low > min(o, c, h)
+    nan_rows: int = 0  # Строк с NaN в ценах
+    zero_volume: int = 0
+    negative_volume: int = 0
+    gaps: int = 0  # Разрывов больше шага таймфрейма
+    missing_bars: int = 0  # Пропущенных свечей в разрывах
+    repairs: list[str] = field(default_factory=list)
+
+    @property
+    def is_clean(self) -> bool:
+        """Данные без замечаний."""
+        return not self.repairs and not self.zero_volume
+
+    @property
+    def needs_repair(self) -> bool:
+        """Есть исправления, которые выполняет DataValidator.clean_dataframe."""
+        return any(action != "refetch_gaps" for action in self.repairs)
+
+
+class BatchDataValidator:
+    """
+    Векторизованная проверка OHLCV сразу для набора пар.
+
+    Колонки всех пар склеиваются в общие массивы, проверки выполняются одним
+    проходом NumPy, а счётчики по парам собираются через np.add.reduceat,
+    поэтому проверка 50 пар по 100 свечей стоит пару миллисекунд.
+    """
+
+    COLUMNS = DataValidator.REQUIRED_COLUMNS
+
+    def validate(
+        self,
+        frames: dict[str, Union[pd.DataFrame, Candles, None]],
+        timeframe: Optional[str] = None,
+    ) -> dict[str, ValidationReport]:
+        """
+        Проверить панель пар.
+
+        Args:
+            frames: {symbol: OHLCV DataFrame или Candles}; пустые и None пропускаются
+            timeframe: Таймфрейм для поиска разрывов (None - без проверки разрывов)
+
+        Returns:
+            {symbol: ValidationReport}
+        """
+        symbols, stamps, values = [], [], []
+        for symbol, data in frames.items():
+            if data is None or len(data) == 0:
+                continue
+            if isinstance(data, Candles):
+                stamps.append(data.timestamp)
+                values.append([data[col] for col in self.COLUMNS])
+            else:
+                stamps.append(self._timestamps_ms(data))
+                values.append([data[col].to_numpy() for col in self.COLUMNS])
+            symbols.append(symbol)
+        if not symbols:
+            return {}
+
+        lengths = np.array([len(t) for t in stamps])
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        ts = np.concatenate(stamps)
+        o, h, l, c, v = (
+            np.concatenate([cols[k] for cols in values]).astype(np.float64, copy=False)
+            for k in range(len(self.COLUMNS))
+        )
+
+        def per_symbol(mask: np.ndarray) -> np.ndarray:
+            return np.add.reduceat(mask.astype(np.int64), starts)
+
+        # Первая строка каждой пары не сравнивается с предыдущей парой
+        first = np.zeros(len(ts), dtype=bool)
+        first[starts] = True
+
+        dt = np.empty(len(ts), dtype=np.int64)
+        dt[0] = 0
+        np.subtract(ts[1:], ts[:-1], out=dt[1:])
+        unsorted = per_symbol((dt < 0) & ~first)
+
+        # Дубликаты и разрывы - по отсортированному времени внутри пары
+        group = np.repeat(np.arange(len(symbols)), lengths)
+        if unsorted.any():
+            order = np.lexsort((ts, group))
+            ts_sorted = ts[order]
+            dt_sorted = np.empty(len(ts), dtype=np.int64)
+            dt_sorted[0] = 0
+            np.subtract(ts_sorted[1:], ts_sorted[:-1], out=dt_sorted[1:])
+        else:
+            dt_sorted = dt
+        duplicates = per_symbol((dt_sorted == 0) & ~first)
+
+        if timeframe is not None:
+            step = TIMEFRAME_MS[timeframe]
+            is_gap = (dt_sorted > step) & ~first
+            gaps = per_symbol(is_gap)
+            missing = np.add.reduceat(np.where(is_gap, dt_sorted // step - 1, 0), starts)
+        else:
+            gaps = missing = np.zeros(len(symbols), dtype=np.int64)
+
+        nan_rows = per_symbol(np.isnan(o) | np.isnan(h) | np.isnan(l) | np.isnan(c))
+        with np.errstate(invalid="ignore"):
+            invalid = per_symbol(
+                (h < np.fmax(np.fmax(o, c), l)) | (l > np.fmin(np.fmin(o, c), h))
+            )
+            zero_volume = per_symbol(v == 0)
+            negative_volume = per_symbol(v < 0)
+
+        reports = {}
+        for i, symbol in enumerate(symbols):
+            report = ValidationReport(
+                symbol=symbol,
+                rows=int(lengths[i]),
+                unsorted=int(unsorted[i]),
+                duplicates=int(duplicates[i]),
+                invalid_ohlc=int(invalid[i]),
+                nan_rows=int(nan_rows[i]),
+                zero_volume=int(zero_volume[i]),
+                negative_volume=int(negative_volume[i]),
+                gaps=int(gaps[i]),
+                missing_bars=int(missing[i]),
+            )
+            report.repairs = self._repair_plan(report)
+            reports[symbol] = report
+        return reports
+
+    @staticmethod
+    def _timestamps_ms(df: pd.DataFrame) -> np.ndarray:
+        """Время свечей в мс из колонки timestamp или DatetimeIndex."""
+        if "timestamp" in df.columns:
+            ts = df["timestamp"].to_numpy()
+        else:
+            ts = df.index.values if isinstance(df.index, pd.DatetimeIndex) else pd.DatetimeIndex(df.index).values
+        if ts.dtype.kind == "M":
+            return ts.astype("datetime64[ms]").astype(np.int64)
+        return ts.astype(np.int64)
+
+    @staticmethod
+    def _repair_plan(report: ValidationReport) -> list[str]:
+        plan = []
+        if report.nan_rows:
+            plan.append("drop_nan")
+        if report.unsorted:
+            plan.append("sort")
+        if report.duplicates:
+            plan.append("drop_duplicates")
+        if report.invalid_ohlc:
+            plan.append("fix_ohlc")
+        if report.negative_volume:
+            plan.append("clip_volume")
+        if report.gaps:
+            plan.append("refetch_gaps")
+        return plan
+
+    def repair(
+        self,
+        frames: dict[str, Optional[pd.DataFrame]],
+        reports: dict[str, ValidationReport],
+    ) -> dict[str, Optional[pd.DataFrame]]:
+        """
+        Исправить пары, которым это нужно (остальные возвращаются как есть).
+
+        Разрывы не заполняются: пары с "refetch_gaps" нужно перезапросить.
+        """
+        repaired = dict(frames)
+        for symbol, report in reports.items():
+            if report.needs_repair and isinstance(frames.get(symbol), pd.DataFrame):
+                repaired[symbol] = DataValidator.clean_dataframe(frames[symbol])
+        return repaired
+
+    def validate_and_repair(
+        self,
+        frames: dict[str, Optional[pd.DataFrame]],
+        timeframe: Optional[str] = None,
+    ) -> tuple[dict[str, Optional[pd.DataFrame]], dict[str, ValidationReport]]:
+        """validate() + repair() за один вызов; проблемы логируются одной строкой."""
+        reports = self.validate(frames, timeframe)
+        problems = {s: r.repairs for s, r in reports.items() if r.repairs}
+        if problems:
+            logger.warning("OHLCV issues: %s", problems)
+        return self.repair(frames, reports), reports
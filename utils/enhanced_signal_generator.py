@@ -5,10 +5,12 @@ and better support for bearish markets.
 """
 
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import pandas as pd
 import numpy as np
 
+from utils.indicator_memo import get_indicator_memo
+
 logger = logging.getLogger(__name__)
 
 # Импорт нового валидатора
@@ -112,11 +114,64 @@ class EnhancedSignalGenerator:
         histogram = macd_line - signal_line
         return macd_line.iloc[-1], signal_line.iloc[-1], histogram.iloc[-1]
     
+    @staticmethod
+    def calculate_indicators(close: pd.Series) -> Dict[str, Any]:
+        """
+        Calculate the close-based indicators used by generate_signal.
+        
+        Returns:
+            Dictionary with rsi_series, macd / macd_prev (line, signal, histogram
+            for the last and previous candle), ema9, ema20 and sma50
+        """
+        delta = close.diff()
+        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+        rs = gain / (loss + 1e-10)
+        
+        # MACD (8-17-9); EWM is causal, so the previous candle is the second to last value
+        macd_line = close.ewm(span=8, adjust=False).mean() - close.ewm(span=17, adjust=False).mean()
+        signal_line = macd_line.ewm(span=9, adjust=False).mean()
+        histogram = macd_line - signal_line
+        macd = (macd_line.iloc[-1], signal_line.iloc[-1], histogram.iloc[-1])
+        macd_prev = (macd_line.iloc[-2], signal_line.iloc[-2], histogram.iloc[-2]) if len(close) > 1 else macd
+        
+        ema20 = close.ewm(span=20, adjust=False).mean().iloc[-1]
+        return {
+            'rsi_series': 100 - (100 / (1 + rs)),
+            'macd': macd,
+            'macd_prev': macd_prev,
+            'ema9': close.ewm(span=9, adjust=False).mean().iloc[-1],
+            'ema20': ema20,
+            'sma50': close.rolling(50).mean().iloc[-1] if len(close) >= 50 else ema20,
+        }
+    
+    @classmethod
+    def get_indicators(
+        cls,
+        ohlcv_data: pd.DataFrame,
+        symbol: Optional[str] = None,
+        timeframe: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        calculate_indicators for the OHLCV data, memoized per candle when
+        symbol and timeframe are given (see utils.indicator_memo).
+        
+        The result is shared between callers and must not be modified.
+        """
+        close = ohlcv_data['close']
+        if symbol is None or timeframe is None:
+            return cls.calculate_indicators(close)
+        return get_indicator_memo().compute(
+            symbol, timeframe, ohlcv_data, 'enhanced_indicators', lambda: cls.calculate_indicators(close)
+        )
+    
     @classmethod
     def generate_signal(
         cls,
         ticker: Dict,
-        ohlcv_data: Optional[pd.DataFrame] = None
+        ohlcv_data: Optional[pd.DataFrame] = None,
+        symbol: Optional[str] = None,
+        timeframe: Optional[str] = None,
     ) -> Tuple[str, int, List[str]]:
         """
         Generate enhanced trading signal.
@@ -124,6 +179,8 @@ class EnhancedSignalGenerator:
         Args:
             ticker: Dictionary with ticker data (percentage, quoteVolume, etc.)
             ohlcv_data: OHLCV DataFrame (optional, for better analysis)
+            symbol: Series id for indicator memoization (e.g. "binance:BTC/USDT")
+            timeframe: Timeframe of ohlcv_data for indicator memoization
         
         Returns:
             Tuple of (signal, confidence_score, reasons_list)
@@ -167,12 +224,10 @@ class EnhancedSignalGenerator:
         if volume_ratio < config['volume_exclusion']:
             return "HOLD", 35, [f"⚠️ Низкий объем ({volume_ratio:.0%})"]
         
+        indicators = cls.get_indicators(ohlcv_data, symbol, timeframe)
+        
         # === 1. RSI ANALYSIS (расширенные зоны) ===
-        delta = close.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / (loss + 1e-10)
-        rsi_series = 100 - (100 / (1 + rs))
+        rsi_series = indicators['rsi_series']
         rsi = rsi_series.iloc[-1] if pd.notna(rsi_series.iloc[-1]) else 50
         rsi_prev = rsi_series.iloc[-2] if len(rsi_series) > 1 and pd.notna(rsi_series.iloc[-2]) else rsi
         rsi_trend = rsi - rsi_prev
@@ -206,12 +261,10 @@ class EnhancedSignalGenerator:
             reasons.append(f"RSI {rsi:.0f}⬇")
         
         # === 2. MACD ANALYSIS (8-17-9) ===
-        macd_line, signal_line, macd_hist = cls.calculate_macd(close, fast=8, slow=17, signal=9)
+        macd_line, signal_line, macd_hist = indicators['macd']
         
         # Get previous values for crossover detection
-        macd_line_prev = cls.calculate_macd(close.iloc[:-1], fast=8, slow=17, signal=9)[0] if len(close) > 1 else macd_line
-        signal_line_prev = cls.calculate_macd(close.iloc[:-1], fast=8, slow=17, signal=9)[1] if len(close) > 1 else signal_line
-        macd_hist_prev = cls.calculate_macd(close.iloc[:-1], fast=8, slow=17, signal=9)[2] if len(close) > 1 else macd_hist
+        macd_line_prev, signal_line_prev, macd_hist_prev = indicators['macd_prev']
         
         # Crossover detection
         bullish_cross = macd_line_prev < signal_line_prev and macd_line > signal_line
@@ -287,9 +340,7 @@ class EnhancedSignalGenerator:
         
         # === 4. MA TREND CONFIRMATION ===
         price = close.iloc[-1]
-        ema9 = close.ewm(span=9, adjust=False).mean().iloc[-1]
-        ema20 = close.ewm(span=20, adjust=False).mean().iloc[-1]
-        sma50 = close.rolling(50).mean().iloc[-1] if len(close) >= 50 else ema20
+        ema9, ema20, sma50 = indicators['ema9'], indicators['ema20'], indicators['sma50']
         
         # MA alignment
         if price > ema9 > ema20 > sma50:
@@ -6,15 +6,13 @@
 from datetime import datetime, timedelta
 from typing import Any, Optional
 
-try:
-    import ccxt
-
-    HAS_CCXT = True
-except ImportError:
-    HAS_CCXT = False
-    ccxt = None
-
+from utils.lazy_import import lazy_import, module_available
 from utils.logger_config import setup_logging
+from utils.market_metadata import ensure_markets, get_market_metadata_cache
+
+# ccxt импортируется при первом подключении к бирже
+HAS_CCXT = module_available("ccxt")
+ccxt = lazy_import("ccxt") if HAS_CCXT else None
 
 logger = setup_logging()
 
@@ -42,12 +40,9 @@ class ExchangeManager:
         self.rate_limits: dict[str, float] = {}
 
         # Популярные биржи для быстрого доступа и фоллбека
+        # (клиенты создаются при первом обращении, markets - из дискового кэша)
         self.priority_exchanges = ["binance", "bybit", "okx", "kraken"]
 
-        # Инициализируем основные биржи сразу
-        for ex_id in self.priority_exchanges:
-            self.get_exchange_instance(ex_id)
-
     def get_all_exchanges(self) -> list[str]:
         """Получить список всех доступных бирж через CCXT."""
         if not HAS_CCXT:
@@ -75,6 +70,7 @@ class ExchangeManager:
                 "timeout": 10000,  # 10 секунд таймаут
             }
             exchange = exchange_class(config)
+            get_market_metadata_cache().apply(exchange)
             self.exchanges[exchange_id] = exchange
             logger.info("Создан экземпляр биржи: %s", exchange_id)
             return exchange
@@ -101,7 +97,14 @@ class ExchangeManager:
             return {}
 
         try:
-            markets = exchange.load_markets()
+            if force_refresh:
+                markets = exchange.load_markets(reload=True)
+                get_market_metadata_cache().save(
+                    exchange_id, exchange.options.get("defaultType", "spot"), markets, exchange.currencies
+                )
+            else:
+                # С диска (data/cache/markets) или один раз из сети
+                markets = ensure_markets(exchange)
             self.markets_cache[exchange_id] = markets
             self.markets_cache_time[exchange_id] = datetime.now()
             logger.info("Загружено %s пар для биржи %s", len(markets), exchange_id)
@@ -0,0 +1,351 @@
+"""
+Постраничная загрузка истории OHLCV в локальный колоночный датасет.
+
+История скачивается страницами через since=, несколько пар параллельно в
+рамках общего rate limit биржи, и сразу дописывается в CandleStore -
+партиционированный датасет data/history/<биржа>/<пара>/<таймфрейм>/.
+Прогресс догрузки "в прошлое" сохраняется в checkpoint-файле, поэтому
+прерванный backfill продолжается с места остановки, а повторный запуск
+скачивает только свечи новее уже сохранённых.
+
+Все скрипты обучения и бэктестов читают историю через load_history().
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import pandas as pd
+
+from utils.candle_store import CandleStore, timeframe_to_ms
+from utils.lazy_import import lazy_import, module_available
+from utils.market_metadata import ensure_markets
+from utils.rate_limiter import RateLimiter, shared_rate_limits_enabled
+
+logger = logging.getLogger(__name__)
+
+HAS_CCXT = module_available("ccxt")
+ccxt = lazy_import("ccxt") if HAS_CCXT else None
+
+DEFAULT_HISTORY_DIR = Path(__file__).parent.parent / "data" / "history"
+
+
+def dataset_name(exchange_id: str, market_type: str = "spot") -> str:
+    """Имя датасета: биржа и тип рынка (спот и фьючерсы хранятся раздельно)."""
+    return exchange_id if market_type == "spot" else f"{exchange_id}_{market_type}"
+
+
+class HistoryBackfill:
+    """
+    Загрузчик истории одной биржи в CandleStore с checkpoint/resume.
+    """
+
+    CHECKPOINT_FILE = "_backfill_checkpoint.json"
+
+    def __init__(
+        self,
+        exchange_id: str = "binance",
+        market_type: str = "spot",
+        root_dir: Optional[Union[str, Path]] = None,
+        exchange: Optional[Any] = None,
+        max_workers: int = 4,
+        page_limit: int = 1000,
+        calls_per_minute: Optional[int] = None,
+        max_retries: int = 5,
+    ):
+        """
+        Args:
+            exchange_id: Биржа ccxt
+            market_type: "spot" или "future" (options.defaultType в ccxt)
+            root_dir: Корень датасетов (по умолчанию data/history)
+            exchange: Готовый клиент ccxt (для тестов и переиспользования)
+            max_workers: Сколько пар качать параллельно
+            page_limit: Свечей на запрос
+            calls_per_minute: Бюджет запросов (по умолчанию из rateLimit биржи)
+            max_retries: Повторы страницы при сетевых ошибках
+        """
+        self.exchange_id = exchange_id
+        self.market_type = market_type
+        self.max_workers = max_workers
+        self.page_limit = page_limit
+        self.max_retries = max_retries
+
+        root = Path(root_dir) if root_dir else DEFAULT_HISTORY_DIR
+        self.store = CandleStore(root / dataset_name(exchange_id, market_type))
+        self.checkpoint_path = self.store.root_dir / self.CHECKPOINT_FILE
+        self._checkpoint_lock = threading.Lock()
+
+        self._exchange = exchange
+        self._exchange_lock = threading.Lock()
+
+        if calls_per_minute is None:
+            rate_limit_ms = getattr(exchange, "rateLimit", None) or 100
+            calls_per_minute = max(1, int(60_000 / rate_limit_ms))
+        self.rate_limiter = RateLimiter(
+            calls_per_minute=calls_per_minute,
+            burst=max(1, calls_per_minute // 6),
+            shared_name=exchange_id if shared_rate_limits_enabled() else None,
+        )
+
+    @property
+    def exchange(self) -> Any:
+        """Клиент ccxt (создаётся при первом обращении, рынки загружаются один раз)."""
+        if self._exchange is None:
+            with self._exchange_lock:
+                if self._exchange is None:
+                    if not HAS_CCXT:
+                        raise ImportError("ccxt not installed. Install with: pip install ccxt")
+                    options = {"defaultType": self.market_type} if self.market_type != "spot" else {}
+                    exchange = getattr(ccxt, self.exchange_id)({"enableRateLimit": False, "options": options})
+                    # Общий клиент для всех потоков: загрузить рынки до параллельных запросов
+                    ensure_markets(exchange)
+                    self._exchange = exchange
+        return self._exchange
+
+    # ------------------------------------------------------------------
+    # Checkpoint
+    # ------------------------------------------------------------------
+
+    def _read_checkpoint(self) -> dict[str, dict]:
+        """
+        Checkpoint: {"pending": {key: {"head_next", "head_end"}}, "earliest": {key: ts}}.
+
+        pending - незавершённые загрузки начала истории, earliest - самая ранняя
+        свеча, которую отдаёт биржа (раньше листинга запрашивать бессмысленно).
+        """
+        try:
+            data = json.loads(self.checkpoint_path.read_text())
+        except (FileNotFoundError, ValueError):
+            data = {}
+        data.setdefault("pending", {})
+        data.setdefault("earliest", {})
+        return data
+
+    def _update_checkpoint(self, section: str, key: str, entry: Optional[Any]):
+        """Атомарно обновить (или удалить при entry=None) запись checkpoint."""
+        with self._checkpoint_lock:
+            data = self._read_checkpoint()
+            if entry is None:
+                if key not in data[section]:
+                    return
+                data[section].pop(key)
+            else:
+                data[section][key] = entry
+            tmp = self.checkpoint_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, indent=1, sort_keys=True))
+            os.replace(tmp, self.checkpoint_path)
+
+    @staticmethod
+    def _checkpoint_key(symbol: str, timeframe: str) -> str:
+        return f"{symbol}|{timeframe}"
+
+    # ------------------------------------------------------------------
+    # Загрузка
+    # ------------------------------------------------------------------
+
+    def _fetch_page(self, symbol: str, timeframe: str, since: int) -> list[list]:
+        """Одна страница свечей с повторами при сетевых ошибках и rate limit."""
+        delay = 1.0
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                return self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=self.page_limit)
+            except Exception as e:
+                retryable = HAS_CCXT and isinstance(e, (ccxt.NetworkError, ccxt.RateLimitExceeded))
+                if not retryable or attempt == self.max_retries:
+                    raise
+                logger.warning("%s %s page since=%s failed (%s), retry in %.0fs", symbol, timeframe, since, e, delay)
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+        return []
+
+    def _fetch_range(
+        self, symbol: str, timeframe: str, since: int, until: int, checkpoint: bool = False
+    ) -> tuple[int, int]:
+        """
+        Скачать [since, until) постранично, дописывая каждую страницу в store.
+
+        Returns:
+            (новых свечей, запросов)
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        key = self._checkpoint_key(symbol, timeframe)
+        added = pages = 0
+
+        while since < until:
+            page = self._fetch_page(symbol, timeframe, since)
+            pages += 1
+            rows = [row for row in page if since <= row[0] < until]
+            if rows:
+                df = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
+                added += self.store.append(symbol, timeframe, df)
+
+            if not page or page[-1][0] + tf_ms <= since:
+                break
+            since = page[-1][0] + tf_ms
+            if checkpoint:
+                self._update_checkpoint("pending", key, {"head_next": since, "head_end": until})
+
+        if checkpoint:
+            self._update_checkpoint("pending", key, None)
+        return added, pages
+
+    def backfill(self, symbol: str, timeframe: str = "1h", days_back: int = 180) -> dict[str, Any]:
+        """
+        Догрузить историю пары так, чтобы датасет покрывал последние days_back дней.
+
+        Скачиваются только отсутствующие участки: продолжение прерванной
+        загрузки из checkpoint, недостающее начало истории и свечи новее
+        последней сохранённой.
+
+        Returns:
+            Статистика: symbol, timeframe, added, pages, candles, error
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        now = int(time.time() * 1000)
+        start = (now - days_back * 86_400_000) // tf_ms * tf_ms
+        key = self._checkpoint_key(symbol, timeframe)
+        stats = {"symbol": symbol, "timeframe": timeframe, "added": 0, "pages": 0, "error": None}
+
+        try:
+            checkpoint = self._read_checkpoint()
+            # 1. Прерванная загрузка начала истории
+            pending = checkpoint["pending"].get(key)
+            if pending:
+                added, pages = self._fetch_range(
+                    symbol, timeframe, pending["head_next"], pending["head_end"], checkpoint=True
+                )
+                stats["added"] += added
+                stats["pages"] += pages
+
+            # 2. Недостающее начало истории (но не раньше листинга)
+            first = self.store.first_timestamp(symbol, timeframe)
+            earliest = checkpoint["earliest"].get(key)
+            if first is not None and start < first and (earliest is None or earliest < first):
+                added, pages = self._fetch_range(symbol, timeframe, start, first, checkpoint=True)
+                stats["added"] += added
+                stats["pages"] += pages
+                new_first = self.store.first_timestamp(symbol, timeframe)
+                if new_first is not None and new_first > start:
+                    self._update_checkpoint("earliest", key, new_first)
+
+            # 3. Хвост: от последней сохранённой свечи до текущего момента.
+            # Пока последняя свеча ещё не закрылась, запросов не делаем -
+            # повторные вызовы в рамках одного прогона читают только датасет.
+            last = self.store.last_timestamp(symbol, timeframe)
+            since = start if last is None else last
+            if last is None or last + tf_ms <= now:
+                added, pages = self._fetch_range(symbol, timeframe, since, now + tf_ms, checkpoint=last is None)
+                stats["added"] += added
+                stats["pages"] += pages
+                new_first = self.store.first_timestamp(symbol, timeframe)
+                if last is None and new_first is not None and new_first > start:
+                    self._update_checkpoint("earliest", key, new_first)
+        except Exception as e:
+            logger.error("Backfill failed for %s %s: %s", symbol, timeframe, e)
+            stats["error"] = str(e)
+
+        stats["candles"] = self.store.count(symbol, timeframe)
+        return stats
+
+    def backfill_many(
+        self, symbols: list[str], timeframe: str = "1h", days_back: int = 180
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Параллельный backfill нескольких пар в общем бюджете запросов.
+
+        Returns:
+            Словарь {symbol: статистика backfill}
+        """
+        results: dict[str, dict[str, Any]] = {}
+        if not symbols:
+            return results
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(symbols))) as executor:
+            futures = {executor.submit(self.backfill, s, timeframe, days_back): s for s in symbols}
+            for future in as_completed(futures):
+                stats = future.result()
+                results[futures[future]] = stats
+                logger.info(
+                    "Backfill %s %s: +%d candles in %d requests (%d total)%s",
+                    stats["symbol"],
+                    timeframe,
+                    stats["added"],
+                    stats["pages"],
+                    stats["candles"],
+                    f", error: {stats['error']}" if stats["error"] else "",
+                )
+        return results
+
+    def read(self, symbol: str, timeframe: str = "1h", days_back: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """Прочитать историю пары из датасета (без запросов к бирже)."""
+        since = None
+        if days_back is not None:
+            since = int(time.time() * 1000) - days_back * 86_400_000
+        return self.store.read(symbol, timeframe, since=since)
+
+
+_backfills: dict[tuple[str, str], HistoryBackfill] = {}
+_backfills_lock = threading.Lock()
+
+
+def get_history_backfill(exchange_id: str = "binance", market_type: str = "spot") -> HistoryBackfill:
+    """Общий HistoryBackfill на биржу и тип рынка (один клиент и rate limiter)."""
+    key = (exchange_id, market_type)
+    with _backfills_lock:
+        if key not in _backfills:
+            _backfills[key] = HistoryBackfill(exchange_id=exchange_id, market_type=market_type)
+        return _backfills[key]
+
+
+def load_history(
+    symbol: str,
+    timeframe: str = "1h",
+    days_back: int = 180,
+    exchange_id: str = "binance",
+    market_type: str = "spot",
+    update: bool = True,
+) -> Optional[pd.DataFrame]:
+    """
+    История пары из локального датасета, при необходимости догруженная с биржи.
+
+    Args:
+        symbol: Торговая пара
+        timeframe: Таймфрейм
+        days_back: Глубина истории в днях
+        exchange_id: Биржа
+        market_type: "spot" или "future"
+        update: Догрузить недостающие свечи (False - только чтение датасета)
+
+    Returns:
+        OHLCV DataFrame с DatetimeIndex или None
+    """
+    backfill = get_history_backfill(exchange_id, market_type)
+    if update:
+        backfill.backfill(symbol, timeframe, days_back)
+    return backfill.read(symbol, timeframe, days_back)
+
+
+def load_history_many(
+    symbols: list[str],
+    timeframe: str = "1h",
+    days_back: int = 180,
+    exchange_id: str = "binance",
+    market_type: str = "spot",
+    update: bool = True,
+) -> dict[str, Optional[pd.DataFrame]]:
+    """
+    История нескольких пар: параллельная догрузка, затем чтение из датасета.
+
+    Returns:
+        Словарь {symbol: DataFrame или None}
+    """
+    backfill = get_history_backfill(exchange_id, market_type)
+    if update:
+        backfill.backfill_many(symbols, timeframe, days_back)
+    return {symbol: backfill.read(symbol, timeframe, days_back) for symbol in symbols}
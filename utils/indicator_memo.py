@@ -0,0 +1,234 @@
+"""
+Мемоизация индикаторов и признаков в пределах одной свечи.
+
+Один и тот же набор индикаторов за цикл считают несколько потребителей:
+SignalIntegrator (EnhancedSignalGenerator + LightGBM), бот для отображения
+RSI/MACD, дашборд. IndicatorMemo хранит результат под ключом
+(символ, таймфрейм, время последней свечи, OHLCV последней свечи, окно
+данных, имя, параметры), так что для одного снимка данных каждый индикатор
+считается один раз на символ.
+
+- Последняя свеча ответа fetch_ohlcv ещё формируется: её OHLCV входит в
+  ключ, и изменение цены внутри свечи даёт новый расчёт, а не результат
+  первого снимка.
+- Новая свеча или новый снимок формирующейся свечи меняют ключ; записи
+  предыдущих снимков ряда удаляются сразу (не дожидаясь вытеснения).
+- Бюджет памяти и LRU - SizedLRUCache; одновременные запросы одного ключа
+  выполняются один раз через SingleFlight.
+- Значения отдаются без копии: DataFrame - read-only view, остальное
+  (Series, dict) нельзя изменять на месте.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.candle_store import timeframe_to_ms
+from utils.candles import OHLCV_FIELDS, Candles
+from utils.market_cache import SizedLRUCache
+from utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Время жизни записей, если таймфрейм неизвестен (сек)
+DEFAULT_TTL = 3600.0
+
+
+def bar_window(data: Any) -> Optional[tuple[int, int, int]]:
+    """
+    Окно данных: (время первой свечи, время последней свечи, число свечей) в мс.
+
+    Время берётся из колонки timestamp (мс или datetime), DatetimeIndex
+    или Candles.timestamp.
+
+    Returns:
+        Кортеж или None, если времени свечей в данных нет
+    """
+    if isinstance(data, Candles):
+        timestamps = data.timestamp
+    elif isinstance(data, pd.DataFrame) and "timestamp" in data.columns:
+        timestamps = data["timestamp"].to_numpy()
+    elif isinstance(data, (pd.DataFrame, pd.Series)) and isinstance(data.index, pd.DatetimeIndex):
+        timestamps = data.index.to_numpy()
+    else:
+        return None
+
+    if len(timestamps) == 0:
+        return None
+    ends = np.asarray(timestamps[[0, -1]])
+    if ends.dtype.kind == "M":
+        ends = ends.astype("datetime64[ms]").astype(np.int64)
+    elif ends.dtype.kind not in "iuf" or np.isnan(ends.astype(np.float64)).any():
+        return None
+    return int(ends[0]), int(ends[1]), len(timestamps)
+
+
+def last_bar(data: Union[pd.DataFrame, pd.Series, Candles]) -> tuple[float, ...]:
+    """
+    OHLCV последней свечи (отсутствующие колонки - 0; Series считается close).
+
+    Последняя свеча в ответе биржи обычно ещё формируется, поэтому её
+    значения - часть ключа мемоизации.
+    """
+    if isinstance(data, Candles):
+        return tuple(float(getattr(data, name)[-1]) for name in OHLCV_FIELDS)
+    if isinstance(data, pd.DataFrame):
+        return tuple(float(data[name].iat[-1]) if name in data.columns else 0.0 for name in OHLCV_FIELDS)
+    return (0.0, 0.0, 0.0, float(data.iat[-1]), 0.0)
+
+
+class IndicatorMemo:
+    """
+    Кэш результатов индикаторов на время одной свечи.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: Бюджет памяти под результаты
+        """
+        self._cache = SizedLRUCache(max_bytes=max_bytes, default_ttl=DEFAULT_TTL)
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        # (symbol, timeframe) -> (время последней свечи, её OHLCV, ключи записей снимка)
+        self._series: dict[tuple[str, str], tuple[int, tuple[float, ...], set[str]]] = {}
+        self.hits = 0
+        self.computes = 0
+        self.shared = 0
+        self.uncached = 0
+        self.invalidated = 0
+
+    @staticmethod
+    def _ttl(timeframe: str) -> float:
+        """Время жизни записи: две свечи таймфрейма."""
+        try:
+            return 2 * timeframe_to_ms(timeframe) / 1000
+        except ValueError:
+            return DEFAULT_TTL
+
+    def _track(self, symbol: str, timeframe: str, last_ts: int, bar: tuple[float, ...], key: str) -> bool:
+        """
+        Запомнить ключ снимка и сбросить записи предыдущих снимков ряда.
+
+        Снимок старше виденного - более ранняя свеча или та же свеча с
+        меньшим объёмом (объём формирующейся свечи только растёт).
+
+        Returns:
+            False, если данные старше уже виденного снимка (результат не кэшируется)
+        """
+        series = (symbol, timeframe)
+        with self._lock:
+            current = self._series.get(series)
+            if current is not None:
+                current_ts, current_bar, _ = current
+                if last_ts < current_ts:
+                    return False
+                if last_ts == current_ts and bar != current_bar and bar[-1] < current_bar[-1]:
+                    return False
+            if current is None or (last_ts, bar) != current[:2]:
+                stale = current[2] if current is not None else set()
+                current = self._series[series] = (last_ts, bar, set())
+                for old_key in stale:
+                    if self._cache.pop(old_key) is not None:
+                        self.invalidated += 1
+            current[2].add(key)
+            return True
+
+    def compute(
+        self, symbol: str, timeframe: str, data: Any, name: str, fn: Callable[[], Any], **params: Any
+    ) -> Any:
+        """
+        Вернуть результат fn() для текущего снимка ряда, посчитав его не более одного раза.
+
+        Снимок - время последней свечи и её OHLCV: пока формирующаяся свеча
+        не меняется, результат берётся из кэша.
+
+        Args:
+            symbol: Идентификатор ряда (для разных бирж - например "okx:BTC/USDT")
+            timeframe: Таймфрейм
+            data: Данные, по которым считается fn (DataFrame/Candles со временем свечей)
+            name: Имя индикатора
+            fn: Функция без аргументов, считающая индикатор
+            **params: Параметры индикатора (входят в ключ)
+
+        Returns:
+            Результат fn() (из кэша, если уже посчитан)
+        """
+        window = bar_window(data)
+        if window is None:
+            with self._lock:
+                self.uncached += 1
+            return fn()
+
+        first_ts, last_ts, bars = window
+        bar = last_bar(data)
+        key = f"{symbol}|{timeframe}|{last_ts}|{bar!r}|{first_ts}:{bars}|{name}|{sorted(params.items())!r}"
+
+        value = self._cache.get(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        if not self._track(symbol, timeframe, last_ts, bar, key):
+            with self._lock:
+                self.uncached += 1
+            return fn()
+
+        def compute_and_store() -> Any:
+            # Лидер мог опоздать к только что сохранённому результату
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+            result = fn()
+            with self._lock:
+                self.computes += 1
+            if result is not None:
+                self._cache.set(key, result, ttl=self._ttl(timeframe))
+            return result
+
+        value, shared = self._flight.do(key, compute_and_store)
+        if shared:
+            with self._lock:
+                self.shared += 1
+        return value
+
+    def clear(self):
+        """Очистить кэш (счётчики сохраняются)."""
+        with self._lock:
+            self._series.clear()
+        self._cache.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Статистика: попадания, вычисления, hit rate, сброшенные записи, память."""
+        cache = self._cache.stats()
+        with self._lock:
+            reused = self.hits + self.shared
+            total = reused + self.computes
+            return {
+                "hits": self.hits,
+                "shared": self.shared,
+                "computes": self.computes,
+                "uncached": self.uncached,
+                "hit_rate": (reused / total * 100) if total > 0 else 0,
+                "invalidated": self.invalidated,
+                "evictions": cache["evictions"],
+                "entries": cache["entries"],
+                "bytes": cache["bytes"],
+                "max_bytes": cache["max_bytes"],
+            }
+
+
+# Singleton instance
+_indicator_memo: Optional[IndicatorMemo] = None
+
+
+def get_indicator_memo() -> IndicatorMemo:
+    """Get or create IndicatorMemo singleton."""
+    global _indicator_memo
+    if _indicator_memo is None:
+        _indicator_memo = IndicatorMemo()
+    return _indicator_memo
@@ -0,0 +1,87 @@
+"""
+Ленивая загрузка тяжёлых опциональных зависимостей.
+
+tensorflow, lightgbm, sklearn, scipy и ccxt импортируются от сотен
+миллисекунд до нескольких секунд, а большинство процессов (бот, API,
+дашборд) используют их только в отдельных ветках или не используют вовсе.
+
+    HAS_LIGHTGBM = module_available("lightgbm")
+    lgb = lazy_import("lightgbm")   # настоящий импорт - при первом lgb.X
+
+module_available() проверяет наличие пакета через importlib.util.find_spec,
+не выполняя его код. lazy_import() возвращает модуль-заместитель, который
+импортирует настоящий модуль при первом обращении к атрибуту.
+"""
+
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+from typing import Any
+
+_import_lock = threading.Lock()
+
+
+def module_available(name: str) -> bool:
+    """
+    Установлен ли модуль (без его импорта).
+
+    Для подмодулей (например "tensorflow.keras") find_spec импортирует
+    родительский пакет, поэтому проверяйте пакет верхнего уровня.
+    """
+    if name in sys.modules:
+        return sys.modules[name] is not None
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule(types.ModuleType):
+    """Заместитель модуля, импортирующий его при первом обращении к атрибуту."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = None
+
+    def _load(self) -> types.ModuleType:
+        target = self.__dict__["_lazy_target"]
+        if target is None:
+            with _import_lock:
+                target = self.__dict__["_lazy_target"]
+                if target is None:
+                    target = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_target"] = target
+        return target
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_target"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Вернуть модуль, импортируемый при первом использовании.
+
+    Если модуль уже импортирован, возвращается он сам. Ошибка импорта
+    (ImportError) возникает при первом обращении к атрибуту, поэтому
+    наличие пакета проверяйте через module_available().
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+def is_loaded(module: Any) -> bool:
+    """Импортирован ли уже настоящий модуль за заместителем."""
+    if isinstance(module, LazyModule):
+        return module.__dict__["_lazy_target"] is not None
+    return module is not None
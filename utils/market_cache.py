@@ -1,15 +1,23 @@
 """
 Продвинутое кэширование для рыночных данных.
-Поддержка Redis для production и in-memory для development.
+In-memory LRU (L1) в каждом процессе и Redis (L2) для production,
+общий для всех процессов на хосте.
 """
 
 import contextlib
-import hashlib
 import json
+import struct
+import sys
 import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime
 from typing import Any, Optional
 
+import numpy as np
+import pandas as pd
+
 from utils.logger_config import setup_logging
 
 logger = setup_logging()
@@ -24,76 +32,624 @@ except ImportError:
     redis = None
 
 
+def estimate_nbytes(value: Any) -> int:
+    """Оценка занимаемой памяти значением в байтах."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_nbytes(k) + estimate_nbytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def freeze_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Сделать read-only копию DataFrame для хранения в кэше.
+
+    Каждая колонка копируется один раз в отдельный массив с writeable=False.
+    Выдаваемые из кэша shallow-копии делят эти массивы: добавление или замена
+    колонок в них не трогает кэш, а запись на месте (df.loc[..., "close"] = x)
+    падает с ValueError вместо молчаливой порчи закэшированных данных.
+    """
+    columns = {}
+    for col in df.columns:
+        arr = df[col].to_numpy(copy=True)
+        arr.flags.writeable = False
+        columns[col] = arr
+    return pd.DataFrame(columns, index=df.index.copy(), columns=df.columns, copy=False)
+
+
+def thaw_frame(df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    Вернуть DataFrame, в который вызывающий код может писать на месте.
+
+    Кэш выдаёт представления поверх read-only массивов (freeze_frame); такой
+    DataFrame копируется один раз, остальные возвращаются как есть. Применяется
+    на границе публичного API (MarketDataManager.get_ohlcv и др.), а внутри
+    модулей данных представления читаются без копирования.
+    """
+    if df is None or all(df.iloc[:, i].to_numpy().flags.writeable for i in range(df.shape[1])):
+        return df
+    return df.copy()
+
+
+class SizedLRUCache:
+    """
+    Потокобезопасный LRU+TTL кэш с бюджетом памяти в байтах.
+
+    DataFrame хранятся замороженными (см. freeze_frame) и выдаются без копирования
+    данных - как shallow-копии поверх read-only массивов.
+    """
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024, default_ttl: float = 300.0, stale_ttl: float = 0.0):
+        """
+        Args:
+            max_bytes: Бюджет памяти; при превышении вытесняются давно не читавшиеся записи
+            default_ttl: Время жизни записи в секундах по умолчанию
+            stale_ttl: Сколько секунд истёкшая запись ещё доступна через get_stale
+        """
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        # key -> (value, nbytes, stored_at, ttl)
+        self._entries: "OrderedDict[str, tuple[Any, int, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+    def _remove(self, key: str):
+        """Удалить запись (под блокировкой)."""
+        _, nbytes, _, _ = self._entries.pop(key)
+        self.current_bytes -= nbytes
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[Any]:
+        """
+        Получить значение.
+
+        Args:
+            key: Ключ
+            ttl: Переопределить время жизни при чтении (сек)
+
+        Returns:
+            Значение (DataFrame - read-only view) или None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, _, stored_at, entry_ttl = entry
+            age = time.monotonic() - stored_at
+            entry_ttl = ttl if ttl is not None else entry_ttl
+            if age >= entry_ttl:
+                # Истёкшая запись ещё stale_ttl секунд доступна для get_stale
+                if age >= entry_ttl + self.stale_ttl:
+                    self._remove(key)
+                    self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        if isinstance(value, pd.DataFrame):
+            return value.copy(deep=False)
+        return value
+
+    def get_stale(self, key: str) -> tuple[Optional[Any], bool]:
+        """
+        Получить значение, в том числе истёкшее не более stale_ttl секунд назад.
+
+        Returns:
+            (значение или None, свежее ли оно)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+
+            value, _, stored_at, entry_ttl = entry
+            age = time.monotonic() - stored_at
+            if age >= entry_ttl + self.stale_ttl:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None, False
+
+            fresh = age < entry_ttl
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if not fresh:
+                self.stale_hits += 1
+
+        if isinstance(value, pd.DataFrame):
+            return value.copy(deep=False), fresh
+        return value, fresh
+
+    def get_age(self, key: str) -> Optional[float]:
+        """Возраст записи в секундах (None если записи нет)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return time.monotonic() - entry[2] if entry else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Сохранить значение.
+
+        Args:
+            key: Ключ
+            value: Значение (DataFrame будет заморожен одной копией)
+            ttl: Время жизни в секундах (по умолчанию default_ttl)
+        """
+        if isinstance(value, pd.DataFrame):
+            value = freeze_frame(value)
+        nbytes = estimate_nbytes(value)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            if nbytes > self.max_bytes:
+                logger.debug("Cache entry %s (%d bytes) exceeds budget, not cached", key, nbytes)
+                return
+
+            self._entries[key] = (value, nbytes, time.monotonic(), self.default_ttl if ttl is None else ttl)
+            self.current_bytes += nbytes
+
+            while self.current_bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        """Удалить запись и вернуть значение."""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            value = self._entries[key][0]
+            self._remove(key)
+            return value
+
+    def keys(self) -> list[str]:
+        """Снимок ключей (от давно не читавшихся к свежим)."""
+        with self._lock:
+            return list(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() - entry[2] < entry[3]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        """Очистить кэш (счётчики сохраняются)."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Статистика: попадания, промахи, вытеснения, занятая память."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total * 100) if total > 0 else 0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "stale_hits": self.stale_hits,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+
+
+# ---------------------------------------------------------------------------
+# Бинарная сериализация для L2 (Redis)
+# ---------------------------------------------------------------------------
+#
+# Формат: MAGIC | тег (1 байт) | длина заголовка (u32) | JSON-заголовок | буферы.
+# Числовые колонки DataFrame и ndarray пишутся сырыми байтами и читаются через
+# np.frombuffer без копирования; остальное - JSON с сохранением datetime.
+
+_MAGIC = b"MFC1"
+_TAG_FRAME = b"F"
+_TAG_ARRAY = b"A"
+_TAG_JSON = b"J"
+_HEADER_LEN = struct.Struct("<I")
+_RAW_KINDS = "biufcmM"
+
+
+def _json_default(obj: Any) -> Any:
+    """JSON-представление типов, которые json не умеет (datetime не превращается в строку)."""
+    if isinstance(obj, pd.Timestamp):
+        return {"__ts__": obj.isoformat()}
+    if isinstance(obj, datetime):
+        return {"__dt__": obj.isoformat()}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+
+def _json_hook(obj: dict) -> Any:
+    """Обратное преобразование для _json_default."""
+    if len(obj) == 1:
+        if "__ts__" in obj:
+            return pd.Timestamp(obj["__ts__"])
+        if "__dt__" in obj:
+            return datetime.fromisoformat(obj["__dt__"])
+    return obj
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+
+def _loads(data: Any) -> Any:
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data, object_hook=_json_hook)
+
+
+def _pack(tag: bytes, header: dict, buffers: list[bytes]) -> bytes:
+    header_bytes = _dumps(header)
+    return b"".join([_MAGIC, tag, _HEADER_LEN.pack(len(header_bytes)), header_bytes, *buffers])
+
+
+def _raw_array(arr: np.ndarray) -> Optional[np.ndarray]:
+    """Массив для побайтовой записи или None, если dtype не числовой."""
+    if arr.dtype.kind not in _RAW_KINDS:
+        return None
+    return np.ascontiguousarray(arr)
+
+
+def _encode_frame(df: pd.DataFrame) -> bytes:
+    buffers: list[bytes] = []
+    columns = []
+    for name in df.columns:
+        values = df[name].to_numpy()
+        raw = _raw_array(values) if isinstance(df[name].dtype, np.dtype) else None
+        if raw is None:
+            columns.append({"name": name, "json": _dumps(values.tolist()).decode()})
+            continue
+        buffers.append(raw.tobytes())
+        columns.append({"name": name, "dtype": raw.dtype.str, "nbytes": raw.nbytes})
+
+    index = df.index
+    if isinstance(index, pd.DatetimeIndex):
+        tz = str(index.tz) if index.tz is not None else None
+        raw = np.ascontiguousarray(index.as_unit("ns").asi8 if tz else index.values.astype("datetime64[ns]"))
+        raw = raw.view("i8")
+        index_header = {"kind": "datetime", "tz": tz, "nbytes": raw.nbytes}
+        buffers.append(raw.tobytes())
+    elif isinstance(index, pd.RangeIndex):
+        index_header = {"kind": "range", "start": index.start, "stop": index.stop, "step": index.step}
+    elif isinstance(index, pd.MultiIndex) or _raw_array(np.asarray(index)) is None:
+        index_header = {"kind": "json", "values": _dumps(index.tolist()).decode()}
+    else:
+        raw = _raw_array(np.asarray(index))
+        index_header = {"kind": "array", "dtype": raw.dtype.str, "nbytes": raw.nbytes}
+        buffers.append(raw.tobytes())
+    index_header["name"] = index.name
+
+    header = {"rows": len(df), "columns": columns, "index": index_header}
+    return _pack(_TAG_FRAME, header, buffers)
+
+
+def _decode_frame(header: dict, body: memoryview) -> pd.DataFrame:
+    offset = 0
+    columns = {}
+    names = []
+    for col in header["columns"]:
+        names.append(col["name"])
+        if "json" in col:
+            columns[col["name"]] = np.array(_loads(col["json"]), dtype=object)
+            continue
+        dtype = np.dtype(col["dtype"])
+        columns[col["name"]] = np.frombuffer(body, dtype=dtype, count=col["nbytes"] // dtype.itemsize, offset=offset)
+        offset += col["nbytes"]
+
+    idx = header["index"]
+    if idx["kind"] == "datetime":
+        values = np.frombuffer(body, dtype="i8", count=idx["nbytes"] // 8, offset=offset)
+        index = pd.DatetimeIndex(values.view("datetime64[ns]"), name=idx["name"])
+        if idx["tz"]:
+            index = index.tz_localize("UTC").tz_convert(idx["tz"])
+    elif idx["kind"] == "range":
+        index = pd.RangeIndex(idx["start"], idx["stop"], idx["step"], name=idx["name"])
+    elif idx["kind"] == "array":
+        dtype = np.dtype(idx["dtype"])
+        index = pd.Index(np.frombuffer(body, dtype=dtype, count=idx["nbytes"] // dtype.itemsize, offset=offset))
+        index.name = idx["name"]
+    else:
+        values = _loads(idx["values"])
+        index = pd.Index([tuple(v) if isinstance(v, list) else v for v in values], name=idx["name"])
+
+    return pd.DataFrame(columns, index=index, columns=names, copy=False)
+
+
+def encode_value(value: Any) -> bytes:
+    """
+    Сериализовать значение для Redis.
+
+    DataFrame и числовые ndarray кодируются колонками сырых байтов,
+    прочие значения - JSON, в котором datetime/Timestamp сохраняют тип.
+    """
+    if isinstance(value, pd.DataFrame):
+        return _encode_frame(value)
+    if isinstance(value, np.ndarray) and _raw_array(value) is not None:
+        raw = _raw_array(value)
+        return _pack(_TAG_ARRAY, {"dtype": raw.dtype.str, "shape": list(raw.shape)}, [raw.tobytes()])
+    return _pack(_TAG_JSON, {}, [_dumps(value)])
+
+
+def decode_value(data: bytes) -> Any:
+    """
+    Десериализовать значение из Redis.
+
+    Числовые данные возвращаются read-only массивами поверх полученного буфера
+    (без копирования). Записи в старом формате (plain JSON) тоже читаются.
+    """
+    if not data.startswith(_MAGIC):
+        return json.loads(data)
+
+    view = memoryview(data)
+    tag = bytes(view[4:5])
+    (header_len,) = _HEADER_LEN.unpack_from(view, 5)
+    start = 5 + _HEADER_LEN.size
+    header = _loads(view[start : start + header_len])
+    body = view[start + header_len :]
+
+    if tag == _TAG_FRAME:
+        return _decode_frame(header, body)
+    if tag == _TAG_ARRAY:
+        return np.frombuffer(body, dtype=np.dtype(header["dtype"])).reshape(header["shape"])
+    return _loads(body)
+
+
 class MarketCache:
     """
-    Продвинутый кэш для рыночных данных с поддержкой Redis.
+    Двухуровневый кэш рыночных данных.
+
+    L1 - SizedLRUCache в памяти процесса, L2 - Redis (опционально), общий для
+    бота, дашборда и фоновых сервисов. Промах L1 читается из L2 и прогревает L1;
+    запись идёт в оба уровня и рассылает по pub/sub инвалидацию, чтобы другие
+    процессы сбросили устаревшую копию в L1 и взяли свежие данные из L2.
     """
 
-    def __init__(self, use_redis: bool = False, redis_host: str = "localhost", redis_port: int = 6379):
+    def __init__(
+        self,
+        use_redis: bool = False,
+        redis_host: str = "localhost",
+        redis_port: int = 6379,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        memory_cache: Optional[SizedLRUCache] = None,
+        redis_client: Optional[Any] = None,
+        namespace: str = "maxflash",
+        subscribe_invalidations: bool = True,
+        stale_seconds: float = 0.0,
+    ):
         """
         Инициализация кэша.
 
         Args:
-            use_redis: Использовать Redis для кэширования
+            use_redis: Использовать Redis как L2
             redis_host: Хост Redis
             redis_port: Порт Redis
+            max_memory_bytes: Бюджет in-memory кэша (L1) в байтах
+            memory_cache: Готовый L1 (например OHLCV кэш MarketDataManager)
+            redis_client: Готовый клиент Redis (binary, без decode_responses)
+            namespace: Префикс ключей и канала инвалидации в Redis
+            subscribe_invalidations: Слушать инвалидации других процессов
+            stale_seconds: Сколько записи живут в Redis после истечения TTL
+                (для get_stale, stale-while-revalidate)
         """
-        self.use_redis = use_redis and HAS_REDIS
-        self.memory_cache: dict[str, tuple[Any, datetime]] = {}
+        self.memory_cache = memory_cache if memory_cache is not None else SizedLRUCache(max_bytes=max_memory_bytes)
         self.lock = threading.Lock()
+        self.namespace = namespace
+        self.stale_seconds = stale_seconds
+        self.channel = f"{namespace}:invalidate"
+        self.instance_id = uuid.uuid4().hex
+        self.redis_client = redis_client
+        self.use_redis = redis_client is not None or (use_redis and HAS_REDIS)
+        self._pubsub = None
+        self._pubsub_thread = None
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.l2_errors = 0
+        self.invalidations_received = 0
 
-        if self.use_redis:
+        if self.use_redis and self.redis_client is None:
             try:
-                self.redis_client = redis.Redis(
-                    host=redis_host, port=redis_port, decode_responses=True, socket_connect_timeout=2
-                )
+                self.redis_client = redis.Redis(host=redis_host, port=redis_port, socket_connect_timeout=2)
                 self.redis_client.ping()
                 logger.info("Redis cache initialized successfully")
             except Exception as e:
                 logger.warning("Redis unavailable, using memory cache: %s", str(e))
                 self.use_redis = False
-        else:
-            self.redis_client = None
+                self.redis_client = None
+
+        if not self.use_redis:
             logger.info("Using in-memory cache")
+        elif subscribe_invalidations:
+            self._subscribe()
+
+    def _subscribe(self):
+        """Подписаться на канал инвалидации в фоновом потоке."""
+        try:
+            self._pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{self.channel: self._handle_invalidation})
+            self._pubsub_thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+        except Exception as e:
+            logger.warning("Redis pub/sub unavailable, cross-process invalidation disabled: %s", str(e))
+            self._pubsub = None
+
+    def _handle_invalidation(self, message: dict):
+        """Сбросить ключи L1, изменённые другим процессом."""
+        try:
+            payload = _loads(message["data"])
+        except (KeyError, TypeError, ValueError):
+            return
+        if payload.get("origin") == self.instance_id:
+            return
+
+        self.invalidations_received += 1
+        if "pattern" in payload:
+            self._clear_memory(payload["pattern"])
+        for key in payload.get("keys", []):
+            self.memory_cache.pop(key)
+
+    def _publish(self, pipe: Any, **payload):
+        """Добавить в pipeline сообщение об инвалидации."""
+        pipe.publish(self.channel, _dumps({"origin": self.instance_id, **payload}))
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
 
     def _make_key(self, prefix: str, *args, **kwargs) -> str:
         """Создать ключ кэша из аргументов."""
         key_parts = [prefix] + [str(arg) for arg in args]
         if kwargs:
             key_parts.append(json.dumps(kwargs, sort_keys=True))
-        key_string = ":".join(key_parts)
-        return hashlib.md5(key_string.encode()).hexdigest()
+        return ":".join(key_parts)
+
+    def _l1_ttl(self, pttl: Optional[int]) -> float:
+        """TTL для прогрева L1 из L2: не дольше, чем запись в Redis остаётся свежей."""
+        if pttl is not None and pttl > 0:
+            return max(0.0, pttl / 1000.0 - self.stale_seconds)
+        return self.memory_cache.default_ttl
+
+    def _warm_from_l2(self, key: str, raw: bytes, pttl: Optional[int]) -> tuple[Any, bool]:
+        """Декодировать значение из Redis и прогреть L1; вернуть (значение, свежее ли)."""
+        self.l2_hits += 1
+        value = decode_value(raw)
+        ttl = self._l1_ttl(pttl)
+        self.memory_cache.set(key, value, ttl=ttl)
+        return value, ttl > 0
 
-    def get(self, key: str, ttl_seconds: int = 300) -> Optional[Any]:
+    def get(self, key: str, ttl_seconds: Optional[float] = None) -> Optional[Any]:
         """
         Получить значение из кэша.
 
         Args:
             key: Ключ кэша
-            ttl_seconds: Время жизни в секундах
+            ttl_seconds: Переопределить время жизни записи в L1 (сек)
 
         Returns:
             Значение или None если истекло или не найдено
         """
-        if self.use_redis and self.redis_client:
-            try:
-                cached = self.redis_client.get(key)
-                if cached:
-                    return json.loads(cached)
-            except Exception as e:
-                logger.warning("Redis get error: %s", str(e))
-
-        # Fallback to memory cache
-        with self.lock:
-            if key in self.memory_cache:
-                value, timestamp = self.memory_cache[key]
-                if (datetime.now() - timestamp).total_seconds() < ttl_seconds:
-                    return value
-                else:
-                    del self.memory_cache[key]
-        return None
+        value = self.memory_cache.get(key, ttl=ttl_seconds)
+        if value is not None or not self.use_redis:
+            return value
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.get(self._redis_key(key))
+            pipe.pttl(self._redis_key(key))
+            raw, pttl = pipe.execute()
+        except Exception as e:
+            self.l2_errors += 1
+            logger.warning("Redis get error: %s", str(e))
+            return None
 
-    def set(self, key: str, value: Any, ttl_seconds: int = 300):
+        if raw is None:
+            self.l2_misses += 1
+            return None
+
+        value, fresh = self._warm_from_l2(key, raw, pttl)
+        return value if fresh else None
+
+    def get_stale(self, key: str) -> tuple[Optional[Any], bool]:
+        """
+        Получить значение, допуская истёкшее не более stale_seconds назад.
+
+        Returns:
+            (значение или None, свежее ли оно)
+        """
+        value, fresh = self.memory_cache.get_stale(key)
+        if value is not None or not self.use_redis:
+            return value, fresh
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.get(self._redis_key(key))
+            pipe.pttl(self._redis_key(key))
+            raw, pttl = pipe.execute()
+        except Exception as e:
+            self.l2_errors += 1
+            logger.warning("Redis get error: %s", str(e))
+            return None, False
+
+        if raw is None:
+            self.l2_misses += 1
+            return None, False
+        return self._warm_from_l2(key, raw, pttl)
+
+    def get_many(self, keys: list[str], ttl_seconds: Optional[float] = None) -> dict[str, Any]:
+        """
+        Получить несколько значений: L1, затем промахи одним pipeline в Redis.
+
+        Args:
+            keys: Ключи кэша
+            ttl_seconds: Переопределить время жизни записей в L1 (сек)
+
+        Returns:
+            Словарь {ключ: значение} только для найденных ключей
+        """
+        found: dict[str, Any] = {}
+        missing = []
+        for key in keys:
+            value = self.memory_cache.get(key, ttl=ttl_seconds)
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+
+        if not missing or not self.use_redis:
+            return found
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key in missing:
+                pipe.get(self._redis_key(key))
+                pipe.pttl(self._redis_key(key))
+            replies = pipe.execute()
+        except Exception as e:
+            self.l2_errors += 1
+            logger.warning("Redis get_many error: %s", str(e))
+            return found
+
+        for key, raw, pttl in zip(missing, replies[::2], replies[1::2]):
+            if raw is None:
+                self.l2_misses += 1
+                continue
+            value, fresh = self._warm_from_l2(key, raw, pttl)
+            if fresh:
+                found[key] = value
+        return found
+
+    def set(self, key: str, value: Any, ttl_seconds: float = 300):
         """
         Сохранить значение в кэш.
 
@@ -102,60 +658,87 @@ class MarketCache:
             value: Значение для сохранения
             ttl_seconds: Время жизни в секундах
         """
-        if self.use_redis and self.redis_client:
-            try:
-                self.redis_client.setex(key, ttl_seconds, json.dumps(value, default=str))
-                return
-            except Exception as e:
-                logger.warning("Redis set error: %s", str(e))
-
-        # Fallback to memory cache
-        with self.lock:
-            self.memory_cache[key] = (value, datetime.now())
-            # Очистка старых записей
-            if len(self.memory_cache) > 10000:
-                self._cleanup_old_entries(ttl_seconds)
-
-    def _cleanup_old_entries(self, ttl_seconds: int):
-        """Очистить старые записи из памяти."""
-        current_time = datetime.now()
-        keys_to_delete = [
-            key
-            for key, (_, timestamp) in self.memory_cache.items()
-            if (current_time - timestamp).total_seconds() > ttl_seconds
-        ]
-        for key in keys_to_delete[:1000]:  # Удаляем по 1000 за раз
-            del self.memory_cache[key]
+        self.set_many({key: value}, ttl_seconds)
+
+    def set_many(self, items: dict[str, Any], ttl_seconds: float = 300):
+        """
+        Сохранить несколько значений: в L1 и одним pipeline в Redis
+        вместе с одним сообщением об инвалидации.
+
+        Args:
+            items: Словарь {ключ: значение}
+            ttl_seconds: Время жизни в секундах
+        """
+        for key, value in items.items():
+            self.memory_cache.set(key, value, ttl=ttl_seconds)
+
+        if not self.use_redis or not items:
+            return
+
+        ttl_ms = max(1, int((ttl_seconds + self.stale_seconds) * 1000))
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(self._redis_key(key), encode_value(value), px=ttl_ms)
+            self._publish(pipe, keys=list(items))
+            pipe.execute()
+        except Exception as e:
+            self.l2_errors += 1
+            logger.warning("Redis set error: %s", str(e))
+
+    def _clear_memory(self, pattern: Optional[str]):
+        if pattern:
+            # Простая фильтрация по паттерну для памяти
+            for key in self.memory_cache.keys():
+                if pattern in key:
+                    self.memory_cache.pop(key)
+        else:
+            self.memory_cache.clear()
 
     def clear(self, pattern: Optional[str] = None):
         """
         Очистить кэш.
 
         Args:
-            pattern: Паттерн для очистки (только для Redis)
+            pattern: Подстрока ключа; с паттерном чистится и Redis, а другие
+                процессы получают инвалидацию. Без паттерна - только L1.
         """
-        if self.use_redis and self.redis_client and pattern:
+        if self.use_redis and pattern:
             try:
-                keys = self.redis_client.keys(pattern)
+                keys = list(self.redis_client.scan_iter(match=self._redis_key(f"*{pattern}*"), count=500))
+                pipe = self.redis_client.pipeline(transaction=False)
                 if keys:
-                    self.redis_client.delete(*keys)
+                    pipe.delete(*keys)
+                self._publish(pipe, pattern=pattern)
+                pipe.execute()
             except Exception as e:
+                self.l2_errors += 1
                 logger.warning("Redis clear error: %s", str(e))
 
-        with self.lock:
-            if pattern:
-                # Простая фильтрация по паттерну для памяти
-                keys_to_delete = [k for k in self.memory_cache if pattern in k]
-                for key in keys_to_delete:
-                    del self.memory_cache[key]
-            else:
-                self.memory_cache.clear()
+        self._clear_memory(pattern)
+
+    def close(self):
+        """Остановить подписку на инвалидации."""
+        if self._pubsub_thread is not None:
+            self._pubsub_thread.stop()
+            self._pubsub_thread = None
+        if self._pubsub is not None:
+            with contextlib.suppress(Exception):
+                self._pubsub.close()
+            self._pubsub = None
 
     def get_stats(self) -> dict[str, Any]:
         """Получить статистику кэша."""
         stats = {"type": "redis" if self.use_redis else "memory", "memory_entries": len(self.memory_cache)}
+        stats["memory"] = self.memory_cache.stats()
 
         if self.use_redis and self.redis_client:
+            stats["redis"] = {
+                "hits": self.l2_hits,
+                "misses": self.l2_misses,
+                "errors": self.l2_errors,
+                "invalidations_received": self.invalidations_received,
+            }
             with contextlib.suppress(Exception):
                 stats["redis_keys"] = self.redis_client.dbsize()
 
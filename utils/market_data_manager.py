@@ -6,8 +6,10 @@
 для избежания банов IP.
 """
 
+import asyncio
 import os
 import threading
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import Any, Optional
@@ -15,9 +17,14 @@ from typing import Any, Optional
 import numpy as np
 import pandas as pd
 
+from utils.candle_builder import LiveCandleBuilder
+from utils.candle_store import TIMEFRAME_MS
+from utils.data_fetcher import resample_ohlcv
 from utils.logger_config import setup_logging
-from utils.market_cache import MarketCache
+from utils.market_cache import MarketCache, SizedLRUCache, thaw_frame
 from utils.performance import global_profiler
+from utils.prefetch_scheduler import CandlePrefetchScheduler
+from utils.single_flight import SingleFlight
 
 # Новый мульти-источниковый провайдер
 try:
@@ -57,22 +64,80 @@ class MarketDataManager:
         "PEPE/USDT", "WIF/USDT", "BONK/USDT", "FLOKI/USDT", "SHIB/USDT",
     ]
 
-    def __init__(self, cache_ttl_minutes: int = 5, use_multi_source: bool = True):
+    # Базовые таймфреймы, из которых выводятся старшие (1h/4h/1d) без запроса к бирже
+    RESAMPLE_BASE_TIMEFRAMES = ("15m", "1m")
+    # Максимум свечей базового таймфрейма для ресемплинга (биржа отдаёт их страницами,
+    # см. CCXTProvider.OHLCV_PAGE_LIMIT); старшим таймфреймам глубже этого - прямой запрос
+    BASE_FETCH_LIMIT = 5000
+    # Пока пара получает живые свечи, закэшированная история годится без REST,
+    # если стыкуется с ними (LiveCandleBuilder.merge)
+    LIVE_CACHE_TTL = 24 * 3600
+
+    def __init__(
+        self,
+        cache_ttl_minutes: int = 5,
+        use_multi_source: bool = True,
+        use_candle_store: bool = True,
+        cache_max_mb: float = 128,
+        stale_while_revalidate: Optional[bool] = None,
+        stale_max_minutes: float = 60,
+    ):
         """
         Инициализация менеджера данных.
 
         Args:
             cache_ttl_minutes: Время жизни кэша в минутах
             use_multi_source: Использовать MultiSourceDataProvider (рекомендуется)
+            use_candle_store: Хранить историю свечей на диске и догружать только новые
+            cache_max_mb: Бюджет памяти OHLCV кэша (LRU вытеснение при превышении)
+            stale_while_revalidate: Отдавать истёкший кэш сразу и обновлять его в фоне
+                (None - из MAXFLASH_STALE_WHILE_REVALIDATE)
+            stale_max_minutes: Насколько устаревшие данные можно отдать в этом режиме
         """
         self.cache_ttl = timedelta(minutes=cache_ttl_minutes)
-        self.ohlcv_cache: dict[str, dict[str, Any]] = {}
+        if stale_while_revalidate is None:
+            stale_while_revalidate = os.getenv("MAXFLASH_STALE_WHILE_REVALIDATE", "false").lower() in (
+                "1",
+                "true",
+                "yes",
+            )
+        self.stale_while_revalidate = stale_while_revalidate
+        stale_seconds = stale_max_minutes * 60 if stale_while_revalidate else 0.0
+
+        # OHLCV кэш отдаёт read-only DataFrame без копирования данных
+        self.ohlcv_cache = SizedLRUCache(
+            max_bytes=int(cache_max_mb * 1024 * 1024),
+            default_ttl=self.cache_ttl.total_seconds(),
+            stale_ttl=stale_seconds,
+        )
         self.tickers_cache: dict[str, dict[str, Any]] = {}
         self.cache_times: dict[str, datetime] = {}
         self.lock = threading.Lock()
 
-        # Используем MarketCache для продвинутого кэширования
-        self.market_cache = MarketCache(use_redis=False)
+        # Дедупликация одновременных запросов к сети по ключу кэша
+        self._inflight = SingleFlight()
+
+        # Фоновые обновления истёкших ключей (stale-while-revalidate)
+        self._refresh_pool: Optional[ThreadPoolExecutor] = None
+        self._revalidating: set[str] = set()
+        self.swr_stats = {"stale_served": 0, "revalidations": 0, "revalidation_errors": 0}
+
+        # Свечи из WebSocket потока (attach_candle_builder)
+        self.candle_builder: Optional[LiveCandleBuilder] = None
+        self._live_ws: Any = None
+        self._live_use_trades = True
+        self._live_symbols: set[str] = set()
+        # Обновление кэша по закрытию свечей (start_prefetch)
+        self.prefetch_scheduler: Optional[CandlePrefetchScheduler] = None
+
+        # L1 - ohlcv_cache этого процесса, L2 - Redis, общий для бота и дашборда
+        self.market_cache = MarketCache(
+            use_redis=os.getenv("USE_REDIS_CACHE", "false").lower() in ("1", "true", "yes"),
+            redis_host=os.getenv("REDIS_HOST", "localhost"),
+            redis_port=int(os.getenv("REDIS_PORT", "6379")),
+            memory_cache=self.ohlcv_cache,
+            stale_seconds=stale_seconds,
+        )
 
         # Инициализируем провайдеры
         self.use_multi_source = use_multi_source and HAS_MULTI_SOURCE
@@ -85,7 +150,8 @@ class MarketDataManager:
                 twelve_data_key = os.getenv("TWELVE_DATA_API_KEY")
                 self.data_provider = MultiSourceDataProvider(
                     coingecko_api_key=coingecko_key,
-                    twelve_data_api_key=twelve_data_key
+                    twelve_data_api_key=twelve_data_key,
+                    use_candle_store=use_candle_store,
                 )
                 logger.info("MarketDataManager: Using MultiSourceDataProvider (KuCoin/Kraken/OKX/CoinGecko)")
             except Exception as e:
@@ -126,21 +192,299 @@ class MarketDataManager:
             force_refresh: Игнорировать кэш
 
         Returns:
-            DataFrame с OHLCV данными или None
+            DataFrame с OHLCV данными или None. Его можно изменять на месте:
+            попадание в кэш (read-only представление) копируется.
         """
-        global_profiler.start("get_ohlcv")
-
         # Упрощенный кэш ключ
         cache_key = f"multi:{symbol}:{timeframe}"
 
-        # Проверяем локальный кэш (простой TTL)
-        if not force_refresh and cache_key in self.ohlcv_cache:
-            cache_data = self.ohlcv_cache[cache_key]
-            if datetime.now() - cache_data["time"] < self.cache_ttl:
-                global_profiler.stop("get_ohlcv")
-                return cache_data["df"].copy()
+        # Проверяем кэш: L1 (read-only view без копирования), затем Redis
+        if not force_refresh:
+            live = self._get_live_ohlcv(symbol, timeframe, cache_key)
+            if live is not None:
+                return thaw_frame(live)
+            cached = self._get_cached_ohlcv(symbol, timeframe, limit, exchange_id, cache_key)
+            if cached is not None:
+                return thaw_frame(cached)
+            derived = self._derive_ohlcv(symbol, timeframe, limit)
+            if derived is not None:
+                return thaw_frame(derived)
+
+        # Одновременные промахи по одному ключу идут в сеть один раз
+        df, shared = self._inflight.do(
+            cache_key, lambda: self._fetch_ohlcv(symbol, timeframe, limit, exchange_id, force_refresh)
+        )
+        if shared and df is not None:
+            df = df.copy()
+        return thaw_frame(self._with_live_candles(symbol, timeframe, df))
+
+    async def aget_ohlcv(
+        self,
+        symbol: str,
+        timeframe: str = "1h",
+        limit: int = 200,
+        exchange_id: str = "auto",
+        force_refresh: bool = False,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Асинхронный get_ohlcv: запрос идёт через ccxt.async_support
+        (MultiSourceDataProvider.aget_ohlcv) прямо в event loop, чтение
+        CandleStore - в потоке. Запросы в полёте общие с потоковыми вызывающими.
+        """
+        cache_key = f"multi:{symbol}:{timeframe}"
+
+        if not force_refresh:
+            live = self._get_live_ohlcv(symbol, timeframe, cache_key)
+            if live is not None:
+                return thaw_frame(live)
+            cached = self._get_cached_ohlcv(symbol, timeframe, limit, exchange_id, cache_key)
+            if cached is not None:
+                return thaw_frame(cached)
+            derived = await asyncio.to_thread(self._derive_ohlcv, symbol, timeframe, limit)
+            if derived is not None:
+                return thaw_frame(derived)
+
+        df, shared = await self._inflight.ado_coro(
+            cache_key, lambda: self._afetch_ohlcv(symbol, timeframe, limit, exchange_id, force_refresh)
+        )
+        if shared and df is not None:
+            df = df.copy()
+        return thaw_frame(self._with_live_candles(symbol, timeframe, df))
+
+    def _get_cached_ohlcv(
+        self, symbol: str, timeframe: str, limit: int, exchange_id: str, cache_key: str
+    ) -> Optional[pd.DataFrame]:
+        """
+        Кэшированный OHLCV. В режиме stale-while-revalidate истёкшие данные
+        отдаются сразу, а обновление ставится в фон.
+        """
+        if not self.stale_while_revalidate:
+            return self.market_cache.get(cache_key)
+
+        cached, fresh = self.market_cache.get_stale(cache_key)
+        if cached is not None and not fresh:
+            self.swr_stats["stale_served"] += 1
+            self._revalidate_ohlcv(symbol, timeframe, limit, exchange_id)
+        return cached
+
+    def _revalidate_ohlcv(self, symbol: str, timeframe: str, limit: int, exchange_id: str = "auto"):
+        """Обновить ключ в фоне (не больше одного обновления на ключ одновременно)."""
+        cache_key = f"multi:{symbol}:{timeframe}"
+        with self.lock:
+            if cache_key in self._revalidating:
+                return
+            self._revalidating.add(cache_key)
+            if self._refresh_pool is None:
+                self._refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ohlcv-refresh")
+        self.swr_stats["revalidations"] += 1
+
+        def refresh():
+            try:
+                self._inflight.do(
+                    cache_key, lambda: self._fetch_ohlcv(symbol, timeframe, limit, exchange_id, False)
+                )
+            except Exception as e:
+                self.swr_stats["revalidation_errors"] += 1
+                logger.warning(f"Background refresh failed for {symbol} {timeframe}: {e}")
+            finally:
+                with self.lock:
+                    self._revalidating.discard(cache_key)
+
+        self._refresh_pool.submit(refresh)
+
+    def start_prefetch(
+        self,
+        symbols: Optional[list[str]] = None,
+        timeframes: tuple[str, ...] = ("1h",),
+        limit: int = 200,
+        jitter: float = 10.0,
+    ) -> CandlePrefetchScheduler:
+        """
+        Обновлять кэш подписанных пар сразу после закрытия их свечей.
+
+        Args:
+            symbols: Пары (по умолчанию TOP_CRYPTO_PAIRS); позже можно добавлять
+                через prefetch_scheduler.subscribe()
+            timeframes: Таймфреймы
+            limit: Количество свечей
+            jitter: Максимальный случайный сдвиг запросов (сек)
+
+        Returns:
+            Запущенный планировщик
+        """
+        if self.prefetch_scheduler is None:
+            self.prefetch_scheduler = CandlePrefetchScheduler(self, jitter=jitter)
+        if symbols is None:
+            symbols = self.TOP_CRYPTO_PAIRS
+        self.prefetch_scheduler.subscribe_many(symbols, list(timeframes), limit)
+        self.prefetch_scheduler.start()
+        return self.prefetch_scheduler
+
+    def attach_candle_builder(
+        self,
+        builder: LiveCandleBuilder,
+        ws_manager: Any = None,
+        symbols: Optional[list[str]] = None,
+        use_trades: bool = True,
+    ):
+        """
+        Поддерживать OHLCV кэш актуальным из WebSocket потока.
+
+        Последняя свеча берётся из builder при каждом чтении, закрытые свечи
+        дописываются в кэш (и Redis), поэтому get_ohlcv не ходит в REST, пока
+        поток жив и стыкуется с закэшированной историей.
+
+        Args:
+            builder: Сборщик свечей
+            ws_manager: WebSocketManager; если задан, пары подписываются на поток
+            symbols: Пары для подписки (по умолчанию TOP_CRYPTO_PAIRS); позже
+                можно добавлять через subscribe_live_candles()
+            use_trades: Строить свечи из сделок, а не из тикеров
+        """
+        self.candle_builder = builder
+        self._live_ws = ws_manager
+        self._live_use_trades = use_trades
+        builder.add_listener(self._on_live_candle_closed)
+        for symbol in symbols if symbols is not None else self.TOP_CRYPTO_PAIRS:
+            self.subscribe_live_candles(symbol)
+        builder.start_clock()
+        logger.info("MarketDataManager: live candles enabled for %s", ", ".join(builder.timeframes))
+
+    def subscribe_live_candles(self, symbol: str) -> bool:
+        """
+        Подписать пару на WebSocket поток сборщика свечей.
+
+        Повторные вызовы для той же пары ничего не делают, поэтому метод можно
+        вызывать при каждом чтении (например, для графика на экране).
+
+        Returns:
+            True, если пара подписана этим вызовом
+        """
+        if self._live_ws is None or self.candle_builder is None:
+            return False
+        with self.lock:
+            if symbol in self._live_symbols:
+                return False
+            self._live_symbols.add(symbol)
+        self._live_ws.stream_candles(self.candle_builder, [symbol], use_trades=self._live_use_trades)
+        return True
+
+    def _get_live_ohlcv(self, symbol: str, timeframe: str, cache_key: str) -> Optional[pd.DataFrame]:
+        """Закэшированная история с живыми свечами (None - нужен обычный путь)."""
+        builder = self.candle_builder
+        if builder is None or not builder.is_live(symbol, timeframe):
+            return None
+        cached = self.market_cache.get(cache_key, ttl_seconds=self.LIVE_CACHE_TTL)
+        if cached is None:
+            return None
+        return builder.merge(symbol, timeframe, cached)
+
+    def _with_live_candles(self, symbol: str, timeframe: str, df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """Наложить живые свечи на загруженную историю, если они стыкуются."""
+        builder = self.candle_builder
+        if builder is None or df is None or not builder.is_live(symbol, timeframe):
+            return df
+        merged = builder.merge(symbol, timeframe, df)
+        return merged if merged is not None else df
+
+    def _on_live_candle_closed(self, symbol: str, timeframe: str, bar: dict[str, Any]):
+        """Дописать закрытую живую свечу в кэш (видна и другим процессам через Redis)."""
+        cache_key = f"multi:{symbol}:{timeframe}"
+        cached = self.market_cache.get(cache_key, ttl_seconds=self.LIVE_CACHE_TTL)
+        if cached is None:
+            return
+        merged = self.candle_builder.merge(symbol, timeframe, cached)
+        if merged is not None:
+            self.market_cache.set(cache_key, merged, ttl_seconds=self.cache_ttl.total_seconds())
+
+    def _derive_ohlcv(self, symbol: str, timeframe: str, limit: int) -> Optional[pd.DataFrame]:
+        """
+        Построить старший таймфрейм из свежих свечей базового таймфрейма.
+
+        Базовый таймфрейм считается свежим, пока его ключ живёт в кэше;
+        длинная история берётся из CandleStore провайдера. Если истории
+        не хватает на limit свечей, возвращается None (будет обычный запрос).
+        """
+        target_ms = TIMEFRAME_MS.get(timeframe)
+        if target_ms is None:
+            return None
+
+        for base in self.RESAMPLE_BASE_TIMEFRAMES:
+            base_ms = TIMEFRAME_MS[base]
+            if base_ms >= target_ms or target_ms % base_ms:
+                continue
+
+            base_df = self.market_cache.get(f"multi:{symbol}:{base}")
+            if base_df is None:
+                continue
+
+            # +1 бакет на случай, если история начинается с середины бакета
+            needed = (limit + 1) * (target_ms // base_ms)
+            if len(base_df) < needed:
+                store = getattr(self.data_provider, "candle_store", None)
+                if store is None:
+                    continue
+                base_df = store.read(symbol, base, limit=needed)
+                if base_df is None or len(base_df) < needed:
+                    continue
+
+            derived = resample_ohlcv(base_df, timeframe, source_timeframe=base).iloc[-limit:]
+            if len(derived) < limit:
+                continue
+
+            self.market_cache.set(f"multi:{symbol}:{timeframe}", derived, ttl_seconds=self.cache_ttl.total_seconds())
+            logger.debug(f"Derived {len(derived)} {timeframe} candles for {symbol} from {base}")
+            return derived
 
-        df = None
+        return None
+
+    def get_ohlcv_multi_tf(
+        self,
+        symbol: str,
+        timeframes: list[str],
+        base_timeframe: str = "15m",
+        limit: int = 200,
+    ) -> dict[str, Optional[pd.DataFrame]]:
+        """
+        Получить несколько таймфреймов пары одним запросом базового таймфрейма.
+
+        Старшие таймфреймы выводятся ресемплингом из базовых свечей, поэтому
+        они согласованы между собой; напрямую запрашиваются только те, на которые
+        не хватило истории.
+
+        Args:
+            symbol: Торговая пара
+            timeframes: Нужные таймфреймы (например ["15m", "1h", "4h"])
+            base_timeframe: Таймфрейм, из которого выводятся старшие
+            limit: Количество свечей каждого таймфрейма
+
+        Returns:
+            Словарь {timeframe: DataFrame или None}
+        """
+        base_ms = TIMEFRAME_MS[base_timeframe]
+        # Глубина базовой истории: +1 бакет, как в _derive_ohlcv; таймфреймы, которым
+        # нужно больше BASE_FETCH_LIMIT свечей, запрашиваются напрямую
+        depths = [(limit + 1) * (TIMEFRAME_MS[tf] // base_ms) for tf in timeframes if tf in TIMEFRAME_MS]
+        base_limit = max([d for d in depths if d <= self.BASE_FETCH_LIMIT] + [limit])
+        self.get_ohlcv(symbol, base_timeframe, limit=base_limit)
+
+        result: dict[str, Optional[pd.DataFrame]] = {}
+        for tf in timeframes:
+            df = self.get_ohlcv(symbol, tf, limit=limit)
+            result[tf] = df.iloc[-limit:] if df is not None else None
+        return result
+
+    def _fetch_ohlcv(
+        self,
+        symbol: str,
+        timeframe: str,
+        limit: int,
+        exchange_id: str,
+        force_refresh: bool,
+    ) -> Optional[pd.DataFrame]:
+        """Загрузить OHLCV из сети (MultiSourceDataProvider, затем ExchangeManager) и положить в кэш."""
+        cache_key = f"multi:{symbol}:{timeframe}"
+        global_profiler.start("get_ohlcv")
 
         # Используем MultiSourceDataProvider
         if self.use_multi_source and self.data_provider:
@@ -150,8 +494,7 @@ class MarketDataManager:
 
                 if df is not None and not df.empty:
                     # Сохраняем в кэш
-                    with self.lock:
-                        self.ohlcv_cache[cache_key] = {"df": df.copy(), "time": datetime.now()}
+                    self.market_cache.set(cache_key, df, ttl_seconds=self.cache_ttl.total_seconds())
 
                     elapsed = global_profiler.stop("get_ohlcv")
                     logger.info(
@@ -161,10 +504,56 @@ class MarketDataManager:
             except Exception as e:
                 logger.warning(f"MultiSourceProvider error for {symbol}: {e}")
 
-        # Fallback на legacy ExchangeManager
+        df = self._fetch_ohlcv_legacy(symbol, timeframe, limit, exchange_id)
+        global_profiler.stop("get_ohlcv")
+        return df
+
+    async def _afetch_ohlcv(
+        self,
+        symbol: str,
+        timeframe: str,
+        limit: int,
+        exchange_id: str,
+        force_refresh: bool,
+    ) -> Optional[pd.DataFrame]:
+        """Async _fetch_ohlcv: MultiSourceDataProvider.aget_ohlcv, затем ExchangeManager в потоке."""
+        cache_key = f"multi:{symbol}:{timeframe}"
+
+        if self.use_multi_source and self.data_provider:
+            try:
+                logger.info(f"Fetching {symbol} {timeframe} via MultiSourceProvider (async)...")
+                start = time.perf_counter()
+                df = await self.data_provider.aget_ohlcv(symbol, timeframe, limit, force_refresh)
+
+                if df is not None and not df.empty:
+                    ttl = self.cache_ttl.total_seconds()
+                    if self.market_cache.use_redis:
+                        await asyncio.to_thread(self.market_cache.set, cache_key, df, ttl)
+                    else:
+                        self.market_cache.set(cache_key, df, ttl_seconds=ttl)
+
+                    logger.info(
+                        f"Loaded {len(df)} candles for {symbol} in {time.perf_counter() - start:.2f}s (async). "
+                        f"Price: {df['close'].iloc[-1]:.2f}"
+                    )
+                    return df
+            except Exception as e:
+                logger.warning(f"MultiSourceProvider error for {symbol}: {e}")
+
+        if self.exchange_manager:
+            return await asyncio.to_thread(self._fetch_ohlcv_legacy, symbol, timeframe, limit, exchange_id)
+
+        logger.warning(f"Failed to fetch data for {symbol} from any source")
+        return None
+
+    def _fetch_ohlcv_legacy(self, symbol: str, timeframe: str, limit: int, exchange_id: str) -> Optional[pd.DataFrame]:
+        """Fallback на legacy ExchangeManager (с записью в кэш)."""
+        cache_key = f"multi:{symbol}:{timeframe}"
+
         if self.exchange_manager:
             try:
                 logger.info(f"Fallback: fetching {symbol} from ExchangeManager...")
+                start = time.perf_counter()
                 ohlcv_data = self.exchange_manager.fetch_ohlcv(symbol, timeframe, limit, exchange_id)
 
                 if ohlcv_data:
@@ -177,17 +566,16 @@ class MarketDataManager:
                     df = df.sort_index()
                     df = df[~df.index.duplicated(keep="last")]
 
-                    with self.lock:
-                        self.ohlcv_cache[cache_key] = {"df": df.copy(), "time": datetime.now()}
+                    self.market_cache.set(cache_key, df, ttl_seconds=self.cache_ttl.total_seconds())
 
-                    elapsed = global_profiler.stop("get_ohlcv")
-                    logger.info(f"Loaded {len(df)} candles for {symbol} (fallback) in {elapsed:.2f}s")
+                    logger.info(
+                        f"Loaded {len(df)} candles for {symbol} (fallback) in {time.perf_counter() - start:.2f}s"
+                    )
                     return df
             except Exception as e:
                 logger.error(f"ExchangeManager error for {symbol}: {e}")
 
         logger.warning(f"Failed to fetch data for {symbol} from any source")
-        global_profiler.stop("get_ohlcv")
         return None
 
     def batch_fetch_ohlcv(
@@ -214,6 +602,14 @@ class MarketDataManager:
         global_profiler.start("batch_fetch_ohlcv")
         results: dict[str, Optional[pd.DataFrame]] = {}
 
+        # Всё, что уже есть в L1/Redis, забираем одним pipeline
+        cached = self.market_cache.get_many([f"multi:{symbol}:{timeframe}" for symbol in symbols])
+        for symbol in symbols:
+            df = cached.get(f"multi:{symbol}:{timeframe}")
+            if df is not None:
+                results[symbol] = thaw_frame(df)
+        pending = [symbol for symbol in symbols if symbol not in results]
+
         def fetch_symbol(symbol: str) -> tuple[str, Optional[pd.DataFrame]]:
             """Worker функция для загрузки одного символа."""
             try:
@@ -225,7 +621,7 @@ class MarketDataManager:
 
         # Используем ThreadPoolExecutor для параллельной загрузки
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_symbol = {executor.submit(fetch_symbol, symbol): symbol for symbol in symbols}
+            future_to_symbol = {executor.submit(fetch_symbol, symbol): symbol for symbol in pending}
 
             for future in as_completed(future_to_symbol):
                 symbol, df = future.result()
@@ -255,6 +651,28 @@ class MarketDataManager:
             if cache_data and self._is_cache_valid(cache_key):
                 return cache_data.copy()
 
+        ticker, shared = self._inflight.do(cache_key, lambda: self._fetch_ticker(symbol, exchange_id))
+        return ticker.copy() if shared and ticker else ticker
+
+    async def aget_ticker(
+        self, symbol: str, exchange_id: str = "auto", force_refresh: bool = False
+    ) -> Optional[dict[str, Any]]:
+        """
+        Асинхронный get_ticker (ccxt.async_support) с общей дедупликацией запросов.
+        """
+        cache_key = f"ticker:{symbol}"
+
+        if not force_refresh and cache_key in self.tickers_cache:
+            cache_data = self.tickers_cache.get(cache_key)
+            if cache_data and self._is_cache_valid(cache_key):
+                return cache_data.copy()
+
+        ticker, shared = await self._inflight.ado_coro(cache_key, lambda: self._afetch_ticker(symbol, exchange_id))
+        return ticker.copy() if shared and ticker else ticker
+
+    def _fetch_ticker(self, symbol: str, exchange_id: str) -> Optional[dict[str, Any]]:
+        """Загрузить тикер из сети и положить в кэш."""
+        cache_key = f"ticker:{symbol}"
         ticker = None
 
         # MultiSourceDataProvider
@@ -278,6 +696,30 @@ class MarketDataManager:
 
         return ticker
 
+    async def _afetch_ticker(self, symbol: str, exchange_id: str) -> Optional[dict[str, Any]]:
+        """Async _fetch_ticker: MultiSourceDataProvider.aget_ticker, затем ExchangeManager в потоке."""
+        cache_key = f"ticker:{symbol}"
+        ticker = None
+
+        if self.use_multi_source and self.data_provider:
+            try:
+                ticker = await self.data_provider.aget_ticker(symbol)
+            except Exception as e:
+                logger.warning(f"Ticker error from MultiSource for {symbol}: {e}")
+
+        if not ticker and self.exchange_manager:
+            try:
+                ticker = await asyncio.to_thread(self.exchange_manager.fetch_ticker, symbol, exchange_id)
+            except Exception as e:
+                logger.warning(f"Ticker error from ExchangeManager for {symbol}: {e}")
+
+        if ticker:
+            with self.lock:
+                self.tickers_cache[cache_key] = ticker.copy()
+                self.cache_times[cache_key] = datetime.now()
+
+        return ticker
+
     def get_all_pairs(self, exchange_id: Optional[str] = None) -> list[str]:
         """
         Получить список всех торговых пар.
@@ -300,11 +742,17 @@ class MarketDataManager:
         global_profiler.start("get_tickers")
         tickers: dict[str, dict[str, Any]] = {}
 
-        # Пробуем получить все тикеры через MultiSourceDataProvider
+        # Пробуем получить все тикеры через MultiSourceDataProvider (bulk запросы к биржам)
         if self.use_multi_source and self.data_provider:
             try:
                 tickers = self.data_provider.get_tickers(symbols)
                 if tickers:
+                    # Заполняем кэш, чтобы последующие get_ticker в этом цикле не ходили в сеть
+                    now = datetime.now()
+                    with self.lock:
+                        for symbol, ticker in tickers.items():
+                            self.tickers_cache[f"ticker:{symbol}"] = ticker.copy()
+                            self.cache_times[f"ticker:{symbol}"] = now
                     elapsed = global_profiler.stop("get_tickers")
                     logger.info("Loaded %s tickers in %.2f sec", len(tickers), elapsed)
                     return tickers
@@ -398,6 +846,19 @@ class MarketDataManager:
             logger.error("Ошибка расчета статистики рынка: %s", str(e))
             return {}
 
+    def get_cache_stats(self) -> dict[str, Any]:
+        """Статистика OHLCV кэша: попадания, промахи, вытеснения, память (и Redis, если включён)."""
+        stats = self.ohlcv_cache.stats()
+        if self.market_cache.use_redis:
+            stats["redis"] = self.market_cache.get_stats().get("redis", {})
+        if self.candle_builder is not None:
+            stats["live_candles"] = self.candle_builder.get_stats()
+        if self.stale_while_revalidate:
+            stats["stale_while_revalidate"] = dict(self.swr_stats)
+        if self.prefetch_scheduler is not None:
+            stats["prefetch"] = self.prefetch_scheduler.get_stats()
+        return stats
+
     def get_health_status(self) -> dict[str, Any]:
         """Получить статус здоровья провайдеров данных."""
         if self.use_multi_source and self.data_provider:
@@ -410,10 +871,8 @@ class MarketDataManager:
         """
         with self.lock:
             if symbol:
-                keys_to_remove = [k for k in self.ohlcv_cache if symbol in k]
-                for k in keys_to_remove:
-                    self.ohlcv_cache.pop(k, None)
-                    self.cache_times.pop(k, None)
+                # Чистит и Redis, остальные процессы получают инвалидацию
+                self.market_cache.clear(symbol)
                 keys_to_remove = [k for k in self.tickers_cache if symbol in k]
                 for k in keys_to_remove:
                     self.tickers_cache.pop(k, None)
@@ -0,0 +1,318 @@
+"""
+Дисковый кэш метаданных рынков бирж и ленивое создание клиентов ccxt.
+
+load_markets() скачивает список всех пар биржи (мегабайты JSON) и раньше
+выполнялся в каждом процессе при первом запросе к каждой бирже. Теперь
+результат сохраняется в data/cache/markets/<биржа>_<тип рынка>.json и
+при старте подставляется в клиент через set_markets() за миллисекунды.
+Файл старше TTL по-прежнему используется, а свежая версия скачивается
+в фоне отдельным клиентом.
+
+    exchange = create_exchange("kucoin", {"enableRateLimit": True})
+    ensure_markets(exchange)   # диск, при отсутствии - сеть + сохранение
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Union
+
+from utils.lazy_import import lazy_import, module_available
+
+logger = logging.getLogger(__name__)
+
+HAS_CCXT = module_available("ccxt")
+ccxt = lazy_import("ccxt") if HAS_CCXT else None
+
+DEFAULT_MARKETS_DIR = Path(__file__).parent.parent / "data" / "cache" / "markets"
+DEFAULT_MARKETS_TTL = float(os.getenv("MAXFLASH_MARKETS_TTL_HOURS", "12")) * 3600
+
+_FORMAT_VERSION = 1
+
+
+def _market_type(exchange: Any) -> str:
+    options = getattr(exchange, "options", None) or {}
+    return options.get("defaultType") or "spot"
+
+
+class MarketMetadataCache:
+    """
+    Кэш markets/currencies бирж в JSON файлах с TTL и фоновым обновлением.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Union[str, Path]] = None,
+        ttl_seconds: float = DEFAULT_MARKETS_TTL,
+        background_refresh: bool = True,
+    ):
+        """
+        Args:
+            cache_dir: Директория файлов (по умолчанию data/cache/markets)
+            ttl_seconds: Возраст, после которого файл обновляется в фоне
+            background_refresh: Обновлять устаревшие файлы в фоне
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_MARKETS_DIR
+        self.ttl_seconds = ttl_seconds
+        self.background_refresh = background_refresh
+
+        # path -> (mtime_ns, payload): файл читается один раз на процесс
+        self._memo: dict[Path, tuple[int, dict]] = {}
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        self._refreshing: set[str] = set()
+        self.stats = {"disk_hits": 0, "downloads": 0, "background_refreshes": 0}
+
+    @staticmethod
+    def _key(exchange_id: str, market_type: str) -> str:
+        return f"{exchange_id}_{market_type}"
+
+    def _path(self, exchange_id: str, market_type: str) -> Path:
+        return self.cache_dir / f"{self._key(exchange_id, market_type)}.json"
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def load(self, exchange_id: str, market_type: str = "spot") -> Optional[dict]:
+        """
+        Прочитать сохранённые метаданные.
+
+        Returns:
+            {"saved_at", "markets", "currencies"} или None
+        """
+        path = self._path(exchange_id, market_type)
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            memo = self._memo.get(path)
+            if memo is not None and memo[0] == mtime_ns:
+                return memo[1]
+
+        try:
+            payload = json.loads(path.read_bytes())
+        except (OSError, ValueError) as e:
+            logger.warning("Corrupted markets cache %s: %s", path, e)
+            return None
+        if payload.get("version") != _FORMAT_VERSION or not payload.get("markets"):
+            return None
+
+        with self._lock:
+            self._memo[path] = (mtime_ns, payload)
+        return payload
+
+    def save(self, exchange_id: str, market_type: str, markets: dict, currencies: Optional[dict] = None):
+        """Атомарно сохранить метаданные биржи."""
+        path = self._path(exchange_id, market_type)
+        payload = {
+            "version": _FORMAT_VERSION,
+            "exchange": exchange_id,
+            "market_type": market_type,
+            "saved_at": time.time(),
+            "markets": dict(markets),
+            "currencies": dict(currencies) if currencies else None,
+        }
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(payload, default=str))
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("Failed to save markets cache for %s: %s", exchange_id, e)
+            return
+        with self._lock:
+            self._memo[path] = (path.stat().st_mtime_ns, payload)
+
+    def is_fresh(self, payload: dict) -> bool:
+        """Моложе ли сохранённые метаданные TTL."""
+        return time.time() - payload.get("saved_at", 0) < self.ttl_seconds
+
+    def apply(self, exchange: Any) -> bool:
+        """
+        Подставить сохранённые markets в клиент (без сети).
+
+        Устаревший файл тоже применяется, а обновление уходит в фон.
+
+        Returns:
+            True, если метаданные были на диске
+        """
+        exchange_id, market_type = exchange.id, _market_type(exchange)
+        payload = self.load(exchange_id, market_type)
+        if payload is None:
+            return False
+
+        exchange.set_markets(payload["markets"], payload.get("currencies"))
+        self.stats["disk_hits"] += 1
+        if not self.is_fresh(payload) and self.background_refresh:
+            self.refresh_in_background(exchange_id, market_type, exchange)
+        return True
+
+    def ensure(self, exchange: Any) -> dict:
+        """
+        Гарантировать загруженные markets: из клиента, с диска или из сети.
+
+        Скачивание выполняется один раз на биржу даже при параллельных вызовах.
+        """
+        if exchange.markets:
+            return exchange.markets
+
+        key = self._key(exchange.id, _market_type(exchange))
+        with self._key_lock(key):
+            if exchange.markets:
+                return exchange.markets
+            if self.apply(exchange):
+                return exchange.markets
+            markets = exchange.load_markets()
+            self.stats["downloads"] += 1
+            self.save(exchange.id, _market_type(exchange), markets, getattr(exchange, "currencies", None))
+            return markets
+
+    async def aensure(self, exchange: Any) -> dict:
+        """ensure() для клиентов ccxt.async_support."""
+        if exchange.markets:
+            return exchange.markets
+        if self.apply(exchange):
+            return exchange.markets
+        markets = await exchange.load_markets()
+        self.stats["downloads"] += 1
+        self.save(exchange.id, _market_type(exchange), markets, getattr(exchange, "currencies", None))
+        return markets
+
+    def refresh(self, exchange_id: str, market_type: str = "spot", target: Any = None) -> dict:
+        """
+        Скачать markets отдельным sync клиентом и сохранить.
+
+        Args:
+            exchange_id: Биржа ccxt
+            market_type: Тип рынка (options.defaultType)
+            target: Клиент, в который подставить свежие markets
+        """
+        if not HAS_CCXT:
+            raise ImportError("ccxt not installed. Install with: pip install ccxt")
+        client = getattr(ccxt, exchange_id)({"options": {"defaultType": market_type}})
+        markets = client.load_markets()
+        self.save(exchange_id, market_type, markets, client.currencies)
+        if target is not None:
+            target.set_markets(markets, client.currencies)
+        return markets
+
+    def refresh_in_background(self, exchange_id: str, market_type: str = "spot", target: Any = None):
+        """Обновить файл в фоновом потоке (не больше одного обновления на биржу)."""
+        key = self._key(exchange_id, market_type)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.refresh(exchange_id, market_type, target)
+                self.stats["background_refreshes"] += 1
+                logger.info("Markets cache refreshed for %s (%s)", exchange_id, market_type)
+            except Exception as e:
+                logger.warning("Background markets refresh failed for %s: %s", exchange_id, e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f"markets-refresh-{key}", daemon=True).start()
+
+
+_default_cache: Optional[MarketMetadataCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_market_metadata_cache() -> MarketMetadataCache:
+    """Общий для процесса кэш метаданных рынков."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = MarketMetadataCache()
+    return _default_cache
+
+
+def ensure_markets(exchange: Any) -> dict:
+    """Загрузить markets клиента с диска или из сети (см. MarketMetadataCache.ensure)."""
+    return get_market_metadata_cache().ensure(exchange)
+
+
+async def aensure_markets(exchange: Any) -> dict:
+    """Async вариант ensure_markets для ccxt.async_support."""
+    return await get_market_metadata_cache().aensure(exchange)
+
+
+def create_exchange(exchange_id: str, config: Optional[dict] = None, module: Any = None) -> Any:
+    """
+    Создать клиент ccxt с markets из дискового кэша (если есть).
+
+    Args:
+        exchange_id: Биржа ccxt
+        config: Конфигурация клиента
+        module: ccxt или ccxt.async_support (по умолчанию ccxt)
+    """
+    if module is None:
+        if not HAS_CCXT:
+            raise ImportError("ccxt not installed. Install with: pip install ccxt")
+        module = ccxt
+    exchange = getattr(module, exchange_id)(dict(config or {}))
+    get_market_metadata_cache().apply(exchange)
+    return exchange
+
+
+class LazyExchangeRegistry(Mapping):
+    """
+    Клиенты бирж по id, создаваемые при первом обращении.
+
+    `ex_id in registry` и перебор ключей клиентов не создают; клиент, который
+    не удалось создать, исключается из реестра.
+    """
+
+    def __init__(self, factory: Callable[[str], Any], exchange_ids: Iterable[str]):
+        """
+        Args:
+            factory: Создаёт клиент по id биржи
+            exchange_ids: Доступные биржи
+        """
+        self._factory = factory
+        self._ids = list(exchange_ids)
+        self._clients: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, exchange_id: str) -> Any:
+        client = self._clients.get(exchange_id)
+        if client is not None:
+            return client
+        if exchange_id not in self._ids:
+            raise KeyError(exchange_id)
+
+        with self._lock:
+            if exchange_id not in self._clients:
+                try:
+                    self._clients[exchange_id] = self._factory(exchange_id)
+                    logger.info("Initialized %s exchange", exchange_id)
+                except Exception as e:
+                    logger.error("Failed to init %s: %s", exchange_id, e)
+                    self._ids.remove(exchange_id)
+                    raise KeyError(exchange_id) from e
+            return self._clients[exchange_id]
+
+    def __contains__(self, exchange_id: object) -> bool:
+        return exchange_id in self._ids
+
+    def __iter__(self):
+        return iter(list(self._ids))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def loaded(self) -> dict[str, Any]:
+        """Уже созданные клиенты."""
+        return dict(self._clients)
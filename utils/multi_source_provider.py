@@ -17,7 +17,9 @@ import asyncio
 import logging
 import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import threading
@@ -25,14 +27,23 @@ import threading
 import requests
 import pandas as pd
 
-try:
-    import ccxt
-    import ccxt.async_support as ccxt_async
-    HAS_CCXT = True
-except ImportError:
-    HAS_CCXT = False
-    ccxt = None
-    ccxt_async = None
+from utils.candle_store import TIMEFRAME_MS, CandleStore, timeframe_to_ms
+from utils.candles import Candles
+from utils.coin_id_index import CoinIdIndex
+from utils.lazy_import import lazy_import, module_available
+from utils.market_metadata import (
+    LazyExchangeRegistry,
+    aensure_markets,
+    create_exchange,
+    ensure_markets,
+)
+from utils.performance import global_profiler
+from utils.rate_limiter import RateLimiter, shared_rate_limits_enabled
+
+# ccxt грузится ~0.5 сек - импортируется при создании первой биржи
+HAS_CCXT = module_available("ccxt")
+ccxt = lazy_import("ccxt") if HAS_CCXT else None
+ccxt_async = lazy_import("ccxt.async_support") if HAS_CCXT else None
 
 logger = logging.getLogger(__name__)
 
@@ -59,31 +70,11 @@ class SourceHealth:
     last_error: Optional[str]
     error_count: int
     avg_latency_ms: float
-
-
-class RateLimiter:
-    """Rate limiter для предотвращения банов."""
-
-    def __init__(self, calls_per_minute: int = 30):
-        self.calls_per_minute = calls_per_minute
-        self.calls: List[float] = []
-        self.lock = threading.Lock()
-
-    def wait_if_needed(self):
-        """Ждём если превышен лимит."""
-        with self.lock:
-            now = time.time()
-            # Удаляем старые вызовы (>1 минуты)
-            self.calls = [t for t in self.calls if now - t < 60]
-
-            if len(self.calls) >= self.calls_per_minute:
-                # Ждём пока освободится слот
-                sleep_time = 60 - (now - self.calls[0]) + 0.1
-                if sleep_time > 0:
-                    logger.debug(f"Rate limit: sleeping {sleep_time:.1f}s")
-                    time.sleep(sleep_time)
-
-            self.calls.append(time.time())
+    # EWMA доли ошибок (0..1) и p90 латентности по последним запросам
+    error_rate: float = 0.0
+    p90_latency_ms: float = 0.0
+    # Circuit breaker: до этого момента источник не опрашивается (кроме крайнего случая)
+    circuit_open_until: Optional[datetime] = None
 
 
 class CoinGeckoProvider:
@@ -131,9 +122,17 @@ class CoinGeckoProvider:
         "SHIB": "shiba-inu",
     }
 
-    def __init__(self, api_key: Optional[str] = None):
+    # Максимум монет на страницу /coins/markets
+    MARKETS_PAGE_SIZE = 250
+    # Страниц рейтинга для разрешения одинаковых тикеров в индексе
+    INDEX_RANK_PAGES = 2
+
+    def __init__(self, api_key: Optional[str] = None, coin_index: Optional[CoinIdIndex] = None):
         self.api_key = api_key
-        self.rate_limiter = RateLimiter(calls_per_minute=25)  # Консервативный лимит
+        self.rate_limiter = RateLimiter(
+            calls_per_minute=25,  # Консервативный лимит
+            shared_name="coingecko" if shared_rate_limits_enabled() else None
+        )
         self.session = requests.Session()
         self.session.headers.update({
             "Accept": "application/json",
@@ -141,57 +140,84 @@ class CoinGeckoProvider:
         })
         if api_key:
             self.session.headers["x-cg-demo-api-key"] = api_key
+        # SYMBOL_TO_ID остаётся приоритетным для неоднозначных тикеров
+        self.coin_index = coin_index if coin_index is not None else CoinIdIndex(overrides=self.SYMBOL_TO_ID)
+
+    def _request(self, path: str, params: Optional[Dict] = None, timeout: int = 15) -> Any:
+        """GET запрос к API с учётом лимита."""
+        self.rate_limiter.wait_if_needed()
+        response = self.session.get(f"{self.BASE_URL}{path}", params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _fetch_index_data(self) -> Tuple[List[Dict], List[str]]:
+        """Данные для индекса: список всех монет и id топа по капитализации."""
+        coins = self._request("/coins/list", timeout=30)
+        ranked = []
+        for page in range(1, self.INDEX_RANK_PAGES + 1):
+            ranked.extend(
+                coin["id"] for coin in self._request("/coins/markets", {
+                    "vs_currency": "usd",
+                    "order": "market_cap_desc",
+                    "per_page": self.MARKETS_PAGE_SIZE,
+                    "page": page,
+                    "sparkline": "false",
+                })
+            )
+        return coins, ranked
+
+    def refresh_coin_index(self, block: bool = False) -> bool:
+        """Обновить индекс символ -> id, если он старше суток."""
+        return self.coin_index.refresh_if_stale(self._fetch_index_data, block=block)
 
     def _get_coin_id(self, symbol: str) -> Optional[str]:
         """Получить CoinGecko ID по символу."""
-        # Убираем /USDT если есть
-        clean_symbol = symbol.replace("/USDT", "").replace("/USD", "").upper()
-        return self.SYMBOL_TO_ID.get(clean_symbol)
-
-    def get_price(self, symbols: List[str]) -> Dict[str, float]:
-        """Получить текущие цены для списка символов."""
-        self.rate_limiter.wait_if_needed()
+        coin_id = self.coin_index.get(symbol)
+        if coin_id is None or not self.coin_index.is_fresh():
+            self.refresh_coin_index()
+        return coin_id
 
-        # Конвертируем символы в CoinGecko IDs
-        coin_ids = []
+    def _resolve_ids(self, symbols: List[str]) -> Dict[str, str]:
+        """coin_id -> исходный символ (неизвестные символы пропускаются)."""
         symbol_map = {}
         for s in symbols:
             coin_id = self._get_coin_id(s)
             if coin_id:
-                coin_ids.append(coin_id)
-                symbol_map[coin_id] = s
+                symbol_map.setdefault(coin_id, s)
+        return symbol_map
 
-        if not coin_ids:
+    def get_price(self, symbols: List[str]) -> Dict[str, float]:
+        """Получить текущие цены для списка символов."""
+        # Конвертируем символы в CoinGecko IDs
+        symbol_map = self._resolve_ids(symbols)
+        if not symbol_map:
             return {}
 
+        coin_ids = list(symbol_map)
+        result = {}
         try:
-            url = f"{self.BASE_URL}/simple/price"
-            params = {
-                "ids": ",".join(coin_ids),
-                "vs_currencies": "usd",
-                "include_24hr_change": "true",
-                "include_24hr_vol": "true"
-            }
-
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            result = {}
-            for coin_id, prices in data.items():
-                symbol = symbol_map.get(coin_id)
-                if symbol:
-                    result[symbol] = {
-                        "price": prices.get("usd", 0),
-                        "change_24h": prices.get("usd_24h_change", 0),
-                        "volume_24h": prices.get("usd_24h_vol", 0)
-                    }
+            for i in range(0, len(coin_ids), self.MARKETS_PAGE_SIZE):
+                data = self._request("/simple/price", {
+                    "ids": ",".join(coin_ids[i:i + self.MARKETS_PAGE_SIZE]),
+                    "vs_currencies": "usd",
+                    "include_24hr_change": "true",
+                    "include_24hr_vol": "true"
+                }, timeout=10)
+
+                for coin_id, prices in data.items():
+                    symbol = symbol_map.get(coin_id)
+                    if symbol:
+                        result[symbol] = {
+                            "price": prices.get("usd", 0),
+                            "change_24h": prices.get("usd_24h_change", 0),
+                            "volume_24h": prices.get("usd_24h_vol", 0)
+                        }
 
             return result
 
         except Exception as e:
             logger.error(f"CoinGecko price error: {e}")
-            return {}
+            return result
 
     def get_ohlcv(self, symbol: str, days: int = 7) -> Optional[pd.DataFrame]:
         """
@@ -200,20 +226,13 @@ class CoinGeckoProvider:
         CoinGecko даёт только daily/hourly данные, не идеально для 15m,
         но можно использовать как fallback.
         """
-        self.rate_limiter.wait_if_needed()
-
         coin_id = self._get_coin_id(symbol)
         if not coin_id:
             logger.warning(f"Unknown symbol for CoinGecko: {symbol}")
             return None
 
         try:
-            url = f"{self.BASE_URL}/coins/{coin_id}/ohlc"
-            params = {"vs_currency": "usd", "days": str(days)}
-
-            response = self.session.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            data = response.json()
+            data = self._request(f"/coins/{coin_id}/ohlc", {"vs_currency": "usd", "days": str(days)})
 
             if not data:
                 return None
@@ -229,28 +248,59 @@ class CoinGeckoProvider:
             logger.error(f"CoinGecko OHLCV error for {symbol}: {e}")
             return None
 
+    def _markets_params(self, per_page: int, page: int = 1) -> Dict[str, Any]:
+        return {
+            "vs_currency": "usd",
+            "order": "market_cap_desc",
+            "per_page": per_page,
+            "page": page,
+            "sparkline": "false",
+            "price_change_percentage": "1h,24h,7d"
+        }
+
     def get_market_data(self, limit: int = 100) -> List[Dict]:
-        """Получить данные топ монет по капитализации."""
-        self.rate_limiter.wait_if_needed()
+        """
+        Получить данные топ монет по капитализации.
 
+        Запрашивается по MARKETS_PAGE_SIZE монет за вызов: топ-500 - два запроса.
+        """
+        result: List[Dict] = []
+        page = 1
         try:
-            url = f"{self.BASE_URL}/coins/markets"
-            params = {
-                "vs_currency": "usd",
-                "order": "market_cap_desc",
-                "per_page": limit,
-                "page": 1,
-                "sparkline": "false",
-                "price_change_percentage": "1h,24h,7d"
-            }
-
-            response = self.session.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            return response.json()
+            while len(result) < limit:
+                per_page = min(self.MARKETS_PAGE_SIZE, limit) if page == 1 else self.MARKETS_PAGE_SIZE
+                batch = self._request("/coins/markets", self._markets_params(per_page, page))
+                result.extend(batch)
+                if len(batch) < per_page:
+                    break
+                page += 1
+            return result[:limit]
 
         except Exception as e:
             logger.error(f"CoinGecko market data error: {e}")
-            return []
+            return result[:limit]
+
+    def get_markets(self, symbols: List[str]) -> List[Dict]:
+        """
+        Рыночные данные для произвольного списка символов.
+
+        id объединяются в один запрос на каждые MARKETS_PAGE_SIZE монет,
+        поэтому расширение списка отслеживаемых монет не добавляет вызовов API.
+        Формат элементов совпадает с get_market_data.
+        """
+        coin_ids = list(self._resolve_ids(symbols))
+        result: List[Dict] = []
+        try:
+            for i in range(0, len(coin_ids), self.MARKETS_PAGE_SIZE):
+                chunk = coin_ids[i:i + self.MARKETS_PAGE_SIZE]
+                params = self._markets_params(len(chunk))
+                params["ids"] = ",".join(chunk)
+                result.extend(self._request("/coins/markets", params))
+            return result
+
+        except Exception as e:
+            logger.error(f"CoinGecko markets error: {e}")
+            return result
 
 
 class CCXTProvider:
@@ -274,48 +324,97 @@ class CCXTProvider:
         "bybit": {},
     }
 
-    def __init__(self):
+    # Конфигурация клиентов (общая для sync и async)
+    EXCHANGE_CONFIGS = {
+        "kucoin": {
+            "enableRateLimit": True,
+            "rateLimit": 200,  # 5 requests per second
+            "options": {"defaultType": "spot"}
+        },
+        "kraken": {
+            "enableRateLimit": True,
+            "rateLimit": 1000,  # 1 request per second (conservative)
+            "options": {"defaultType": "spot"}
+        },
+        "okx": {
+            "enableRateLimit": True,
+            "rateLimit": 100,
+            "options": {"defaultType": "spot"}
+        },
+        "bybit": {
+            "enableRateLimit": True,
+            "rateLimit": 100,
+            "options": {"defaultType": "spot"}
+        }
+    }
+
+    # Максимум одновременных async запросов к одной бирже
+    ASYNC_CONCURRENCY = 4
+
+    # Режимы маршрутизации: строго по EXCHANGE_PRIORITY или по измеренной латентности/ошибкам
+    ROUTING_MODES = ("priority", "latency")
+
+    # Circuit breaker: после N ошибок подряд источник выключается на COOLDOWN секунд
+    CIRCUIT_BREAKER_THRESHOLD = 3
+    CIRCUIT_BREAKER_COOLDOWN = 30
+
+    # Hedged requests: задержка перед запросом к резервной бирже
+    HEDGE_MIN_SAMPLES = 5
+    HEDGE_MIN_DELAY_MS = 150
+    HEDGE_DEFAULT_DELAY_MS = 2000
+    LATENCY_WINDOW = 50
+    # Латентность-заглушка для ещё не измеренных бирж (ранжирование)
+    UNKNOWN_LATENCY_MS = 1000
+    # Максимум свечей за один запрос к бирже; более длинная история грузится страницами
+    OHLCV_PAGE_LIMIT = 1000
+
+    def __init__(self, routing: str = "priority", hedge: bool = False):
+        """
+        Args:
+            routing: "priority" - порядок EXCHANGE_PRIORITY, "latency" - по EWMA латентности и доле ошибок
+            hedge: Если основная биржа не ответила за свой p90, дублировать запрос на следующую
+                   и брать первый ответ
+        """
+        if routing not in self.ROUTING_MODES:
+            raise ValueError(f"Unknown routing mode: {routing}")
+
+        self.routing = routing
+        self.hedge = hedge
+        # Клиенты создаются при первом запросе к бирже, markets - из дискового кэша
         self.exchanges: Dict[str, Any] = {}
         self.rate_limiters: Dict[str, RateLimiter] = {}
         self.health: Dict[str, SourceHealth] = {}
+        self._latency_samples: Dict[str, Deque[float]] = {}
+        self._health_lock = threading.Lock()
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+
+        # Async клиенты создаются лениво и переиспользуются (одна aiohttp сессия на биржу)
+        self.async_exchanges: Dict[str, Any] = {}
+        self._async_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Задачи закрытия клиентов прошлого loop (держим ссылки до завершения)
+        self._async_close_tasks: set = set()
 
         # Инициализируем биржи
         self._init_exchanges()
 
     def _init_exchanges(self):
-        """Инициализация бирж."""
+        """
+        Инициализация бирж: лимиты и health сразу, клиенты ccxt - лениво.
+        """
         if not HAS_CCXT:
             logger.warning("CCXT not installed")
             return
 
-        exchange_configs = {
-            "kucoin": {
-                "enableRateLimit": True,
-                "rateLimit": 200,  # 5 requests per second
-                "options": {"defaultType": "spot"}
-            },
-            "kraken": {
-                "enableRateLimit": True,
-                "rateLimit": 1000,  # 1 request per second (conservative)
-                "options": {"defaultType": "spot"}
-            },
-            "okx": {
-                "enableRateLimit": True,
-                "rateLimit": 100,
-                "options": {"defaultType": "spot"}
-            },
-            "bybit": {
-                "enableRateLimit": True,
-                "rateLimit": 100,
-                "options": {"defaultType": "spot"}
-            }
-        }
-
-        for ex_id, config in exchange_configs.items():
+        self.exchanges = LazyExchangeRegistry(
+            lambda ex_id: create_exchange(ex_id, self.EXCHANGE_CONFIGS[ex_id]), self.EXCHANGE_CONFIGS
+        )
+        for ex_id in self.EXCHANGE_CONFIGS:
             try:
-                exchange_class = getattr(ccxt, ex_id)
-                self.exchanges[ex_id] = exchange_class(config)
-                self.rate_limiters[ex_id] = RateLimiter(calls_per_minute=50)
+                self.rate_limiters[ex_id] = RateLimiter(
+                    calls_per_minute=50,
+                    shared_name=ex_id if shared_rate_limits_enabled() else None
+                )
                 self.health[ex_id] = SourceHealth(
                     source=DataSource(ex_id) if ex_id in [e.value for e in DataSource] else DataSource.KUCOIN,
                     is_healthy=True,
@@ -324,7 +423,7 @@ class CCXTProvider:
                     error_count=0,
                     avg_latency_ms=0
                 )
-                logger.info(f"Initialized {ex_id} exchange")
+                self._latency_samples[ex_id] = deque(maxlen=self.LATENCY_WINDOW)
             except Exception as e:
                 logger.error(f"Failed to init {ex_id}: {e}")
 
@@ -338,92 +437,567 @@ class CCXTProvider:
         if exchange_id not in self.health:
             return
 
-        h = self.health[exchange_id]
-        if success:
-            h.is_healthy = True
-            h.last_success = datetime.now()
-            h.error_count = 0
-            # Скользящее среднее latency
-            h.avg_latency_ms = (h.avg_latency_ms * 0.8 + latency_ms * 0.2) if h.avg_latency_ms > 0 else latency_ms
-        else:
-            h.error_count += 1
-            h.last_error = error
-            # Помечаем как unhealthy после 3 ошибок подряд
-            if h.error_count >= 3:
-                h.is_healthy = False
+        with self._health_lock:
+            h = self.health[exchange_id]
+            if success:
+                h.is_healthy = True
+                h.last_success = datetime.now()
+                h.error_count = 0
+                h.error_rate *= 0.8
+                h.circuit_open_until = None
+                if latency_ms > 0:
+                    # Скользящее среднее latency
+                    h.avg_latency_ms = (h.avg_latency_ms * 0.8 + latency_ms * 0.2) if h.avg_latency_ms > 0 else latency_ms
+                    samples = self._latency_samples.setdefault(exchange_id, deque(maxlen=self.LATENCY_WINDOW))
+                    samples.append(latency_ms)
+                    ordered = sorted(samples)
+                    h.p90_latency_ms = ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+            else:
+                h.error_count += 1
+                h.last_error = error
+                h.error_rate = h.error_rate * 0.8 + 0.2
+                # Помечаем как unhealthy и размыкаем цепь после N ошибок подряд.
+                # По истечении cooldown источник получает одну пробную попытку (half-open).
+                if h.error_count >= self.CIRCUIT_BREAKER_THRESHOLD:
+                    h.is_healthy = False
+                    h.circuit_open_until = datetime.now() + timedelta(seconds=self.CIRCUIT_BREAKER_COOLDOWN)
+
+    def _is_circuit_open(self, exchange_id: str) -> bool:
+        """Разомкнута ли цепь (источник временно выключен)."""
+        h = self.health.get(exchange_id)
+        return bool(h and h.circuit_open_until and datetime.now() < h.circuit_open_until)
+
+    def _route_score(self, exchange_id: str) -> float:
+        """Оценка источника для latency-маршрутизации (меньше - лучше)."""
+        h = self.health.get(exchange_id)
+        if h is None:
+            return float("inf")
+        latency = h.avg_latency_ms if h.avg_latency_ms > 0 else self.UNKNOWN_LATENCY_MS
+        return latency * (1 + 4 * h.error_rate)
+
+    def _hedge_delay(self, exchange_id: str) -> float:
+        """Сколько ждать основную биржу (сек) перед дублирующим запросом."""
+        samples = self._latency_samples.get(exchange_id)
+        if not samples or len(samples) < self.HEDGE_MIN_SAMPLES:
+            return self.HEDGE_DEFAULT_DELAY_MS / 1000
+        return max(self.health[exchange_id].p90_latency_ms, self.HEDGE_MIN_DELAY_MS) / 1000
+
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        """Пул потоков для hedged запросов (создаётся лениво)."""
+        if self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(max_workers=2 * len(self.EXCHANGE_PRIORITY),
+                                                      thread_name_prefix="ccxt-hedge")
+        return self._hedge_executor
+
+    def _fetch_ohlcv_from(
+        self,
+        ex_id: str,
+        symbol: str,
+        timeframe: str,
+        limit: int,
+        since: Optional[int] = None
+    ) -> Optional[pd.DataFrame]:
+        """Запрос OHLCV к одной бирже. Ошибки учитываются в health, наружу не пробрасываются."""
+        mapped_symbol = self._map_symbol(symbol, ex_id)
+
+        try:
+            # KeyError, если клиент биржи не удалось создать
+            exchange = self.exchanges[ex_id]
+            self.rate_limiters[ex_id].wait_if_needed()
+
+            # Markets: с диска или (один раз) из сети
+            ensure_markets(exchange)
+
+            # Проверяем есть ли символ
+            if mapped_symbol not in exchange.markets:
+                logger.debug(f"{mapped_symbol} not found on {ex_id}")
+                return None
+
+            start_time = time.time()
+            ohlcv = exchange.fetch_ohlcv(mapped_symbol, timeframe, since=since, limit=limit)
+            latency = (time.time() - start_time) * 1000
+
+            if ohlcv and len(ohlcv) > 0:
+                df = self._ohlcv_to_dataframe(ohlcv)
+
+                self._update_health(ex_id, True, latency_ms=latency)
+                logger.info(f"Got {len(df)} candles for {symbol} from {ex_id} in {latency:.0f}ms")
+                return df
+
+        except Exception as e:
+            error_msg = str(e)
+            self._update_health(ex_id, False, error=error_msg)
+            logger.warning(f"OHLCV error from {ex_id}: {error_msg}")
+
+        return None
+
+    def _page_start(self, timeframe: str, limit: int, since: Optional[int]) -> Optional[int]:
+        """
+        since первой страницы, если limit не помещается в один запрос
+        (OHLCV_PAGE_LIMIT). None - хватит одного запроса.
+        """
+        if limit <= self.OHLCV_PAGE_LIMIT or timeframe not in TIMEFRAME_MS:
+            return None
+        if since is not None:
+            return since
+        tf_ms = TIMEFRAME_MS[timeframe]
+        return (int(time.time() * 1000) // tf_ms - limit + 1) * tf_ms
+
+    @staticmethod
+    def _next_page(page: pd.DataFrame, timeframe: str, start: int) -> Optional[int]:
+        """since следующей страницы или None, если биржа больше ничего не отдаст."""
+        next_start = int(page.index[-1].value // 1_000_000) + TIMEFRAME_MS[timeframe]
+        if next_start <= start or next_start > time.time() * 1000:
+            return None
+        return next_start
+
+    @staticmethod
+    def _join_pages(pages: List[pd.DataFrame], limit: int) -> pd.DataFrame:
+        """Склеить страницы (перекрывающиеся свечи - из более поздней) и оставить limit последних."""
+        df = pd.concat(pages)
+        df = df[~df.index.duplicated(keep="last")].sort_index()
+        return df.iloc[-limit:]
+
+    def _fetch_ohlcv_paged_from(
+        self,
+        ex_id: str,
+        symbol: str,
+        timeframe: str,
+        limit: int,
+        since: Optional[int] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Запрос OHLCV к одной бирже; больше OHLCV_PAGE_LIMIT свечей - страницами
+        вперёд по since. Все страницы берутся с одной биржи.
+        """
+        start = self._page_start(timeframe, limit, since)
+        if start is None:
+            return self._fetch_ohlcv_from(ex_id, symbol, timeframe, limit, since)
+
+        pages: List[pd.DataFrame] = []
+        remaining = limit
+        while remaining > 0:
+            page = self._fetch_ohlcv_from(ex_id, symbol, timeframe, min(remaining, self.OHLCV_PAGE_LIMIT), start)
+            if page is None:
+                break
+            pages.append(page)
+            remaining -= len(page)
+            start = self._next_page(page, timeframe, start)
+            if start is None:
+                break
+
+        return self._join_pages(pages, limit) if pages else None
 
     def fetch_ohlcv(
         self,
         symbol: str,
         timeframe: str = "1h",
         limit: int = 200,
-        preferred_exchange: Optional[str] = None
+        preferred_exchange: Optional[str] = None,
+        since: Optional[int] = None
     ) -> Optional[pd.DataFrame]:
         """
         Получить OHLCV с автоматическим fallback между биржами.
+
+        Args:
+            limit: Количество свечей; больше OHLCV_PAGE_LIMIT - несколькими запросами
+            since: Timestamp (мс) первой нужной свечи - для инкрементальной догрузки
         """
         if not HAS_CCXT:
             return None
 
-        # Формируем приоритетный список бирж
+        exchanges_to_try = self._exchange_order(preferred_exchange)
+        tried: set = set()
+
+        # Постраничная загрузка не хеджируется: страницы должны прийти с одной биржи
+        if self.hedge and len(exchanges_to_try) > 1 and self._page_start(timeframe, limit, since) is None:
+            df = self._fetch_ohlcv_hedged(exchanges_to_try[0], exchanges_to_try[1], symbol, timeframe, limit, since,
+                                          tried)
+            if df is not None:
+                return df
+
+        for ex_id in exchanges_to_try:
+            if ex_id in tried:
+                continue
+            df = self._fetch_ohlcv_paged_from(ex_id, symbol, timeframe, limit, since)
+            if df is not None:
+                return df
+
+        logger.error(f"Failed to get OHLCV for {symbol} from any exchange")
+        return None
+
+    def _fetch_ohlcv_hedged(
+        self,
+        primary: str,
+        backup: str,
+        symbol: str,
+        timeframe: str,
+        limit: int,
+        since: Optional[int],
+        tried: set
+    ) -> Optional[pd.DataFrame]:
+        """
+        Hedged запрос: основная биржа, а если она не ответила за свой p90 -
+        тот же запрос к резервной. Возвращается первый успешный ответ.
+        """
+        executor = self._get_hedge_executor()
+        futures = {executor.submit(self._fetch_ohlcv_from, primary, symbol, timeframe, limit, since): primary}
+        tried.add(primary)
+
+        done, _ = wait(futures, timeout=self._hedge_delay(primary))
+        if not done:
+            logger.debug(f"Hedging {symbol} {timeframe}: {primary} slower than p90, asking {backup}")
+            futures[executor.submit(self._fetch_ohlcv_from, backup, symbol, timeframe, limit, since)] = backup
+            tried.add(backup)
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                df = future.result()
+                if df is not None:
+                    return df
+        return None
+
+    def _exchange_order(self, preferred_exchange: Optional[str] = None) -> List[str]:
+        """
+        Порядок опроса бирж: предпочитаемая, затем здоровые (по приоритету или
+        по латентности), затем нездоровые, затем биржи с разомкнутой цепью
+        (на всякий случай).
+        """
+        candidates = [ex_id for ex_id in self.EXCHANGE_PRIORITY if ex_id in self.exchanges]
+        if self.routing == "latency":
+            candidates.sort(key=self._route_score)
+
         exchanges_to_try = []
         if preferred_exchange and preferred_exchange in self.exchanges:
             exchanges_to_try.append(preferred_exchange)
 
-        # Добавляем здоровые биржи по приоритету
-        for ex_id in self.EXCHANGE_PRIORITY:
-            if ex_id not in exchanges_to_try and ex_id in self.exchanges:
-                if self.health.get(ex_id, SourceHealth(DataSource.KUCOIN, True, None, None, 0, 0)).is_healthy:
-                    exchanges_to_try.append(ex_id)
+        healthy, unhealthy, open_circuit = [], [], []
+        for ex_id in candidates:
+            if ex_id in exchanges_to_try:
+                continue
+            if self._is_circuit_open(ex_id):
+                open_circuit.append(ex_id)
+            elif self.health.get(ex_id, SourceHealth(DataSource.KUCOIN, True, None, None, 0, 0)).is_healthy:
+                healthy.append(ex_id)
+            else:
+                unhealthy.append(ex_id)
+
+        return exchanges_to_try + healthy + unhealthy + open_circuit
+
+    @staticmethod
+    def _ohlcv_to_dataframe(ohlcv: List[List]) -> pd.DataFrame:
+        """Преобразовать ответ ccxt fetch_ohlcv в DataFrame с индексом timestamp."""
+        return Candles.from_ohlcv(ohlcv).to_dataframe()
+
+    def fetch_ticker(self, symbol: str) -> Optional[Dict]:
+        """Получить тикер с fallback."""
+        if not HAS_CCXT:
+            return None
 
-        # Добавляем нездоровые биржи в конец (на всякий случай)
         for ex_id in self.EXCHANGE_PRIORITY:
-            if ex_id not in exchanges_to_try and ex_id in self.exchanges:
-                exchanges_to_try.append(ex_id)
+            if ex_id not in self.exchanges:
+                continue
 
-        for ex_id in exchanges_to_try:
-            exchange = self.exchanges[ex_id]
             mapped_symbol = self._map_symbol(symbol, ex_id)
 
             try:
+                exchange = self.exchanges[ex_id]
                 self.rate_limiters[ex_id].wait_if_needed()
 
-                # Загружаем markets если не загружены
-                if not exchange.markets:
-                    exchange.load_markets()
+                ensure_markets(exchange)
 
-                # Проверяем есть ли символ
                 if mapped_symbol not in exchange.markets:
-                    logger.debug(f"{mapped_symbol} not found on {ex_id}")
                     continue
 
-                start_time = time.time()
-                ohlcv = exchange.fetch_ohlcv(mapped_symbol, timeframe, limit=limit)
-                latency = (time.time() - start_time) * 1000
+                ticker = exchange.fetch_ticker(mapped_symbol)
+                self._update_health(ex_id, True)
+                return ticker
+
+            except Exception as e:
+                self._update_health(ex_id, False, error=str(e))
+                continue
+
+        return None
+
+    def _bulk_ticker_request(self, ex_id: str, exchange: Any, symbols: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Подготовить bulk-запрос тикеров к бирже.
+
+        Returns:
+            (символы биржи для запроса, {символ биржи: исходный символ})
+        """
+        reverse: Dict[str, str] = {}
+        for symbol in symbols:
+            mapped = self._map_symbol(symbol, ex_id)
+            if mapped in exchange.markets:
+                reverse[mapped] = symbol
+        return list(reverse), reverse
+
+    def fetch_tickers(self, symbols: List[str], bulk: bool = True) -> Dict[str, Dict]:
+        """
+        Получить тикеры для нескольких символов.
+
+        В bulk режиме каждая биржа (по порядку fallback) опрашивается одним
+        запросом fetch_tickers на все ещё не найденные символы; по одному
+        символу запрашиваются только пары, которых нет ни в одном bulk ответе.
+        Время цикла пишется в global_profiler ("fetch_tickers_bulk",
+        "fetch_tickers_fallback").
+
+        Args:
+            symbols: Список символов
+            bulk: Использовать all-tickers эндпоинты бирж
+        """
+        result: Dict[str, Dict] = {}
+        if not HAS_CCXT or not symbols:
+            return result
+
+        remaining = list(dict.fromkeys(symbols))
+
+        if bulk:
+            # Локальный таймер: параллельные циклы не делят один start/stop
+            bulk_start = time.perf_counter()
+            for ex_id in self._exchange_order():
+                if not remaining:
+                    break
+                # None, если клиент биржи не удалось создать
+                exchange = self.exchanges.get(ex_id)
+                if exchange is None or not exchange.has.get("fetchTickers"):
+                    continue
 
-                if ohlcv and len(ohlcv) > 0:
-                    df = pd.DataFrame(
-                        ohlcv,
-                        columns=["timestamp", "open", "high", "low", "close", "volume"]
-                    )
-                    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-                    df.set_index("timestamp", inplace=True)
+                try:
+                    self.rate_limiters[ex_id].wait_if_needed()
 
+                    ensure_markets(exchange)
+
+                    request_symbols, reverse = self._bulk_ticker_request(ex_id, exchange, remaining)
+                    if not request_symbols:
+                        continue
+
+                    start_time = time.time()
+                    tickers = exchange.fetch_tickers(request_symbols)
+                    latency = (time.time() - start_time) * 1000
                     self._update_health(ex_id, True, latency_ms=latency)
-                    logger.info(f"Got {len(df)} candles for {symbol} from {ex_id} in {latency:.0f}ms")
-                    return df
+                except Exception as e:
+                    self._update_health(ex_id, False, error=str(e))
+                    logger.warning(f"Bulk tickers error from {ex_id}: {e}")
+                    continue
+
+                for ex_symbol, ticker in tickers.items():
+                    symbol = reverse.get(ex_symbol)
+                    if symbol and ticker:
+                        result[symbol] = ticker
+                remaining = [s for s in remaining if s not in result]
+
+            elapsed = global_profiler.record("fetch_tickers_bulk", time.perf_counter() - bulk_start)
+            logger.debug(f"Bulk tickers: {len(result)}/{len(symbols)} in {elapsed:.2f}s")
+
+        if remaining:
+            fallback_start = time.perf_counter()
+            for symbol in remaining:
+                ticker = self.fetch_ticker(symbol)
+                if ticker:
+                    result[symbol] = ticker
+            elapsed = global_profiler.record("fetch_tickers_fallback", time.perf_counter() - fallback_start)
+            logger.debug(f"Per-symbol ticker fallback for {len(remaining)} pairs in {elapsed:.2f}s")
+
+        return result
+
+    def _get_async_exchange(self, exchange_id: str) -> Any:
+        """
+        Получить async клиент биржи (создаётся при первом обращении).
+
+        Клиенты и семафоры привязаны к event loop; если loop сменился
+        (например, повторный asyncio.run), старые клиенты закрываются,
+        а новые создаются заново.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            if self.async_exchanges:
+                logger.debug("Event loop changed, recreating async exchange clients")
+                self._close_stale_clients(self.async_exchanges, self._async_loop, loop)
+            self.async_exchanges = {}
+            self._async_semaphores = {}
+            self._async_loop = loop
+
+        if exchange_id not in self.async_exchanges:
+            # Markets из дискового кэша (их сохраняет и sync клиент)
+            exchange = create_exchange(exchange_id, self.EXCHANGE_CONFIGS[exchange_id], module=ccxt_async)
+            self.async_exchanges[exchange_id] = exchange
+            self._async_semaphores[exchange_id] = asyncio.Semaphore(self.ASYNC_CONCURRENCY)
+        return self.async_exchanges[exchange_id]
+
+    def _close_stale_clients(
+        self,
+        clients: Dict[str, Any],
+        old_loop: Optional[asyncio.AbstractEventLoop],
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        """
+        Закрыть клиенты прошлого event loop, не блокируя текущий.
 
+        Если прошлый loop ещё работает (другой поток) — закрытие идёт в нём;
+        иначе — фоновой задачей в текущем loop (aiohttp сессия закрывается,
+        соединения уже завершённого loop освобождает только GC).
+        """
+        coro = self._close_async_clients(dict(clients))
+        if old_loop is not None and old_loop.is_running() and not old_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(coro, old_loop)
+            return
+        task = loop.create_task(coro)
+        self._async_close_tasks.add(task)
+        task.add_done_callback(self._async_close_tasks.discard)
+
+    @staticmethod
+    async def _close_async_clients(clients: Dict[str, Any]) -> None:
+        """Закрыть async клиенты, игнорируя ошибки отдельных бирж."""
+        for ex_id, exchange in clients.items():
+            try:
+                await exchange.close()
             except Exception as e:
-                error_msg = str(e)
-                self._update_health(ex_id, False, error=error_msg)
-                logger.warning(f"OHLCV error from {ex_id}: {error_msg}")
+                logger.debug(f"Error closing async {ex_id}: {e}")
+
+    async def _afetch_ohlcv_from(
+        self,
+        ex_id: str,
+        symbol: str,
+        timeframe: str,
+        limit: int,
+        since: Optional[int] = None
+    ) -> Optional[pd.DataFrame]:
+        """Async запрос OHLCV к одной бирже. Ошибки учитываются в health."""
+        mapped_symbol = self._map_symbol(symbol, ex_id)
+
+        try:
+            exchange = self._get_async_exchange(ex_id)
+            async with self._async_semaphores[ex_id]:
+                await self.rate_limiters[ex_id].acquire_async()
+
+                await aensure_markets(exchange)
+
+                if mapped_symbol not in exchange.markets:
+                    logger.debug(f"{mapped_symbol} not found on {ex_id}")
+                    return None
+
+                start_time = time.time()
+                ohlcv = await exchange.fetch_ohlcv(mapped_symbol, timeframe, since=since, limit=limit)
+                latency = (time.time() - start_time) * 1000
+
+            if ohlcv and len(ohlcv) > 0:
+                df = self._ohlcv_to_dataframe(ohlcv)
+
+                self._update_health(ex_id, True, latency_ms=latency)
+                logger.info(f"Got {len(df)} candles for {symbol} from {ex_id} in {latency:.0f}ms (async)")
+                return df
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error_msg = str(e)
+            self._update_health(ex_id, False, error=error_msg)
+            logger.warning(f"OHLCV error from {ex_id}: {error_msg}")
+
+        return None
+
+    async def _afetch_ohlcv_paged_from(
+        self,
+        ex_id: str,
+        symbol: str,
+        timeframe: str,
+        limit: int,
+        since: Optional[int] = None
+    ) -> Optional[pd.DataFrame]:
+        """Async вариант _fetch_ohlcv_paged_from."""
+        start = self._page_start(timeframe, limit, since)
+        if start is None:
+            return await self._afetch_ohlcv_from(ex_id, symbol, timeframe, limit, since)
+
+        pages: List[pd.DataFrame] = []
+        remaining = limit
+        while remaining > 0:
+            page = await self._afetch_ohlcv_from(ex_id, symbol, timeframe, min(remaining, self.OHLCV_PAGE_LIMIT),
+                                                 start)
+            if page is None:
+                break
+            pages.append(page)
+            remaining -= len(page)
+            start = self._next_page(page, timeframe, start)
+            if start is None:
+                break
+
+        return self._join_pages(pages, limit) if pages else None
+
+    async def afetch_ohlcv(
+        self,
+        symbol: str,
+        timeframe: str = "1h",
+        limit: int = 200,
+        preferred_exchange: Optional[str] = None,
+        since: Optional[int] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Асинхронный fetch_ohlcv: тот же порядок fallback, учёт здоровья и hedging,
+        но без блокировки event loop. Число одновременных запросов к каждой
+        бирже ограничено ASYNC_CONCURRENCY.
+        """
+        if not HAS_CCXT:
+            return None
+
+        exchanges_to_try = self._exchange_order(preferred_exchange)
+        tried: set = set()
+
+        if self.hedge and len(exchanges_to_try) > 1 and self._page_start(timeframe, limit, since) is None:
+            df = await self._afetch_ohlcv_hedged(exchanges_to_try[0], exchanges_to_try[1], symbol, timeframe, limit,
+                                                 since, tried)
+            if df is not None:
+                return df
+
+        for ex_id in exchanges_to_try:
+            if ex_id in tried:
                 continue
+            df = await self._afetch_ohlcv_paged_from(ex_id, symbol, timeframe, limit, since)
+            if df is not None:
+                return df
 
         logger.error(f"Failed to get OHLCV for {symbol} from any exchange")
         return None
 
-    def fetch_ticker(self, symbol: str) -> Optional[Dict]:
-        """Получить тикер с fallback."""
+    async def _afetch_ohlcv_hedged(
+        self,
+        primary: str,
+        backup: str,
+        symbol: str,
+        timeframe: str,
+        limit: int,
+        since: Optional[int],
+        tried: set
+    ) -> Optional[pd.DataFrame]:
+        """Async hedged запрос; проигравший запрос отменяется."""
+        tasks = {asyncio.ensure_future(self._afetch_ohlcv_from(primary, symbol, timeframe, limit, since))}
+        tried.add(primary)
+
+        done, _ = await asyncio.wait(tasks, timeout=self._hedge_delay(primary))
+        if not done:
+            logger.debug(f"Hedging {symbol} {timeframe}: {primary} slower than p90, asking {backup}")
+            tasks.add(asyncio.ensure_future(self._afetch_ohlcv_from(backup, symbol, timeframe, limit, since)))
+            tried.add(backup)
+
+        pending = tasks
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    df = task.result()
+                    if df is not None:
+                        return df
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def afetch_ticker(self, symbol: str) -> Optional[Dict]:
+        """Асинхронный fetch_ticker с fallback."""
         if not HAS_CCXT:
             return None
 
@@ -431,19 +1005,19 @@ class CCXTProvider:
             if ex_id not in self.exchanges:
                 continue
 
-            exchange = self.exchanges[ex_id]
             mapped_symbol = self._map_symbol(symbol, ex_id)
 
             try:
-                self.rate_limiters[ex_id].wait_if_needed()
+                exchange = self._get_async_exchange(ex_id)
+                async with self._async_semaphores[ex_id]:
+                    await self.rate_limiters[ex_id].acquire_async()
 
-                if not exchange.markets:
-                    exchange.load_markets()
+                    await aensure_markets(exchange)
 
-                if mapped_symbol not in exchange.markets:
-                    continue
+                    if mapped_symbol not in exchange.markets:
+                        continue
 
-                ticker = exchange.fetch_ticker(mapped_symbol)
+                    ticker = await exchange.fetch_ticker(mapped_symbol)
                 self._update_health(ex_id, True)
                 return ticker
 
@@ -453,17 +1027,69 @@ class CCXTProvider:
 
         return None
 
-    def fetch_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
-        """Получить тикеры для нескольких символов."""
-        result = {}
+    async def afetch_tickers(self, symbols: List[str], bulk: bool = True) -> Dict[str, Dict]:
+        """Асинхронный fetch_tickers: bulk запросы к биржам, затем параллельный fallback по символам."""
+        result: Dict[str, Dict] = {}
+        if not HAS_CCXT or not symbols:
+            return result
 
-        for symbol in symbols:
-            ticker = self.fetch_ticker(symbol)
-            if ticker:
-                result[symbol] = ticker
+        remaining = list(dict.fromkeys(symbols))
+
+        if bulk:
+            bulk_start = time.perf_counter()
+            for ex_id in self._exchange_order():
+                if not remaining:
+                    break
+
+                try:
+                    exchange = self._get_async_exchange(ex_id)
+                    if not exchange.has.get("fetchTickers"):
+                        continue
+
+                    async with self._async_semaphores[ex_id]:
+                        await self.rate_limiters[ex_id].acquire_async()
+
+                        await aensure_markets(exchange)
+
+                        request_symbols, reverse = self._bulk_ticker_request(ex_id, exchange, remaining)
+                        if not request_symbols:
+                            continue
+
+                        start_time = time.time()
+                        tickers = await exchange.fetch_tickers(request_symbols)
+                        latency = (time.time() - start_time) * 1000
+                    self._update_health(ex_id, True, latency_ms=latency)
+                except Exception as e:
+                    self._update_health(ex_id, False, error=str(e))
+                    logger.warning(f"Bulk tickers error from {ex_id}: {e}")
+                    continue
+
+                for ex_symbol, ticker in tickers.items():
+                    symbol = reverse.get(ex_symbol)
+                    if symbol and ticker:
+                        result[symbol] = ticker
+                remaining = [s for s in remaining if s not in result]
+            global_profiler.record("afetch_tickers_bulk", time.perf_counter() - bulk_start)
+
+        if remaining:
+            tickers = await asyncio.gather(*(self.afetch_ticker(s) for s in remaining), return_exceptions=True)
+            for symbol, ticker in zip(remaining, tickers):
+                if ticker and not isinstance(ticker, Exception):
+                    result[symbol] = ticker
 
         return result
 
+    async def aclose(self):
+        """Закрыть async клиенты (aiohttp сессии)."""
+        await self._close_async_clients(dict(self.async_exchanges))
+        loop = asyncio.get_running_loop()
+        pending = [task for task in self._async_close_tasks if task.get_loop() is loop]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        self.async_exchanges = {}
+        self._async_semaphores = {}
+        self._async_loop = None
+
     def get_health_status(self) -> Dict[str, SourceHealth]:
         """Получить статус здоровья всех источников."""
         return self.health.copy()
@@ -619,16 +1245,28 @@ class MultiSourceDataProvider:
     def __init__(
         self,
         coingecko_api_key: Optional[str] = None,
-        twelve_data_api_key: Optional[str] = None
+        twelve_data_api_key: Optional[str] = None,
+        use_candle_store: bool = True,
+        candle_store_dir: Optional[str] = None,
+        routing: str = "priority",
+        hedge_requests: bool = False
     ):
         self.coingecko = CoinGeckoProvider(api_key=coingecko_api_key)
-        self.ccxt_provider = CCXTProvider()
+        self.ccxt_provider = CCXTProvider(routing=routing, hedge=hedge_requests)
         self.forex_provider = ForexProvider(twelve_data_api_key=twelve_data_api_key)
 
         # Кэш для OHLCV данных
         self.ohlcv_cache: Dict[str, Tuple[datetime, pd.DataFrame]] = {}
         self.ohlcv_cache_ttl = timedelta(minutes=5)
 
+        # Персистентное хранилище свечей (история + инкрементальная догрузка)
+        self.candle_store: Optional[CandleStore] = None
+        if use_candle_store:
+            try:
+                self.candle_store = CandleStore(candle_store_dir)
+            except OSError as e:
+                logger.warning(f"Candle store unavailable, using full refetch: {e}")
+
         logger.info("MultiSourceDataProvider initialized")
 
     def _is_forex_pair(self, symbol: str) -> bool:
@@ -664,8 +1302,11 @@ class MultiSourceDataProvider:
             # TODO: Добавить OHLCV для Forex через Twelve Data
             return None
 
-        # Крипто - используем CCXT
-        df = self.ccxt_provider.fetch_ohlcv(symbol, timeframe, limit)
+        # Крипто - используем CCXT (с догрузкой только новых свечей, если есть хранилище)
+        if self.candle_store is not None and timeframe in TIMEFRAME_MS:
+            df = self._fetch_ohlcv_incremental(symbol, timeframe, limit)
+        else:
+            df = self.ccxt_provider.fetch_ohlcv(symbol, timeframe, limit)
 
         if df is not None and not df.empty:
             self.ohlcv_cache[cache_key] = (datetime.now(), df.copy())
@@ -681,6 +1322,123 @@ class MultiSourceDataProvider:
 
         return None
 
+    def _plan_incremental(self, symbol: str, timeframe: str, limit: int) -> Tuple[int, Optional[int]]:
+        """
+        Решить, сколько свечей запрашивать у биржи.
+
+        Если в хранилище уже есть не меньше limit свечей и история не устарела
+        больше чем на limit свечей, запрашиваются только свечи начиная с последней
+        сохранённой (она могла быть незакрытой). Иначе - полная загрузка окна limit.
+
+        Returns:
+            (limit запроса, since) - since=None означает полную загрузку
+        """
+        store = self.candle_store
+        tf_ms = timeframe_to_ms(timeframe)
+        last_ts = store.last_timestamp(symbol, timeframe)
+        now_ms = int(time.time() * 1000)
+
+        if last_ts is not None and store.count(symbol, timeframe) >= limit and now_ms - last_ts < tf_ms * limit:
+            missing = (now_ms - last_ts) // tf_ms + 1
+            return min(missing + 1, limit), last_ts
+        return limit, None
+
+    def _merge_incremental(
+        self, symbol: str, timeframe: str, limit: int, fresh: Optional[pd.DataFrame]
+    ) -> Optional[pd.DataFrame]:
+        """Дописать свежие свечи в хранилище и вернуть последние limit свечей."""
+        if fresh is None or fresh.empty:
+            return None
+
+        try:
+            added = self.candle_store.append(symbol, timeframe, fresh)
+            logger.debug(f"Candle store: {symbol} {timeframe} +{added} candles")
+            df = self.candle_store.read(symbol, timeframe, limit=limit)
+        except OSError as e:
+            logger.warning(f"Candle store error for {symbol} {timeframe}: {e}")
+            return fresh
+
+        return df if df is not None and not df.empty else fresh
+
+    def _fetch_ohlcv_incremental(self, symbol: str, timeframe: str, limit: int) -> Optional[pd.DataFrame]:
+        """Получить OHLCV через локальное хранилище свечей (догружая только новые свечи)."""
+        fetch_limit, since = self._plan_incremental(symbol, timeframe, limit)
+        fresh = self.ccxt_provider.fetch_ohlcv(symbol, timeframe, fetch_limit, since=since)
+        return self._merge_incremental(symbol, timeframe, limit, fresh)
+
+    async def aget_ohlcv(
+        self,
+        symbol: str,
+        timeframe: str = "1h",
+        limit: int = 200,
+        force_refresh: bool = False
+    ) -> Optional[pd.DataFrame]:
+        """
+        Асинхронный get_ohlcv на ccxt.async_support (не блокирует event loop).
+
+        Чтение и запись CandleStore (диск) выполняются в потоке.
+        """
+        cache_key = f"{symbol}_{timeframe}_{limit}"
+
+        if not force_refresh and cache_key in self.ohlcv_cache:
+            cache_time, df = self.ohlcv_cache[cache_key]
+            if datetime.now() - cache_time < self.ohlcv_cache_ttl:
+                return df.copy()
+
+        if self._is_forex_pair(symbol):
+            return None
+
+        if self.candle_store is not None and timeframe in TIMEFRAME_MS:
+            fetch_limit, since = await asyncio.to_thread(self._plan_incremental, symbol, timeframe, limit)
+            fresh = await self.ccxt_provider.afetch_ohlcv(symbol, timeframe, fetch_limit, since=since)
+            df = await asyncio.to_thread(self._merge_incremental, symbol, timeframe, limit, fresh)
+        else:
+            df = await self.ccxt_provider.afetch_ohlcv(symbol, timeframe, limit)
+
+        if df is not None and not df.empty:
+            self.ohlcv_cache[cache_key] = (datetime.now(), df.copy())
+            return df
+
+        # Fallback на CoinGecko (только для больших таймфреймов)
+        if timeframe in ["1d", "1w"]:
+            days = 30 if timeframe == "1d" else 90
+            df = await asyncio.to_thread(self.coingecko.get_ohlcv, symbol, days)
+            if df is not None:
+                self.ohlcv_cache[cache_key] = (datetime.now(), df.copy())
+                return df
+
+        return None
+
+    async def aget_ohlcv_many(
+        self,
+        symbols: List[str],
+        timeframe: str = "1h",
+        limit: int = 200,
+        force_refresh: bool = False
+    ) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        Загрузить OHLCV для множества символов параллельно.
+
+        Каждый символ идёт по обычной цепочке fallback, одновременность к каждой
+        бирже ограничена семафором CCXTProvider.
+
+        Returns:
+            Словарь {symbol: DataFrame или None}
+        """
+        results = await asyncio.gather(
+            *(self.aget_ohlcv(symbol, timeframe, limit, force_refresh) for symbol in symbols),
+            return_exceptions=True
+        )
+
+        data: Dict[str, Optional[pd.DataFrame]] = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Async OHLCV error for {symbol}: {result}")
+                data[symbol] = None
+            else:
+                data[symbol] = result
+        return data
+
     def get_prices(self, symbols: List[str]) -> Dict[str, Dict]:
         """
         Получить текущие цены для списка символов.
@@ -729,20 +1487,59 @@ class MultiSourceDataProvider:
         return self.ccxt_provider.fetch_ticker(symbol)
 
     def get_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
-        """Получить тикеры для списка символов."""
+        """
+        Получить тикеры для списка символов.
+
+        Крипто-пары загружаются bulk-запросами CCXTProvider.fetch_tickers,
+        Forex - по одной.
+        """
         result = {}
+        crypto_symbols = [s for s in symbols if not self._is_forex_pair(s)]
+
+        if crypto_symbols:
+            result.update(self.ccxt_provider.fetch_tickers(crypto_symbols))
 
         for symbol in symbols:
-            ticker = self.get_ticker(symbol)
-            if ticker:
-                result[symbol] = ticker
+            if symbol not in crypto_symbols:
+                ticker = self.get_ticker(symbol)
+                if ticker:
+                    result[symbol] = ticker
 
         return result
 
-    def get_market_overview(self) -> Dict[str, Any]:
+    async def aget_ticker(self, symbol: str) -> Optional[Dict]:
+        """Асинхронный get_ticker."""
+        if self._is_forex_pair(symbol):
+            return await asyncio.to_thread(self.get_ticker, symbol)
+        return await self.ccxt_provider.afetch_ticker(symbol)
+
+    async def aget_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Получить тикеры для списка символов (bulk для крипто, параллельно для Forex)."""
+        crypto_symbols = [s for s in symbols if not self._is_forex_pair(s)]
+        forex_symbols = [s for s in symbols if s not in crypto_symbols]
+
+        result = await self.ccxt_provider.afetch_tickers(crypto_symbols) if crypto_symbols else {}
+
+        results = await asyncio.gather(*(self.aget_ticker(s) for s in forex_symbols), return_exceptions=True)
+        for symbol, ticker in zip(forex_symbols, results):
+            if isinstance(ticker, Exception):
+                logger.warning(f"Async ticker error for {symbol}: {ticker}")
+            elif ticker:
+                result[symbol] = ticker
+        return result
+
+    async def aclose(self):
+        """Закрыть async сессии бирж."""
+        await self.ccxt_provider.aclose()
+
+    def get_crypto_markets(self, symbols: List[str]) -> List[Dict]:
+        """Рыночные данные CoinGecko для списка символов (batch запросы)."""
+        return self.coingecko.get_markets(symbols)
+
+    def get_market_overview(self, limit: int = 50) -> Dict[str, Any]:
         """Получить обзор рынка."""
         # Топ монеты через CoinGecko
-        market_data = self.coingecko.get_market_data(limit=50)
+        market_data = self.coingecko.get_market_data(limit=limit)
 
         # Forex курсы
         forex_rates = self.forex_provider.get_all_rates()
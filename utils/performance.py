@@ -5,6 +5,7 @@ Caching, vectorization helpers, and performance profiling.
 
 import contextlib
 import logging
+import threading
 import time
 from collections import defaultdict
 from typing import Any, Callable, Optional
@@ -64,24 +65,36 @@ class PerformanceCache:
 class PerformanceProfiler:
     """
     Performance profiler for tracking execution time.
+
+    start/stop keep one timer per name, so overlapping runs of the same
+    operation (threads, coroutines) should time locally and call record().
     """
 
     def __init__(self):
         self.timings = defaultdict(list)
         self.current_timers = {}
+        self._lock = threading.Lock()
 
     def start(self, name: str):
         """Start timing an operation."""
-        self.current_timers[name] = time.perf_counter()
+        with self._lock:
+            self.current_timers[name] = time.perf_counter()
 
     def stop(self, name: str) -> float:
         """Stop timing and return elapsed time."""
-        if name in self.current_timers:
-            elapsed = time.perf_counter() - self.current_timers[name]
+        with self._lock:
+            started: Optional[float] = self.current_timers.pop(name, None)
+            if started is None:
+                return 0.0
+            elapsed = time.perf_counter() - started
             self.timings[name].append(elapsed)
-            del self.current_timers[name]
             return elapsed
-        return 0.0
+
+    def record(self, name: str, elapsed: float) -> float:
+        """Record an externally measured duration and return it."""
+        with self._lock:
+            self.timings[name].append(elapsed)
+        return elapsed
 
     def get_stats(self, name: str) -> dict:
         """Get statistics for a timed operation."""
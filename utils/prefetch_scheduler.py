@@ -0,0 +1,177 @@
+"""
+Предзагрузка OHLCV сразу после закрытия свечи.
+
+Новые данные по паре/таймфрейму появляются только когда закрывается
+свеча, поэтому обновлять кэш по таймеру TTL бессмысленно: CandlePrefetchScheduler
+запрашивает каждую подписку через close_delay секунд после границы её
+таймфрейма плюс случайный jitter, чтобы десятки пар не били в биржу
+одновременно. Пользовательские запросы к MarketDataManager после этого
+попадают в свежий кэш и не ждут биржу.
+"""
+
+import heapq
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+from utils.candle_store import TIMEFRAME_MS
+from utils.data_fetcher import bucket_starts
+
+logger = logging.getLogger(__name__)
+
+
+class CandlePrefetchScheduler:
+    """
+    Планировщик обновления кэша по закрытию свечей.
+    """
+
+    def __init__(
+        self,
+        manager: Any,
+        close_delay: float = 2.0,
+        jitter: float = 10.0,
+        max_workers: int = 4,
+    ):
+        """
+        Args:
+            manager: MarketDataManager (нужен get_ohlcv(..., force_refresh=True))
+            close_delay: Пауза после закрытия свечи, чтобы биржа успела её отдать (сек)
+            jitter: Максимальный случайный сдвиг запроса (сек); для коротких
+                таймфреймов ограничивается десятой частью периода
+            max_workers: Параллельных запросов
+        """
+        self.manager = manager
+        self.close_delay = close_delay
+        self.jitter = jitter
+        self.max_workers = max_workers
+
+        # (symbol, timeframe) -> limit
+        self.subscriptions: dict[tuple[str, str], int] = {}
+        # Очередь (время запуска, symbol, timeframe)
+        self._queue: list[tuple[float, str, str]] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.stats = {"prefetched": 0, "errors": 0, "skipped": 0}
+
+    def next_run(self, timeframe: str, now: Optional[float] = None) -> float:
+        """
+        Время следующей предзагрузки (unix-время, сек): закрытие текущей
+        свечи + close_delay + jitter.
+        """
+        now = time.time() if now is None else now
+        tf_ms = TIMEFRAME_MS[timeframe]
+        close_ms = int(bucket_starts(int(now * 1000), tf_ms)) + tf_ms
+        jitter = min(self.jitter, tf_ms / 10_000)
+        return close_ms / 1000 + self.close_delay + random.uniform(0, jitter)
+
+    def subscribe(self, symbol: str, timeframe: str, limit: int = 200) -> bool:
+        """
+        Подписать пару/таймфрейм на предзагрузку.
+
+        Args:
+            symbol: Торговая пара
+            timeframe: Таймфрейм
+            limit: Количество свечей в запросе
+
+        Returns:
+            False, если таймфрейм не поддерживается
+        """
+        if timeframe not in TIMEFRAME_MS:
+            logger.warning("Prefetch: unsupported timeframe %s for %s", timeframe, symbol)
+            return False
+
+        key = (symbol, timeframe)
+        with self._lock:
+            is_new = key not in self.subscriptions
+            self.subscriptions[key] = max(limit, self.subscriptions.get(key, 0))
+            if is_new:
+                heapq.heappush(self._queue, (self.next_run(timeframe), symbol, timeframe))
+        self._wakeup.set()
+        return True
+
+    def subscribe_many(self, symbols: list[str], timeframes: list[str], limit: int = 200):
+        """Подписать все комбинации пар и таймфреймов."""
+        for symbol in symbols:
+            for timeframe in timeframes:
+                self.subscribe(symbol, timeframe, limit)
+
+    def unsubscribe(self, symbol: str, timeframe: str):
+        """Отписать пару/таймфрейм (запись в очереди пропускается при запуске)."""
+        with self._lock:
+            self.subscriptions.pop((symbol, timeframe), None)
+
+    def run_due(self, now: Optional[float] = None) -> list[tuple[str, str]]:
+        """
+        Извлечь подписки, время которых наступило, и запланировать следующий запуск.
+
+        Returns:
+            Список (symbol, timeframe) для обновления
+        """
+        now = time.time() if now is None else now
+        due = []
+        with self._lock:
+            while self._queue and self._queue[0][0] <= now:
+                _, symbol, timeframe = heapq.heappop(self._queue)
+                if (symbol, timeframe) not in self.subscriptions:
+                    continue
+                due.append((symbol, timeframe))
+                heapq.heappush(self._queue, (self.next_run(timeframe, now), symbol, timeframe))
+        return due
+
+    def _prefetch(self, symbol: str, timeframe: str):
+        """Обновить кэш одной подписки."""
+        limit = self.subscriptions.get((symbol, timeframe))
+        if limit is None:
+            self.stats["skipped"] += 1
+            return
+        try:
+            df = self.manager.get_ohlcv(symbol, timeframe, limit=limit, force_refresh=True)
+            if df is None:
+                self.stats["errors"] += 1
+            else:
+                self.stats["prefetched"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning("Prefetch failed for %s %s: %s", symbol, timeframe, e)
+
+    def _loop(self):
+        while self._running:
+            for symbol, timeframe in self.run_due():
+                self._executor.submit(self._prefetch, symbol, timeframe)
+
+            with self._lock:
+                wait = self._queue[0][0] - time.time() if self._queue else 60.0
+            self._wakeup.wait(timeout=min(max(wait, 0.05), 60.0))
+            self._wakeup.clear()
+
+    def start(self):
+        """Запустить планировщик в фоновом потоке."""
+        if self._running:
+            return
+        self._running = True
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="prefetch")
+        self._thread = threading.Thread(target=self._loop, name="candle-prefetch", daemon=True)
+        self._thread.start()
+        logger.info("Prefetch scheduler started for %d subscriptions", len(self.subscriptions))
+
+    def stop(self):
+        """Остановить планировщик."""
+        self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def get_stats(self) -> dict[str, Any]:
+        """Статистика: выполненные и неудачные предзагрузки, число подписок."""
+        return {**self.stats, "subscriptions": len(self.subscriptions)}
@@ -0,0 +1,210 @@
+"""
+Token-bucket rate limiter для запросов к биржам и API.
+
+Ведро пополняется со скоростью calls_per_minute / 60 токенов в секунду и
+вмещает до burst токенов. Каждый вызов резервирует токен под короткой
+блокировкой и ждёт уже после её освобождения, поэтому потоки не выстраиваются
+в очередь за тем, кто спит.
+
+Опционально состояние ведра хранится в маленьком файле в /dev/shm (или во
+временной директории), отображённом в память и защищённом flock. Тогда все
+процессы MaxFlash на одном хосте (бот, дашборд, background_updater, retrain)
+расходуют один общий бюджет на биржу. Включается параметром shared_name
+или переменной окружения MAXFLASH_SHARED_RATE_LIMITS=1. Файлы доступны только
+владельцу (0o600) и лежат в личной поддиректории пользователя, поэтому бюджет
+общий для процессов одного пользователя.
+"""
+
+import asyncio
+import logging
+import mmap
+import os
+import stat
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+
+    HAS_FCNTL = True
+except ImportError:  # Windows
+    HAS_FCNTL = False
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def shared_rate_limits_enabled() -> bool:
+    """Включено ли разделение лимитов между процессами (MAXFLASH_SHARED_RATE_LIMITS)."""
+    return os.getenv("MAXFLASH_SHARED_RATE_LIMITS", "").lower() in ("1", "true", "yes")
+
+
+def _private_dir(base: Path) -> Path:
+    """
+    Личная поддиректория пользователя в общей (world-writable) директории.
+
+    Создаётся с правами 0o700; если она уже есть, но это симлинк или
+    она принадлежит другому пользователю, - OSError.
+    """
+    path = base / f"maxflash-ratelimit-{os.getuid()}"
+    try:
+        path.mkdir(mode=0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+        raise OSError(f"{path} is not a directory owned by the current user")
+    if st.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+def _default_shared_dir() -> Path:
+    """Директория для сегментов: MAXFLASH_RATE_LIMIT_DIR или личная поддиректория в /dev/shm (temp)."""
+    env_dir = os.getenv("MAXFLASH_RATE_LIMIT_DIR")
+    if env_dir:
+        return Path(env_dir)
+    # /dev/shm виден всем сервисам даже при PrivateTmp=true в systemd
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return _private_dir(shm)
+    return _private_dir(Path(tempfile.gettempdir()))
+
+
+class _SharedBucketState:
+    """
+    Состояние ведра в файле, отображённом в память: (tokens, updated).
+
+    Нулевой (только что созданный) файл означает полное ведро: updated=0,
+    поэтому первое пополнение упирается в capacity.
+    """
+
+    _STRUCT = struct.Struct("dd")
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        # O_NOFOLLOW: подложенный симлинк не даст писать в чужой файл
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+        if os.fstat(self._fd).st_size < self._STRUCT.size:
+            os.ftruncate(self._fd, self._STRUCT.size)
+        self._mm = mmap.mmap(self._fd, self._STRUCT.size)
+        # flock не защищает от потоков своего процесса на всех платформах
+        self._thread_lock = threading.Lock()
+
+    def reserve(self, tokens: float, rate: float, capacity: float, now: float) -> float:
+        """Атомарно списать токены, вернуть время ожидания (сек)."""
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                available, updated = self._STRUCT.unpack_from(self._mm, 0)
+                available = min(capacity, available + max(0.0, now - updated) * rate)
+                available -= tokens
+                self._STRUCT.pack_into(self._mm, 0, available, now)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return 0.0 if available >= 0 else -available / rate
+
+    def close(self):
+        """Закрыть отображение."""
+        self._mm.close()
+        os.close(self._fd)
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter с sync и async ожиданием.
+
+    Совместим со старым интерфейсом: wait_if_needed() == acquire().
+    """
+
+    def __init__(
+        self,
+        calls_per_minute: int = 30,
+        burst: Optional[int] = None,
+        shared_name: Optional[str] = None,
+        shared_dir: Optional[str] = None,
+    ):
+        """
+        Args:
+            calls_per_minute: Средний допустимый темп запросов
+            burst: Ёмкость ведра (по умолчанию calls_per_minute - как у старого окна в 60 сек)
+            shared_name: Имя общего бюджета (например id биржи); None - лимит только в этом процессе
+            shared_dir: Директория сегментов общего состояния
+        """
+        self.calls_per_minute = calls_per_minute
+        self.rate = calls_per_minute / 60.0
+        self.capacity = float(burst if burst is not None else calls_per_minute)
+
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._shared: Optional[_SharedBucketState] = None
+
+        if shared_name:
+            if not HAS_FCNTL:
+                logger.warning("Shared rate limits need fcntl; using per-process limiter for %s", shared_name)
+            else:
+                try:
+                    base_dir = Path(shared_dir) if shared_dir else _default_shared_dir()
+                    self._shared = _SharedBucketState(base_dir / f"maxflash_ratelimit_{shared_name}.bucket")
+                except OSError as e:
+                    logger.warning("Shared rate limit segment unavailable for %s: %s", shared_name, e)
+
+    @property
+    def is_shared(self) -> bool:
+        """Разделяется ли бюджет с другими процессами."""
+        return self._shared is not None
+
+    def _reserve(self, tokens: float) -> float:
+        """Зарезервировать токены и вернуть, сколько ждать до их появления."""
+        now = time.monotonic()
+        if self._shared is not None:
+            return self._shared.reserve(tokens, self.rate, self.capacity, now)
+
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            deficit = -self._tokens
+        return 0.0 if deficit <= 0 else deficit / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Дождаться разрешения на запрос (блокирует только текущий поток).
+
+        Returns:
+            Время ожидания в секундах
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logger.debug(f"Rate limit: sleeping {wait:.1f}s")
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """
+        Асинхронно дождаться разрешения на запрос (не блокирует event loop).
+
+        Returns:
+            Время ожидания в секундах
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logger.debug(f"Rate limit: sleeping {wait:.1f}s")
+            await asyncio.sleep(wait)
+        return wait
+
+    def wait_if_needed(self):
+        """Ждём если превышен лимит."""
+        self.acquire()
+
+    def close(self):
+        """Освободить общий сегмент."""
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
@@ -16,6 +16,7 @@ import pandas as pd
 import numpy as np
 
 from utils.enhanced_signal_generator import EnhancedSignalGenerator
+from utils.indicator_memo import get_indicator_memo
 from ml.lightgbm_model import LightGBMSignalGenerator
 
 # Optional imports for advanced features
@@ -186,9 +187,12 @@ class SignalIntegrator:
             ticker = ticker or fetched_ticker
             ohlcv_df = ohlcv_df if ohlcv_df is not None else fetched_ohlcv
         
+        # Indicators and ML features are memoized per candle of this series
+        series_id = f"{exchange_id}:{symbol}"
+        
         # Get EnhancedSignalGenerator signal (rule-based)
         enhanced_signal, enhanced_confidence, enhanced_reasons = self.enhanced_generator.generate_signal(
-            ticker, ohlcv_df
+            ticker, ohlcv_df, symbol=series_id, timeframe=timeframe
         )
         enhanced_confidence_pct = enhanced_confidence / 100.0
         
@@ -199,7 +203,10 @@ class SignalIntegrator:
         
         if self.ml_model and ohlcv_df is not None and len(ohlcv_df) > 20:
             try:
-                ml_signal_dict = self.ml_model.predict(ohlcv_df)
+                ml_signal_dict = get_indicator_memo().compute(
+                    series_id, timeframe, ohlcv_df, 'lightgbm_predict',
+                    lambda: self.ml_model.predict(ohlcv_df), model=id(self.ml_model),
+                )
                 ml_action = ml_signal_dict.get('action', 'HOLD')
                 ml_confidence_pct = ml_signal_dict.get('confidence', 0.5)
                 ml_probs = ml_signal_dict.get('probabilities', {})
@@ -9,7 +9,9 @@ from dataclasses import dataclass
 import pandas as pd
 import numpy as np
 
+from utils.data_validator import BatchDataValidator
 from utils.market_data_manager import MarketDataManager
+from utils.streaming_indicators import IndicatorConfig, IndicatorEngine
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +73,13 @@ class SignalScanner:
     
     def __init__(self, data_manager: Optional[MarketDataManager] = None):
         self.data_manager = data_manager or MarketDataManager()
+        self.validator = BatchDataValidator()
+        settings = self.SCANNER_SETTINGS
+        # Состояние индикаторов по каждой паре: между сканами досчитываются только новые свечи
+        self.indicators = IndicatorEngine(IndicatorConfig(
+            ema_periods=(settings['ema_fast'], settings['ema_slow'], 200),
+            sma_periods=(),
+        ))
         self._signals_cache: List[Signal] = []
         self._last_scan: Optional[datetime] = None
     
@@ -89,9 +98,15 @@ class SignalScanner:
         
         logger.info(f"Начинаю сканирование {len(coins)} монет...")
         
+        # Загружаем все пары сразу и проверяем их одним векторизованным проходом
+        frames = self._fetch_validated(coins)
+        
         for symbol in coins:
+            df = frames.get(symbol)
+            if df is None:
+                continue
             try:
-                signal = self.analyze_coin(symbol)
+                signal = self.analyze_coin(symbol, df=df)
                 if signal:
                     signals.append(signal)
                     logger.info(f"✅ Найден сигнал: {signal.signal_type} {symbol} @ {signal.entry_price:.4f}")
@@ -110,7 +125,19 @@ class SignalScanner:
         
         return signals
     
-    def analyze_coin(self, symbol: str) -> Optional[Signal]:
+    def _fetch_validated(self, coins: List[str]) -> Dict[str, Optional[pd.DataFrame]]:
+        """Загрузить OHLCV для списка монет, проверить и исправить данные."""
+        settings = self.SCANNER_SETTINGS
+        frames = self.data_manager.batch_fetch_ohlcv(
+            coins,
+            timeframe=settings['timeframe'],
+            limit=100,
+            exchange_id=settings['exchange'],
+        )
+        frames, _ = self.validator.validate_and_repair(frames, settings['timeframe'])
+        return frames
+    
+    def analyze_coin(self, symbol: str, df: Optional[pd.DataFrame] = None) -> Optional[Signal]:
         """
         Анализирует одну монету и возвращает сигнал если есть.
         
@@ -119,25 +146,22 @@ class SignalScanner:
         - EMA crossover
         - Подтверждение объёмом
         - MACD дивергенция
+        
+        Args:
+            symbol: Торговая пара
+            df: Уже загруженные и проверенные свечи (иначе загружаются здесь)
         """
         settings = self.SCANNER_SETTINGS
         
         # Получаем данные
-        df = self.data_manager.get_ohlcv(
-            symbol=symbol,
-            timeframe=settings['timeframe'],
-            limit=100,
-            exchange_id=settings['exchange']
-        )
+        if df is None:
+            df = self._fetch_validated([symbol]).get(symbol)
         
         if df is None or len(df) < 50:
             return None
         
-        # Вычисляем индикаторы
-        df = self._calculate_indicators(df)
-        
-        current = df.iloc[-1]
-        prev = df.iloc[-2]
+        # Вычисляем индикаторы (последняя свеча ещё формируется)
+        current, prev = self._latest_indicators(symbol, df)
         
         # Проверяем условия
         long_signal = self._check_long(df, current, prev)
@@ -152,17 +176,35 @@ class SignalScanner:
         if long_signal:
             logger.info(f"{symbol} LONG: conf={long_signal['confidence']:.2f}, indicators={long_signal['indicators']}")
             if long_signal['confidence'] >= settings['min_confidence']:
-                return self._create_signal(symbol, "LONG", df, long_signal)
+                return self._create_signal(symbol, "LONG", current, long_signal)
         
         if short_signal:
             logger.info(f"{symbol} SHORT: conf={short_signal['confidence']:.2f}, indicators={short_signal['indicators']}")
             if short_signal['confidence'] >= settings['min_confidence']:
-                return self._create_signal(symbol, "SHORT", df, short_signal)
+                return self._create_signal(symbol, "SHORT", current, short_signal)
         
         return None
     
+    def _latest_indicators(self, symbol: str, df: pd.DataFrame) -> tuple[Dict, Dict]:
+        """
+        Индикаторы последней (формирующейся) и предыдущей свечи.
+
+        Считаются инкрементально через IndicatorEngine и совпадают с
+        _calculate_indicators на тех же свечах.
+        """
+        settings = self.SCANNER_SETTINGS
+        rows = self.indicators.update(symbol, settings['timeframe'], df)
+        return tuple(
+            dict(
+                row,
+                ema_fast=row[f"ema_{settings['ema_fast']}"],
+                ema_slow=row[f"ema_{settings['ema_slow']}"],
+            )
+            for row in rows
+        )
+    
     def _calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Вычисляет технические индикаторы."""
+        """Вычисляет технические индикаторы по всему DataFrame (пакетный вариант)."""
         settings = self.SCANNER_SETTINGS
         
         # RSI
@@ -208,7 +250,7 @@ class SignalScanner:
         
         return df
     
-    def _check_long(self, df: pd.DataFrame, current: pd.Series, prev: pd.Series) -> Optional[Dict]:
+    def _check_long(self, df: pd.DataFrame, current: Dict, prev: Dict) -> Optional[Dict]:
         """
         Проверяет условия для LONG сигнала.
         Комбинированный подход: текущее состояние + подтверждение тренда.
@@ -307,7 +349,7 @@ class SignalScanner:
         
         return None
     
-    def _check_short(self, df: pd.DataFrame, current: pd.Series, prev: pd.Series) -> Optional[Dict]:
+    def _check_short(self, df: pd.DataFrame, current: Dict, prev: Dict) -> Optional[Dict]:
         """
         Проверяет условия для SHORT сигнала.
         Комбинированный подход: текущее состояние + подтверждение тренда.
@@ -410,12 +452,11 @@ class SignalScanner:
         self, 
         symbol: str, 
         signal_type: str, 
-        df: pd.DataFrame,
+        current: Dict,
         analysis: Dict
     ) -> Signal:
         """Создаёт объект сигнала."""
         settings = self.SCANNER_SETTINGS
-        current = df.iloc[-1]
         price = current['close']
         atr = current['atr']
         
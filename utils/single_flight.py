@@ -0,0 +1,150 @@
+"""
+Single-flight: дедупликация одновременных запросов по ключу.
+
+Если несколько вызывающих одновременно запрашивают один и тот же ключ
+(например "multi:BTC/USDT:1h"), реальный запрос в сеть выполняет только
+первый из них, остальные ждут его результат. Работает и из потоков
+(ThreadPoolExecutor в batch_fetch_ohlcv), и из asyncio-корутин - оба типа
+вызывающих делят одну таблицу запросов в полёте. Лидер-корутина (ado_coro)
+выполняет запрос прямо в event loop, без executor.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Optional
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """Event loop текущего потока, если он сейчас выполняется."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class SingleFlight:
+    """
+    Группа запросов в полёте, сгруппированных по ключу.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: dict[str, Future] = {}
+        # Ключи, которые ведут корутины (ado_coro): key -> event loop лидера
+        self._owner_loops: dict[str, asyncio.AbstractEventLoop] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def _join_or_lead(
+        self, key: str, loop: Optional[asyncio.AbstractEventLoop] = None, blocking: bool = False
+    ) -> tuple[Future, bool]:
+        """
+        Вернуть (future, is_leader) для ключа.
+
+        Если запрос ведёт корутина, а блокирующе (blocking) присоединиться
+        хочет синхронный код из её же event loop, ожидание заблокировало бы
+        лидера: тогда вызывающий выполняет запрос сам и получает собственный
+        future, не записанный в таблицу (его результат никто не ждёт).
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                owner = self._owner_loops.get(key)
+                if not blocking or owner is None or owner is not _running_loop():
+                    self.shared += 1
+                    return future, False
+                self.calls += 1
+                return Future(), True
+            future = Future()
+            self._inflight[key] = future
+            if loop is not None:
+                self._owner_loops[key] = loop
+            self.calls += 1
+            return future, True
+
+    def _release(self, key: str, future: Future):
+        """Снять ключ из таблицы запросов в полёте."""
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+                self._owner_loops.pop(key, None)
+
+    def _finish(self, key: str, future: Future, fn: Callable[[], Any]):
+        """Выполнить fn как лидер и раздать результат ожидающим."""
+        try:
+            result = fn()
+        except BaseException as e:
+            self._release(key, future)
+            future.set_exception(e)
+            raise
+        self._release(key, future)
+        future.set_result(result)
+        return result
+
+    def do(self, key: str, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """
+        Выполнить fn для ключа, если такой запрос ещё не выполняется.
+
+        Args:
+            key: Ключ дедупликации
+            fn: Функция без аргументов, выполняющая запрос
+
+        Returns:
+            (результат, shared) - shared=True если результат получен от чужого запроса.
+            Исключение лидера пробрасывается всем ожидающим.
+        """
+        future, is_leader = self._join_or_lead(key, blocking=True)
+        if not is_leader:
+            return future.result(), True
+        return self._finish(key, future, fn), False
+
+    async def ado(self, key: str, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """
+        Асинхронный вариант do(): блокирующая fn выполняется в executor,
+        event loop не блокируется ни лидером, ни ожидающими.
+
+        Returns:
+            (результат, shared)
+        """
+        future, is_leader = self._join_or_lead(key)
+        if not is_leader:
+            return await asyncio.wrap_future(future), True
+
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, self._finish, key, future, fn)
+        return result, False
+
+    async def ado_coro(self, key: str, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """
+        Как ado(), но fn возвращает корутину (например async запрос к бирже),
+        которая выполняется в текущем event loop без executor. Потоковые
+        вызывающие do() с тем же ключом ждут её результат.
+
+        Returns:
+            (результат, shared)
+        """
+        loop = asyncio.get_running_loop()
+        future, is_leader = self._join_or_lead(key, loop)
+        if not is_leader:
+            return await asyncio.wrap_future(future), True
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._release(key, future)
+            future.set_exception(e)
+            raise
+        self._release(key, future)
+        future.set_result(result)
+        return result, False
+
+    def in_flight(self) -> int:
+        """Количество запросов в полёте."""
+        with self._lock:
+            return len(self._inflight)
+
+    def get_stats(self) -> dict[str, int]:
+        """Статистика: выполненные запросы и сэкономленные (разделённые) вызовы."""
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._inflight)}
@@ -0,0 +1,584 @@
+"""
+Инкрементальный расчёт индикаторов по мере прихода свечей.
+
+Сканер и сервис сигналов пересчитывали RSI, EMA, MACD, ATR и Bollinger по
+всему окну из 100-200 свечей ради значения на последней свече.
+StreamingIndicators хранит состояние каждого индикатора и обновляет его за
+O(1) на свечу: закрытая свеча фиксируется в состоянии (push), а формирующаяся
+только "примеряется" (peek) и может меняться сколько угодно раз.
+
+Формулы совпадают с pandas-версиями из SignalScanner._calculate_indicators:
+rolling(...).mean()/std() с min_periods = окну, ewm(span, adjust=False).
+Все индикаторы, включая EMA/MACD, равны пакетному расчёту по тому же окну
+свечей, что передано в IndicatorEngine.update(): EMA "начинается" с первой
+свечи окна, а не с момента прогрева, поэтому результат не зависит от того,
+сколько истории движок видел раньше.
+
+    engine = IndicatorEngine()
+    current, previous = engine.update("BTC/USDT", "15m", df)   # df: последняя свеча открыта
+    current["rsi"], current["macd_hist"], previous["ema_9"]
+"""
+
+import logging
+import math
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+NAN = float("nan")
+OHLCV = ("open", "high", "low", "close", "volume")
+
+
+def _is_nan(x: float) -> bool:
+    return x != x
+
+
+def _div(a: float, b: float) -> float:
+    """Деление с семантикой numpy: x/0 -> ±inf, 0/0 -> NaN."""
+    if b == 0:
+        if a == 0 or _is_nan(a):
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class RollingWindow:
+    """
+    Скользящая сумма/дисперсия по окну из window значений (NaN не учитываются).
+
+    Хранит window-1 последних зафиксированных значений, поэтому значение окна,
+    заканчивающегося кандидатом x, считается без изменения состояния.
+    Суммы ведутся относительно опорной точки и пересчитываются заново каждые
+    window добавлений, чтобы ошибка округления не накапливалась.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values: deque = deque(maxlen=window - 1)
+        self._shift = NAN
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._count = 0
+        self._since_resync = 0
+
+    def _stats(self, x: float) -> tuple[int, float, float]:
+        if _is_nan(x):
+            return self._count, self._sum, self._sumsq
+        d = x - (x if _is_nan(self._shift) else self._shift)
+        return self._count + 1, self._sum + d, self._sumsq + d * d
+
+    def _shift_for(self, x: float) -> float:
+        return x if _is_nan(self._shift) else self._shift
+
+    def mean(self, x: float) -> float:
+        """Среднее окна, заканчивающегося значением x (NaN, пока окно не заполнено)."""
+        count, s, _ = self._stats(x)
+        if count < self.window:
+            return NAN
+        return self._shift_for(x) + s / count
+
+    def std(self, x: float) -> float:
+        """Выборочное стандартное отклонение (ddof=1) окна с x."""
+        count, s, sq = self._stats(x)
+        if count < self.window or count < 2:
+            return NAN
+        var = (sq - s * s / count) / (count - 1)
+        return math.sqrt(var) if var > 0 else 0.0
+
+    def push(self, x: float):
+        """Зафиксировать значение закрытой свечи."""
+        if self.window == 1:
+            return
+        if len(self._values) == self._values.maxlen:
+            old = self._values[0]
+            if not _is_nan(old):
+                d = old - self._shift
+                self._sum -= d
+                self._sumsq -= d * d
+                self._count -= 1
+        if not _is_nan(x):
+            if _is_nan(self._shift):
+                self._shift = x
+            d = x - self._shift
+            self._sum += d
+            self._sumsq += d * d
+            self._count += 1
+        self._values.append(x)
+
+        self._since_resync += 1
+        if self._since_resync >= self.window:
+            self._resync()
+
+    def _resync(self):
+        valid = [v for v in self._values if not _is_nan(v)]
+        self._since_resync = 0
+        self._count = len(valid)
+        if not valid:
+            self._shift, self._sum, self._sumsq = NAN, 0.0, 0.0
+            return
+        self._shift = math.fsum(valid) / len(valid)
+        deltas = [v - self._shift for v in valid]
+        self._sum = math.fsum(deltas)
+        self._sumsq = math.fsum(d * d for d in deltas)
+
+
+class RollingExtreme:
+    """Скользящий минимум или максимум на монотонной очереди (амортизированно O(1))."""
+
+    def __init__(self, window: int, mode: str = "min"):
+        self.window = window
+        self._better = (lambda a, b: a <= b) if mode == "min" else (lambda a, b: a >= b)
+        self._queue: deque = deque()  # (номер, значение)
+        self._counter = RollingWindow(window)
+        self._n = 0
+
+    def value(self, x: float) -> float:
+        """Экстремум окна, заканчивающегося значением x."""
+        count, _, _ = self._counter._stats(x)
+        if count < self.window:
+            return NAN
+        if not self._queue:
+            return x
+        best = self._queue[0][1]
+        return x if self._better(x, best) else best
+
+    def push(self, x: float):
+        """Зафиксировать значение закрытой свечи."""
+        self._counter.push(x)
+        if not _is_nan(x):
+            while self._queue and self._better(x, self._queue[-1][1]):
+                self._queue.pop()
+            self._queue.append((self._n, x))
+        self._n += 1
+        # В очереди остаются только window-1 последних значений
+        while self._queue and self._queue[0][0] <= self._n - self.window:
+            self._queue.popleft()
+
+
+class SlidingEMA:
+    """
+    ewm(span, adjust=False) по окну, начинающемуся с любой из последних свечей.
+
+    Хранит поток T_j = a*x_j + (1-a)*T_{j-1} (T_{-1} = 0) за history свечей.
+    EMA окна [s, e], стартующая с x_s, равна T_e + (1-a)^(e-s) * (x_s - T_s),
+    поэтому значение для любого начала окна считается за O(1).
+    """
+
+    def __init__(self, span: int, history: int):
+        self.alpha = 2.0 / (span + 1)
+        self.decay = 1.0 - self.alpha
+        self._x: deque = deque(maxlen=history)
+        self._t: deque = deque(maxlen=history)
+        self.count = 0  # номер следующей свечи
+
+    @property
+    def first(self) -> int:
+        """Номер самой старой хранимой свечи."""
+        return self.count - len(self._t)
+
+    def peek(self, x: float) -> float:
+        """T для свечи-кандидата x (без изменения состояния)."""
+        prev = self._t[-1] if self._t else 0.0
+        return self.alpha * x + self.decay * prev
+
+    def push(self, x: float) -> float:
+        """Зафиксировать свечу. Returns: T на ней."""
+        t = self.peek(x)
+        self._x.append(x)
+        self._t.append(t)
+        self.count += 1
+        return t
+
+    def sum_at(self, j: int) -> float:
+        """T зафиксированной свечи j."""
+        return self._t[j - self.first]
+
+    def offset(self, start: int) -> float:
+        """x_s - T_s для начала окна."""
+        i = start - self.first
+        return self._x[i] - self._t[i]
+
+    def window(self, start: int, end: int, end_sum: float) -> float:
+        """EMA окна [start, end] по T на его последней свече."""
+        return end_sum + self.decay ** (end - start) * self.offset(start)
+
+
+class SlidingMACD:
+    """
+    MACD по окну, совпадающий с ewm(adjust=False) для линии и сигнальной.
+
+    Линия окна: EMA_fast - EMA_slow (обе стартуют с первой свечи окна).
+    Сигнальная - EMA линии окна; линия отличается от потоковой разности
+    M_j = Tf_j - Ts_j на геометрические члены от начала окна, поэтому
+    сигнальная тоже выражается через T-поток M за O(1).
+    """
+
+    def __init__(self, fast: int, slow: int, signal: int, history: int):
+        self.fast = SlidingEMA(fast, history)
+        self.slow = SlidingEMA(slow, history)
+        self.signal = SlidingEMA(signal, history)
+
+    def _geometric(self, decay: float, n: int) -> float:
+        """a * sum_{k=1..n} w^(n-k) * decay^k, w - затухание сигнальной."""
+        w = self.signal.decay
+        if w == decay:
+            return self.signal.alpha * n * decay ** n
+        return self.signal.alpha * decay * (w ** n - decay ** n) / (w - decay)
+
+    def _window(self, start: int, end: int, tf: float, ts: float, tm: float) -> tuple[float, float]:
+        n = end - start
+        cf, cs = self.fast.offset(start), self.slow.offset(start)
+        macd = tf + self.fast.decay ** n * cf - (ts + self.slow.decay ** n * cs)
+        # Линия на первой свече окна равна 0, поэтому её слагаемое в сигнальной пропадает
+        signal = (
+            tm - self.signal.decay ** n * self.signal.sum_at(start)
+            + cf * self._geometric(self.fast.decay, n)
+            - cs * self._geometric(self.slow.decay, n)
+        )
+        return macd, signal
+
+    def push(self, x: float):
+        """Зафиксировать close свечи."""
+        tf, ts = self.fast.push(x), self.slow.push(x)
+        self.signal.push(tf - ts)
+
+    def at(self, start: int, end: int) -> tuple[float, float]:
+        """(macd, signal) зафиксированной свечи end для окна с начала start."""
+        return self._window(start, end, self.fast.sum_at(end), self.slow.sum_at(end), self.signal.sum_at(end))
+
+    def peek(self, start: int, x: float) -> tuple[float, float]:
+        """(macd, signal) свечи-кандидата с close x."""
+        tf, ts = self.fast.peek(x), self.slow.peek(x)
+        return self._window(start, self.fast.count, tf, ts, self.signal.peek(tf - ts))
+
+
+@dataclass(frozen=True)
+class IndicatorConfig:
+    """Набор и параметры индикаторов."""
+
+    rsi_period: int = 14
+    rsi_epsilon: float = 0.0  # Добавка к среднему убытку (1e-10 в сервисе сигналов)
+    ema_periods: tuple[int, ...] = (9, 21, 200)
+    macd: tuple[int, int, int] = (12, 26, 9)
+    atr_period: int = 14
+    atr_true_range: bool = True  # False - среднее high-low вместо true range
+    sma_periods: tuple[int, ...] = (20, 50)
+    bb_period: int = 20
+    bb_std: float = 2.0
+    volume_sma_period: int = 20
+    stoch_period: int = 14
+    stoch_smooth: int = 3
+    ema_history: int = 1000  # Самое длинное окно, для которого EMA/MACD точны
+
+
+class StreamingIndicators:
+    """
+    Состояние индикаторов одного ряда свечей.
+
+    EMA/MACD считаются по окну, начинающемуся со свечи anchor (номер
+    зафиксированной свечи с 0); по умолчанию - с первой поданной свечи.
+    """
+
+    def __init__(self, config: Optional[IndicatorConfig] = None):
+        self.config = config = config or IndicatorConfig()
+        self._prev_close = NAN
+        self._gain = RollingWindow(config.rsi_period)
+        self._loss = RollingWindow(config.rsi_period)
+        self._emas = {p: SlidingEMA(p, config.ema_history) for p in config.ema_periods}
+        self._macd = SlidingMACD(*config.macd, history=config.ema_history)
+        self._tr = RollingWindow(config.atr_period)
+        self._smas = {p: RollingWindow(p) for p in config.sma_periods}
+        self._bb = RollingWindow(config.bb_period)
+        self._volume = RollingWindow(config.volume_sma_period)
+        self._low = RollingExtreme(config.stoch_period, "min")
+        self._high = RollingExtreme(config.stoch_period, "max")
+        self._stoch_d = RollingWindow(config.stoch_smooth)
+
+        self.anchor = 0
+        self.last_timestamp: Optional[int] = None
+        self.last_close = NAN
+        # Индикаторы без EMA/MACD двух последних закрытых свечей
+        self._last: Optional[dict[str, float]] = None
+        self._prior: Optional[dict[str, float]] = None
+        self.bars = 0
+
+    @property
+    def first_bar(self) -> int:
+        """Самая ранняя свеча, с которой может начинаться окно EMA/MACD."""
+        return self._macd.fast.first
+
+    def set_anchor(self, anchor: int):
+        """Начать окно EMA/MACD со свечи anchor (не раньше first_bar)."""
+        self.anchor = max(anchor, self.first_bar)
+
+    def _windowed(self, out: dict[str, float], end: int, close: Optional[float] = None) -> dict[str, float]:
+        """
+        Добавить EMA/MACD окна [anchor, end] к индикаторам свечи end.
+
+        close задан для формирующейся свечи (end = bars), иначе свеча end зафиксирована.
+        """
+        out = dict(out)
+        start = min(max(self.anchor, self.first_bar), end)
+        if close is not None and start == end:
+            # Окно из одной формирующейся свечи
+            macd = signal = 0.0
+            for p in self._emas:
+                out[f"ema_{p}"] = close
+        elif close is not None:
+            macd, signal = self._macd.peek(start, close)
+            for p, ema in self._emas.items():
+                out[f"ema_{p}"] = ema.window(start, end, ema.peek(close))
+        else:
+            macd, signal = self._macd.at(start, end)
+            for p, ema in self._emas.items():
+                out[f"ema_{p}"] = ema.window(start, end, ema.sum_at(end))
+        out["macd"] = macd
+        out["macd_signal"] = signal
+        out["macd_hist"] = macd - signal
+        return out
+
+    @property
+    def last(self) -> Optional[dict[str, float]]:
+        """Индикаторы последней закрытой свечи (EMA/MACD - по текущему окну)."""
+        return None if self._last is None else self._windowed(self._last, self.bars - 1)
+
+    @property
+    def prior(self) -> Optional[dict[str, float]]:
+        """Индикаторы предпоследней закрытой свечи."""
+        return None if self._prior is None else self._windowed(self._prior, self.bars - 2)
+
+    def _compute(self, bar: dict[str, float], commit: bool) -> dict[str, float]:
+        cfg = self.config
+        o, h, l, c, v = (float(bar[k]) for k in OHLCV)
+        pc = self._prev_close
+
+        # RSI на простых средних прироста/падения (как rolling().mean())
+        delta = c - pc
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        avg_gain = self._gain.mean(gain)
+        avg_loss = self._loss.mean(loss)
+        rs = _div(avg_gain, avg_loss + cfg.rsi_epsilon)
+        rsi = NAN if _is_nan(rs) else 100.0 - 100.0 / (1.0 + rs)
+
+        if cfg.atr_true_range and not _is_nan(pc):
+            tr = max(h - l, abs(h - pc), abs(l - pc))
+        else:
+            tr = h - l
+
+        bb_middle = self._bb.mean(c)
+        bb_std = self._bb.std(c)
+        low_n = self._low.value(l)
+        high_n = self._high.value(h)
+        stoch_k = 100.0 * _div(c - low_n, high_n - low_n)
+
+        out = {
+            "timestamp": bar.get("timestamp"),
+            "open": o, "high": h, "low": l, "close": c, "volume": v,
+            "rsi": rsi,
+            "atr": self._tr.mean(tr),
+            "bb_middle": bb_middle,
+            "bb_std": bb_std,
+            "bb_upper": bb_middle + bb_std * cfg.bb_std,
+            "bb_lower": bb_middle - bb_std * cfg.bb_std,
+            "volume_sma": self._volume.mean(v),
+            "stoch_k": stoch_k,
+            "stoch_d": self._stoch_d.mean(stoch_k),
+        }
+        for p, sma in self._smas.items():
+            out[f"sma_{p}"] = sma.mean(c)
+
+        if not commit:
+            return self._windowed(out, self.bars, close=c)
+
+        self._gain.push(gain)
+        self._loss.push(loss)
+        for ema in self._emas.values():
+            ema.push(c)
+        self._macd.push(c)
+        self._tr.push(tr)
+        for sma in self._smas.values():
+            sma.push(c)
+        self._bb.push(c)
+        self._volume.push(v)
+        self._low.push(l)
+        self._high.push(h)
+        self._stoch_d.push(stoch_k)
+        self._prev_close = c
+        self.last_timestamp = bar.get("timestamp")
+        self.last_close = c
+        self._prior, self._last = self._last, out
+        self.bars += 1
+        return self._windowed(out, self.bars - 1)
+
+    def push(self, bar: dict[str, float]) -> dict[str, float]:
+        """Добавить закрытую свечу; возвращает индикаторы на ней."""
+        return self._compute(bar, commit=True)
+
+    def peek(self, bar: dict[str, float]) -> dict[str, float]:
+        """Индикаторы на формирующейся свече (состояние не меняется)."""
+        return self._compute(bar, commit=False)
+
+    def push_frame(self, df: pd.DataFrame) -> int:
+        """Добавить все свечи DataFrame как закрытые. Returns: количество свечей."""
+        bars = _Bars(df)
+        for i in range(len(bars)):
+            self.push(bars[i])
+        return len(bars)
+
+
+class _Bars:
+    """Построчный доступ к OHLCV DataFrame без обращения к pandas на каждую ячейку."""
+
+    def __init__(self, df: pd.DataFrame):
+        if "timestamp" in df.columns:
+            ts = df["timestamp"].to_numpy()
+        else:
+            ts = pd.DatetimeIndex(df.index).values
+        if ts.dtype.kind == "M":
+            ts = ts.astype("datetime64[ms]").astype(np.int64)
+        self.timestamp = ts.astype(np.int64)
+        self.columns = [df[k].to_numpy(dtype=np.float64) for k in OHLCV]
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, i: int) -> dict[str, float]:
+        bar = {k: float(col[i]) for k, col in zip(OHLCV, self.columns)}
+        bar["timestamp"] = int(self.timestamp[i])
+        return bar
+
+
+class IndicatorEngine:
+    """
+    Потоковые индикаторы по парам (symbol, timeframe).
+
+    update() сверяет пришедший DataFrame с состоянием: в движок добавляются
+    только новые закрытые свечи, формирующаяся свеча считается через peek().
+    EMA/MACD считаются по окну df, как пакетный расчёт по тем же свечам.
+    Если история изменилась (пропала последняя учтённая свеча или у неё
+    другой close) или начало df старше хранимой истории, ряд прогревается заново.
+    """
+
+    def __init__(self, config: Optional[IndicatorConfig] = None, max_series: int = 1000):
+        """
+        Args:
+            config: Параметры индикаторов
+            max_series: Максимум рядов в памяти (LRU)
+        """
+        self.config = config or IndicatorConfig()
+        self.max_series = max_series
+        self._series: OrderedDict[tuple[str, str], StreamingIndicators] = OrderedDict()
+        # Длина окна последнего update() по ряду - для on_bar
+        self._windows: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"incremental": 0, "rebuilds": 0, "bars_pushed": 0}
+
+    def _state(self, key: tuple[str, str]) -> Optional[StreamingIndicators]:
+        with self._lock:
+            state = self._series.get(key)
+            if state is not None:
+                self._series.move_to_end(key)
+            return state
+
+    def _store(self, key: tuple[str, str], state: StreamingIndicators):
+        with self._lock:
+            self._series[key] = state
+            self._series.move_to_end(key)
+            while len(self._series) > self.max_series:
+                evicted, _ = self._series.popitem(last=False)
+                self._windows.pop(evicted, None)
+
+    def update(
+        self,
+        symbol: str,
+        timeframe: str,
+        df: pd.DataFrame,
+        last_is_open: bool = True,
+    ) -> tuple[Optional[dict[str, float]], Optional[dict[str, float]]]:
+        """
+        Обновить ряд свечами из df.
+
+        Args:
+            symbol: Торговая пара
+            timeframe: Таймфрейм
+            df: OHLCV свечи по возрастанию времени
+            last_is_open: Последняя свеча ещё формируется
+
+        Returns:
+            (индикаторы последней свечи, индикаторы предпоследней)
+        """
+        if df is None or len(df) == 0:
+            return None, None
+
+        key = (symbol, timeframe)
+        bars = _Bars(df)
+        closed = len(bars) - 1 if last_is_open else len(bars)
+        state = self._state(key)
+
+        start = 0
+        if state is not None:
+            pos = int(np.searchsorted(bars.timestamp, state.last_timestamp)) if state.bars else -1
+            # Номер первой свечи df в нумерации состояния
+            first = state.bars - 1 - pos
+            if (
+                0 <= pos < closed
+                and bars.timestamp[pos] == state.last_timestamp
+                and bars.columns[3][pos] == state.last_close
+                and first >= state.first_bar
+            ):
+                start = pos + 1
+                state.set_anchor(first)
+                self.stats["incremental"] += 1
+            else:
+                state = None
+        if state is None:
+            state = StreamingIndicators(self.config)
+            self.stats["rebuilds"] += 1
+
+        for i in range(start, closed):
+            state.push(bars[i])
+        self.stats["bars_pushed"] += max(closed - start, 0)
+        self._store(key, state)
+        with self._lock:
+            self._windows[key] = len(bars)
+
+        if last_is_open:
+            return state.peek(bars[len(bars) - 1]), state.last
+        return state.last, state.prior
+
+    def on_bar(self, symbol: str, timeframe: str, bar: dict[str, Any], closed: bool = True) -> Optional[dict[str, float]]:
+        """
+        Обновить ряд одной свечой (например из LiveCandleBuilder).
+
+        Закрытая свеча новее последней учтённой фиксируется, формирующаяся
+        считается через peek(). Ряд должен быть прогрет через update();
+        окно EMA/MACD сдвигается так, чтобы его длина оставалась как у
+        последнего update() (как при повторной загрузке того же числа свечей).
+        """
+        key = (symbol, timeframe)
+        state = self._state(key)
+        if state is None:
+            return None
+        if closed and state.last_timestamp is not None and bar["timestamp"] <= state.last_timestamp:
+            return state.last
+
+        window = self._windows.get(key)
+        if window is not None:
+            # Окно заканчивается формирующейся свечой: после закрытой - следующей
+            end = state.bars + 1 if closed else state.bars
+            state.set_anchor(max(state.anchor, end - window + 1))
+        if closed:
+            self.stats["bars_pushed"] += 1
+            return state.push(bar)
+        return state.peek(bar)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Статистика: инкрементальные обновления, перестроения, ряды в памяти."""
+        return {**self.stats, "series": len(self._series)}
@@ -5,10 +5,15 @@ Selects top pairs by aggregated volume across multiple exchanges (Binance, Bybit
 Ensures pairs are available on at least 2 out of 3 exchanges for reliability.
 """
 
+import json
 import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-from collections import defaultdict
 import numpy as np
 
 from utils.exchange_manager import ExchangeManager
@@ -16,17 +21,67 @@ from utils.logger_config import setup_logging
 
 logger = setup_logging()
 
+DEFAULT_UNIVERSE_PATH = Path(__file__).parent.parent / "data" / "cache" / "universe.json"
+
+
+@dataclass
+class TickerMatrix:
+    """
+    Columnar view of tickers: rows are symbols, columns are exchanges.
+
+    Missing (or zero) volume/price cells are NaN.
+    """
+
+    symbols: np.ndarray
+    exchanges: List[str]
+    volumes: np.ndarray
+    prices: np.ndarray
+
+    @classmethod
+    def from_tickers(
+        cls,
+        all_tickers: Dict[str, Dict[str, Dict]],
+        excluded_bases: frozenset = frozenset(),
+    ) -> "TickerMatrix":
+        """
+        Build the matrices from Dict[exchange_id, Dict[symbol, ticker]].
+        """
+        exchanges = list(all_tickers)
+        rows: Dict[str, int] = {}
+        cells: List[Tuple[int, int, float, float]] = []
+
+        for col, tickers in enumerate(all_tickers.values()):
+            for symbol, ticker in tickers.items():
+                if symbol.split("/")[0] in excluded_bases:
+                    continue
+                volume = ticker.get("quoteVolume", 0) or 0
+                price = ticker.get("last", 0) or 0
+                if volume > 0 and price > 0:
+                    row = rows.setdefault(symbol, len(rows))
+                    cells.append((row, col, volume, price))
+
+        volumes = np.full((len(rows), len(exchanges)), np.nan)
+        prices = np.full((len(rows), len(exchanges)), np.nan)
+        if cells:
+            r, c, v, p = (np.array(x) for x in zip(*cells))
+            r, c = r.astype(np.intp), c.astype(np.intp)
+            volumes[r, c] = v
+            prices[r, c] = p
+
+        return cls(np.array(list(rows), dtype=object), exchanges, volumes, prices)
+
 
 class UniverseSelector:
     """
     Selects top trading pairs by aggregated volume across multiple exchanges.
     
     Features:
-    - Fetches tickers from Binance, Bybit, OKX
-    - Aggregates volume using median (robust to outliers)
+    - Fetches tickers from Binance, Bybit, OKX concurrently
+    - Aggregates volume using median (robust to outliers) on symbol x exchange matrices
     - Filters pairs available on at least min_exchanges
     - Returns top-N pairs sorted by volume
-    - Caches results for performance
+    - Caches results for performance and persists the ranking across restarts
+    - Re-ranks only when volumes change materially
     """
     
     # Target exchanges for multi-exchange strategy
@@ -47,6 +102,9 @@ class UniverseSelector:
         exchange_manager: Optional[ExchangeManager] = None,
         min_exchanges: int = 2,
         cache_ttl_minutes: int = 30,
+        cache_path: Optional[str] = None,
+        rerank_threshold: float = 0.10,
+        max_stale_hours: float = 24,
     ):
         """
         Initialize Universe Selector.
@@ -55,49 +113,65 @@ class UniverseSelector:
             exchange_manager: ExchangeManager instance (creates new if None)
             min_exchanges: Minimum number of exchanges where pair must be available
             cache_ttl_minutes: Cache TTL in minutes
+            cache_path: JSON file with the persisted ranking (None = data/cache/universe.json)
+            rerank_threshold: Relative change of any median volume (or a change of
+                the eligible set) that triggers a new ranking
+            max_stale_hours: An expired universe younger than this is returned
+                immediately while it is refreshed in the background
         """
         self.exchange_manager = exchange_manager or ExchangeManager()
         self.min_exchanges = min_exchanges
         self.cache_ttl = timedelta(minutes=cache_ttl_minutes)
+        self.cache_path = Path(cache_path) if cache_path else DEFAULT_UNIVERSE_PATH
+        self.rerank_threshold = rerank_threshold
+        self.max_stale = timedelta(hours=max_stale_hours)
         
         # Cache
         self._cached_universe: List[Dict] = []
+        self._by_symbol: Dict[str, Dict] = {}
+        # Median volumes at the last re-rank: the baseline for rerank_threshold
+        self._ranked_volumes: Dict[str, float] = {}
         self._cache_time: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.stats = {"refreshes": 0, "reranks": 0, "skipped_reranks": 0, "background_refreshes": 0}
+        self._load_universe()
+    
+    def _fetch_exchange_tickers(self, exchange_id: str) -> Dict[str, Dict]:
+        """Fetch USDT tickers from one exchange (empty dict on failure)."""
+        try:
+            exchange = self.exchange_manager.get_exchange_instance(exchange_id)
+            if not exchange:
+                logger.warning(f"Exchange {exchange_id} not available")
+                return {}
+            
+            # Fetch all tickers at once (more efficient)
+            tickers = exchange.fetch_tickers()
+            
+            # Filter USDT pairs only
+            usdt_tickers = {
+                symbol: ticker
+                for symbol, ticker in tickers.items()
+                if symbol.endswith("/USDT") and ticker.get("quoteVolume")
+            }
+            
+            logger.info(f"Fetched {len(usdt_tickers)} USDT tickers from {exchange_id}")
+            return usdt_tickers
+            
+        except Exception as e:
+            logger.error(f"Failed to fetch tickers from {exchange_id}: {e}")
+            return {}
     
     def _fetch_all_tickers(self) -> Dict[str, Dict[str, Dict]]:
         """
-        Fetch tickers from all target exchanges.
+        Fetch tickers from all target exchanges concurrently.
         
         Returns:
             Dict[exchange_id, Dict[symbol, ticker_data]]
         """
-        all_tickers = {}
-        
-        for exchange_id in self.TARGET_EXCHANGES:
-            try:
-                exchange = self.exchange_manager.get_exchange_instance(exchange_id)
-                if not exchange:
-                    logger.warning(f"Exchange {exchange_id} not available")
-                    continue
-                
-                # Fetch all tickers at once (more efficient)
-                tickers = exchange.fetch_tickers()
-                
-                # Filter USDT pairs only
-                usdt_tickers = {
-                    symbol: ticker
-                    for symbol, ticker in tickers.items()
-                    if symbol.endswith("/USDT") and ticker.get("quoteVolume")
-                }
-                
-                all_tickers[exchange_id] = usdt_tickers
-                logger.info(f"Fetched {len(usdt_tickers)} USDT tickers from {exchange_id}")
-                
-            except Exception as e:
-                logger.error(f"Failed to fetch tickers from {exchange_id}: {e}")
-                all_tickers[exchange_id] = {}
-        
-        return all_tickers
+        with ThreadPoolExecutor(max_workers=len(self.TARGET_EXCHANGES), thread_name_prefix="universe") as pool:
+            results = pool.map(self._fetch_exchange_tickers, self.TARGET_EXCHANGES)
+            return dict(zip(self.TARGET_EXCHANGES, results))
     
     def _aggregate_volumes(
         self, 
@@ -114,68 +188,151 @@ class UniverseSelector:
         Returns:
             Dict[symbol, {volume, exchanges, prices, best_exchange}]
         """
-        # Collect data per symbol
-        symbol_data = defaultdict(lambda: {
-            "volumes": [],
-            "prices": [],
-            "exchanges": [],
-            "tickers": {},
-        })
+        matrix = TickerMatrix.from_tickers(all_tickers, frozenset(self.EXCLUDED_BASES))
+        volumes, prices = matrix.volumes, matrix.prices
+        listed = ~np.isnan(volumes)
+        exchange_count = listed.sum(axis=1)
         
-        for exchange_id, tickers in all_tickers.items():
-            for symbol, ticker in tickers.items():
-                # Extract base currency
-                base = symbol.split("/")[0]
-                
-                # Skip excluded tokens
-                if base in self.EXCLUDED_BASES:
-                    continue
-                
-                volume = ticker.get("quoteVolume", 0) or 0
-                price = ticker.get("last", 0) or 0
-                
-                if volume > 0 and price > 0:
-                    symbol_data[symbol]["volumes"].append(volume)
-                    symbol_data[symbol]["prices"].append(price)
-                    symbol_data[symbol]["exchanges"].append(exchange_id)
-                    symbol_data[symbol]["tickers"][exchange_id] = ticker
+        # Median over the exchanges listing the pair (robust to outliers)
+        eligible = exchange_count >= max(self.min_exchanges, 1)
+        median_volume = np.full(len(matrix.symbols), np.nan)
+        median_price = np.full(len(matrix.symbols), np.nan)
+        if eligible.any():
+            median_volume[eligible] = np.nanmedian(volumes[eligible], axis=1)
+            median_price[eligible] = np.nanmedian(prices[eligible], axis=1)
         
-        # Aggregate
-        aggregated = {}
+        # Skip low volume pairs
+        keep = np.flatnonzero(eligible & (median_volume >= self.MIN_VOLUME_USD))
         
-        for symbol, data in symbol_data.items():
-            if len(data["exchanges"]) < self.min_exchanges:
-                continue
-            
-            volumes = data["volumes"]
-            prices = data["prices"]
-            
-            # Use median for robustness
-            median_volume = float(np.median(volumes))
-            median_price = float(np.median(prices))
-            
-            # Skip low volume pairs
-            if median_volume < self.MIN_VOLUME_USD:
-                continue
-            
-            # Find best exchange (highest volume)
-            best_idx = np.argmax(volumes)
-            best_exchange = data["exchanges"][best_idx]
-            
+        # Best exchange = highest volume (first one on ties)
+        best = np.argmax(np.where(listed, volumes, -np.inf), axis=1)
+        total_volume = np.nansum(volumes, axis=1)
+        
+        aggregated = {}
+        for i in keep:
+            cols = np.flatnonzero(listed[i])
+            exchanges = [matrix.exchanges[c] for c in cols]
+            symbol = matrix.symbols[i]
             aggregated[symbol] = {
                 "symbol": symbol,
-                "median_volume": median_volume,
-                "median_price": median_price,
-                "total_volume": sum(volumes),
-                "exchange_count": len(data["exchanges"]),
-                "exchanges": data["exchanges"],
-                "best_exchange": best_exchange,
-                "volumes_by_exchange": dict(zip(data["exchanges"], volumes)),
-                "prices_by_exchange": dict(zip(data["exchanges"], prices)),
+                "median_volume": float(median_volume[i]),
+                "median_price": float(median_price[i]),
+                "total_volume": float(total_volume[i]),
+                "exchange_count": int(exchange_count[i]),
+                "exchanges": exchanges,
+                "best_exchange": matrix.exchanges[best[i]],
+                "volumes_by_exchange": dict(zip(exchanges, volumes[i, cols].tolist())),
+                "prices_by_exchange": dict(zip(exchanges, prices[i, cols].tolist())),
             }
         
         return aggregated
     
+    def _ranking_changed(self, aggregated: Dict[str, Dict]) -> bool:
+        """
+        Check whether new volumes differ materially from the cached ranking.
+        
+        The ranking is kept when the set of eligible pairs is the same and no
+        median volume moved by more than rerank_threshold.
+        """
+        if not self._cached_universe or set(aggregated) != set(self._ranked_volumes):
+            return True
+        
+        symbols = list(aggregated)
+        new = np.array([aggregated[s]["median_volume"] for s in symbols])
+        old = np.array([self._ranked_volumes[s] for s in symbols])
+        return bool(np.any(np.abs(new - old) > self.rerank_threshold * old))
+    
+    def _set_universe(self, pairs: List[Dict], cache_time: datetime, reranked: bool = True):
+        self._cached_universe = pairs
+        self._by_symbol = {p["symbol"]: p for p in pairs}
+        if reranked:
+            self._ranked_volumes = {p["symbol"]: p["median_volume"] for p in pairs}
+        self._cache_time = cache_time
+    
+    def _load_universe(self):
+        """Restore the persisted ranking so restarts do not block on exchanges."""
+        try:
+            payload = json.loads(self.cache_path.read_text())
+            pairs = payload["universe"]
+            saved_at = datetime.fromtimestamp(payload["saved_at"])
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring corrupted universe cache {self.cache_path}: {e}")
+            return
+        if pairs:
+            self._set_universe(pairs, saved_at)
+            logger.info(f"Loaded universe of {len(pairs)} pairs from {self.cache_path}")
+    
+    def _save_universe(self):
+        """Persist the ranking atomically."""
+        payload = {
+            "saved_at": self._cache_time.timestamp(),
+            "exchanges": self.TARGET_EXCHANGES,
+            "universe": self._cached_universe,
+        }
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(payload))
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Failed to save universe cache: {e}")
+    
+    def refresh(self) -> List[Dict]:
+        """
+        Fetch tickers and update the ranking if volumes changed materially.
+        
+        Returns:
+            Full ranked universe
+        """
+        all_tickers = self._fetch_all_tickers()
+        aggregated = self._aggregate_volumes(all_tickers)
+        self.stats["refreshes"] += 1
+        
+        with self._lock:
+            if not aggregated and self._cached_universe:
+                logger.warning("No tickers fetched, keeping previous universe")
+                return self._cached_universe
+            
+            reranked = self._ranking_changed(aggregated)
+            if reranked:
+                # Sort by median volume descending
+                sorted_pairs = sorted(
+                    aggregated.values(),
+                    key=lambda x: x["median_volume"],
+                    reverse=True,
+                )
+                self.stats["reranks"] += 1
+            else:
+                # Keep the order, but prices, volumes and best exchanges are fresh
+                sorted_pairs = [aggregated[p["symbol"]] for p in self._cached_universe]
+                self.stats["skipped_reranks"] += 1
+                logger.debug("Volumes changed less than threshold, keeping ranking")
+            
+            self._set_universe(sorted_pairs, datetime.now(), reranked)
+            self._save_universe()
+        
+        logger.info(f"Universe refreshed: {len(sorted_pairs)} pairs total")
+        return sorted_pairs
+    
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        
+        def run():
+            try:
+                self.refresh()
+                self.stats["background_refreshes"] += 1
+            except Exception as e:
+                logger.error(f"Background universe refresh failed: {e}")
+            finally:
+                self._refreshing = False
+        
+        threading.Thread(target=run, name="universe-refresh", daemon=True).start()
+    
     def get_top_pairs(
         self,
         n: int = 20,
@@ -193,28 +350,17 @@ class UniverseSelector:
         """
         # Check cache
         if not force_refresh and self._cached_universe and self._cache_time:
-            if datetime.now() - self._cache_time < self.cache_ttl:
+            age = datetime.now() - self._cache_time
+            if age < self.cache_ttl:
                 logger.debug("Returning cached universe")
                 return self._cached_universe[:n]
+            if age < self.max_stale:
+                # Do not block callers (bot pair selection) on the exchanges
+                self._refresh_in_background()
+                return self._cached_universe[:n]
         
         logger.info(f"Refreshing universe (top-{n} pairs across {self.TARGET_EXCHANGES})")
-        
-        # Fetch and aggregate
-        all_tickers = self._fetch_all_tickers()
-        aggregated = self._aggregate_volumes(all_tickers)
-        
-        # Sort by median volume descending
-        sorted_pairs = sorted(
-            aggregated.values(),
-            key=lambda x: x["median_volume"],
-            reverse=True,
-        )
-        
-        # Cache results
-        self._cached_universe = sorted_pairs
-        self._cache_time = datetime.now()
-        
-        logger.info(f"Universe refreshed: {len(sorted_pairs)} pairs total, returning top {n}")
+        sorted_pairs = self.refresh()
         
         # Log top pairs for debugging
         for i, pair in enumerate(sorted_pairs[:n], 1):
@@ -251,10 +397,9 @@ class UniverseSelector:
             Exchange ID (defaults to 'binance' if not found)
         """
         # Use cached data if available
-        if self._cached_universe:
-            for pair in self._cached_universe:
-                if pair["symbol"] == symbol:
-                    return pair["best_exchange"]
+        pair = self._by_symbol.get(symbol)
+        if pair:
+            return pair["best_exchange"]
         
         # Fallback to binance
         return "binance"
@@ -269,10 +414,9 @@ class UniverseSelector:
         Returns:
             List of exchange IDs
         """
-        if self._cached_universe:
-            for pair in self._cached_universe:
-                if pair["symbol"] == symbol:
-                    return pair["exchanges"]
+        pair = self._by_symbol.get(symbol)
+        if pair:
+            return pair["exchanges"]
         
         return ["binance"]  # Fallback
     
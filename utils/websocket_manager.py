@@ -100,6 +100,36 @@ class WebSocketManager:
         self.subscribers[symbol].append(callback)
         logger.debug("Подписка на %s добавлена", symbol)
 
+    def subscribe_trades(self, symbol: str, callback: Callable[[dict[str, Any]], None]):
+        """
+        Подписаться на поток сделок символа.
+
+        Args:
+            symbol: Торговая пара (например, 'BTC/USDT')
+            callback: Функция для обработки сделок
+        """
+        if not self.is_available or not self.stream:
+            logger.warning("WebSocket недоступен для подписки на сделки %s", symbol)
+            return
+
+        self.stream.subscribe_trades(symbol, callback)
+        logger.debug("Подписка на сделки %s добавлена", symbol)
+
+    def stream_candles(self, builder: Any, symbols: list[str], use_trades: bool = True):
+        """
+        Подать события символов в LiveCandleBuilder.
+
+        Args:
+            builder: utils.candle_builder.LiveCandleBuilder
+            symbols: Торговые пары
+            use_trades: Строить свечи из сделок (точный объём); False - из тикеров
+        """
+        for symbol in symbols:
+            if use_trades:
+                self.subscribe_trades(symbol, builder.handle_update)
+            else:
+                self.subscribe(symbol, builder.handle_update)
+
     def unsubscribe(self, symbol: str, callback: Optional[Callable] = None):
         """
         Отписаться от обновлений для символа.
@@ -32,7 +32,9 @@ try:
     from dash import Input, Output, dcc, html, dash_table
     from plotly.subplots import make_subplots
 
+    from utils.candle_builder import LiveCandleBuilder
     from utils.market_data_manager import MarketDataManager
+    from utils.websocket_manager import get_websocket_manager
     from utils.signal_generator import SignalGenerator
     from utils.signal_scanner import SignalScanner, get_scanner
     from utils.logger_config import setup_logging
@@ -40,8 +42,15 @@ try:
     HAS_DEPS = True
     logger = setup_logging()
 
-    # Инициализация менеджеров
-    data_manager = MarketDataManager()
+    # Инициализация менеджеров: истёкший кэш отдаётся сразу и обновляется в фоне,
+    # открытый график обновляется по закрытию свечи
+    data_manager = MarketDataManager(stale_while_revalidate=True)
+    data_manager.start_prefetch(symbols=[], timeframes=())
+    # Последняя свеча открытого графика - из потока сделок Binance, без REST
+    ws_manager = get_websocket_manager("binance")
+    if ws_manager.is_available:
+        data_manager.attach_candle_builder(LiveCandleBuilder(), ws_manager=ws_manager, symbols=[])
+        ws_manager.start()
     signal_generator = SignalGenerator(data_manager=data_manager)
     signal_scanner = SignalScanner(data_manager=data_manager)  # Независимый сканер
 
@@ -586,6 +595,8 @@ def create_simple_app():
             
             # Получаем данные
             try:
+                data_manager.prefetch_scheduler.subscribe(symbol, timeframe, limit=200)
+                data_manager.subscribe_live_candles(symbol)
                 df = data_manager.get_ohlcv(
                     symbol=symbol, 
                     timeframe=timeframe, 
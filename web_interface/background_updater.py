@@ -145,11 +145,17 @@ def fetch_crypto_data() -> List[Dict[str, Any]]:
         data = []
 
         # Get market overview from CoinGecko
-        overview = provider.get_market_overview()
+        overview = provider.get_market_overview(limit=50)
         crypto_markets = overview.get("crypto_markets", [])
 
+        # Monitored coins outside the top 50: one batched request for all of them
+        listed = {coin.get("symbol", "").upper() for coin in crypto_markets}
+        missing = [symbol for symbol in TOP_COINS if symbol not in listed]
+        if crypto_markets and missing:
+            crypto_markets = crypto_markets + provider.get_crypto_markets(missing)
+
         if crypto_markets:
-            for coin in crypto_markets[:50]:  # Top 50
+            for coin in crypto_markets:
                 try:
                     symbol = coin.get("symbol", "").upper()
                     price = coin.get("current_price", 0)
@@ -251,15 +251,20 @@ def calculate_macd(close: pd.Series) -> tuple:
     return macd_line.iloc[-1], signal_line.iloc[-1], histogram.iloc[-1]
 
 
-def get_enhanced_signal(ticker: dict, ohlcv_data: pd.DataFrame = None) -> tuple:
+def get_enhanced_signal(
+    ticker: dict, ohlcv_data: pd.DataFrame = None, symbol: str = None, timeframe: str = None
+) -> tuple:
     """
     Enhanced signal generation using EnhancedSignalGenerator.
     Includes validation for better signal quality.
+    Indicators are memoized per candle when symbol and timeframe are given.
     
     Returns (signal, score, details)
     """
     # Use the new enhanced signal generator
-    signal, confidence, reasons = signal_generator.generate_signal(ticker, ohlcv_data)
+    signal, confidence, reasons = signal_generator.generate_signal(
+        ticker, ohlcv_data, symbol=symbol, timeframe=timeframe
+    )
     
     # Optional: Apply additional validation if needed
     # (SignalDirection and signal_validator logic can be added here if required)
@@ -510,7 +515,7 @@ def get_market_data():
                 ohlcv_df = None
             
             # Calculate enhanced signal
-            signal, signal_score, reasons = get_enhanced_signal(ticker, ohlcv_df)
+            signal, signal_score, reasons = get_enhanced_signal(ticker, ohlcv_df, f"{exchange.id}:{symbol}", '15m')
             
             data.append({
                 'symbol': symbol.replace('/USDT', ''),
@@ -12,9 +12,13 @@ import threading
 from datetime import datetime
 from typing import Callable, Optional
 
-import ccxt
 import websocket
 
+from utils.lazy_import import lazy_import
+
+# ccxt нужен только для fallback-потока через REST
+ccxt = lazy_import("ccxt")
+
 logger = logging.getLogger(__name__)
 
 
@@ -41,6 +45,7 @@ class WebSocketPriceStream:
         self.is_connected = False
         self.subscribers: list[str] = []  # Список торговых пар
         self.callbacks: dict[str, list[Callable]] = {}  # Callback функции по парам
+        self.trade_callbacks: dict[str, list[Callable]] = {}  # Callback функции сделок по парам
         self.running = False
         self.thread: Optional[threading.Thread] = None
 
@@ -93,14 +98,58 @@ class WebSocketPriceStream:
         if self.running and self.is_connected:
             self._subscribe_to_symbols()
 
+    def subscribe_trades(self, symbol: str, callback: Callable):
+        """
+        Подписка на поток сделок торговой пары (Binance aggTrade).
+
+        Args:
+            symbol: Торговая пара (например, 'BTC/USDT')
+            callback: Получает dict с type="trade", price, amount и
+                timestamp (время сделки в мс)
+        """
+        self.trade_callbacks.setdefault(symbol, []).append(callback)
+        logger.info(f"Подписка на сделки {symbol} добавлена")
+
+        if self.running and self.is_connected:
+            self._subscribe_to_symbols()
+
     def unsubscribe(self, symbol: str):
         """Отписка от обновлений для торговой пары."""
         if symbol in self.subscribers:
             self.subscribers.remove(symbol)
         if symbol in self.callbacks:
             del self.callbacks[symbol]
+        self.trade_callbacks.pop(symbol, None)
         logger.info(f"Отписка от {symbol}")
 
+    def _stream_names(self) -> list[str]:
+        """Имена Binance streams для всех подписок."""
+        streams = [f"{symbol.replace('/', '').lower()}@ticker" for symbol in self.subscribers]
+        streams += [f"{symbol.replace('/', '').lower()}@aggTrade" for symbol in self.trade_callbacks]
+        return streams
+
+    def _subscribe_to_symbols(self):
+        """Добавить новые пары в уже открытое соединение (Binance SUBSCRIBE)."""
+        if self.exchange_name != "binance" or not self.ws:
+            return
+        try:
+            self.ws.send(json.dumps({"method": "SUBSCRIBE", "params": self._stream_names(), "id": 1}))
+        except Exception as e:
+            logger.error(f"Ошибка подписки на новые пары: {e}")
+
+    @staticmethod
+    def _format_symbol(symbol: str) -> str:
+        """BTCUSDT -> BTC/USDT."""
+        return f"{symbol[:-4]}/{symbol[-4:]}"
+
+    def _dispatch(self, callbacks: dict[str, list[Callable]], symbol: str, update: dict):
+        """Вызвать callbacks пары."""
+        for callback in callbacks.get(symbol, ()):
+            try:
+                callback(update)
+            except Exception as e:
+                logger.error(f"Ошибка в callback для {symbol}: {e}")
+
     def _run(self):
         """Основной цикл WebSocket connection."""
         if self.exchange_name == "binance":
@@ -113,18 +162,32 @@ class WebSocketPriceStream:
         """WebSocket stream для Binance."""
         try:
             # Binance комбинированный stream URL
-            streams = [f"{symbol.replace('/', '').lower()}@ticker" for symbol in self.subscribers]
-            stream_names = "/".join(streams)
+            stream_names = "/".join(self._stream_names())
             url = f"wss://stream.binance.com:9443/stream?streams={stream_names}"
 
             def on_message(ws, message):
                 try:
                     data = json.loads(message)
-                    if "data" in data:
+                    if "data" in data and data["data"].get("e") == "aggTrade":
+                        trade = data["data"]
+                        formatted_symbol = self._format_symbol(trade["s"])
+                        self._dispatch(
+                            self.trade_callbacks,
+                            formatted_symbol,
+                            {
+                                "type": "trade",
+                                "symbol": formatted_symbol,
+                                "price": float(trade["p"]),
+                                "amount": float(trade["q"]),
+                                "timestamp": int(trade["T"]),  # Trade time, ms
+                                "exchange": self.exchange_name,
+                            },
+                        )
+                    elif "data" in data:
                         ticker_data = data["data"]
                         symbol = ticker_data["s"]  # Symbol from Binance
                         # Конвертируем в формат 'BTC/USDT'
-                        formatted_symbol = f"{symbol[:-4]}/{symbol[-4:]}"
+                        formatted_symbol = self._format_symbol(symbol)
 
                         price_update = {
                             "symbol": formatted_symbol,
@@ -134,16 +197,12 @@ class WebSocketPriceStream:
                             "high_24h": float(ticker_data["h"]),
                             "low_24h": float(ticker_data["l"]),
                             "timestamp": datetime.now().isoformat(),
+                            "event_time": int(ticker_data["E"]),  # Event time, ms
                             "exchange": self.exchange_name,
                         }
 
                         # Вызываем все callbacks для этого символа
-                        if formatted_symbol in self.callbacks:
-                            for callback in self.callbacks[formatted_symbol]:
-                                try:
-                                    callback(price_update)
-                                except Exception as e:
-                                    logger.error(f"Ошибка в callback для {formatted_symbol}: {e}")
+                        self._dispatch(self.callbacks, formatted_symbol, price_update)
 
                 except Exception as e:
                     logger.error(f"Ошибка обработки сообщения: {e}")
@@ -165,6 +224,9 @@ class WebSocketPriceStream:
             def on_open(ws):
                 logger.info("WebSocket соединение открыто")
                 self.is_connected = True
+                # Пары, подписанные пока соединение устанавливалось, не попали в URL
+                if self._stream_names() and stream_names != "/".join(self._stream_names()):
+                    self._subscribe_to_symbols()
 
             self.ws = websocket.WebSocketApp(
                 url, on_message=on_message, on_error=on_error, on_close=on_close, on_open=on_open
@@ -221,6 +283,23 @@ class WebSocketPriceStream:
                                     except Exception as e:
                                         logger.error(f"Ошибка в callback: {e}")
 
+                        for symbol in list(self.trade_callbacks):
+                            if not hasattr(self.exchange, "watch_trades"):
+                                break
+                            for trade in await self.exchange.watch_trades(symbol):
+                                self._dispatch(
+                                    self.trade_callbacks,
+                                    symbol,
+                                    {
+                                        "type": "trade",
+                                        "symbol": symbol,
+                                        "price": trade["price"],
+                                        "amount": trade.get("amount") or 0.0,
+                                        "timestamp": trade["timestamp"],
+                                        "exchange": self.exchange_name,
+                                    },
+                                )
+
                         await asyncio.sleep(1)
 
                     except Exception as e: